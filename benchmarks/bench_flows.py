@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the flow evaluation hot path (check_flow_match, calculate_mbps,
+Analyzer.run_analysis and Analyzer.query_flows).
+
+Flows come from the PCE simulator's generator (mixed interval/total byte
+counters, labelled workloads, unmanaged IPs with IP lists, timestamp ranges),
+decoded into FlowRecords once, as ApiClient does.
+At most --pool distinct flows are generated; larger runs cycle through them,
+so a 1M-flow run does not need 1M flow dicts in memory. Each rule count N
+means N rules of every type (traffic, bandwidth, volume) with a mix of port,
+protocol, policy decision, label and IP filters.
+
+Each case runs at least --repeat times and for at least --min-time seconds;
+the fastest run is reported, so a few-millisecond case is not judged on a
+single timer reading. Reported per case: flows/s of that run and the peak RSS
+of the process so far; with --alloc also the peak tracemalloc allocation of
+one more, traced run (tracing slows the hot path down by an order of
+magnitude, so it is opt-in).
+
+Usage (from the project root):
+    python benchmarks/bench_flows.py                                  # 10k flows, 1/10 rules
+    python benchmarks/bench_flows.py --sizes 10000,100000,1000000 --rules 1,10,100
+    python benchmarks/bench_flows.py --alloc --output results.json
+    python benchmarks/bench_flows.py --save-baseline benchmarks/baseline_flows.json
+    python benchmarks/bench_flows.py --baseline benchmarks/baseline_flows.json --threshold 0.15
+
+With --baseline, a case whose flows/s fell by more than --threshold (default
+0.20) is reported as a regression and the exit code is 1. Cases whose best run
+took less than MIN_COMPARE_SECONDS are listed but not judged.
+"""
+import gc
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime
+import platform
+import itertools
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analyzer import Analyzer  # noqa: E402
+from src.flow_record import FlowRecord, SymbolTable  # noqa: E402
+from benchmarks.pce_simulator import Inventory, SIM_DEFAULTS  # noqa: E402
+
+BENCHES = ("check_flow_match", "calculate_mbps", "run_analysis", "query_flows")
+DEFAULT_POOL = 50000
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_REPEAT = 3
+DEFAULT_MIN_TIME = 0.5  # seconds spent per case, at least
+MIN_COMPARE_SECONDS = 0.01  # faster runs are timer noise, not a regression signal
+RULE_TYPES = ("traffic", "bandwidth", "volume")
+WINDOW_MINUTES = 10
+
+
+class _Config:
+    def __init__(self, rules):
+        self.config = {"settings": {"enable_health_check": False}, "alerts": {}, "rules": rules}
+
+
+class _Api:
+    """Feeds a fixed flow sequence to the Analyzer in place of ApiClient."""
+
+    def __init__(self, flows_fn):
+        self.flows_fn = flows_fn
+
+    def fetch_events(self, *args, **kwargs):
+        return []
+
+    def execute_traffic_query_stream(self, *args, **kwargs):
+        return self.flows_fn()
+
+
+class _Reporter:
+    def __init__(self):
+        self.alerts = 0
+
+    def _add(self, alert):
+        self.alerts += 1
+
+    add_health_alert = add_event_alert = add_traffic_alert = add_metric_alert = _add
+
+
+class _BenchAnalyzer(Analyzer):
+    """Analyzer without state.json I/O."""
+
+    def load_state(self):
+        pass
+
+    def save_state(self):
+        pass
+
+
+def make_rules(per_type: int) -> list:
+    filters = [
+        {},
+        {"port": 443},
+        {"pd": 2},
+        {"src_label": "role=role-01"},
+        {"dst_label": "env=env-00", "ex_port": 22},
+        {"proto": 17},
+        {"dst_ip_in": "Any (0.0.0.0/0 and ::/0)"},
+        {"ex_src_label": "loc=loc-02", "pd": 1},
+    ]
+    thresholds = {"traffic": 50, "bandwidth": 5, "volume": 100}
+    rules = []
+    for rtype in RULE_TYPES:
+        for i in range(per_type):
+            rule = {"id": f"{rtype}-{i}", "name": f"{rtype} {i}", "type": rtype, "pd": -1,
+                    "threshold_count": thresholds[rtype], "threshold_window": WINDOW_MINUTES,
+                    "cooldown_minutes": 0}
+            rule.update(filters[i % len(filters)])
+            rules.append(rule)
+    return rules
+
+
+def rss_peak_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def build_cases(pool: list, n: int, rules: list) -> dict:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = now - datetime.timedelta(minutes=WINDOW_MINUTES + 2)
+    start_str = start.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def flows():
+        return itertools.islice(itertools.cycle(pool), n)
+
+    cm = _Config(rules)
+    analyzer = _BenchAnalyzer(cm, _Api(flows), _Reporter())
+    limit = now - datetime.timedelta(minutes=WINDOW_MINUTES)
+
+    def check_flow_match():
+        match = analyzer.check_flow_match
+        for f in flows():
+            for r in rules:
+                match(r, f, limit)
+
+    def calculate_mbps():
+        calc = analyzer.calculate_mbps
+        for f in flows():
+            calc(f)
+
+    def run_analysis():
+        analyzer.state["alert_history"] = {}
+        analyzer.state["alert_fingerprints"] = {}
+        analyzer.run_analysis()
+
+    def query_flows():
+        analyzer.query_flows({"start_time": start_str, "end_time": now.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                              "sort_by": "bandwidth", "port": 443})
+
+    return {"check_flow_match": check_flow_match, "calculate_mbps": calculate_mbps,
+            "run_analysis": run_analysis, "query_flows": query_flows}
+
+
+def measure(fn, trace_alloc: bool, repeat: int = DEFAULT_REPEAT, min_time: float = DEFAULT_MIN_TIME) -> dict:
+    with redirect_stdout(io.StringIO()):
+        runs = []
+        deadline = time.perf_counter() + min_time
+        while len(runs) < repeat or time.perf_counter() < deadline:
+            # As timeit does: a collection landing in one run is noise, not the code under test
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - started)
+            finally:
+                gc.enable()
+        seconds = min(runs)
+        alloc = None
+        if trace_alloc:
+            tracemalloc.start()
+            fn()
+            alloc = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+    return {"seconds": round(seconds, 4), "runs": len(runs), "alloc_peak_mb": None if alloc is None else round(alloc, 2),
+            "rss_peak_mb": round(rss_peak_mb(), 1)}
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    base = {(r["bench"], r["flows"], r["rules"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get((r["bench"], r["flows"], r["rules"]))
+        if not b or not b.get("flows_per_s"):
+            continue
+        if min(r["seconds"], b.get("seconds", 0)) < MIN_COMPARE_SECONDS:
+            r["change"] = None  # too short to judge
+            continue
+        r["baseline_flows_per_s"] = b["flows_per_s"]
+        r["change"] = round(r["flows_per_s"] / b["flows_per_s"] - 1, 3)
+        if r["change"] < -threshold:
+            regressions.append(r)
+    return regressions
+
+
+def _ints(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flow evaluation benchmark")
+    parser.add_argument("--sizes", type=_ints, default=[10000], help="comma-separated flow counts (default: 10000)")
+    parser.add_argument("--rules", type=_ints, default=[1, 10], help="comma-separated rules per type (default: 1,10)")
+    parser.add_argument("--bench", default=",".join(BENCHES), help=f"comma-separated subset of {','.join(BENCHES)}")
+    parser.add_argument("--pool", type=int, default=DEFAULT_POOL, help=f"distinct flows generated (default: {DEFAULT_POOL})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"minimum runs per case; the fastest is reported (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help=f"minimum seconds spent per case (default: {DEFAULT_MIN_TIME})")
+    parser.add_argument("--alloc", action="store_true", help="add a traced run measuring peak allocations")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", help="write results as the new baseline JSON")
+    parser.add_argument("--baseline", help="baseline JSON to compare flows/s against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed flows/s drop vs. baseline (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+    benches = [b for b in args.bench.split(",") if b in BENCHES]
+    logging.disable(logging.CRITICAL)  # "Alert triggered" warnings on every run
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    inventory = Inventory(dict(SIM_DEFAULTS))
+    started = time.perf_counter()
+    # Decoded into FlowRecords up front through one SymbolTable, as ApiClient does while downloading
+    symbols = SymbolTable()
+    pool = [FlowRecord(f, symbols) for f in inventory.flows(min(args.pool, max(args.sizes)),
+                                                   now - datetime.timedelta(minutes=WINDOW_MINUTES), now)]
+    print(f"generated {len(pool)} flows in {time.perf_counter() - started:.1f}s "
+          f"(rss {rss_peak_mb():.0f} MB)", file=sys.stderr)
+
+    results = []
+    print(f"{'bench':<18}{'flows':>9}{'rules':>7}{'seconds':>10}{'flows/s':>12}{'alloc MB':>10}{'rss MB':>9}")
+    for n in args.sizes:
+        for per_type in args.rules:
+            rules = make_rules(per_type)
+            cases = build_cases(pool, n, rules)
+            for bench in benches:
+                m = measure(cases[bench], args.alloc, max(args.repeat, 1), args.min_time)
+                row = dict(bench=bench, flows=n, rules=len(rules), **m)
+                row["flows_per_s"] = round(n / m["seconds"]) if m["seconds"] else None
+                results.append(row)
+                alloc = "-" if m["alloc_peak_mb"] is None else f"{m['alloc_peak_mb']:.1f}"
+                print(f"{bench:<18}{n:>9}{len(rules):>7}{m['seconds']:>10.3f}{row['flows_per_s'] or 0:>12}"
+                      f"{alloc:>10}{m['rss_peak_mb']:>9.0f}", flush=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['bench']} flows={r['flows']} rules={r['rules']}: "
+                  f"{r['flows_per_s']} flows/s vs. {r['baseline_flows_per_s']} ({r['change']:+.0%})")
+        skipped = [r for r in results if "change" in r and r["change"] is None]
+        if skipped:
+            print(f"{len(skipped)} case(s) under {MIN_COMPARE_SECONDS}s per run not compared")
+        if not regressions:
+            print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+    doc = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "date": now.strftime('%Y-%m-%dT%H:%M:%SZ'), "pool": len(pool)},
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(doc, f, indent=2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: render flow snapshot tables and the plain-text report.
+
+Usage (from the project root):
+    python benchmarks/bench_render.py               # 10,000-row snapshot, 5 runs
+    python benchmarks/bench_render.py --rows 50000 --runs 3
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import render  # noqa: E402
+
+LABELS = [{"key": k, "value": v} for k, v in
+          [("app", "shop"), ("app", "erp"), ("env", "prod"), ("env", "dev"), ("loc", "tpe"), ("role", "web"), ("role", "db")]]
+
+
+def make_flows(n: int, seed: int = 7) -> list:
+    rnd = random.Random(seed)
+    flows = []
+    for i in range(n):
+        flows.append({
+            "_metric_val": rnd.random() * 100,
+            "_metric_fmt": f"\x1b[92m{rnd.random() * 100:.2f} Mbps\x1b[0m (Interval)",
+            "timestamp_range": {"first_detected": "2024-05-01T10:00:00.000Z", "last_detected": "2024-05-01T10:09:59.000Z"},
+            "flow_direction": rnd.choice(["inbound", "outbound"]),
+            "src": {"ip": f"10.1.{i % 250}.{i % 200}",
+                    "workload": {"name": f"web-{i % 300:03d}", "labels": rnd.sample(LABELS, 3)}},
+            "dst": {"ip": f"10.2.{i % 250}.{i % 100}",
+                    "workload": {"hostname": f"db-{i % 50:02d}.corp.local", "labels": rnd.sample(LABELS, 2)}},
+            "service": {"port": rnd.choice([22, 443, 3306, 5432]), "proto": rnd.choice([6, 17])},
+            "num_connections": rnd.randint(1, 500),
+            "policy_decision": rnd.choice(["blocked", "potentially_blocked", "allowed"]),
+        })
+    return flows
+
+
+def make_alerts(flows: list) -> tuple:
+    traffic = [{"rule": f"Rule {i}", "count": str(i * 10), "criteria": "port 22",
+                "details": "web-001 -> db-01 [22]: 5<br>web-002 -> db-02 [22]: 3"} for i in range(len(flows) // 10)]
+    return [], [], traffic, []
+
+
+def timed(fn, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report rendering benchmark")
+    parser.add_argument("--rows", type=int, default=10000, help="flow rows per snapshot (default: 10000)")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions; the best run is reported (default: 5)")
+    args = parser.parse_args()
+
+    flows = make_flows(args.rows)
+    alerts = make_alerts(flows)
+
+    html_s = timed(lambda: render.snapshot_html(flows), args.runs)
+    text_s = timed(lambda: render.plain_text_report(*alerts, rule_label=lambda a: a["rule"]), args.runs)
+    size = len(render.snapshot_html(flows))
+    info = render.label_badge.cache_info()
+
+    print(f"snapshot_html      {args.rows:>8} rows  {html_s * 1000:9.1f} ms  "
+          f"{args.rows / html_s:>10.0f} rows/s  {size / 1024 / 1024:.1f} MB")
+    print(f"plain_text_report  {len(alerts[2]):>8} alerts {text_s * 1000:8.1f} ms")
+    print(f"label badge cache  hits={info.hits} misses={info.misses} size={info.currsize}")
+
+
+if __name__ == "__main__":
+    main()
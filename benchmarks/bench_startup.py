@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold-start import time of the entry points.
+
+Each case runs in a fresh interpreter (python -X importtime), so nothing is
+cached in sys.modules; .pyc files are warmed by one untimed run first. Reports
+the median total import time per case and the slowest modules of the last run.
+
+Usage (from the project root):
+    python benchmarks/bench_startup.py                 # 7 runs per case
+    python benchmarks/bench_startup.py --runs 15 --top 10 --output startup.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> code run in the fresh interpreter
+CASES = {
+    "entry (src.main)": "import src.main",
+    "monitor cycle": "import src.main, src.api_client, src.analyzer, src.dispatcher, src.coalescer",
+    "i18n first message": "from src.i18n import t; t('menu_debug_mode_title')",
+    "reporter": "import src.reporter",
+}
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(code: str) -> tuple:
+    """Runs code under -X importtime; returns (total_us, [(cumulative_us, module)] of top-level imports)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    top = []
+    for line in proc.stderr.splitlines():
+        m = IMPORT_LINE.match(line)
+        if m and len(m.group(3)) == 1:  # depth 0: one space before the module name
+            top.append((int(m.group(2)), m.group(4)))
+    return sum(us for us, _ in top), top
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry point import-time benchmark")
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per case (default: 7)")
+    parser.add_argument("--top", type=int, default=5, help="slowest top-level imports to list per case")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<22}{'median ms':>11}{'min ms':>9}   slowest imports")
+    for name, code in CASES.items():
+        import_times(code)  # warm .pyc files
+        totals, top = [], []
+        for _ in range(args.runs):
+            total, top = import_times(code)
+            totals.append(total / 1000)
+        slowest = sorted(top, reverse=True)[:args.top]
+        results[name] = {"median_ms": round(statistics.median(totals), 2), "min_ms": round(min(totals), 2),
+                         "slowest": {mod: round(us / 1000, 2) for us, mod in slowest}}
+        listing = ", ".join(f"{mod} {us / 1000:.1f}" for us, mod in slowest)
+        print(f"{name:<22}{statistics.median(totals):>11.1f}{min(totals):>9.1f}   {listing}", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Synthetic PCE: a local stand-in for the Illumio PCE REST API, for offline load
+testing of ApiClient, Analyzer.run_analysis and the Web GUI.
+
+Implements the endpoints the project uses:
+
+    GET  /api/v2/health
+    GET  /api/v2/orgs/<org>/events?timestamp[gte]=...&max_results=...
+    POST /api/v2/orgs/<org>/traffic_flows/async_queries          -> 202, job href
+    GET  /api/v2/orgs/<org>/traffic_flows/async_queries/<id>     -> queued / working / completed
+    GET  /api/v2/orgs/<org>/traffic_flows/async_queries/<id>/download  (gzip JSON array)
+    GET  /api/v2/orgs/<org>/labels[?key=...]     POST /api/v2/orgs/<org>/labels
+    GET  /api/v2/orgs/<org>/workloads[?name=&hostname=&labels=]  (Prefer: respond-async -> jobs/datafiles)
+    GET  /api/v2/orgs/<org>/workloads/<id>       PUT /api/v2/orgs/<org>/workloads/<id>
+    PUT  /api/v2/orgs/<org>/workloads/bulk_update
+    GET  /api/v2/orgs/<org>/jobs/<id>            GET /api/v2/orgs/<org>/datafiles/<id>
+
+GET responses carry an ETag and honour If-None-Match. Credentials are not checked.
+Data is generated from a seed, so runs are repeatable. Knobs (SIM_DEFAULTS):
+workload/label/port cardinalities, flows per traffic query, events per minute,
+per-request latency, traffic query latency and the share of requests answered
+with 429 or 503.
+
+Usage (from the project root):
+    python benchmarks/pce_simulator.py --port 8443 --flows 100000 --error-429 0.05
+    # then point config.json's api.url at http://127.0.0.1:8443 (org_id 1)
+
+In tests and benchmarks:
+    with PceSimulator({"flows_per_query": 5000}) as sim:
+        cm.config["api"] = sim.api_config()
+"""
+import sys
+import json
+import gzip
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import datetime
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SIM_DEFAULTS = {
+    "org_id": 1,
+    "seed": 42,
+    "workloads": 500,
+    "label_values": {"role": 8, "app": 25, "env": 4, "loc": 3},
+    "ports": [22, 53, 80, 123, 443, 445, 1433, 3306, 3389, 5432, 8080, 8443],
+    "unmanaged_ratio": 0.15,     # share of flow endpoints that are plain IPs (no workload)
+    "interval_ratio": 0.7,       # share of flows with dst_dbo/dst_dbi/ddms (the rest only carry totals)
+    "flows_per_query": 10000,    # result size of each traffic query (capped by its max_results)
+    "events_per_minute": 20,
+    "event_types": ["user.sign_in", "user.login_failed", "agent.tampering", "agent.suspend",
+                    "rule_set.update", "sec_policy.create", "workload.update"],
+    "latency_ms": 0,             # added to every request
+    "query_latency_s": 0.0,      # time a traffic query or async export stays "working"
+    "error_429": 0.0,            # probability of answering a request with 429
+    "error_503": 0.0,            # probability of answering a request with 503
+    "retry_after": 1,            # Retry-After sent with injected 429/503
+}
+DECISIONS = ["allowed", "potentially_blocked", "blocked"]
+TS_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+def _ts(dt: datetime.datetime) -> str:
+    return dt.strftime(TS_FORMAT)[:-4] + "Z"  # milliseconds, like the PCE
+
+
+def _parse_ts(value: str, default: datetime.datetime) -> datetime.datetime:
+    for fmt in (TS_FORMAT, '%Y-%m-%dT%H:%M:%SZ'):
+        try:
+            return datetime.datetime.strptime(value, fmt).replace(tzinfo=datetime.timezone.utc)
+        except (TypeError, ValueError):
+            continue
+    return default
+
+
+class Inventory:
+    """Labels and workloads of the simulated org, plus a flow and event generator over them."""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.org = f"/orgs/{settings['org_id']}"
+        rnd = random.Random(settings["seed"])
+        self.labels = {}
+        for key, count in settings["label_values"].items():
+            for n in range(count):
+                href = f"{self.org}/labels/{len(self.labels) + 1}"
+                self.labels[href] = {"href": href, "key": key, "value": f"{key}-{n:02d}"}
+        by_key = {}
+        for label in self.labels.values():
+            by_key.setdefault(label["key"], []).append(label)
+        self.workloads = {}
+        for n in range(settings["workloads"]):
+            href = f"{self.org}/workloads/{uuid.UUID(int=rnd.getrandbits(128))}"
+            name = f"wl-{n:05d}"
+            self.workloads[href] = {
+                "href": href, "name": name, "hostname": f"{name}.sim.local",
+                "interfaces": [{"name": "eth0", "address": f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}"}],
+                "labels": [{"href": rnd.choice(values)["href"]} for values in by_key.values()],
+                "updated_at": _ts(datetime.datetime.now(datetime.timezone.utc)),
+            }
+        self._workload_list = list(self.workloads.values())
+        self.lock = threading.Lock()
+
+    def expand_labels(self, refs: list) -> list:
+        return [dict(self.labels[r["href"]]) for r in refs if r.get("href") in self.labels]
+
+    def _endpoint(self, rnd) -> dict:
+        if rnd.random() < self.settings["unmanaged_ratio"]:
+            ip = f"203.0.{rnd.randrange(256)}.{rnd.randrange(1, 255)}"
+            return {"ip": ip, "ip_lists": [{"name": "Any (0.0.0.0/0 and ::/0)"}]}
+        wl = rnd.choice(self._workload_list)
+        return {"ip": wl["interfaces"][0]["address"],
+                "workload": {"href": wl["href"], "name": wl["name"], "hostname": wl["hostname"],
+                             "labels": self.expand_labels(wl["labels"])}}
+
+    def flow(self, rnd, start: datetime.datetime, span_s: float) -> dict:
+        first = start + datetime.timedelta(seconds=rnd.random() * span_s)
+        last = first + datetime.timedelta(seconds=rnd.random() * min(600.0, span_s))
+        decision = rnd.choices(DECISIONS, weights=(70, 20, 10))[0]
+        f = {
+            "src": self._endpoint(rnd),
+            "dst": self._endpoint(rnd),
+            "service": {"port": rnd.choice(self.settings["ports"]), "proto": rnd.choice((6, 6, 6, 17))},
+            "num_connections": rnd.randint(1, 500),
+            "policy_decision": decision,
+            "flow_direction": rnd.choice(("inbound", "outbound")),
+            "timestamp_range": {"first_detected": _ts(first), "last_detected": _ts(last)},
+            "dst_tbo": rnd.randint(0, 50_000_000), "dst_tbi": rnd.randint(0, 50_000_000),
+            "tdms": rnd.randint(1000, 600_000),
+        }
+        if rnd.random() < self.settings["interval_ratio"]:
+            f["dst_dbo"] = rnd.randint(0, 5_000_000)
+            f["dst_dbi"] = rnd.randint(0, 5_000_000)
+            f["ddms"] = rnd.randint(500, 600_000)
+        return f
+
+    def flows(self, count: int, start: datetime.datetime, end: datetime.datetime, seed=None):
+        rnd = random.Random(self.settings["seed"] if seed is None else seed)
+        span = max((end - start).total_seconds(), 1.0)
+        for _ in range(count):
+            yield self.flow(rnd, start, span)
+
+    def events(self, since: datetime.datetime, until: datetime.datetime, max_results: int) -> list:
+        rate = float(self.settings["events_per_minute"])
+        minutes = max((until - since).total_seconds() / 60.0, 0.0)
+        count = min(int(rate * minutes), max_results)
+        rnd = random.Random(int(since.timestamp()))
+        out = []
+        for i in range(count):
+            ts = since + datetime.timedelta(seconds=(i + rnd.random()) * 60.0 / rate)
+            wl = rnd.choice(self._workload_list)
+            etype = rnd.choice(self.settings["event_types"])
+            out.append({
+                "href": f"{self.org}/events/{uuid.UUID(int=rnd.getrandbits(128))}",
+                "timestamp": _ts(ts), "event_type": etype,
+                "severity": "err" if "failed" in etype or "tampering" in etype else "info",
+                "status": "failure" if "failed" in etype else "success",
+                "created_by": {"agent": {"href": wl["href"], "hostname": wl["hostname"]}},
+                "resource_changes": [{"resource": {"workload": {"href": wl["href"]}}}],
+            })
+        return out
+
+    def search(self, params: dict) -> list:
+        name = (params.get("name") or [""])[0].lower()
+        hostname = (params.get("hostname") or [""])[0].lower()
+        label_sets = []
+        for raw in params.get("labels") or []:
+            try:
+                label_sets.extend({h for h in group} for group in json.loads(raw))
+            except (TypeError, ValueError):
+                continue
+        max_results = int((params.get("max_results") or [500])[0])
+        out = []
+        with self.lock:
+            for wl in self._workload_list:
+                if name and name not in wl["name"].lower():
+                    continue
+                if hostname and hostname not in wl["hostname"].lower():
+                    continue
+                hrefs = {l["href"] for l in wl["labels"]}
+                if label_sets and not any(s <= hrefs for s in label_sets):
+                    continue
+                out.append(wl)
+                if len(out) >= max_results:
+                    break
+        return out
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    sim = None  # set per server class in PceSimulator.start()
+
+    def log_message(self, *args):
+        pass
+
+    # ─── Plumbing ─────────────────────────────────────────────────────────
+
+    def _send(self, status: int, body=None, headers: dict = None, raw: bytes = None):
+        data = raw if raw is not None else (b"" if body is None else json.dumps(body).encode("utf-8"))
+        etag = None
+        if self.command == "GET" and status == 200 and raw is None:
+            etag = '"' + hashlib.md5(data).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                status, data = 304, b""
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if etag:
+            self.send_header("ETag", etag)
+        if data or status not in (204, 304):
+            self.send_header("Content-Type", "application/json" if raw is None else "application/gzip")
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+        self.sim.stats["requests"] += 1
+        self.sim.stats["bytes_sent"] += len(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(data) if data else None
+        except ValueError:
+            return None
+
+    def _inject(self) -> bool:
+        """Applies latency and random 429/503 answers. Returns True when the request was answered."""
+        s = self.sim.settings
+        if s["latency_ms"]:
+            time.sleep(s["latency_ms"] / 1000.0)
+        roll = self.sim.rnd.random()
+        for status, key in ((429, "error_429"), (503, "error_503")):
+            if roll < s[key]:
+                self.sim.stats[f"injected_{status}"] += 1
+                self._send(status, {"error": "injected"}, {"Retry-After": str(s["retry_after"])})
+                return True
+            roll -= s[key]
+        return False
+
+    def _route(self, method: str):
+        parts = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(parts.query)
+        path = parts.path.rstrip("/")
+        if not path.startswith("/api/v2"):
+            return self._send(404, {"error": "not found"})
+        path = path[len("/api/v2"):]
+        if self._inject():
+            return None
+        if path == "/health":
+            return self._send(200, [{"status": "normal", "type": "sim"}])
+        org = self.sim.inventory.org
+        if not path.startswith(org):
+            return self._send(404, {"error": "unknown org"})
+        rest = path[len(org):].strip("/").split("/")
+        handler = getattr(self, f"_{method}_{rest[0]}", None)
+        if handler is None:
+            return self._send(404, {"error": "not found"})
+        return handler(rest[1:], params)
+
+    def do_GET(self):
+        self._route("get")
+
+    def do_POST(self):
+        self._route("post")
+
+    def do_PUT(self):
+        self._route("put")
+
+    # ─── Endpoints ────────────────────────────────────────────────────────
+
+    def _get_events(self, rest, params):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        since = _parse_ts((params.get("timestamp[gte]") or [None])[0], now - datetime.timedelta(minutes=10))
+        max_results = int((params.get("max_results") or [1000])[0])
+        self._send(200, self.sim.inventory.events(since, now, max_results))
+
+    def _post_traffic_flows(self, rest, params):
+        query = self._body() or {}
+        job_id = uuid.uuid4().hex
+        href = f"{self.sim.inventory.org}/traffic_flows/async_queries/{job_id}"
+        with self.sim.lock:
+            self.sim.jobs[job_id] = {"kind": "traffic", "query": query, "created": time.monotonic()}
+        self._send(202, {"href": href, "status": "queued", "query_parameters": query})
+
+    def _get_traffic_flows(self, rest, params):
+        job_id = rest[1] if len(rest) > 1 else ""  # async_queries/<id>[/download]
+        job = self.sim.jobs.get(job_id)
+        if job is None:
+            return self._send(404, {"error": "no such query"})
+        done = time.monotonic() - job["created"] >= self.sim.settings["query_latency_s"]
+        if len(rest) > 2 and rest[2] == "download":
+            if not done:
+                return self._send(409, {"error": "query not completed"})
+            return self._send(200, raw=self.sim.traffic_result(job_id, job["query"]))
+        status = "completed" if done else "working"
+        href = f"{self.sim.inventory.org}/traffic_flows/async_queries/{job_id}"
+        self._send(200, {"href": href, "status": status,
+                         "result": f"{href}/download" if done else None})
+
+    def _get_labels(self, rest, params):
+        inv = self.sim.inventory
+        with inv.lock:
+            if rest:
+                label = inv.labels.get(f"{inv.org}/labels/{rest[0]}")
+                return self._send(200, label) if label else self._send(404, {"error": "not found"})
+            key = (params.get("key") or [None])[0]
+            labels = [l for l in inv.labels.values() if key is None or l["key"] == key]
+        self._send(200, labels)
+
+    def _post_labels(self, rest, params):
+        body = self._body() or {}
+        inv = self.sim.inventory
+        with inv.lock:
+            if any(l["key"] == body.get("key") and l["value"] == body.get("value") for l in inv.labels.values()):
+                return self._send(406, {"error": "label already exists"})
+            href = f"{inv.org}/labels/{len(inv.labels) + 1}"
+            inv.labels[href] = {"href": href, "key": body.get("key"), "value": body.get("value")}
+        self._send(201, inv.labels[href])
+
+    def _workload_view(self, wl):
+        return dict(wl, labels=self.sim.inventory.expand_labels(wl["labels"]))
+
+    def _get_workloads(self, rest, params):
+        inv = self.sim.inventory
+        if rest:
+            wl = inv.workloads.get(f"{inv.org}/workloads/{rest[0]}")
+            return self._send(200, self._workload_view(wl)) if wl else self._send(404, {"error": "not found"})
+        if self.headers.get("Prefer") == "respond-async":
+            job_id = uuid.uuid4().hex
+            with self.sim.lock:
+                self.sim.jobs[job_id] = {"kind": "export", "params": params, "created": time.monotonic()}
+            return self._send(202, headers={"Location": f"{inv.org}/jobs/{job_id}",
+                                            "Retry-After": str(self.sim.settings["retry_after"])})
+        self._send(200, [self._workload_view(wl) for wl in inv.search(params)])
+
+    def _put_workloads(self, rest, params):
+        inv = self.sim.inventory
+        body = self._body()
+        if rest and rest[0] == "bulk_update":
+            results = []
+            for item in body or []:
+                ok = self._update_workload(item.get("href"), item)
+                results.append({"href": item.get("href"), "status": "updated" if ok else "failed",
+                                **({} if ok else {"errors": [{"token": "not_found"}]})})
+            return self._send(200, results)
+        href = f"{inv.org}/workloads/{rest[0]}" if rest else None
+        if not self._update_workload(href, body or {}):
+            return self._send(404, {"error": "not found"})
+        self._send(204)
+
+    def _update_workload(self, href, body) -> bool:
+        inv = self.sim.inventory
+        with inv.lock:
+            wl = inv.workloads.get(href)
+            if wl is None:
+                return False
+            if "labels" in body:
+                wl["labels"] = [{"href": l["href"]} for l in body["labels"] if l.get("href") in inv.labels]
+            wl["updated_at"] = _ts(datetime.datetime.now(datetime.timezone.utc))
+        return True
+
+    def _get_jobs(self, rest, params):
+        job = self.sim.jobs.get(rest[0] if rest else "")
+        if job is None:
+            return self._send(404, {"error": "no such job"})
+        if time.monotonic() - job["created"] < self.sim.settings["query_latency_s"]:
+            return self._send(200, {"status": "running"}, {"Retry-After": str(self.sim.settings["retry_after"])})
+        self._send(200, {"status": "done", "result": {"href": f"{self.sim.inventory.org}/datafiles/{rest[0]}"}})
+
+    def _get_datafiles(self, rest, params):
+        job = self.sim.jobs.get(rest[0] if rest else "")
+        if job is None:
+            return self._send(404, {"error": "no such datafile"})
+        self._send(200, [self._workload_view(wl) for wl in self.sim.inventory.search(job["params"])])
+
+
+class PceSimulator:
+    def __init__(self, settings: dict = None, host: str = "127.0.0.1", port: int = 0):
+        self.settings = dict(SIM_DEFAULTS)
+        self.settings.update(settings or {})
+        self.inventory = Inventory(self.settings)
+        self.rnd = random.Random(self.settings["seed"])
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes_sent": 0, "injected_429": 0, "injected_503": 0}
+        self._results = {}
+        self._addr = (host, port)
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def api_config(self) -> dict:
+        """The config.json "api" section pointing at this simulator."""
+        return {"url": self.url, "org_id": self.settings["org_id"], "key": "sim", "secret": "sim", "verify_ssl": False}
+
+    def traffic_result(self, job_id: str, query: dict) -> bytes:
+        """gzip-compressed JSON array of the query's flows, generated once per job."""
+        with self.lock:
+            cached = self._results.get(job_id)
+        if cached is not None:
+            return cached
+        now = datetime.datetime.now(datetime.timezone.utc)
+        start = _parse_ts(query.get("start_date"), now - datetime.timedelta(minutes=10))
+        end = _parse_ts(query.get("end_date"), now)
+        decisions = set(query.get("policy_decisions") or DECISIONS)
+        count = min(int(self.settings["flows_per_query"]), int(query.get("max_results") or 200000))
+        lines = [json.dumps(f) for f in self.inventory.flows(count, start, end) if f["policy_decision"] in decisions]
+        data = gzip.compress(("[\n" + ",\n".join(lines) + "\n]\n").encode("utf-8"), compresslevel=1)
+        with self.lock:
+            self._results[job_id] = data
+        return data
+
+    def start(self) -> 'PceSimulator':
+        handler = type("SimHandler", (_Handler,), {"sim": self})
+        self._server = ThreadingHTTPServer(self._addr, handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="pce-simulator", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic Illumio PCE for offline load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--seed", type=int, default=SIM_DEFAULTS["seed"])
+    parser.add_argument("--workloads", type=int, default=SIM_DEFAULTS["workloads"])
+    parser.add_argument("--flows", type=int, default=SIM_DEFAULTS["flows_per_query"], help="flows per traffic query")
+    parser.add_argument("--events-per-minute", type=float, default=SIM_DEFAULTS["events_per_minute"])
+    parser.add_argument("--latency-ms", type=float, default=0, help="added to every request")
+    parser.add_argument("--query-latency", type=float, default=0, help="seconds a traffic query stays 'working'")
+    parser.add_argument("--error-429", type=float, default=0, help="share of requests answered with 429")
+    parser.add_argument("--error-503", type=float, default=0, help="share of requests answered with 503")
+    args = parser.parse_args()
+
+    sim = PceSimulator({
+        "seed": args.seed, "workloads": args.workloads, "flows_per_query": args.flows,
+        "events_per_minute": args.events_per_minute, "latency_ms": args.latency_ms,
+        "query_latency_s": args.query_latency, "error_429": args.error_429, "error_503": args.error_503,
+    }, host=args.host, port=args.port).start()
+    print(f"Simulated PCE listening on {sim.url} (org {sim.settings['org_id']}); Ctrl+C to stop")
+    print(f'config.json "api": {json.dumps(sim.api_config())}')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+        print(f"\n{sim.stats}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
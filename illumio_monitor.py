@@ -6,6 +6,8 @@ Usage:
     python illumio_monitor.py --monitor        # Headless daemon mode
     python illumio_monitor.py --monitor -i 5   # Daemon with 5-min interval
     python illumio_monitor.py --gui            # Launch tkinter GUI
+    python illumio_monitor.py --run-once       # One cycle, JSON to stdout, exit 1 if alerts fired
+    python illumio_monitor.py --query -m 60    # Traffic query, JSON to stdout
 """
 import sys
 
@@ -1,12 +1,20 @@
 import datetime
 import json
 import gc
+import time
 import os
+import heapq
 import logging
 import tempfile
 from collections import Counter
 from src.utils import Colors, format_unit, safe_input
 from src.i18n import t
+from src.status_cache import publish_state
+from src.syslog_sink import get_flow_sink
+from src.coalescer import DELTA_DEFAULTS, delta_fingerprint, take_delivery
+from src.memory_budget import budget_from_config, approx_size
+from src.flow_record import as_record
+from src import cycle_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +22,9 @@ logger = logging.getLogger(__name__)
 PKG_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(PKG_DIR)
 STATE_FILE = os.path.join(ROOT_DIR, "state.json")
+TOP_N = 10  # flows kept per traffic rule for the alert snapshot
+QUERY_LIMIT = 500  # flows returned by query_flows
+SIZE_SAMPLE = 64  # query_flows re-measures the size of a result entry every SIZE_SAMPLE entries
 
 
 class Analyzer:
@@ -60,7 +71,26 @@ class Analyzer:
 
         if len(self.state["processed_ids"]) > 2000:
             self.state["processed_ids"] = self.state["processed_ids"][-2000:]
+        self._write_state()
 
+    def save_deliveries(self):
+        """
+        Moves the alert delivery outcomes recorded in this process (coalescer.record_delivery)
+        into alert_fingerprints and writes state.json if any changed, so a later --run-once
+        or a restarted daemon knows the first alert already went out. Leaves last_check alone.
+        """
+        if self._take_deliveries():
+            self._write_state()
+
+    def _take_deliveries(self):
+        changed = False
+        for entry in self.state.get("alert_fingerprints", {}).values():
+            if not entry.get("delivered") and take_delivery(entry.get("fp")):
+                entry["delivered"] = True
+                changed = True
+        return changed
+
+    def _write_state(self):
         try:
             # Atomic write using a temporary file
             dir_name = os.path.dirname(STATE_FILE) or '.'
@@ -70,6 +100,7 @@ class Analyzer:
                     json.dump(self.state, f, ensure_ascii=False)
                 # os.replace is atomic and will overwrite the destination if it exists
                 os.replace(tmp_path, STATE_FILE)
+                publish_state(STATE_FILE, self.state)
             except Exception as inner_e:
                 logger.error(f"Failed to atomically write state file: {inner_e}")
                 try:
@@ -82,8 +113,9 @@ class Analyzer:
 
     def calculate_mbps(self, flow):
         # Hybrid Calculation: Interval vs Total
-        delta_bytes = float(flow.get("dst_dbo") or flow.get("dbo") or 0) + float(flow.get("dst_dbi") or flow.get("dbi") or 0)
-        ddms = float(flow.get("ddms") or 0)
+        flow = as_record(flow)
+        delta_bytes = flow.delta_bytes
+        ddms = flow.ddms
 
         if delta_bytes > 0 and ddms > 0:
             if ddms < 1000:
@@ -91,14 +123,9 @@ class Analyzer:
             val = (delta_bytes * 8.0) / (ddms / 1000.0) / 1000000.0
             return val, "(Interval)", delta_bytes, ddms
 
-        # Fallback to Total if Interval is 0
-        tbo = float(flow.get("dst_tbo") or flow.get("tbo") or flow.get("dst_bo") or 0)
-        tbi = float(flow.get("dst_tbi") or flow.get("tbi") or flow.get("dst_bi") or 0)
-        total_bytes = tbo + tbi
-        tdms = float(flow.get("tdms") or 0)
-
-        if tdms < 1000:
-            tdms = float(flow.get("interval_sec", 600)) * 1000
+        # Fallback to Total if Interval is 0 (tdms falls back to interval_sec at decode)
+        total_bytes = flow.total_bytes
+        tdms = flow.tdms
 
         if total_bytes > 0 and tdms > 0:
             val = (total_bytes * 8.0) / (tdms / 1000.0) / 1000000.0
@@ -107,135 +134,96 @@ class Analyzer:
         return 0.0, "", 0.0, 0.0
 
     def calculate_volume_mb(self, flow):
-        delta_bytes = float(flow.get("dst_dbo") or flow.get("dbo") or 0) + float(flow.get("dst_dbi") or flow.get("dbi") or 0)
-        if delta_bytes > 0:
-            return delta_bytes / 1024 / 1024, "(Interval)"
-
-        tbo = float(flow.get("dst_tbo") or flow.get("tbo") or flow.get("dst_bo") or 0)
-        tbi = float(flow.get("dst_tbi") or flow.get("tbi") or flow.get("dst_bi") or 0)
-        return (tbo + tbi) / 1024 / 1024, "(Total)"
+        flow = as_record(flow)
+        if flow.delta_bytes > 0:
+            return flow.delta_bytes / 1024 / 1024, "(Interval)"
+        return flow.total_bytes / 1024 / 1024, "(Total)"
 
     def check_flow_match(self, rule, f, start_time_limit):
+        f = as_record(f)
         # Dynamic Sliding Window Check
         if start_time_limit:
-            ts_str = f.get("timestamp")
-            if not ts_str and "timestamp_range" in f:
-                ts_str = f["timestamp_range"].get("last_detected") or f["timestamp_range"].get("first_detected")
-                
-            if ts_str:
-                try:
-                    f_time = datetime.datetime.strptime(ts_str, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=datetime.timezone.utc)
-                except ValueError:
-                    try:
-                        f_time = datetime.datetime.strptime(ts_str, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
-                    except ValueError:
-                        f_time = None
-
-                if f_time and f_time < start_time_limit:
-                    return False
+            f_time = f.seen
+            if f_time and f_time < start_time_limit:
+                return False
 
         # Criteria Check
-        p = f.get("pd")
-        raw_dec = str(f.get("policy_decision", "")).lower()
-        flow_pd = -1
-        if p is not None:
-            flow_pd = int(p)
-        elif "blocked" in raw_dec and "potentially" not in raw_dec:
-            flow_pd = 2
-        elif "potentially" in raw_dec:
-            flow_pd = 1
-        elif "allowed" in raw_dec:
-            flow_pd = 0
-
         target_pd = rule.get("pd", 3 if rule.get("type") == "traffic" else -1)
-        if target_pd != -1 and target_pd != 3 and flow_pd != target_pd:
+        if target_pd != -1 and target_pd != 3 and f.pd != target_pd:
             return False
 
         if rule.get("port"):
-            f_port = f.get("dst_port") or f.get("service", {}).get("port")
             try:
-                if not f_port or int(f_port) != int(rule["port"]):
+                if f.port_num is None or f.port_num != int(rule["port"]):
                     return False
             except (ValueError, TypeError):
                 return False
 
         if rule.get("proto"):
-            f_proto = f.get("proto") or f.get("service", {}).get("proto")
             try:
-                if not f_proto or int(f_proto) != int(rule.get("proto")):
+                if f.proto_num is None or f.proto_num != int(rule.get("proto")):
                     return False
             except (ValueError, TypeError):
                 return False
 
         # Labels & IPs
-        if rule.get("src_label") and not self._check_flow_labels(f.get('src', {}), rule["src_label"]):
+        if rule.get("src_label") and not self._check_flow_labels(f.src, rule["src_label"]):
             return False
-        if rule.get("dst_label") and not self._check_flow_labels(f.get('dst', {}), rule["dst_label"]):
+        if rule.get("dst_label") and not self._check_flow_labels(f.dst, rule["dst_label"]):
             return False
-        if rule.get("src_ip_in") and not self._check_ip_filter(f.get('src', {}), rule["src_ip_in"]):
+        if rule.get("src_ip_in") and not self._check_ip_filter(f.src, rule["src_ip_in"]):
             return False
-        if rule.get("dst_ip_in") and not self._check_ip_filter(f.get('dst', {}), rule["dst_ip_in"]):
+        if rule.get("dst_ip_in") and not self._check_ip_filter(f.dst, rule["dst_ip_in"]):
             return False
 
         # Excludes
         if rule.get("ex_port"):
-            f_port = f.get("dst_port") or f.get("service", {}).get("port")
             try:
-                if f_port and int(f_port) == int(rule["ex_port"]):
+                if f.port_num is not None and f.port_num == int(rule["ex_port"]):
                     return False
             except (ValueError, TypeError):
                 pass
-        if rule.get("ex_src_label") and self._check_flow_labels(f.get('src', {}), rule["ex_src_label"]):
+        if rule.get("ex_src_label") and self._check_flow_labels(f.src, rule["ex_src_label"]):
             return False
-        if rule.get("ex_dst_label") and self._check_flow_labels(f.get('dst', {}), rule["ex_dst_label"]):
+        if rule.get("ex_dst_label") and self._check_flow_labels(f.dst, rule["ex_dst_label"]):
             return False
-        if rule.get("ex_src_ip") and self._check_ip_filter(f.get('src', {}), rule["ex_src_ip"]):
+        if rule.get("ex_src_ip") and self._check_ip_filter(f.src, rule["ex_src_ip"]):
             return False
-        if rule.get("ex_dst_ip") and self._check_ip_filter(f.get('dst', {}), rule["ex_dst_ip"]):
+        if rule.get("ex_dst_ip") and self._check_ip_filter(f.dst, rule["ex_dst_ip"]):
             return False
 
         return True
 
-    def _check_flow_labels(self, flow_side, filter_str):
+    def _check_flow_labels(self, endpoint, filter_str):
+        """endpoint: a FlowEndpoint; filter_str: "key=value"."""
         if not filter_str:
             return True
-        try:
-            fk, fv = filter_str.split('=')
-            for l in flow_side.get('workload', {}).get('labels', []):
-                if l.get('key') == fk.strip() and l.get('value') == fv.strip():
-                    return True
-            return False
-        except ValueError:
-            return False
+        return endpoint.has_label(filter_str)
 
-    def _check_ip_filter(self, flow_side, filter_val):
+    def _check_ip_filter(self, endpoint, filter_val):
         if not filter_val:
             return True
-        if flow_side.get('ip') == filter_val:
-            return True
-        for ipl in flow_side.get('ip_lists', []):
-            if ipl.get('name') == filter_val:
-                return True
-        return False
+        return endpoint.ip == filter_val or filter_val in endpoint.ip_lists
 
     def get_traffic_details_key(self, flow):
-        src = flow.get('src', {})
-        dst = flow.get('dst', {})
-        svc = flow.get('service', {})
-        s_name = src.get('workload', {}).get('name') or src.get('ip', 'N/A')
-        d_name = dst.get('workload', {}).get('name') or dst.get('ip', 'N/A')
-        port = svc.get('port', 'All') or flow.get('dst_port', 'All')
-        return f"{s_name} -> {d_name} [{port}]"
+        flow = as_record(flow)
+        s_name = flow.src.name or flow.src.ip or 'N/A'
+        d_name = flow.dst.name or flow.dst.ip or 'N/A'
+        return f"{s_name} -> {d_name} [{flow.port or 'All'}]"
 
     def run_analysis(self):
         logger.info("Starting analysis cycle.")
+        cycle = cycle_metrics.current()
+        self._take_deliveries()  # alerts the dispatcher delivered since the last cycle; saved below
         # 1. Health Check
         if self.cm.config["settings"].get("enable_health_check", True):
             print(f"{t('checking_pce_health')}...", end=" ", flush=True)
-            status, msg = self.api.check_health()
+            with cycle.stage("health_check"):
+                status, msg = self.api.check_health()
             if status != 200:
                 print(f"{Colors.FAIL}{t('status_error')}{Colors.ENDC}")
                 logger.warning(f"PCE health check failed: {status} - {msg[:200]}")
+                cycle.count("alerts_health")
                 self.reporter.add_health_alert({
                     "time": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                     "status": str(status),
@@ -247,13 +235,20 @@ class Analyzer:
 
         # 2. Events
         print(f"{t('checking_events')}...")
-        events = self.api.fetch_events(self.state["last_check"])
+        with cycle.stage("events"):
+            events = self.api.fetch_events(self.state["last_check"])
         if events:
+            self.api.note_events(events)
+            cycle.count("events", len(events))
             print(t('found_events', count=len(events)))
             logger.info(f"Found {len(events)} events.")
             now_utc = datetime.datetime.now(datetime.timezone.utc)
             for rule in [r for r in self.cm.config["rules"] if r["type"] == "event"]:
+                started = time.perf_counter()
                 matches = [e for e in events if rule["filter_value"] == e.get("event_type")]
+                stats = cycle.rule(rule)
+                stats[1] += len(matches)
+                stats[2] += time.perf_counter() - started
 
                 # Event History Logic for 'count' threshold
                 if matches:
@@ -274,7 +269,7 @@ class Analyzer:
 
                 if count_val >= rule["threshold_count"] and count_val > 0:
                     if self._check_cooldown(rule):
-                        self.reporter.add_event_alert({
+                        alert_data = {
                             "time": matches[0].get("timestamp") if matches else "N/A",
                             "rule": rule["name"],
                             "desc": rule.get("desc"),
@@ -282,10 +277,16 @@ class Analyzer:
                             "count": count_val,
                             "source": matches[0].get("created_by", {}).get("agent", {}).get("hostname", "System") if matches else "N/A",
                             "raw_data": matches[:5]
-                        })
+                        }
+                        self._mark_ongoing(rule, "event", alert_data)
+                        self.reporter.add_event_alert(alert_data)
+                        cycle.count("alerts_event")
+                else:
+                    self._clear_fingerprint(rule)
 
         # 3. Traffic
         tr_rules = [r for r in self.cm.config["rules"] if r["type"] in ["traffic", "bandwidth", "volume"]]
+        budget = budget_from_config(self.cm)
         if tr_rules:
             max_win = max([r.get('threshold_window', 10) for r in tr_rules])
             now_utc = datetime.datetime.now(datetime.timezone.utc)
@@ -294,57 +295,73 @@ class Analyzer:
             traffic_stream = self.api.execute_traffic_query_stream(
                 start_dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
                 now_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                ["blocked", "potentially_blocked", "allowed"]
+                ["blocked", "potentially_blocked", "allowed"],
+                budget=budget
             )
 
             if traffic_stream:
+                # top_matches is a bounded heap of (value, -seq, flow, note): references to the
+                # stream's flow dicts, copied and formatted only if they make the final report
                 rule_results = {r['id']: {'max_val': 0.0, 'top_matches': []} for r in tr_rules}
-
+                rule_starts = {r['id']: now_utc - datetime.timedelta(minutes=r.get("threshold_window", 10))
+                               for r in tr_rules}
+                # Optional: every matched flow is queued for the syslog sender (non-blocking)
+                flow_sink = get_flow_sink(self.cm)
+                # [name, matches, eval_seconds] per rule, updated in place
+                rule_stats = {r['id']: cycle.rule(r) for r in tr_rules}
+                perf = time.perf_counter
+
+                scan_started = perf()
                 count_processed = 0
-                for f in traffic_stream:
+                for f in map(as_record, traffic_stream):
                     count_processed += 1
-
-                    bw_val, bw_note, _, _ = self.calculate_mbps(f)
-                    vol_val, vol_note = self.calculate_volume_mb(f)
-                    conn_val = int(f.get("num_connections") or f.get("count", 1))
+                    bw = vol = None  # computed on the first rule that needs them
 
                     for rule in tr_rules:
                         rid = rule['id']
-                        r_win = rule.get("threshold_window", 10)
-                        r_start = now_utc - datetime.timedelta(minutes=r_win)
-
-                        if not self.check_flow_match(rule, f, r_start):
+                        t0 = perf()
+                        matched = self.check_flow_match(rule, f, rule_starts[rid])
+                        stats = rule_stats[rid]
+                        stats[2] += perf() - t0
+                        if not matched:
                             continue
+                        stats[1] += 1
+
+                        if flow_sink is not None:
+                            flow_sink.emit_flow(rule["name"], f)
 
                         res = rule_results[rid]
 
                         if rule["type"] == "bandwidth":
+                            if bw is None:
+                                bw = self.calculate_mbps(f)
+                            bw_val = bw[0]
                             if bw_val > res['max_val']:
                                 res['max_val'] = bw_val
                             if bw_val > float(rule.get("threshold_count", 0)):
-                                f_copy = f.copy()
-                                f_copy['_metric_val'] = bw_val
-                                f_copy['_metric_fmt'] = f"{format_unit(bw_val, 'bandwidth')} {bw_note}"
-                                res['top_matches'].append(f_copy)
+                                self._keep_top(res['top_matches'], bw_val, count_processed, f, bw[1])
 
                         elif rule["type"] == "volume":
-                            res['max_val'] += vol_val
-                            f_copy = f.copy()
-                            f_copy['_metric_val'] = vol_val
-                            f_copy['_metric_fmt'] = f"{format_unit(vol_val, 'volume')} {vol_note}"
-                            res['top_matches'].append(f_copy)
+                            if vol is None:
+                                vol = self.calculate_volume_mb(f)
+                            res['max_val'] += vol[0]
+                            self._keep_top(res['top_matches'], vol[0], count_processed, f, vol[1])
 
                         else:  # Traffic Count
+                            conn_val = f.connections
                             res['max_val'] += conn_val
-                            f_copy = f.copy()
-                            f_copy['_metric_val'] = conn_val
-                            f_copy['_metric_fmt'] = str(conn_val)
-                            res['top_matches'].append(f_copy)
+                            self._keep_top(res['top_matches'], conn_val, count_processed, f, "")
 
+                cycle.add_time("flow_scan", perf() - scan_started)
+                cycle.count("flows", count_processed)
+                # The snapshots are bounded (TOP_N per rule), so they are sized once, after the scan
+                kept = {id(e[2]): e[2] for res in rule_results.values() for e in res['top_matches']}
+                budget.reserve(sum(approx_size(flow) for flow in kept.values()))
                 print(t('found_traffic', count=count_processed))
                 logger.info(f"Processed {count_processed} traffic flows.")
 
                 # Check Triggers
+                triggers_started = perf()
                 for rule in tr_rules:
                     rid = rule['id']
                     res = rule_results[rid]
@@ -360,8 +377,8 @@ class Analyzer:
                             is_trigger = True
 
                     if is_trigger and self._check_cooldown(rule):
-                        res['top_matches'].sort(key=lambda x: x.get('_metric_val', 0), reverse=True)
-                        top_10 = res['top_matches'][:10]
+                        top_10 = [self._decorate_flow(rule["type"], val, flow, note)
+                                  for val, _, flow, note in sorted(res['top_matches'], reverse=True)]
 
                         ctr = Counter([self.get_traffic_details_key(m) for m in top_10])
                         details = "<br>".join([f"{k}: {v}" for k, v in ctr.most_common(10)])
@@ -375,13 +392,25 @@ class Analyzer:
                         }
 
                         if rule["type"] in ["bandwidth", "volume"]:
+                            self._mark_ongoing(rule, "metric", alert_data)
                             self.reporter.add_metric_alert(alert_data)
+                            cycle.count("alerts_metric")
                         else:
+                            self._mark_ongoing(rule, "traffic", alert_data)
                             self.reporter.add_traffic_alert(alert_data)
-
-        self.save_state()
+                            cycle.count("alerts_traffic")
+                    elif not is_trigger:
+                        self._clear_fingerprint(rule)
+                cycle.add_time("triggers", perf() - triggers_started)
+
+        with cycle.stage("state_save"):
+            self.save_state()
+        budget.report("analysis")
         logger.info("Analysis cycle completed.")
-        gc.collect()
+        # Flows are acyclic and freed by reference counting as soon as the scan ends; a full
+        # collection is only worth its cost after a cycle that went over its memory budget.
+        if budget.high_water > budget.limit:
+            gc.collect()
 
     def _check_cooldown(self, rule):
         rid = str(rule["id"])
@@ -407,6 +436,55 @@ class Analyzer:
         self.state["alert_history"][rid] = now_utc.strftime('%Y-%m-%dT%H:%M:%SZ')
         return True
 
+    @staticmethod
+    def _keep_top(heap, val, seq, flow, note):
+        """Keeps the TOP_N largest matches in a min-heap; ties keep the earlier flow."""
+        entry = (val, -seq, flow, note)
+        if len(heap) < TOP_N:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    @staticmethod
+    def _decorate_flow(rule_type, val, flow, note):
+        """The reported flow as a PCE-shaped dict, with its metric value and display string."""
+        fmt = str(val) if rule_type == "traffic" else f"{format_unit(val, rule_type)} {note}"
+        return dict(as_record(flow).to_dict(), _metric_val=val, _metric_fmt=fmt)
+
+    def _mark_ongoing(self, rule, kind, alert):
+        """
+        Flags the alert as a "still ongoing" update when it matches the last one sent for this
+        rule and that full alert was delivered (see coalescer.record_delivery); until then the
+        full report is sent again.
+        """
+        settings = dict(DELTA_DEFAULTS)
+        settings.update(self.cm.config.get("alerts", {}).get("delta") or {})
+        if not settings["enabled"]:
+            return
+        rid = str(rule["id"])
+        fp = delta_fingerprint(kind, alert, float(settings["bucket_ratio"]))
+        fingerprints = self.state.setdefault("alert_fingerprints", {})
+        last = fingerprints.get(rid)
+        alert["delta_fp"] = fp
+        if last and last.get("fp") == fp:
+            if not last.get("delivered") and take_delivery(fp):
+                last["delivered"] = True
+            if last.get("delivered"):
+                alert["ongoing"] = True
+                alert["ongoing_since"] = last.get("since", "")
+                alert["raw_data"] = []  # receivers already got the snapshot with the first alert
+                logger.info(f"Rule '{rule['name']}' unchanged since {alert['ongoing_since']}; sending ongoing update.")
+            else:
+                logger.info(f"Rule '{rule['name']}' unchanged, but its first alert was not delivered; sending it in full.")
+        else:
+            take_delivery(fp)  # drop any outcome left from an earlier incident with the same fingerprint
+            fingerprints[rid] = {"fp": fp, "delivered": False,
+                                 "since": datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+
+    def _clear_fingerprint(self, rule):
+        """The rule stopped firing: its next alert is a new incident."""
+        self.state.get("alert_fingerprints", {}).pop(str(rule["id"]), None)
+
     def _build_criteria_str(self, rule):
         crit = [f"Threshold: > {rule['threshold_count']}"]
         if rule.get('port'):
@@ -435,7 +513,8 @@ class Analyzer:
             elif p == "blocked": strict_pd.add("blocked")
             elif p == "allowed": strict_pd.add("allowed")
         
-        traffic_stream = self.api.execute_traffic_query_stream(start_time, end_time, pds)
+        budget = budget_from_config(self.cm)
+        traffic_stream = self.api.execute_traffic_query_stream(start_time, end_time, pds, budget=budget)
         if not traffic_stream:
             return []
 
@@ -458,40 +537,46 @@ class Analyzer:
         except:
             start_dt = now_dt - datetime.timedelta(minutes=30)
             
-        matches = []
+        # Bounded min-heap of (metric, -seq, size, flow): only flows that rank in the top
+        # `limit` are copied and formatted. While the memory budget is exceeded the
+        # lowest-ranked results are dropped and the limit shrinks (backpressure).
+        heap = []
+        limit = QUERY_LIMIT
+        admitted = size = 0
         sort_by = params.get("sort_by", "bandwidth")
         rule["type"] = sort_by if sort_by in ["bandwidth", "volume"] else "connections"
 
-        for f in traffic_stream:
-            if strict_pd and f.get("policy_decision") not in strict_pd:
+        seq = 0
+        for f in map(as_record, traffic_stream):
+            seq += 1
+            if strict_pd and f.policy_decision not in strict_pd:
                 continue
 
             if not self.check_flow_match(rule, f, start_dt):
                 continue
-                
-            src = f.get('src', {})
-            dst = f.get('dst', {})
-            svc = f.get('service', {})
 
-            s_name = src.get('workload', {}).get('name') or src.get('ip', 'N/A')
-            d_name = dst.get('workload', {}).get('name') or dst.get('ip', 'N/A')
-            port = svc.get('port', 'All') or f.get('dst_port', 'All')
+            src = f.src
+            dst = f.dst
+
+            s_name = src.name or src.ip or 'N/A'
+            d_name = dst.name or dst.ip or 'N/A'
+            port = f.port or 'All'
 
             # Detailed Attribution
-            s_proc = (src.get('process_name') or "").lower()
-            s_user = (src.get('user_name') or "").lower()
-            d_proc = (dst.get('process_name') or svc.get('process_name') or "").lower()
-            d_user = (dst.get('user_name') or svc.get('user_name') or "").lower()
-            svc_name = (svc.get("name") or "").lower()
+            s_proc = (src.process_name or "").lower()
+            s_user = (src.user_name or "").lower()
+            d_proc = (dst.process_name or f.service_process or "").lower()
+            d_user = (dst.user_name or f.service_user or "").lower()
+            svc_name = (f.service_name or "").lower()
 
             if search_query:
-                s_ip = str(src.get('ip', '')).lower()
-                d_ip = str(dst.get('ip', '')).lower()
-                
+                s_ip = str(src.ip or '').lower()
+                d_ip = str(dst.ip or '').lower()
+
                 matches_search = (
-                    search_query in s_name.lower() or 
+                    search_query in s_name.lower() or
                     search_query in d_name.lower() or
-                    search_query in s_ip or 
+                    search_query in s_ip or
                     search_query in d_ip or
                     search_query == str(port).lower() or
                     search_query in s_proc or
@@ -500,14 +585,27 @@ class Analyzer:
                     search_query in d_user or
                     search_query in svc_name
                 )
-                
+
                 if not matches_search:
                     continue
 
-            f_copy = f.copy()
-            
+            bw_val, bw_note, _, _ = self.calculate_mbps(f)
+            vol_val, vol_note = self.calculate_volume_mb(f)
+            conn_val = f.connections
+
+            if rule["type"] == "bandwidth":
+                metric_val = bw_val
+            elif rule["type"] == "volume":
+                metric_val = vol_val
+            else:
+                metric_val = conn_val
+            if len(heap) >= limit and (metric_val, -seq) <= heap[0][:2]:
+                continue
+
+            f_copy = f.to_dict()
+
             # Format Protocol Name
-            proto = f.get('proto') or svc.get('proto', '')
+            proto = f.proto or f.svc_proto or ''
             try:
                 p_int = int(proto)
                 if p_int == 6: proto = "TCP"
@@ -517,54 +615,57 @@ class Analyzer:
 
             f_copy['source'] = {
                 "name": s_name,
-                "ip": src.get('ip'),
-                "href": src.get('workload', {}).get('href'),
-                "labels": src.get('workload', {}).get('labels', []),
-                "process": src.get('process_name') or "",
-                "user": src.get('user_name') or ""
+                "ip": src.ip,
+                "href": src.href,
+                "labels": src.label_dicts(),
+                "process": src.process_name or "",
+                "user": src.user_name or ""
             }
             f_copy['destination'] = {
                 "name": d_name,
-                "ip": dst.get('ip'),
-                "href": dst.get('workload', {}).get('href'),
-                "labels": dst.get('workload', {}).get('labels', []),
-                "process": dst.get('process_name') or svc.get('process_name') or "",
-                "user": dst.get('user_name') or svc.get('user_name') or ""
+                "ip": dst.ip,
+                "href": dst.href,
+                "labels": dst.label_dicts(),
+                "process": dst.process_name or f.service_process or "",
+                "user": dst.user_name or f.service_user or ""
             }
             f_copy['service'] = {
                 "port": port,
                 "proto": proto,
-                "name": svc.get("name") or getattr(svc, 'name', '') or f.get("sn") or ""
+                "name": f.service_name or (f.extra or {}).get("sn") or ""
             }
 
-            bw_val, bw_note, _, _ = self.calculate_mbps(f)
-            vol_val, vol_note = self.calculate_volume_mb(f)
-            conn_val = int(f.get("num_connections") or f.get("count", 1))
-
-            if rule["type"] == "bandwidth":
-                f_copy['_metric_val'] = bw_val
-            elif rule["type"] == "volume":
-                f_copy['_metric_val'] = vol_val
-            else:
-                f_copy['_metric_val'] = conn_val
-                
+            f_copy['_metric_val'] = metric_val
             f_copy["max_bandwidth_mbps"] = bw_val
             f_copy["total_volume_mb"] = vol_val
             f_copy["total_connections"] = conn_val
-            
+
             f_copy["formatted_bandwidth"] = f"{format_unit(bw_val, 'bandwidth')} {bw_note}".strip()
             f_copy["formatted_volume"] = f"{format_unit(vol_val, 'volume')} {vol_note}".strip()
             f_copy["formatted_connections"] = f"{conn_val}"
-            
-            ts = f.get('timestamp_range', {})
-            f_copy["first_seen"] = ts.get('first_detected')
-            f_copy["last_seen"] = ts.get('last_detected')
-            f_copy["policy_decision"] = f.get("policy_decision")
 
-            matches.append(f_copy)
+            f_copy["first_seen"] = f.first_detected
+            f_copy["last_seen"] = f.last_detected
+            f_copy["policy_decision"] = f.policy_decision
 
-        matches.sort(key=lambda x: x.get('_metric_val', 0), reverse=True)
-        return matches[:500]
+            admitted += 1
+            if admitted % SIZE_SAMPLE == 1:  # sizing every entry would cost more than the copy itself
+                size = approx_size(f_copy)
+            if len(heap) < limit:
+                heapq.heappush(heap, (metric_val, -seq, size, f_copy))
+            else:
+                budget.release(heapq.heapreplace(heap, (metric_val, -seq, size, f_copy))[2])
+            budget.reserve(size)
+            while budget.over and len(heap) > 1:
+                budget.release(heapq.heappop(heap)[2])
+                budget.dropped += 1
+                limit = len(heap)
+
+        if budget.dropped:
+            logger.warning(f"query_flows: memory budget exceeded, kept the top {len(heap)} flows "
+                           f"({budget.dropped} lower-ranked results dropped)")
+        budget.report("query")
+        return [entry[3] for entry in sorted(heap, reverse=True)]
 
     def run_debug_mode(self, mins=None, pd_sel=None):
         print(f"\n{Colors.HEADER}{t('menu_debug_mode_title')}{Colors.ENDC}")
@@ -598,58 +699,64 @@ class Analyzer:
         now = datetime.datetime.now(datetime.timezone.utc)
         start_dt = now - datetime.timedelta(minutes=mins)
         print(f"{t('debug_submit_query')} ({start_dt.strftime('%H:%M')} -> {now.strftime('%H:%M')})...")
+        # One pass over the stream evaluates every rule; only the matched count, the
+        # running max/sum and the 10 sample flows of each rule are kept in memory.
+        rules = [r for r in self.cm.config["rules"] if r["type"] in ["traffic", "bandwidth", "volume"]]
+        results = [{"matched": 0, "max": 0.0, "sum": 0.0, "samples": [],
+                    "start": now - datetime.timedelta(minutes=r.get("threshold_window", 10))} for r in rules]
+        budget = budget_from_config(self.cm)
         traffic_gen = self.api.execute_traffic_query_stream(
             start_dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
             now.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            pds
+            pds,
+            budget=budget
         )
-        traffic = list(traffic_gen) if traffic_gen else []
+        total = 0
+        for f in map(as_record, traffic_gen or ()):
+            total += 1
+            for rule, res in zip(rules, results):
+                if not self.check_flow_match(rule, f, res["start"]):
+                    continue
+                res["matched"] += 1
+                if rule["type"] == "bandwidth":
+                    val, note, _, _ = self.calculate_mbps(f)
+                    res["max"] = max(res["max"], val)
+                elif rule["type"] == "volume":
+                    val, note = self.calculate_volume_mb(f)
+                    res["sum"] += val
+                else:
+                    val, note = f.connections, ""
+                    res["sum"] += val
+                    if len(res["samples"]) < TOP_N:  # traffic samples are the first matches
+                        res["samples"].append((val, -total, f, note))
+                    continue
+                self._keep_top(res["samples"], val, total, f, note)
+        kept = {id(e[2]): e[2] for res in results for e in res["samples"]}
+        budget.reserve(sum(approx_size(flow) for flow in kept.values()))
+        budget.report("debug")
 
         print(f"\n{Colors.CYAN}{t('debug_report_title')}{Colors.ENDC}")
-        print(f"{t('debug_records_found')} {len(traffic)} (Window: {mins} mins)。")
+        print(f"{t('debug_records_found')} {total} (Window: {mins} mins)。")
 
-        for rule in [r for r in self.cm.config["rules"] if r["type"] in ["traffic", "bandwidth", "volume"]]:
+        for rule, res in zip(rules, results):
             print(f"\n{Colors.HEADER}{t('traffic_rule')}: {rule['name']} ({rule['type'].upper()}){Colors.ENDC}")
             rule_win = rule.get("threshold_window", 10)
-            rule_start = now - datetime.timedelta(minutes=rule_win)
-
-            matches = []
-            for f in traffic:
-                if self.check_flow_match(rule, f, rule_start):
-                    f_copy = f.copy()
-                    if rule["type"] == "bandwidth":
-                        val, note, _, _ = self.calculate_mbps(f)
-                        f_copy['_metric_val'] = val
-                        f_copy['_metric_fmt'] = f"{format_unit(val, 'bandwidth')} {note}"
-                    elif rule["type"] == "volume":
-                        val_bytes, note = self.calculate_volume_mb(f)
-                        f_copy['_metric_val'] = val_bytes
-                        f_copy['_metric_fmt'] = f"{format_unit(val_bytes, 'volume')} {note}"
-                    else:
-                        c = int(f.get("num_connections") or f.get("count", 1))
-                        f_copy['_metric_val'] = c
-                        f_copy['_metric_fmt'] = str(c)
-                    matches.append(f_copy)
-
-            print(f"  -> [Filter] Raw: {len(traffic)} -> Window({rule_win}m): {len(matches)} left")
+            print(f"  -> [Filter] Raw: {total} -> Window({rule_win}m): {res['matched']} left")
 
-            val = 0.0
             if rule["type"] == "bandwidth":
-                for m in matches:
-                    if m['_metric_val'] > val:
-                        val = m['_metric_val']
+                val = res["max"]
                 print(f"  -> Max Bandwidth (Max): {val:.4f} Mbps")
             elif rule["type"] == "volume":
-                val = sum(m['_metric_val'] for m in matches)
+                val = res["sum"]
                 print(f"  -> Total Volume (Sum): {val:.4f} MB")
             else:
-                val = sum(m['_metric_val'] for m in matches)
+                val = res["sum"]
                 print(f"  -> Total Count (Sum): {int(val)}")
 
             is_trigger = False
             threshold = float(rule.get("threshold_count", 0))
             if rule["type"] == "bandwidth":
-                if matches and val > threshold:
+                if res["matched"] and val > threshold:
                     is_trigger = True
             else:
                 if val >= threshold:
@@ -658,11 +765,12 @@ class Analyzer:
             status = f"{Colors.FAIL}🔴 {t('trigger')}{Colors.ENDC}" if is_trigger else f"{Colors.GREEN}🟢 {t('pass')}{Colors.ENDC}"
             print(f"  -> Result: {status} (Threshold: {threshold})")
 
-            if matches:
+            if res["matched"]:
                 print(f"  -> Sample (Top 10):")
+                samples = res["samples"]
                 if rule["type"] in ["bandwidth", "volume"]:
-                    matches.sort(key=lambda x: x.get('_metric_val', 0), reverse=True)
-
-                for i, m in enumerate(matches[:10]):
+                    samples = sorted(samples, reverse=True)
+                for i, (m_val, _, flow, note) in enumerate(samples):
+                    m = self._decorate_flow(rule["type"], m_val, flow, note)
                     key = self.get_traffic_details_key(m)
                     print(f"     [{i + 1}] {key} Value: {m.get('_metric_fmt')} (PD:{m.get('policy_decision')})")
@@ -7,15 +7,60 @@ import logging
 import urllib.request
 import urllib.error
 import urllib.parse
-from io import BytesIO
-from src.utils import Colors
+import threading
+import http.client
+import concurrent.futures
 from src.utils import Colors
+from src.cache import TTLCache
+from src.memory_budget import budget_from_config
+from src.flow_record import FlowRecord, SymbolTable
+from src import cycle_metrics, metrics
 
 logger = logging.getLogger(__name__)
 
 MAX_TRAFFIC_RESULTS = 200000
 MAX_RETRIES = 3
 RETRY_BACKOFF_BASE = 2  # seconds
+BULK_UPDATE_CHUNK = 1000  # PCE limit: 1,000 items per bulk operation
+BULK_FETCH_WORKERS = 8
+BULK_EXPORT_MIN = 500  # settings.bulk_export_min: batches this large read one collection export (0: never)
+BULK_EXPORT_RATIO = 0.1  # ...and at least this share of the org's workloads, when the local index knows it
+METADATA_CACHE_TTL = 300  # seconds
+METADATA_CACHE_SIZE = 4096
+SEARCH_CACHE_TTL = 60  # seconds
+QUARANTINE_LEVELS = ["Mild", "Moderate", "Severe"]
+ASYNC_JOB_TIMEOUT = 300  # seconds
+
+# Process-wide caches: ApiClient is instantiated per request/cycle, the metadata is not.
+_metadata_cache = TTLCache(max_entries=METADATA_CACHE_SIZE, ttl=METADATA_CACHE_TTL)
+_quarantine_hrefs = {}  # org base_url -> {level: label href}
+_quarantine_lock = threading.Lock()
+metrics.register_cache("pce_metadata", _metadata_cache)
+
+
+def _retry_after_seconds(headers: dict, default: float = 2) -> float:
+    try:
+        return max(1.0, min(float(headers.get("retry-after", default)), 30.0))
+    except (TypeError, ValueError):
+        return default
+
+
+def endpoint_label(url: str) -> str:
+    """Low-cardinality name of an API URL for metrics: ids become ':id', the org prefix and query are dropped."""
+    path = urllib.parse.urlsplit(url).path
+    parts = [p for p in path.split("/") if p][2:]  # skip "api", "v2"
+    if parts[:1] == ["orgs"]:
+        parts = parts[2:]
+    return "/".join(p if p.replace("_", "").isalpha() else ":id" for p in parts) or "/"
+
+
+def event_resource_hrefs(event: dict, resource_type: str):
+    """Yield hrefs of resources of the given type referenced by an audit event's resource_changes."""
+    for change in event.get("resource_changes") or []:
+        res = (change or {}).get("resource") or {}
+        href = (res.get(resource_type) or {}).get("href")
+        if href:
+            yield href
 
 
 class ApiClient:
@@ -23,6 +68,7 @@ class ApiClient:
         self.cm = config_manager
         self.api_cfg = self.cm.config["api"]
         self.base_url = f"{self.api_cfg['url']}/api/v2/orgs/{self.api_cfg['org_id']}"
+        self._org_href = f"/orgs/{self.api_cfg['org_id']}"
         self._auth_header = self._build_auth_header()
         self._ssl_ctx = self._build_ssl_context()
 
@@ -38,11 +84,12 @@ class ApiClient:
             ctx.verify_mode = ssl.CERT_NONE
         return ctx
 
-    def _request(self, url, method="GET", data=None, headers=None, timeout=15, stream=False):
+    def _request(self, url, method="GET", data=None, headers=None, timeout=15, stream=False, response_headers=None):
         """
         Core HTTP helper with retry logic.
         Returns (status_code, response_body_bytes | None).
         For stream=True, returns (status_code, raw_response_object) — caller must close it.
+        If response_headers is a dict, it is filled with the response headers (lower-cased names).
         """
         if headers is None:
             headers = {}
@@ -54,44 +101,88 @@ class ApiClient:
             body = json.dumps(data).encode('utf-8')
             headers.setdefault("Content-Type", "application/json")
 
+        endpoint = endpoint_label(url)
         last_exc = None
         for attempt in range(1, MAX_RETRIES + 1):
+            started = time.perf_counter()
             try:
                 req = urllib.request.Request(url, data=body, headers=headers, method=method)
                 resp = urllib.request.urlopen(req, timeout=timeout, context=self._ssl_ctx)
+                if response_headers is not None:
+                    response_headers.update((k.lower(), v) for k, v in resp.headers.items())
                 if stream:
+                    self._observe(endpoint, method, resp.status, started)
                     return resp.status, resp
                 resp_body = resp.read()
+                self._observe(endpoint, method, resp.status, started)
                 return resp.status, resp_body
             except urllib.error.HTTPError as e:
                 status = e.code
                 resp_body = e.read()
+                self._observe(endpoint, method, status, started)
+                if response_headers is not None and e.headers is not None:
+                    response_headers.update((k.lower(), v) for k, v in e.headers.items())
                 if status == 429 and attempt < MAX_RETRIES:
+                    metrics.PCE_RETRIES.inc(endpoint=endpoint, reason="429")
                     wait = RETRY_BACKOFF_BASE ** attempt
                     logger.warning(f"Rate limited (429). Retrying in {wait}s... (attempt {attempt}/{MAX_RETRIES})")
                     time.sleep(wait)
                     last_exc = e
                     continue
                 if status in (502, 503, 504) and attempt < MAX_RETRIES:
+                    metrics.PCE_RETRIES.inc(endpoint=endpoint, reason=str(status))
                     wait = RETRY_BACKOFF_BASE ** attempt
                     logger.warning(f"Server error ({status}). Retrying in {wait}s... (attempt {attempt}/{MAX_RETRIES})")
                     time.sleep(wait)
                     last_exc = e
                     continue
+                if status >= 500 or status in (401, 403):
+                    cycle_metrics.current().count("pce_errors")
                 return status, resp_body
             except (urllib.error.URLError, OSError, TimeoutError) as e:
+                self._observe(endpoint, method, 0, started)
                 if attempt < MAX_RETRIES:
+                    metrics.PCE_RETRIES.inc(endpoint=endpoint, reason="connection")
                     wait = RETRY_BACKOFF_BASE ** attempt
                     logger.warning(f"Connection error: {e}. Retrying in {wait}s... (attempt {attempt}/{MAX_RETRIES})")
                     time.sleep(wait)
                     last_exc = e
                     continue
                 logger.error(f"Connection failed after {MAX_RETRIES} attempts: {e}")
+                cycle_metrics.current().count("pce_errors")
                 return 0, str(e).encode('utf-8')
 
         # Should not reach here, but safety fallback
         return 0, str(last_exc).encode('utf-8') if last_exc else b""
 
+    def _download_spool(self, url, budget, timeout=60):
+        """
+        Streams a GET into budget.spool(). A connection dropped mid-download is retried with
+        _request's backoff. Returns (status, spool); the spool is None unless status is 200.
+        """
+        for attempt in range(1, MAX_RETRIES + 1):
+            status, resp = self._request(url, timeout=timeout, stream=True)
+            if status != 200:
+                if hasattr(resp, "close"):
+                    resp.close()
+                return status, None
+            try:
+                return status, budget.spool(resp)
+            except (OSError, http.client.HTTPException) as e:
+                if attempt >= MAX_RETRIES:
+                    raise
+                metrics.PCE_RETRIES.inc(endpoint=endpoint_label(url), reason="download")
+                wait = RETRY_BACKOFF_BASE ** attempt
+                logger.warning(f"Download interrupted: {e}. Retrying in {wait}s... (attempt {attempt}/{MAX_RETRIES})")
+                time.sleep(wait)
+            finally:
+                resp.close()
+
+    @staticmethod
+    def _observe(endpoint, method, status, started):
+        metrics.PCE_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint,
+                                            method=method, status=status)
+
     def check_health(self):
         url = f"{self.api_cfg['url']}/api/v2/health"
         try:
@@ -102,27 +193,36 @@ class ApiClient:
             logger.error(f"Health check failed: {e}")
             return 0, str(e)
 
-    def fetch_events(self, start_time_str, max_results=1000):
+    def fetch_events(self, start_time_str, max_results=1000, event_types=None, strict=False):
+        """strict: return None instead of [] when the query fails, so callers can tell it from "no events"."""
+        failed = None if strict else []
         try:
-            params = urllib.parse.urlencode({
+            query = {
                 "timestamp[gte]": start_time_str,
                 "max_results": max_results
-            })
+            }
+            if event_types:
+                query["event_type"] = ",".join(event_types)
+            params = urllib.parse.urlencode(query)
             url = f"{self.base_url}/events?{params}"
             status, body = self._request(url, timeout=15)
             if status != 200:
                 logger.error(f"Get Events Failed: {status}")
                 print(f"{Colors.FAIL}Get Events Failed: {status}{Colors.ENDC}")
-                return []
+                return failed
             return json.loads(body)
         except Exception as e:
             logger.error(f"Fetch Events Error: {e}")
             print(f"{Colors.FAIL}Fetch Events Error: {e}{Colors.ENDC}")
-            return []
+            return failed
 
-    def execute_traffic_query_stream(self, start_time_str, end_time_str, policy_decisions):
+    def execute_traffic_query_stream(self, start_time_str, end_time_str, policy_decisions, budget=None):
         """
-        Executes an async traffic query and yields results row by row to save memory.
+        Executes an async traffic query and yields results row by row to save memory,
+        each decoded once into a compact FlowRecord. The records of one query share a
+        SymbolTable, so repeated names, IPs and labels are stored once.
+        budget: the run's MemoryBudget (default: a fresh one from settings.memory_budget_mb);
+        the download is spooled within it and spills to a temporary file beyond it.
         """
         import urllib.parse
 
@@ -138,9 +238,11 @@ class ApiClient:
 
         print(f"正在提交流量查詢 ({start_time_str} 至 {end_time_str})...")
         logger.info(f"Submitting traffic query ({start_time_str} to {end_time_str})")
+        cycle = cycle_metrics.current()
         try:
             url = f"{self.base_url}/traffic_flows/async_queries"
-            status, body = self._request(url, method="POST", data=payload, timeout=10)
+            with cycle.stage("pce_submit"):
+                status, body = self._request(url, method="POST", data=payload, timeout=10)
 
             if status not in (201, 202):
                 text = body.decode('utf-8', errors='replace') if isinstance(body, bytes) else str(body)
@@ -154,6 +256,7 @@ class ApiClient:
 
             # Polling
             poll_url = f"{self.api_cfg['url']}/api/v2{job_url}"
+            poll_started = time.perf_counter()
             for _ in range(60):  # Wait up to 2 mins
                 time.sleep(2)
                 poll_status, poll_body = self._request(poll_url, timeout=15)
@@ -168,26 +271,44 @@ class ApiClient:
                 if state == "failed":
                     print(" 失敗。")
                     logger.error("Traffic query failed.")
+                    cycle.add_time("pce_poll", time.perf_counter() - poll_started)
                     return
                 print(".", end="", flush=True)
             else:
                 print(" Timeout.")
                 logger.error("Traffic query timed out.")
+                cycle.add_time("pce_poll", time.perf_counter() - poll_started)
                 return
+            cycle.add_time("pce_poll", time.perf_counter() - poll_started)
 
-            # Stream Download
+            # Stream Download into a spool bounded by the memory budget
+            if budget is None:
+                budget = budget_from_config(self.cm)
             dl_url = f"{self.api_cfg['url']}/api/v2{job_url}/download"
-            dl_status, dl_body = self._request(dl_url, timeout=60)
-            if dl_status != 200:
-                logger.error(f"Download failed: {dl_status}")
-                return
-
-            buffer = BytesIO(dl_body)
+            with cycle.stage("download"):
+                dl_status, buffer = self._download_spool(dl_url, budget)
+                if dl_status != 200:
+                    logger.error(f"Download failed: {dl_status}")
+                    return
+            cycle.count("bytes_downloaded", buffer.seek(0, 2))
+            buffer.seek(0)
+            # Decompression and parsing interleave with the consumer, so their time is summed per line
+            perf = time.perf_counter
+            decompress_s = parse_s = 0.0
+            parse_errors = 0
+            symbols = SymbolTable()
 
             # Handle Gzip
             try:
                 with gzip.GzipFile(fileobj=buffer, mode='rb') as f:
-                    for line in f:
+                    lines = iter(f)
+                    while True:
+                        t0 = perf()
+                        line = next(lines, None)
+                        t1 = perf()
+                        decompress_s += t1 - t0
+                        if line is None:
+                            break
                         line = line.strip()
                         if not line:
                             continue
@@ -197,48 +318,180 @@ class ApiClient:
                             if line.endswith(b','):
                                 line = line[:-1]
                             data = json.loads(line)
+                            parse_s += perf() - t1
                             if isinstance(data, list):
                                 for item in data:
-                                    yield item
+                                    yield FlowRecord(item, symbols)
                             else:
-                                yield data
+                                yield FlowRecord(data, symbols)
                         except json.JSONDecodeError as je:
+                            parse_errors += 1
                             logger.debug(f"Skipping unparseable line: {je}")
             except (gzip.BadGzipFile, OSError):
-                # Fallback if not gzip
+                # Fallback if not gzip: plain NDJSON, read line by line from the spool
                 buffer.seek(0)
-                text_data = buffer.read().decode('utf-8', errors='replace')
-                for line in text_data.splitlines():
+                for line in buffer:
                     if not line.strip():
                         continue
                     try:
+                        t0 = perf()
                         data = json.loads(line)
+                        parse_s += perf() - t0
                         if isinstance(data, list):
                             for item in data:
-                                yield item
+                                yield FlowRecord(item, symbols)
                         else:
-                            yield data
+                            yield FlowRecord(data, symbols)
                     except json.JSONDecodeError as je:
+                        parse_errors += 1
                         logger.debug(f"Skipping unparseable line: {je}")
+            finally:
+                budget.release_spool(buffer)
+                cycle.add_time("decompress", decompress_s)
+                cycle.add_time("parse", parse_s)
+                if parse_errors:
+                    cycle.count("parse_errors", parse_errors)
+                cycle.count("distinct_strings", len(symbols))
+                cycle.count("distinct_labels", len(symbols.labels))
 
         except Exception as e:
             logger.error(f"Query Exception: {e}")
             print(f"Query Exception: {e}")
             return
 
+    def fetch_collection_async(self, collection: str, params: dict = None, timeout: int = ASYNC_JOB_TIMEOUT):
+        """
+        Export a whole collection (e.g. "workloads") using an asynchronous GET job
+        (Prefer: respond-async -> poll jobs/[uuid] -> GET datafiles/[uuid]).
+        Returns the list of items, or None on failure.
+        """
+        query = f"?{urllib.parse.urlencode(params, doseq=True)}" if params else ""
+        url = f"{self.base_url}/{collection}{query}"
+        resp_headers = {}
+        try:
+            status, body = self._request(url, headers={"Prefer": "respond-async"}, timeout=30,
+                                         response_headers=resp_headers)
+            if status == 200:
+                # Small collections may be answered synchronously
+                return json.loads(body)
+            if status != 202 or not resp_headers.get("location"):
+                logger.error(f"Async {collection} export failed: {status}")
+                return None
+
+            job_url = resp_headers["location"]
+            if not job_url.startswith("http"):
+                job_url = f"{self.api_cfg['url']}/api/v2{job_url}"
+            deadline = time.monotonic() + timeout
+            wait = _retry_after_seconds(resp_headers, default=2)
+            while time.monotonic() < deadline:
+                time.sleep(wait)
+                poll_headers = {}
+                poll_status, poll_body = self._request(job_url, timeout=15, response_headers=poll_headers)
+                if poll_status != 200:
+                    wait = _retry_after_seconds(poll_headers, default=wait)
+                    continue
+                job = json.loads(poll_body)
+                state = str(job.get("status", "")).lower()
+                if state == "done":
+                    result_href = (job.get("result") or {}).get("href")
+                    if not result_href:
+                        logger.error(f"Async {collection} export finished without a result.")
+                        return None
+                    dl_status, dl_body = self._request(f"{self.api_cfg['url']}/api/v2{result_href}", timeout=120)
+                    if dl_status != 200:
+                        logger.error(f"Async {collection} download failed: {dl_status}")
+                        return None
+                    return json.loads(dl_body)
+                if state == "failed":
+                    logger.error(f"Async {collection} export job failed.")
+                    return None
+                wait = _retry_after_seconds(poll_headers, default=wait)
+            logger.error(f"Async {collection} export timed out.")
+            return None
+        except Exception as e:
+            logger.error(f"Async {collection} export error: {e}")
+            return None
+
     # ═══════════════════════════════════════════════════════════════════════════════
     # Quarantine Feature: Labels and Workloads
     # ═══════════════════════════════════════════════════════════════════════════════
 
-    def get_labels(self, key: str) -> list:
+    def _cache_key(self, href: str):
+        return (self.api_cfg['url'], href)
+
+    def _cached_get(self, href: str, timeout=10, ttl=None, revalidate=False):
+        """
+        GET an API href (e.g. /orgs/1/workloads/xx) through the shared metadata cache.
+        Fresh entries are served locally; stale ones (or all, with revalidate=True) are
+        revalidated with If-None-Match.
+        Returns (status, parsed_json | None). A 304 is reported as 200 with the cached value.
+        """
+        key = self._cache_key(href)
+        entry = _metadata_cache.get_entry(key)
+        if entry is not None and entry.is_fresh() and not revalidate:
+            return 200, entry.value
+
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        resp_headers = {}
+        status, body = self._request(f"{self.api_cfg['url']}/api/v2{href}", headers=headers,
+                                     timeout=timeout, response_headers=resp_headers)
+        if status == 304 and entry is not None:
+            _metadata_cache.touch(key, ttl=ttl)
+            return 200, entry.value
+        if status == 200:
+            value = json.loads(body)
+            _metadata_cache.set(key, value, etag=resp_headers.get("etag"), ttl=ttl)
+            return 200, value
+        if status == 404:
+            _metadata_cache.invalidate(key)
+        return status, None
+
+    def invalidate_workloads(self, hrefs=()):
+        """Drop cached workloads (by href) and every cached workload search result."""
+        search_prefix = f"{self._org_href}/workloads?"
+        targets = {self._cache_key(h) for h in hrefs}
+        url = self.api_cfg['url']
+        _metadata_cache.invalidate_where(
+            lambda k: k in targets or (k[0] == url and k[1].startswith(search_prefix)))
+
+    def invalidate_labels(self):
+        """Drop cached label collections and the resolved Quarantine label hrefs."""
+        label_prefix = f"{self._org_href}/labels"
+        url = self.api_cfg['url']
+        _metadata_cache.invalidate_where(lambda k: k[0] == url and k[1].startswith(label_prefix))
+        with _quarantine_lock:
+            _quarantine_hrefs.pop(self.base_url, None)
+
+    def note_events(self, events: list):
+        """Invalidate cached metadata affected by PCE audit events (label.* and workload.*)."""
+        labels_changed = False
+        workload_hrefs = set()
+        workloads_changed = False
+        for evt in events or []:
+            etype = str(evt.get("event_type", ""))
+            if etype.startswith("label."):
+                labels_changed = True
+            elif etype.startswith("workload"):
+                workloads_changed = True
+                workload_hrefs.update(event_resource_hrefs(evt, "workload"))
+        if labels_changed:
+            logger.info("Label change events received; refreshing label cache.")
+            self.invalidate_labels()
+        if workloads_changed:
+            self.invalidate_workloads(workload_hrefs)
+            from src.workload_index import notify_events
+            notify_events(self, events)
+
+    def get_labels(self, key: str, revalidate: bool = False) -> list:
         try:
             params = urllib.parse.urlencode({"key": key})
-            url = f"{self.base_url}/labels?{params}"
-            status, body = self._request(url, timeout=10)
+            status, labels = self._cached_get(f"{self._org_href}/labels?{params}", timeout=10, revalidate=revalidate)
             if status != 200:
                 logger.error(f"Get Labels Failed: {status}")
                 return []
-            return json.loads(body)
+            return labels
         except Exception as e:
             logger.error(f"Fetch Labels Error: {e}")
             return []
@@ -249,6 +502,9 @@ class ApiClient:
             payload = {"key": key, "value": value}
             status, body = self._request(url, method="POST", data=payload, timeout=10)
             if status == 201:
+                label_prefix = f"{self._org_href}/labels"
+                api_url = self.api_cfg['url']
+                _metadata_cache.invalidate_where(lambda k: k[0] == api_url and k[1].startswith(label_prefix))
                 return json.loads(body)
             logger.error(f"Create Label Failed: {status} - {body.decode(errors='replace')}")
             return {}
@@ -256,31 +512,63 @@ class ApiClient:
             logger.error(f"Create Label Error: {e}")
             return {}
 
-    def check_and_create_quarantine_labels(self):
-        """Ensure Quarantine labels (Mild, Moderate, Severe) exist in the PCE. Returns list of their hrefs."""
-        existing_labels = self.get_labels("Quarantine")
-        existing_values = {lbl.get("value"): lbl.get("href") for lbl in existing_labels if lbl.get("value")}
-        
-        target_levels = ["Mild", "Moderate", "Severe"]
-        label_hrefs = {}
-        for level in target_levels:
-            if level in existing_values:
-                label_hrefs[level] = existing_values[level]
+    def check_and_create_quarantine_labels(self, refresh: bool = False):
+        """
+        Ensure Quarantine labels (Mild, Moderate, Severe) exist in the PCE. Returns {level: href}.
+        Resolved once per process and PCE org; re-resolved when refresh=True or after invalidate_labels().
+        """
+        with _quarantine_lock:
+            cached = _quarantine_hrefs.get(self.base_url)
+            if cached and not refresh:
+                return dict(cached)
+
+            if refresh:
+                _metadata_cache.invalidate(self._cache_key(
+                    f"{self._org_href}/labels?{urllib.parse.urlencode({'key': 'Quarantine'})}"))
+            existing_labels = self.get_labels("Quarantine")
+            existing_values = {lbl.get("value"): lbl.get("href") for lbl in existing_labels if lbl.get("value")}
+
+            label_hrefs = {}
+            for level in QUARANTINE_LEVELS:
+                if level in existing_values:
+                    label_hrefs[level] = existing_values[level]
+                else:
+                    logger.info(f"Creating missing Quarantine label: {level}")
+                    new_lbl = self.create_label("Quarantine", level)
+                    if new_lbl and "href" in new_lbl:
+                        label_hrefs[level] = new_lbl["href"]
+
+            if len(label_hrefs) == len(QUARANTINE_LEVELS):
+                _quarantine_hrefs[self.base_url] = dict(label_hrefs)
+            return label_hrefs
+
+    def find_quarantine_labels(self, refresh: bool = False) -> dict:
+        """
+        Read-only counterpart of check_and_create_quarantine_labels(): the Quarantine
+        labels that already exist, {level: href}. Never creates labels; a complete
+        set is cached the same way. refresh=True re-reads the labels and replaces
+        the cached set (or drops it when a label has gone).
+        """
+        with _quarantine_lock:
+            cached = _quarantine_hrefs.get(self.base_url)
+            if cached and not refresh:
+                return dict(cached)
+            existing = {lbl.get("value"): lbl.get("href") for lbl in self.get_labels("Quarantine", revalidate=refresh)
+                        if lbl.get("value")}
+            label_hrefs = {level: existing[level] for level in QUARANTINE_LEVELS if level in existing}
+            if len(label_hrefs) == len(QUARANTINE_LEVELS):
+                _quarantine_hrefs[self.base_url] = dict(label_hrefs)
             else:
-                logger.info(f"Creating missing Quarantine label: {level}")
-                new_lbl = self.create_label("Quarantine", level)
-                if new_lbl and "href" in new_lbl:
-                    label_hrefs[level] = new_lbl["href"]
-        return label_hrefs
-
-    def get_workload(self, href: str) -> dict:
-        """Fetch a specific workload by its href"""
+                _quarantine_hrefs.pop(self.base_url, None)
+            return label_hrefs
+
+    def get_workload(self, href: str, revalidate: bool = False) -> dict:
+        """Fetch a specific workload by its href. Use revalidate=True before read-modify-write updates."""
         try:
             # href usually looks like /orgs/1/workloads/xx-yy-zz
-            url = f"{self.api_cfg['url']}/api/v2{href}"
-            status, body = self._request(url, timeout=10)
+            status, wl = self._cached_get(href, timeout=10, revalidate=revalidate)
             if status == 200:
-                return json.loads(body)
+                return wl
             logger.error(f"Get Workload Failed: {status} for {href}")
             return {}
         except Exception as e:
@@ -293,9 +581,14 @@ class ApiClient:
             url = f"{self.api_cfg['url']}/api/v2{href}"
             payload = {"labels": labels}
             status, body = self._request(url, method="PUT", data=payload, timeout=10)
+            self.invalidate_workloads([href])
             if status == 204:
                 return True
-            logger.error(f"Update Workload Labels Failed: {status} - {body.decode(errors='replace')}")
+            text = body.decode(errors='replace') if isinstance(body, bytes) else str(body)
+            if status in (404, 406) and "label" in text.lower():
+                # A label we hold an href for no longer exists; resolve Quarantine labels again next time
+                self.invalidate_labels()
+            logger.error(f"Update Workload Labels Failed: {status} - {text}")
             return False
         except Exception as e:
             logger.error(f"Update Workload Labels Error: {e}")
@@ -305,12 +598,154 @@ class ApiClient:
         """Search workloads matching query params (e.g., name, hostname, ip_address, labels)"""
         try:
             query_str = urllib.parse.urlencode(params, doseq=True)
-            url = f"{self.base_url}/workloads?{query_str}"
-            status, body = self._request(url, timeout=15)
+            status, workloads = self._cached_get(f"{self._org_href}/workloads?{query_str}",
+                                                 timeout=15, ttl=SEARCH_CACHE_TTL)
             if status == 200:
-                return json.loads(body)
+                return workloads
             logger.error(f"Search Workloads Failed: {status}")
             return []
         except Exception as e:
             logger.error(f"Search Workloads Error: {e}")
             return []
+
+    # ═══════════════════════════════════════════════════════════════════════════════
+    # Bulk Labeling
+    # ═══════════════════════════════════════════════════════════════════════════════
+
+    def _bulk_export_threshold(self, export_min: int = None) -> float:
+        """Batch size from which get_workloads_batch() exports the whole workload collection."""
+        if export_min is None:
+            export_min = int(self.cm.config.get("settings", {}).get("bulk_export_min", BULK_EXPORT_MIN))
+        if export_min <= 0:
+            return float("inf")
+        from src.workload_index import known_size
+        size = known_size(self)
+        return max(export_min, size * BULK_EXPORT_RATIO) if size else export_min
+
+    def get_workloads_batch(self, hrefs: list, max_workers: int = BULK_FETCH_WORKERS,
+                            export_min: int = None) -> dict:
+        """
+        Fetch the current state of many workloads. Returns {href: workload} for the ones that were found.
+        The workloads API has no filter by href, so a batch that is a large share of the org is read from
+        one asynchronous export of the workload collection (see _bulk_export_threshold). Smaller batches,
+        a failed export, and hrefs the export did not contain use conditional GETs.
+        """
+        found = {}
+        unique = list(dict.fromkeys(h for h in hrefs if h))
+        if not unique:
+            return found
+        missing = unique
+        if len(unique) >= self._bulk_export_threshold(export_min):
+            workloads = self.fetch_collection_async("workloads")
+            if workloads is not None:
+                wanted = set(unique)
+                for wl in workloads:
+                    if isinstance(wl, dict) and wl.get("href") in wanted:
+                        found[wl["href"]] = wl
+                missing = [h for h in unique if h not in found]
+                if missing:
+                    logger.info(f"{len(missing)} workload(s) not in the export; fetching them one by one")
+            else:
+                logger.warning("Workload export failed; fetching workloads one by one")
+        if not missing:
+            return found
+        # Labels are about to be rewritten, so confirm cached copies with a (cheap) conditional GET
+        fetch = lambda h: self.get_workload(h, revalidate=True)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as ex:
+            for href, wl in zip(missing, ex.map(fetch, missing)):
+                if wl:
+                    found[href] = wl
+        return found
+
+    def bulk_update_workloads(self, updates: list) -> list:
+        """
+        Submit workload updates via PUT workloads/bulk_update, chunked to the PCE limit.
+        updates: [{"href": ..., "labels": [{"href": ...}, ...]}, ...]
+        Returns the hrefs the PCE reported as failed (or all hrefs of a chunk whose call failed).
+        """
+        failed = []
+        url = f"{self.base_url}/workloads/bulk_update"
+        for i in range(0, len(updates), BULK_UPDATE_CHUNK):
+            chunk = updates[i:i + BULK_UPDATE_CHUNK]
+            chunk_hrefs = [u["href"] for u in chunk]
+            try:
+                status, body = self._request(url, method="PUT", data=chunk, timeout=120)
+            except Exception as e:
+                logger.error(f"Bulk Update Error: {e}")
+                failed.extend(chunk_hrefs)
+                continue
+            if status not in (200, 201, 204, 207):
+                text = body.decode('utf-8', errors='replace') if isinstance(body, bytes) else str(body)
+                logger.error(f"Bulk Update Failed: {status} - {text[:500]}")
+                failed.extend(chunk_hrefs)
+                continue
+            chunk_failed, label_errors = self._parse_bulk_failures(body, chunk_hrefs)
+            failed.extend(chunk_failed)
+            if label_errors:
+                self.invalidate_labels()
+        self.invalidate_workloads([u["href"] for u in updates])
+        return failed
+
+    @staticmethod
+    def _parse_bulk_failures(body, chunk_hrefs):
+        """
+        The PCE answers bulk calls with one status object per item; items carrying errors failed.
+        Returns (failed_hrefs, saw_label_error).
+        """
+        if not body:
+            return [], False
+        try:
+            results = json.loads(body)
+        except (json.JSONDecodeError, TypeError, ValueError):
+            logger.warning("Bulk Update returned an unparseable body; treating chunk as failed.")
+            return list(chunk_hrefs), False
+        if not isinstance(results, list):
+            return [], False
+        failed = []
+        label_errors = False
+        for i, item in enumerate(results):
+            if not isinstance(item, dict):
+                continue
+            errors = item.get("errors")
+            state = str(item.get("status", "")).lower()
+            if errors or state in ("failed", "error"):
+                # Results are in request order; an item without an href is the workload at its position
+                href = item.get("href") or (chunk_hrefs[i] if i < len(chunk_hrefs) else None)
+                logger.warning(f"Bulk Update item failed: {href} - {errors or state}")
+                if "label" in json.dumps(errors or "").lower():
+                    label_errors = True
+                if href:
+                    failed.append(href)
+        return failed, label_errors
+
+    def bulk_relabel_workloads(self, hrefs: list, add_label_hrefs: list, remove_label_hrefs=()) -> dict:
+        """
+        Replace labels on many workloads at once: drop any label in remove_label_hrefs, then add
+        add_label_hrefs. Current labels are fetched in bulk (get_workloads_batch), new label sets are computed locally
+        and submitted through bulk_update; only items the PCE rejects are retried with individual PUTs.
+        Returns {"success": [hrefs], "failed": [hrefs]}.
+        """
+        remove = set(remove_label_hrefs) | set(add_label_hrefs)
+        workloads = self.get_workloads_batch(hrefs)
+
+        failed = [h for h in dict.fromkeys(hrefs) if h not in workloads]
+        new_labels = {}
+        for href, wl in workloads.items():
+            labels = [{"href": l.get("href")} for l in wl.get("labels", []) if l.get("href") not in remove]
+            labels.extend({"href": h} for h in add_label_hrefs)
+            new_labels[href] = labels
+
+        updates = [{"href": href, "labels": labels} for href, labels in new_labels.items()]
+        bulk_failed = self.bulk_update_workloads(updates) if updates else []
+
+        if bulk_failed:
+            logger.info(f"Falling back to individual updates for {len(bulk_failed)} workload(s).")
+            retry = [h for h in dict.fromkeys(bulk_failed) if h in new_labels]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(BULK_FETCH_WORKERS, len(retry) or 1)) as ex:
+                for href, ok in zip(retry, ex.map(lambda h: self.update_workload_labels(h, new_labels[h]), retry)):
+                    if not ok:
+                        failed.append(href)
+
+        failed_set = set(failed)
+        success = [h for h in new_labels if h not in failed_set]
+        return {"success": success, "failed": failed}
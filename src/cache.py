@@ -0,0 +1,98 @@
+"""
+Small thread-safe LRU cache with per-entry TTL, shared by the API client and the Web GUI.
+
+Expired entries are not dropped immediately: they stay in the cache (until evicted by
+size) together with their ETag, so callers can revalidate them with If-None-Match
+instead of downloading the full resource again.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheEntry:
+    __slots__ = ("value", "etag", "expires")
+
+    def __init__(self, value, etag, expires):
+        self.value = value
+        self.etag = etag
+        self.expires = expires
+
+    def is_fresh(self, now=None) -> bool:
+        return (now if now is not None else time.monotonic()) < self.expires
+
+
+class TTLCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_entry(self, key):
+        """Returns the CacheEntry for key (fresh or stale), or None. Counts a hit only when fresh."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if entry.is_fresh():
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def get(self, key, default=None):
+        """Returns the cached value if present and not expired."""
+        entry = self.get_entry(key)
+        if entry is not None and entry.is_fresh():
+            return entry.value
+        return default
+
+    def set(self, key, value, etag=None, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = CacheEntry(value, etag, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def touch(self, key, ttl=None):
+        """Extends an entry's lifetime after a successful revalidation (HTTP 304)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+                self._data.move_to_end(key)
+                self.revalidations += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drops every entry whose key satisfies predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
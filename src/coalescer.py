@@ -0,0 +1,266 @@
+"""
+Alert digest / coalescing stage between the Analyzer and the Reporter.
+
+AlertCoalescer exposes the same add_*_alert() / send_alerts() interface as
+Reporter, so the Analyzer feeds it unchanged. Alerts are grouped by kind, rule
+and fingerprint (see alert_fingerprint); repeated firings of the same group are
+merged into a single alert that carries an occurrence count, the first/last
+time it fired, the latest and peak values and the merged top talkers.
+
+Pending groups are flushed to a Reporter (and from there to the dispatcher, if
+one is set) when the digest window has elapsed, when max_groups distinct
+groups are pending, when a health alert arrives, or on an explicit
+flush(). With the default window of 0 every send_alerts() call flushes, so only
+duplicates within one cycle are merged. Tuned through alerts.digest:
+
+    "digest": {"window_seconds": 0, "max_groups": 50, "max_raw_per_alert": 10}
+
+delta_fingerprint() adds the bucketed alert value to that identity. The Analyzer
+keeps the last one sent per rule in state.json; a re-fired alert with the same
+delta fingerprint is flagged "ongoing" and reported as a short "still ongoing"
+update instead of a full report. That only happens once the first, full alert
+was delivered: the delivery path calls record_delivery() when a channel sent
+or dead-lettered it, the Analyzer moves that outcome into state.json
+(Analyzer.save_deliveries, or at the start of the next cycle) and keeps
+re-sending the full report until a delivery is confirmed. Tuned through alerts.delta:
+
+    "delta": {"enabled": true, "bucket_ratio": 1.25}
+"""
+import math
+import time
+import json
+import hashlib
+import logging
+import datetime
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DIGEST_DEFAULTS = {
+    "window_seconds": 0,    # how long alerts are held and merged before sending
+    "max_groups": 50,       # flush early once this many distinct alert groups are pending
+    "max_raw_per_alert": 10,
+}
+DELTA_DEFAULTS = {
+    "enabled": True,
+    "bucket_ratio": 1.25,   # values within this factor of each other usually share a bucket
+}
+MAX_DELIVERY_RECORDS = 1000
+
+_delivery_lock = threading.Lock()
+_deliveries = {}  # delta fingerprint of a full alert -> True (delivered) / False (a channel gave up)
+
+
+def _top_talkers(details: str) -> Counter:
+    """Parses the Analyzer's "key: count<br>key: count" top-talker summary."""
+    talkers = Counter()
+    for line in (details or "").split("<br>"):
+        key, sep, count = line.rpartition(": ")
+        if not sep:
+            continue
+        try:
+            talkers[key] += int(count)
+        except ValueError:
+            talkers[line] += 1
+    return talkers
+
+
+def alert_fingerprint(kind: str, alert: dict) -> str:
+    """Stable identity of an alert: what fired and who was involved, ignoring values and timestamps."""
+    if kind == "health":
+        parts = [alert.get("status")]
+    elif kind == "event":
+        parts = [alert.get("rule"), alert.get("severity"), alert.get("source")]
+    else:
+        parts = [alert.get("rule"), sorted(_top_talkers(alert.get("details")))]
+    return hashlib.sha1(json.dumps([kind] + parts, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _value_bucket(value, ratio: float):
+    v = _as_float(value)
+    if v is None or v <= 0 or ratio <= 1:
+        return v
+    return math.floor(math.log(v, ratio))
+
+
+def delta_fingerprint(kind: str, alert: dict, ratio: float = DELTA_DEFAULTS["bucket_ratio"]) -> str:
+    """alert_fingerprint plus the log-bucketed alert value: changes when the incident materially changes."""
+    key = f"{alert_fingerprint(kind, alert)}:{_value_bucket(alert.get('count'), ratio)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def record_delivery(alerts: dict, ok: bool):
+    """
+    alerts: {"traffic_alerts": [...], ...} as handed to a channel. Records the
+    outcome for every full (not ongoing) alert carrying a delta_fp; a channel
+    that gave up wins over one that delivered.
+    """
+    fps = {a.get("delta_fp") for group in alerts.values() for a in group or ()
+           if isinstance(a, dict) and a.get("delta_fp") and not a.get("ongoing")}
+    if not fps:
+        return
+    with _delivery_lock:
+        for fp in fps:
+            if not ok:
+                _deliveries[fp] = False
+            else:
+                _deliveries.setdefault(fp, True)
+        while len(_deliveries) > MAX_DELIVERY_RECORDS:
+            del _deliveries[next(iter(_deliveries))]
+
+
+def take_delivery(fp: str):
+    """Outcome recorded for fp (True, False, or None while still pending) and forgets it."""
+    with _delivery_lock:
+        return _deliveries.pop(fp, None)
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Group:
+    __slots__ = ("kind", "alert", "occurrences", "first_seen", "last_seen", "peak", "talkers", "raw", "max_raw")
+
+    def __init__(self, kind, alert, now, max_raw):
+        self.kind = kind
+        self.max_raw = max_raw
+        self.alert = dict(alert)
+        self.occurrences = 1
+        self.first_seen = self.last_seen = now
+        self.peak = _as_float(alert.get("count"))
+        self.talkers = _top_talkers(alert.get("details")) if kind in ("traffic", "metric") else None
+        self.raw = list(alert.get("raw_data") or [])
+        self._trim()
+
+    def _trim(self):
+        if len(self.raw) <= self.max_raw:
+            return
+        if self.kind in ("traffic", "metric"):
+            # Keep the heaviest flows across all merged firings
+            self.raw.sort(key=lambda x: x.get("_metric_val", 0) if isinstance(x, dict) else 0, reverse=True)
+            del self.raw[self.max_raw:]
+        else:
+            del self.raw[:-self.max_raw]
+
+    def merge(self, alert, now):
+        self.occurrences += 1
+        self.last_seen = now
+        value = _as_float(alert.get("count"))
+        if value is not None and (self.peak is None or value > self.peak):
+            self.peak = value
+        if self.talkers is not None:
+            self.talkers.update(_top_talkers(alert.get("details")))
+        self.raw.extend(alert.get("raw_data") or [])
+        self._trim()
+        # The newest values win; identity fields are equal by construction. The group is only
+        # an "ongoing" update if every merged alert is: otherwise it carries a first snapshot.
+        ongoing = self.alert.get("ongoing") and alert.get("ongoing")
+        self.alert.update(alert)
+        if not ongoing:
+            self.alert.pop("ongoing", None)
+            self.alert.pop("ongoing_since", None)
+
+    def build(self) -> dict:
+        out = dict(self.alert)
+        if self.occurrences > 1:
+            out["occurrences"] = self.occurrences
+            out["first_seen"] = self.first_seen
+            out["last_seen"] = self.last_seen
+            if self.peak is not None:
+                out["peak"] = f"{self.peak:.2f}" if self.kind == "metric" else str(int(self.peak))
+        if self.talkers is not None:
+            out["details"] = "<br>".join(f"{k}: {v}" for k, v in self.talkers.most_common(10))
+        if self.raw:
+            out["raw_data"] = list(self.raw)
+        return out
+
+
+class AlertCoalescer:
+    def __init__(self, cm, dispatcher=None, reporter_factory=None):
+        """reporter_factory(cm, dispatcher) builds the Reporter a digest is flushed to; defaults to Reporter."""
+        self.cm = cm
+        self.dispatcher = dispatcher
+        self.reporter_factory = reporter_factory or self._default_reporter
+        self._groups = {}  # (kind, fingerprint) -> _Group, in first-seen order
+        self._window_start = None
+        self._urgent = False
+        self._lock = threading.Lock()
+        self.stats = {"received": 0, "merged": 0, "flushes": 0}
+
+    @staticmethod
+    def _default_reporter(cm, dispatcher):
+        from src.reporter import Reporter
+        return Reporter(cm, dispatcher=dispatcher)
+
+    def _settings(self) -> dict:
+        settings = dict(DIGEST_DEFAULTS)
+        settings.update(self.cm.config.get("alerts", {}).get("digest") or {})
+        return settings
+
+    def _add(self, kind: str, alert: dict):
+        now = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        max_raw = int(self._settings()["max_raw_per_alert"])
+        key = (kind, alert_fingerprint(kind, alert))
+        with self._lock:
+            self.stats["received"] += 1
+            if self._window_start is None:
+                self._window_start = time.monotonic()
+            group = self._groups.get(key)
+            if group is None:
+                self._groups[key] = _Group(kind, alert, now, max_raw)
+            else:
+                group.merge(alert, now)
+                self.stats["merged"] += 1
+            if kind == "health":
+                self._urgent = True
+
+    def add_health_alert(self, alert):
+        self._add("health", alert)
+
+    def add_event_alert(self, alert):
+        self._add("event", alert)
+
+    def add_traffic_alert(self, alert):
+        self._add("traffic", alert)
+
+    def add_metric_alert(self, alert):
+        self._add("metric", alert)
+
+    def pending(self) -> int:
+        return len(self._groups)
+
+    def due(self) -> bool:
+        settings = self._settings()
+        with self._lock:
+            if not self._groups:
+                return False
+            if self._urgent or len(self._groups) >= int(settings["max_groups"]):
+                return True
+            return time.monotonic() - self._window_start >= float(settings["window_seconds"])
+
+    def send_alerts(self, force_test=False):
+        """Called once per cycle: flushes the digest if it is due, otherwise keeps merging."""
+        if force_test or self.due():
+            self.flush(force_test=force_test)
+
+    def flush(self, force_test=False):
+        with self._lock:
+            groups = list(self._groups.values())
+            self._groups = {}
+            self._window_start = None
+            self._urgent = False
+        if not groups and not force_test:
+            return
+        rep = self.reporter_factory(self.cm, self.dispatcher)
+        for group in groups:
+            getattr(rep, f"add_{group.kind}_alert")(group.build())
+        merged = sum(g.occurrences for g in groups)
+        if merged > len(groups):
+            logger.info(f"Alert digest: {merged} alerts coalesced into {len(groups)}")
+        self.stats["flushes"] += 1
+        rep.send_alerts(force_test=force_test)
@@ -43,10 +43,28 @@ class ConfigManager:
     def __init__(self, config_file: str = CONFIG_FILE):
         self.config_file = config_file
         self.config = json.loads(json.dumps(_DEFAULT_CONFIG))  # deep copy
+        self.mtime_stamp = None
         self.load()
 
+    def _file_stamp(self):
+        """Returns an (mtime_ns, size) tuple for the config file, or None if it is missing."""
+        try:
+            st = os.stat(self.config_file)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """Re-reads config.json only when its mtime/size changed since the last load or save."""
+        stamp = self._file_stamp()
+        if stamp is not None and stamp == self.mtime_stamp:
+            return False
+        self.load()
+        return True
+
     def load(self):
         if os.path.exists(self.config_file):
+            self.mtime_stamp = self._file_stamp()
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
@@ -66,6 +84,7 @@ class ConfigManager:
                 json.dump(self.config, f, indent=4, ensure_ascii=False)
             # On Windows, os.replace handles atomic rename
             os.replace(tmp_file, self.config_file)
+            self.mtime_stamp = self._file_stamp()
             lang = self.config.get("settings", {}).get("language", "en")
             set_language(lang)
             print(f"{Colors.GREEN}{t('config_saved')}{Colors.ENDC}")
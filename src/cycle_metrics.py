@@ -0,0 +1,128 @@
+"""
+Per-cycle timing and counters for the monitoring hot path.
+
+A monitoring cycle (run_analysis plus alert delivery) is wrapped in cycle():
+
+    with cycle_metrics.cycle("monitor"):
+        ana.run_analysis()
+        reporter.send_alerts()
+
+While it runs, ApiClient, Analyzer and Reporter record into current():
+
+  - stages:   wall time per stage in ms. ApiClient records pce_submit,
+              pce_poll, download, decompress and parse; Analyzer records
+              health_check, events, flow_scan, triggers and state_save;
+              Reporter records alert_delivery. decompress and parse happen
+              while Analyzer pulls flows, so they are part of flow_scan.
+  - counters: bytes downloaded, flows processed, events, alerts, ...
+  - rules:    per rule id, the number of matching flows/events and the time
+              spent evaluating the rule.
+
+When the cycle ends, one JSON line ("cycle_metrics {...}") is logged, the
+record is kept in a rolling in-memory history (history()) and fed into the
+Prometheus metrics (src/metrics.py). The active cycle is per thread, so a GUI
+request running on another thread never records into it.
+Outside a cycle current() returns a new throwaway record on every call; it is
+never stored or emitted.
+"""
+import json
+import time
+import logging
+import datetime
+import threading
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SIZE = 100  # cycles kept in memory
+
+_local = threading.local()
+_history = deque(maxlen=HISTORY_SIZE)
+_seq = itertools.count(1)
+
+
+class CycleMetrics:
+    __slots__ = ("kind", "cycle", "started", "_t0", "duration_ms", "status", "stages", "counters", "rules")
+
+    def __init__(self, kind: str = "cycle"):
+        self.kind = kind
+        self.cycle = 0
+        self.started = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self._t0 = time.perf_counter()
+        self.duration_ms = 0.0
+        self.status = "ok"
+        self.stages = {}
+        self.counters = {}
+        self.rules = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Adds the wall time of the block to the named stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+
+    def count(self, name: str, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def rule(self, rule: dict) -> list:
+        """The [name, matches, eval_seconds] accumulator of a rule; callers update it in place."""
+        rid = str(rule.get("id"))
+        entry = self.rules.get(rid)
+        if entry is None:
+            entry = self.rules[rid] = [rule.get("name", ""), 0, 0.0]
+        return entry
+
+    def to_dict(self) -> dict:
+        return {
+            "cycle": self.cycle,
+            "kind": self.kind,
+            "started": self.started,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 2),
+            "stages": {k: round(v, 2) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            "rules": {rid: {"name": name, "matches": matches, "eval_ms": round(secs * 1000, 2)}
+                      for rid, (name, matches, secs) in self.rules.items()},
+        }
+
+
+def current() -> CycleMetrics:
+    """The cycle active on this thread, or a new throwaway record outside a cycle."""
+    m = getattr(_local, "metrics", None)
+    return m if m is not None else CycleMetrics("untracked")
+
+
+@contextmanager
+def cycle(kind: str = "monitor"):
+    """Makes a new CycleMetrics current for the block, then logs and stores it."""
+    previous = getattr(_local, "metrics", None)
+    m = CycleMetrics(kind)
+    m.cycle = next(_seq)
+    _local.metrics = m
+    try:
+        yield m
+    except BaseException:
+        m.status = "error"
+        raise
+    finally:
+        m.duration_ms = (time.perf_counter() - m._t0) * 1000
+        _local.metrics = previous
+        record = m.to_dict()
+        _history.append(record)
+        metrics.observe_cycle(record)
+        logger.info("cycle_metrics %s", json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+
+def history(limit: int = None) -> list:
+    """Most recent cycle records, oldest first."""
+    records = list(_history)
+    return records[-limit:] if limit else records
@@ -0,0 +1,376 @@
+"""
+Asynchronous alert delivery.
+
+Reporter.send_alerts() hands a snapshot of the collected alerts to an
+AlertDispatcher with a single put on a bounded in-process queue; the monitoring
+cycle never waits for SMTP, LINE or webhook endpoints. A dispatcher thread moves
+queued alerts into a SQLite spool (one row per channel, or per target for the
+webhook and LINE channels) and hands them to a per-channel thread pool, so a
+slow mail relay or a dead webhook endpoint does not hold back the others.
+
+Mail deliveries that are due together (a burst of alerts, a retry scan after a
+relay outage, rows resumed at startup) are sent as one batch over a single SMTP
+session (SmtpPool.send_many), up to mail_batch messages per batch.
+
+Failed deliveries stay in the spool and are retried with exponential backoff;
+after max_attempts, or when a channel is not configured, the row is kept as a
+dead letter for inspection. Rows still pending when the process stops are
+delivered after the next start.
+
+Tuned through alerts.dispatch in config.json:
+
+    "dispatch": {"queue_size": 1000, "workers_per_channel": 4, "max_attempts": 8,
+                 "backoff_base": 30, "backoff_max": 3600, "mail_batch": 20}
+"""
+import os
+import json
+import time
+import queue
+import random
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src import smtp_pool, metrics
+from src.coalescer import record_delivery
+
+logger = logging.getLogger(__name__)
+
+PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(PKG_DIR)
+SPOOL_FILE = os.path.join(ROOT_DIR, "alert_spool.db")
+
+CHANNELS = ("mail", "line", "webhook", "syslog")
+TARGET_CHANNELS = ("line", "webhook")
+DISPATCH_DEFAULTS = {
+    "queue_size": 1000,
+    "workers_per_channel": 4,
+    "max_attempts": 8,
+    "backoff_base": 30,     # seconds before the first retry; doubles on every attempt
+    "backoff_max": 3600,
+    "mail_batch": 20,       # mails sent over one SMTP session when several are due at once
+}
+POLL_INTERVAL = 1.0  # seconds between spool scans for due retries
+
+STATUS_PENDING = "pending"
+STATUS_DEAD = "dead"
+
+
+class AlertSpool:
+    """SQLite-backed store of deliveries that have not succeeded yet. Thread-safe."""
+
+    def __init__(self, path: str = SPOOL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                created REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (status, next_attempt)")
+
+    def add(self, channel: str, subject: str, payload: str) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO deliveries (channel, subject, payload, next_attempt, created) VALUES (?, ?, ?, ?, ?)",
+                (channel, subject, payload, now, now))
+            return cur.lastrowid
+
+    def due(self, now: float = None, exclude=()) -> list:
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, channel, subject, payload, attempts FROM deliveries "
+                "WHERE status = ? AND next_attempt <= ? ORDER BY next_attempt",
+                (STATUS_PENDING, now)).fetchall()
+        return [r for r in rows if r[0] not in exclude]
+
+    def done(self, row_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM deliveries WHERE id = ?", (row_id,))
+
+    def retry(self, row_id: int, attempts: int, next_attempt: float, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                (attempts, next_attempt, error, row_id))
+
+    def dead(self, row_id: int, attempts: int, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                (STATUS_DEAD, attempts, error, row_id))
+
+    def dead_letters(self) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, channel, subject, attempts, last_error, created FROM deliveries "
+                "WHERE status = ? ORDER BY id", (STATUS_DEAD,)).fetchall()
+        return [{"id": r[0], "channel": r[1], "subject": r[2], "attempts": r[3],
+                 "last_error": r[4], "created": r[5]} for r in rows]
+
+    def requeue_dead(self) -> int:
+        """Moves every dead letter back to pending for another round of attempts."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = 0, next_attempt = ? WHERE status = ?",
+                (STATUS_PENDING, time.time(), STATUS_DEAD))
+            return cur.rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM deliveries GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AlertDispatcher:
+    def __init__(self, cm, spool: AlertSpool = None, deliver_fn=None):
+        """
+        deliver_fn(channel, subject, alerts) sends one delivery and returns True (sent),
+        False (transient failure, retry) or None (channel not configured, dead-letter).
+        Defaults to rendering through a Reporter.
+        """
+        self.cm = cm
+        self.settings = dict(DISPATCH_DEFAULTS)
+        self.settings.update(cm.config.get("alerts", {}).get("dispatch") or {})
+        self.spool = spool or AlertSpool()
+        self.deliver_fn = deliver_fn or self._deliver_with_reporter
+        self._batch_mail = deliver_fn is None  # batching renders through the Reporter too
+        self._queue = queue.Queue(maxsize=int(self.settings["queue_size"]))
+        self._stop = threading.Event()
+        self._thread = None
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+        self._pools = {}
+        self.stats = {"submitted": 0, "sent": 0, "retried": 0, "dead": 0, "overflow": 0}
+
+    # ─── Hand-off (called from the monitoring cycle) ──────────────────────
+
+    def _expand(self, channels) -> list:
+        """webhook/line become one delivery per target ("webhook:soar"), each retried on its own."""
+        from src.reporter import alert_targets
+        out = []
+        for c in channels:
+            if c not in CHANNELS:
+                continue
+            names = [tg["name"] for tg in alert_targets(self.cm, c)] if c in TARGET_CHANNELS else []
+            if names:
+                out.extend(f"{c}:{n}" for n in names)
+            else:
+                out.append(c)
+        return out
+
+    def submit(self, subject: str, alerts: dict, channels) -> bool:
+        """Queues one delivery per channel (and target) without blocking. Returns False if the queue was full."""
+        channels = self._expand(channels)
+        if not channels:
+            return True
+        self.stats["submitted"] += 1
+        try:
+            self._queue.put_nowait((subject, alerts, channels))
+            for c in channels:
+                metrics.ALERTS.inc(channel=c.partition(":")[0], outcome="queued")
+            return True
+        except queue.Full:
+            # Never drop an alert: write it to the spool directly and let the retry scan pick it up
+            self.stats["overflow"] += 1
+            for c in channels:
+                metrics.ALERTS.inc(channel=c.partition(":")[0], outcome="overflow")
+            logger.warning("Alert queue full; spooling delivery synchronously")
+            self._spool(subject, alerts, channels)
+            return False
+
+    # ─── Lifecycle ────────────────────────────────────────────────────────
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        workers = int(self.settings["workers_per_channel"])
+        self._pools = {c: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"alert-{c}") for c in CHANNELS}
+        pending = self.spool.counts().get(STATUS_PENDING, 0)
+        if pending:
+            logger.info(f"Resuming {pending} spooled alert deliveries")
+        self._thread = threading.Thread(target=self._loop, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+        metrics.register_collector(self._collect_metrics)
+
+    def stop(self, timeout: float = 10.0):
+        """Stops accepting work, spools whatever is still queued and waits briefly for running sends."""
+        self._stop.set()
+        metrics.unregister_collector(self._collect_metrics)
+        if self._thread:
+            self._thread.join(timeout)
+        self._drain_queue()
+        for pool in self._pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._pools = {}
+        smtp_pool.close_all()
+
+    def _collect_metrics(self):
+        with self._in_flight_lock:
+            in_flight = len(self._in_flight)
+        return [
+            ("illumio_monitor_alert_queue_depth", "gauge", "Alert deliveries waiting, by stage.",
+             [({"queue": "memory"}, self._queue.qsize()), ({"queue": "in_flight"}, in_flight)]
+             + [({"queue": f"spool_{status}"}, n) for status, n in self.spool.counts().items()]),
+        ]
+
+    # ─── Dispatcher thread ────────────────────────────────────────────────
+
+    def _spool(self, subject, alerts, channels):
+        payload = json.dumps(alerts, default=str)
+        return [(self.spool.add(c, subject, payload), c, subject, payload, 0) for c in channels]
+
+    def _drain_queue(self):
+        rows = []
+        while True:
+            try:
+                rows.extend(self._spool(*self._queue.get_nowait()))
+            except queue.Empty:
+                return rows
+
+    def _loop(self):
+        next_scan = 0.0
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=POLL_INTERVAL)
+                self._dispatch_rows(self._spool(*item) + self._drain_queue())
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f"Alert dispatcher error: {e}", exc_info=True)
+            if time.monotonic() >= next_scan:
+                next_scan = time.monotonic() + POLL_INTERVAL
+                smtp_pool.close_idle()
+                try:
+                    with self._in_flight_lock:
+                        busy = set(self._in_flight)
+                    self._dispatch_rows(self.spool.due(exclude=busy))
+                except Exception as e:
+                    logger.error(f"Alert spool scan failed: {e}", exc_info=True)
+
+    def _dispatch_rows(self, rows):
+        batch_size = int(self.settings["mail_batch"])
+        mail = [r for r in rows if r[1] == "mail"] if self._batch_mail and batch_size > 1 else []
+        if len(mail) > 1:
+            rows = [r for r in rows if r[1] != "mail"]
+            for i in range(0, len(mail), batch_size):
+                self._dispatch(mail[i:i + batch_size], self._run_mail_batch)
+        for row in rows:
+            self._dispatch([row], lambda batch: self._run_delivery(batch[0]))
+
+    def _dispatch(self, rows, run):
+        pool = self._pools.get(rows[0][1].partition(":")[0])
+        if pool is None or self._stop.is_set():
+            return
+        with self._in_flight_lock:
+            rows = [r for r in rows if r[0] not in self._in_flight]
+            self._in_flight.update(r[0] for r in rows)
+        if rows:
+            pool.submit(run, rows)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(float(self.settings["backoff_base"]) * (2 ** (attempts - 1)), float(self.settings["backoff_max"]))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _run_delivery(self, row):
+        row_id, channel, subject, payload, attempts = row
+        error = None
+        alerts = {}
+        try:
+            alerts = json.loads(payload)
+            ok = self.deliver_fn(channel, subject, alerts)
+            if ok is None:
+                error = f"{channel} channel is not configured"
+        except Exception as e:
+            ok, error = False, str(e)
+            logger.error(f"Alert delivery via {channel} raised: {e}", exc_info=True)
+        self._finish(row, ok, error, alerts)
+
+    def _run_mail_batch(self, rows):
+        """Renders each mail and sends them all over one SMTP session; every row gets its own outcome."""
+        outcomes = {}
+        batch = []
+        for row in rows:
+            alerts = {}
+            try:
+                alerts = json.loads(row[3])
+                mail = self._reporter(alerts).build_mail(row[2])
+            except Exception as e:
+                logger.error(f"Alert mail rendering failed: {e}", exc_info=True)
+                outcomes[row[0]] = (False, str(e), alerts)
+                continue
+            if mail is None:
+                outcomes[row[0]] = (None, "mail channel is not configured", alerts)
+            else:
+                batch.append((row, alerts, mail))
+        if batch:
+            sent, error = len(batch), None
+            try:
+                smtp_pool.get_pool(self.cm.config.get("smtp", {})).send_many([m for _, _, m in batch])
+            except smtp_pool.SmtpBatchError as e:
+                sent, error = e.sent, str(e.error)
+            except Exception as e:
+                sent, error = 0, str(e)
+            logger.info(f"Alert mail batch: {sent}/{len(batch)} message(s) sent over one SMTP session")
+            for i, (row, alerts, _) in enumerate(batch):
+                outcomes[row[0]] = (True, None, alerts) if i < sent else (False, error, alerts)
+        for row in rows:
+            self._finish(row, *outcomes[row[0]])
+
+    def _finish(self, row, ok, error, alerts):
+        row_id, channel, _, _, attempts = row
+        attempts += 1
+        try:
+            base = channel.partition(":")[0]
+            if ok:
+                self.spool.done(row_id)
+                self.stats["sent"] += 1
+                metrics.ALERTS.inc(channel=base, outcome="sent")
+                record_delivery(alerts, True)
+            elif ok is None or attempts >= int(self.settings["max_attempts"]):
+                if ok is not None:
+                    record_delivery(alerts, False)
+                self.spool.dead(row_id, attempts, error or "delivery failed")
+                self.stats["dead"] += 1
+                metrics.ALERTS.inc(channel=base, outcome="dead")
+                logger.error(f"Alert delivery via {channel} dead-lettered after {attempts} attempt(s): {error or 'delivery failed'}")
+            else:
+                delay = self._backoff(attempts)
+                self.spool.retry(row_id, attempts, time.time() + delay, error or "delivery failed")
+                self.stats["retried"] += 1
+                metrics.ALERTS.inc(channel=base, outcome="retry")
+                logger.warning(f"Alert delivery via {channel} failed (attempt {attempts}); retrying in {delay:.0f}s")
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.discard(row_id)
+
+    def _reporter(self, alerts):
+        from src.reporter import Reporter
+        rep = Reporter(self.cm)
+        rep.health_alerts = alerts.get("health_alerts", [])
+        rep.event_alerts = alerts.get("event_alerts", [])
+        rep.traffic_alerts = alerts.get("traffic_alerts", [])
+        rep.metric_alerts = alerts.get("metric_alerts", [])
+        return rep
+
+    def _deliver_with_reporter(self, channel, subject, alerts):
+        rep = self._reporter(alerts)
+        base, _, target = channel.partition(":")
+        send = getattr(rep, f"_send_{base}")
+        return send(subject, target=target) if target else send(subject)
@@ -0,0 +1,345 @@
+"""
+Compact traffic flow records.
+
+The PCE returns every flow as a nested dict tree (src.workload.labels[...],
+service, timestamp_range, ...). ApiClient decodes each flow into a FlowRecord
+once, and the analyzer and the syslog sender read its attributes instead of
+walking the tree with chained .get(..., {}) calls:
+
+  - FlowRecord and FlowEndpoint use __slots__. Fields the monitor does not
+    read are kept as they came in `extra` (None when there are none), and the
+    label and IP list entries are kept as the PCE sent them (hrefs included),
+    so to_dict() returns the PCE JSON for alert snapshots, webhooks, syslog,
+    --query output and the GUI.
+  - Each query decodes through its own SymbolTable: workload names,
+    hostnames, hrefs, IPs, process/user names and the other string values
+    are interned in it, so a value repeated across a 200k-flow download is
+    one string object, and the table is dropped with the query's records.
+  - Labels are dictionary-encoded: every distinct key=value pair gets a small
+    integer id, and an endpoint's labels are a sorted tuple of ids, shared by
+    all endpoints with the same set. A rule's label filter is resolved to an
+    id once per table (filter_id), so matching is an integer membership test;
+    a label that never occurs in the query rejects without looking at flows.
+    Equal label and IP lists share one (read-only) list of entries; to_dict()
+    hands out copies.
+  - Values derived from several fields (policy decision code, port and
+    protocol numbers, byte counters, connection count) are computed once here;
+    the flow time used by the sliding window is parsed on first use.
+"""
+import datetime
+from functools import lru_cache
+
+_UNSET = object()
+
+_WORKLOAD_KEYS = frozenset(("href", "name", "hostname", "labels"))
+_ENDPOINT_KEYS = frozenset(("ip", "workload", "ip_lists", "process_name", "user_name"))
+_SERVICE_KEYS = frozenset(("port", "proto", "name", "process_name", "user_name"))
+# num_connections stays in `extra`: to_dict() only emits it when the PCE sent it
+_FLOW_KEYS = frozenset(("src", "dst", "service", "dst_port", "proto", "policy_decision", "flow_direction",
+                        "timestamp", "timestamp_range"))
+
+
+def _num(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _int_or_none(value):
+    if not value:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _extra(d: dict, known: frozenset, symbols):
+    extra = {k: symbols.intern(v) for k, v in d.items() if k not in known}
+    return extra or None
+
+
+def _parse_ts(ts_str):
+    try:
+        return datetime.datetime.strptime(ts_str, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        try:
+            return datetime.datetime.strptime(ts_str, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            return None
+
+
+@lru_cache(maxsize=1024)
+def label_filter(filter_str: str):
+    """A "key=value" rule filter in the canonical form of SymbolTable labels, or None if malformed."""
+    try:
+        fk, fv = filter_str.split('=')
+    except ValueError:
+        return None
+    return f"{fk.strip()}={fv.strip()}"
+
+
+class SymbolTable:
+    """
+    The strings and labels of one flow stream. intern() returns the first
+    copy of an equal string; label ids index `labels` ("key=value" strings)
+    and label_index maps a "key=value" string back to its id.
+    """
+    __slots__ = ("_strings", "_shared", "_ids_by_key", "label_index", "labels", "_filters", "_lists")
+
+    def __init__(self):
+        self._strings = {}
+        self._shared = {}     # label id tuples and IP list tuples, one object per distinct value
+        self._ids_by_key = {}  # key -> {value: id}: resolves a label without building "key=value"
+        self.label_index = {}  # "key=value" -> id
+        self.labels = []
+        self._filters = {}     # rule filter as written (" role = web ") -> id, once it has been seen
+        self._lists = {}       # label / IP list entries as items -> (shared list, ids or names)
+
+    def __len__(self):
+        return len(self._strings)
+
+    def intern(self, value):
+        if type(value) is not str:
+            return value
+        return self._strings.setdefault(value, value)
+
+    def shared(self, values: tuple) -> tuple:
+        return self._shared.setdefault(values, values)
+
+    def label_id(self, key, value) -> int:
+        by_value = self._ids_by_key.get(key)
+        if by_value is None:
+            by_value = self._ids_by_key[key] = {}
+        lid = by_value.get(value)
+        if lid is None:
+            label = self.intern(f"{key}={value}")
+            lid = by_value[value] = self.label_index[label] = len(self.labels)
+            self.labels.append(label)
+        return lid
+
+    def label_set(self, labels: list) -> tuple:
+        """Sorted, shared tuple of label ids for a PCE label list."""
+        return self.shared(tuple(sorted({self.label_id(l.get("key"), l.get("value")) for l in labels})))
+
+    def _entries(self, items: list, derive) -> tuple:
+        """(shared copy of a list of flat dicts, derive(list)); unhashable entries are not shared."""
+        try:
+            key = tuple(tuple(d.items()) for d in items)
+            entry = self._lists.get(key)
+        except (AttributeError, TypeError):
+            return items, derive(items)
+        if entry is None:
+            shared = [{k: self.intern(v) for k, v in d.items()} for d in items]
+            entry = self._lists[key] = (shared, derive(shared))
+        return entry
+
+    def label_list(self, labels: list) -> tuple:
+        """(shared PCE label list, sorted label id tuple)."""
+        return self._entries(labels, self.label_set)
+
+    def ip_list_entries(self, ip_lists: list) -> tuple:
+        """(shared PCE IP list entries, tuple of their names)."""
+        return self._entries(ip_lists, lambda items: self.shared(tuple(self.intern(i.get("name")) for i in items)))
+
+    def find_label(self, label: str):
+        """Id of a "key=value" label, or None when it does not occur in this stream."""
+        return self.label_index.get(label)
+
+    def filter_id(self, filter_str: str):
+        """
+        Id of the label a rule filter ("key=value", spaces allowed) selects, or
+        None when it is malformed or the label has not occurred in this stream (yet).
+        """
+        lid = self._filters.get(filter_str)
+        if lid is None:
+            label = label_filter(filter_str)
+            lid = self.label_index.get(label) if label is not None else None
+            if lid is not None:
+                self._filters[filter_str] = lid
+        return lid
+
+
+class FlowEndpoint:
+    __slots__ = ("ip", "name", "hostname", "href", "label_ids", "label_list", "ip_lists", "ip_list_entries",
+                 "process_name", "user_name", "has_workload", "workload_extra", "extra", "symbols")
+
+    def __init__(self, d: dict, symbols: SymbolTable):
+        self.symbols = symbols
+        intern = symbols.intern
+        self.ip = intern(d.get("ip"))
+        ip_lists = d.get("ip_lists")
+        if ip_lists is None:
+            self.ip_list_entries, self.ip_lists = None, ()
+        else:
+            self.ip_list_entries, self.ip_lists = symbols.ip_list_entries(ip_lists)
+        self.process_name = intern(d.get("process_name"))
+        self.user_name = intern(d.get("user_name"))
+        wl = d.get("workload")
+        self.has_workload = wl is not None
+        wl = wl or {}
+        self.name = intern(wl.get("name"))
+        self.hostname = intern(wl.get("hostname"))
+        self.href = intern(wl.get("href"))
+        labels = wl.get("labels")
+        if labels is None:
+            self.label_list, self.label_ids = None, ()
+        else:
+            self.label_list, self.label_ids = symbols.label_list(labels)
+        self.workload_extra = _extra(wl, _WORKLOAD_KEYS, symbols) if wl else None
+        self.extra = _extra(d, _ENDPOINT_KEYS, symbols)
+
+    @property
+    def labels(self) -> frozenset:
+        """The endpoint's labels as "key=value" strings."""
+        names = self.symbols.labels
+        return frozenset(names[i] for i in self.label_ids)
+
+    def has_label(self, filter_str: str) -> bool:
+        """filter_str: a rule label filter, "key=value"."""
+        lid = self.symbols.filter_id(filter_str)
+        return lid is not None and lid in self.label_ids
+
+    def label_dicts(self) -> list:
+        """The workload's labels as the PCE sent them (copies)."""
+        return [dict(l) for l in self.label_list or ()]
+
+    def to_dict(self) -> dict:
+        d = {}
+        if self.ip is not None:
+            d["ip"] = self.ip
+        if self.has_workload:
+            wl = {k: v for k, v in (("href", self.href), ("name", self.name), ("hostname", self.hostname))
+                  if v is not None}
+            if self.label_list is not None:
+                wl["labels"] = self.label_dicts()
+            if self.workload_extra:
+                wl.update(self.workload_extra)
+            d["workload"] = wl
+        if self.ip_list_entries is not None:
+            d["ip_lists"] = [dict(i) for i in self.ip_list_entries]
+        if self.process_name is not None:
+            d["process_name"] = self.process_name
+        if self.user_name is not None:
+            d["user_name"] = self.user_name
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+
+_NO_ENDPOINT = FlowEndpoint({}, SymbolTable())
+
+
+class FlowRecord:
+    __slots__ = ("src", "dst", "dst_port", "proto", "svc_port", "svc_proto", "service_name", "service_process",
+                 "service_user", "service_extra", "has_service", "port_num", "proto_num",
+                 "policy_decision", "pd", "flow_direction", "timestamp", "first_detected", "last_detected",
+                 "connections", "delta_bytes", "ddms", "total_bytes", "tdms", "extra", "_seen")
+
+    def __init__(self, d: dict, symbols: SymbolTable = None):
+        """symbols: the query's SymbolTable; a record decoded on its own gets a private one."""
+        if symbols is None:
+            symbols = SymbolTable()
+        intern = symbols.intern
+        src, dst = d.get("src"), d.get("dst")
+        self.src = FlowEndpoint(src, symbols) if src is not None else _NO_ENDPOINT
+        self.dst = FlowEndpoint(dst, symbols) if dst is not None else _NO_ENDPOINT
+
+        svc = d.get("service")
+        self.has_service = svc is not None
+        svc = svc or {}
+        self.svc_port = svc.get("port")
+        self.svc_proto = svc.get("proto")
+        self.service_name = intern(svc.get("name"))
+        self.service_process = intern(svc.get("process_name"))
+        self.service_user = intern(svc.get("user_name"))
+        self.service_extra = _extra(svc, _SERVICE_KEYS, symbols) if svc else None
+        self.dst_port = d.get("dst_port")
+        self.proto = d.get("proto")
+        self.port_num = _int_or_none(self.dst_port or self.svc_port)
+        self.proto_num = _int_or_none(self.proto or self.svc_proto)
+
+        decision = d.get("policy_decision")
+        self.policy_decision = intern(decision)
+        p = d.get("pd")
+        raw_dec = str(decision if decision is not None else "").lower()
+        if p is not None:
+            self.pd = _int_or_none(p) or 0
+        elif "blocked" in raw_dec and "potentially" not in raw_dec:
+            self.pd = 2
+        elif "potentially" in raw_dec:
+            self.pd = 1
+        elif "allowed" in raw_dec:
+            self.pd = 0
+        else:
+            self.pd = -1
+        self.flow_direction = intern(d.get("flow_direction"))
+
+        ts = d.get("timestamp_range") or {}
+        self.timestamp = d.get("timestamp")
+        self.first_detected = ts.get("first_detected")
+        self.last_detected = ts.get("last_detected")
+        self._seen = _UNSET
+
+        try:
+            self.connections = int(d.get("num_connections") or d.get("count", 1))
+        except (TypeError, ValueError):
+            self.connections = 1
+        self.delta_bytes = _num(d.get("dst_dbo") or d.get("dbo")) + _num(d.get("dst_dbi") or d.get("dbi"))
+        self.ddms = _num(d.get("ddms"))
+        self.total_bytes = (_num(d.get("dst_tbo") or d.get("tbo") or d.get("dst_bo"))
+                            + _num(d.get("dst_tbi") or d.get("tbi") or d.get("dst_bi")))
+        tdms = _num(d.get("tdms"))
+        self.tdms = tdms if tdms >= 1000 else _num(d.get("interval_sec", 600)) * 1000
+        self.extra = _extra(d, _FLOW_KEYS, symbols)
+
+    @property
+    def seen(self):
+        """The flow time the sliding window compares (timestamp, else last/first detected), or None."""
+        seen = self._seen
+        if seen is _UNSET:
+            ts_str = self.timestamp or self.last_detected or self.first_detected
+            seen = self._seen = _parse_ts(ts_str) if ts_str else None
+        return seen
+
+    @property
+    def port(self):
+        """Port as displayed in reports: the service port, else the top-level dst_port."""
+        return self.svc_port or self.dst_port
+
+    def to_dict(self) -> dict:
+        """The flow in its PCE JSON shape."""
+        d = {}
+        if self.src is not _NO_ENDPOINT:
+            d["src"] = self.src.to_dict()
+        if self.dst is not _NO_ENDPOINT:
+            d["dst"] = self.dst.to_dict()
+        if self.has_service:
+            svc = {k: v for k, v in (("port", self.svc_port), ("proto", self.svc_proto), ("name", self.service_name),
+                                     ("process_name", self.service_process), ("user_name", self.service_user))
+                   if v is not None}
+            if self.service_extra:
+                svc.update(self.service_extra)
+            d["service"] = svc
+        if self.dst_port is not None:
+            d["dst_port"] = self.dst_port
+        if self.proto is not None:
+            d["proto"] = self.proto
+        if self.policy_decision is not None:
+            d["policy_decision"] = self.policy_decision
+        if self.flow_direction is not None:
+            d["flow_direction"] = self.flow_direction
+        if self.timestamp is not None:
+            d["timestamp"] = self.timestamp
+        if self.first_detected is not None or self.last_detected is not None:
+            d["timestamp_range"] = {k: v for k, v in (("first_detected", self.first_detected),
+                                                      ("last_detected", self.last_detected)) if v is not None}
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+
+def as_record(flow) -> FlowRecord:
+    """flow as a FlowRecord; PCE-shaped dicts (tests, external callers) are decoded on the fly."""
+    return flow if type(flow) is FlowRecord else FlowRecord(flow)
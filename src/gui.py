@@ -5,34 +5,30 @@ Optional dependency: pip install flask
 Features full parity with CLI:
   Dashboard, Rules (add event/traffic/bandwidth, delete), Settings, Actions (Run, Debug, Test Alert, Best Practices).
 """
-import re
 import os
 import sys
 import io
-import json
+import time
 import datetime
 import threading
 import logging
 
 try:
-    from flask import Flask, request, jsonify, render_template
+    from flask import Flask, Response, g, request, jsonify, render_template, send_file
     HAS_FLASK = True
 except ImportError:
     HAS_FLASK = False
 
 from src.config import ConfigManager
+from src.status_cache import StatusCache
+from src.warmup import WarmupScheduler, dashboard_cache, dashboard_cache_key, warmup_settings
 from src.i18n import t
-from src import __version__
+from src.utils import strip_ansi
+from src.profiling import get_profiler, PROFILE_HEADER
+from src import __version__, cycle_metrics, metrics
 
 logger = logging.getLogger(__name__)
 
-_ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-
-
-def _strip_ansi(text: str) -> str:
-    return _ANSI_RE.sub('', text)
-
-
 def _capture_stdout(func):
     """Run func, capture its stdout, strip ANSI, return as string."""
     buf = io.StringIO()
@@ -44,7 +40,7 @@ def _capture_stdout(func):
         buf.write(f"\nError: {e}\n")
     finally:
         sys.stdout = old
-    return _strip_ansi(buf.getvalue())
+    return strip_ansi(buf.getvalue())
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -95,6 +91,112 @@ FULL_EVENT_CATALOG = {
 }
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# Dashboard Queries
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _dashboard_top10(cm: ConfigManager, d: dict) -> dict:
+    """Runs one Top 10 dashboard query; shared by the route and the cache warm-up scheduler."""
+    try:
+        from src.api_client import ApiClient
+        from src.analyzer import Analyzer
+        from src.reporter import Reporter
+
+        api = ApiClient(cm)
+        base_ana = Analyzer(cm, api, Reporter(cm))
+
+        mins = int(d.get("mins", 30))
+        now = datetime.datetime.utcnow()
+        start_time = (now - datetime.timedelta(minutes=mins)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        end_time = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+        
+        pd_val = int(d.get("pd", 3))
+        if pd_val == 1: pds = ["potentially_blocked"]
+        elif pd_val == 2: pds = ["blocked"]
+        elif pd_val == 0: pds = ["allowed"]
+        else: pds = ["blocked", "potentially_blocked", "allowed"]
+
+        rank_by = d.get("rank_by", "bandwidth")
+        
+        # Map the inbound payload to the analyzer's query
+        params = {
+            "start_time": start_time,
+            "end_time": end_time,
+            "policy_decisions": pds,
+            "sort_by": rank_by,
+            "search": d.get("search", ""),
+            "src_ip_in": d.get("src_ip_in"), "dst_ip_in": d.get("dst_ip_in"),
+            "src_label": d.get("src_label"), "dst_label": d.get("dst_label"),
+            "ex_src_ip": d.get("ex_src_ip"), "ex_dst_ip": d.get("ex_dst_ip"),
+            "ex_src_label": d.get("ex_src_label"), "ex_dst_label": d.get("ex_dst_label"),
+            "port": d.get("port"), "ex_port": d.get("ex_port"),
+            "proto": d.get("proto")
+        }
+        results = base_ana.query_flows(params)
+
+        # Sort and get top 10
+        if rank_by == "bandwidth":
+            sorted_v = sorted(results, key=lambda x: x.get("max_bandwidth_mbps", 0), reverse=True)
+        elif rank_by == "volume":
+            sorted_v = sorted(results, key=lambda x: x.get("total_volume_mb", 0), reverse=True)
+        else: # count
+            sorted_v = sorted(results, key=lambda x: x.get("total_connections", 0), reverse=True)
+        
+        top10 = []
+        for item in sorted_v[:10]:
+            s = item.get('source', {})
+            dst = item.get('destination', {})
+            sv = item.get('service', {})
+            
+            s_name = s.get('name', 'N/A')
+            d_name = dst.get('name', 'N/A')
+            port = sv.get('port', 'All')
+            proto_name = sv.get('proto', '')
+            svc_name = sv.get('name') or getattr(sv, 'name', '') or ''
+            svc_str = f"{proto_name}/{port}"
+            if svc_name:
+                svc_str = f"{svc_name} {svc_str}"
+            
+            # Policy Decision mapping for UI
+            flow_pd = item.get("policy_decision", "")
+            if flow_pd == "allowed": pd_int = 0
+            elif flow_pd == "potentially_blocked": pd_int = 1
+            else: pd_int = 2 # default to Blocked if unknown or explicitly blocked
+            
+            if rank_by == "bandwidth": val_fmt = f"{item.get('max_bandwidth_mbps', 0):.2f} Mbps"
+            elif rank_by == "volume": val_fmt = f"{item.get('total_volume_mb', 0):.2f} MB"
+            else: val_fmt = f"{item.get('total_connections', 0)}"
+            
+            first_seen = item.get("first_seen", "")
+            last_seen = item.get("last_seen", "")
+            
+            top10.append({
+                "val_fmt": val_fmt,
+                "first_seen": first_seen,
+                "last_seen": last_seen,
+                "dir": "→",
+                "s_name": s_name,
+                "s_ip": s.get('ip', ''),
+                "s_href": s.get('href', ''),
+                "s_process": s.get('process', ''),
+                "s_user": s.get('user', ''),
+                "s_labels": s.get('labels', []),
+                "d_name": d_name,
+                "d_ip": dst.get('ip', ''),
+                "d_href": dst.get('href', ''),
+                "d_process": dst.get('process', ''),
+                "d_user": dst.get('user', ''),
+                "d_labels": dst.get('labels', []),
+                "svc": svc_str,
+                "pd": pd_int
+            })
+            
+        return {"ok": True, "data": top10, "total": len(sorted_v), "generated_at": time.time()}
+    except Exception as e:
+        logger.error(f"Top 10 Query Error: {e}", exc_info=True)
+        return {"ok": False, "error": str(e)}
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # Flask Application Factory
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -103,59 +205,50 @@ def _create_app(cm: ConfigManager) -> 'Flask':
     PKG_DIR = os.path.dirname(os.path.abspath(__file__))
     app = Flask(__name__, template_folder=os.path.join(PKG_DIR, 'templates'), static_folder=os.path.join(PKG_DIR, 'static'))
     app.config['JSON_AS_ASCII'] = False
+    status_cache = StatusCache(cm)
+    profiler = get_profiler(cm)
+
+    # ─── Profiling (X-Profile header, or armed from the Actions tab) ─────
+    @app.before_request
+    def _start_profile():
+        if request.path.startswith(('/api/profiles', '/metrics')):
+            return
+        g.profile = profiler.start("gui", f"{request.method}-{request.path}",
+                                   force=bool(request.headers.get(PROFILE_HEADER)))
+
+    @app.after_request
+    def _stop_profile(response):
+        cap = g.pop('profile', None)
+        if cap is not None:
+            response.headers[PROFILE_HEADER + '-File'] = cap.stop()
+        return response
+
+    @app.teardown_request
+    def _abort_profile(exc):
+        cap = g.pop('profile', None)
+        if cap is not None:
+            cap.stop()
 
     # ─── Frontend SPA ─────────────────────────────────────────────────────
     @app.route('/')
     def index():
         return render_template('index.html')
 
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
     # ─── API: Status ──────────────────────────────────────────────────────
     @app.route('/api/ui_translations')
     def api_ui_translations():
         lang = cm.config.get("settings", {}).get("language", "en")
-        from src.i18n import MESSAGES
-        ui_dict = {k: v for k, v in MESSAGES.get(lang, MESSAGES["en"]).items() if k.startswith("gui_")}
+        from src.i18n import messages
+        ui_dict = {k: v for k, v in messages(lang).items() if k.startswith("gui_")}
         return jsonify(ui_dict)
 
     @app.route('/api/status')
     def api_status():
-        cm.load()
-        
-        cooldowns = []
-        try:
-            PKG_DIR = os.path.dirname(os.path.abspath(__file__))
-            ROOT_DIR = os.path.dirname(PKG_DIR)
-            STATE_FILE = os.path.join(ROOT_DIR, "state.json")
-            if os.path.exists(STATE_FILE):
-                with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                    state = json.load(f)
-                    
-                now = datetime.datetime.now(datetime.timezone.utc)
-                alert_history = state.get("alert_history", {})
-                
-                for rule in cm.config['rules']:
-                    rid = str(rule['id'])
-                    rem_mins = 0
-                    if rid in alert_history:
-                        try:
-                            last_alert_str = alert_history[rid]
-                            last_ts = datetime.datetime.strptime(last_alert_str, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
-                            cd_mins = int(rule.get('cooldown_minutes', 0))
-                            if cd_mins > 0:
-                                elapsed = (now - last_ts).total_seconds()
-                                total_cd = cd_mins * 60
-                                if elapsed < total_cd:
-                                    rem_mins = int((total_cd - elapsed) // 60) + 1
-                        except Exception as e:
-                            logger.error(f"Error parsing cooldown for rule {rid}: {e}")
-                    
-                    cooldowns.append({
-                        "id": rule['id'],
-                        "name": rule.get('name', 'Unknown Rule'),
-                        "remaining_mins": rem_mins
-                    })
-        except Exception as e:
-            logger.error(f"Error reading state file for cooldowns: {e}")
+        cooldowns = status_cache.cooldowns()
 
         return jsonify({
             "version": __version__,
@@ -185,40 +278,11 @@ def _create_app(cm: ConfigManager) -> 'Flask':
     # ─── API: Rules CRUD ──────────────────────────────────────────────────
     @app.route('/api/rules')
     def api_rules():
-        cm.load()
-        
-        # Load state to get cooldowns
-        alert_history = {}
-        try:
-            PKG_DIR = os.path.dirname(os.path.abspath(__file__))
-            ROOT_DIR = os.path.dirname(PKG_DIR)
-            STATE_FILE = os.path.join(ROOT_DIR, "state.json")
-            if os.path.exists(STATE_FILE):
-                with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                    state = json.load(f)
-                    alert_history = state.get("alert_history", {})
-        except Exception as e:
-            logger.error(f"Error reading state file for rules: {e}")
-
-        now = datetime.datetime.now(datetime.timezone.utc)
+        remaining = status_cache.remaining_by_rule()
         rules = []
         for i, r in enumerate(cm.config['rules']):
             rule_out = {"index": i, **r}
-            rem_mins = 0
-            rid = str(r['id'])
-            if rid in alert_history:
-                try:
-                    last_alert_str = alert_history[rid]
-                    last_ts = datetime.datetime.strptime(last_alert_str, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
-                    cd_mins = int(r.get('cooldown_minutes', 0))
-                    if cd_mins > 0:
-                        elapsed = (now - last_ts).total_seconds()
-                        total_cd = cd_mins * 60
-                        if elapsed < total_cd:
-                            rem_mins = int((total_cd - elapsed) // 60) + 1
-                except Exception as e:
-                    pass
-            rule_out['cooldown_remaining'] = rem_mins
+            rule_out['cooldown_remaining'] = remaining.get(str(r['id']), 0)
             rules.append(rule_out)
             
         return jsonify(rules)
@@ -535,104 +599,22 @@ def _create_app(cm: ConfigManager) -> 'Flask':
     def api_dashboard_top10():
         d = request.json or {}
         try:
-            from src.api_client import ApiClient
-            from src.analyzer import Analyzer
-            from src.reporter import Reporter
-            import datetime
-
-            api = ApiClient(cm)
-            base_ana = Analyzer(cm, api, Reporter(cm))
-
             mins = int(d.get("mins", 30))
-            now = datetime.datetime.utcnow()
-            start_time = (now - datetime.timedelta(minutes=mins)).strftime("%Y-%m-%dT%H:%M:%SZ")
-            end_time = now.strftime("%Y-%m-%dT%H:%M:%SZ")
-            
-            pd_val = int(d.get("pd", 3))
-            if pd_val == 1: pds = ["potentially_blocked"]
-            elif pd_val == 2: pds = ["blocked"]
-            elif pd_val == 0: pds = ["allowed"]
-            else: pds = ["blocked", "potentially_blocked", "allowed"]
-
-            rank_by = d.get("rank_by", "bandwidth")
-            
-            # Map the inbound payload to the analyzer's query
-            params = {
-                "start_time": start_time,
-                "end_time": end_time,
-                "policy_decisions": pds,
-                "sort_by": rank_by,
-                "search": d.get("search", ""),
-                "src_ip_in": d.get("src_ip_in"), "dst_ip_in": d.get("dst_ip_in"),
-                "src_label": d.get("src_label"), "dst_label": d.get("dst_label"),
-                "ex_src_ip": d.get("ex_src_ip"), "ex_dst_ip": d.get("ex_dst_ip"),
-                "ex_src_label": d.get("ex_src_label"), "ex_dst_label": d.get("ex_dst_label"),
-                "port": d.get("port"), "ex_port": d.get("ex_port"),
-                "proto": d.get("proto")
-            }
-            results = base_ana.query_flows(params)
-
-            # Sort and get top 10
-            if rank_by == "bandwidth":
-                sorted_v = sorted(results, key=lambda x: x.get("max_bandwidth_mbps", 0), reverse=True)
-            elif rank_by == "volume":
-                sorted_v = sorted(results, key=lambda x: x.get("total_volume_mb", 0), reverse=True)
-            else: # count
-                sorted_v = sorted(results, key=lambda x: x.get("total_connections", 0), reverse=True)
-            
-            top10 = []
-            for item in sorted_v[:10]:
-                s = item.get('source', {})
-                dst = item.get('destination', {})
-                sv = item.get('service', {})
-                
-                s_name = s.get('name', 'N/A')
-                d_name = dst.get('name', 'N/A')
-                port = sv.get('port', 'All')
-                proto_name = sv.get('proto', '')
-                svc_name = sv.get('name') or getattr(sv, 'name', '') or ''
-                svc_str = f"{proto_name}/{port}"
-                if svc_name:
-                    svc_str = f"{svc_name} {svc_str}"
-                
-                # Policy Decision mapping for UI
-                flow_pd = item.get("policy_decision", "")
-                if flow_pd == "allowed": pd_int = 0
-                elif flow_pd == "potentially_blocked": pd_int = 1
-                else: pd_int = 2 # default to Blocked if unknown or explicitly blocked
-                
-                if rank_by == "bandwidth": val_fmt = f"{item.get('max_bandwidth_mbps', 0):.2f} Mbps"
-                elif rank_by == "volume": val_fmt = f"{item.get('total_volume_mb', 0):.2f} MB"
-                else: val_fmt = f"{item.get('total_connections', 0)}"
-                
-                first_seen = item.get("first_seen", "")
-                last_seen = item.get("last_seen", "")
-                
-                top10.append({
-                    "val_fmt": val_fmt,
-                    "first_seen": first_seen,
-                    "last_seen": last_seen,
-                    "dir": "→",
-                    "s_name": s_name,
-                    "s_ip": s.get('ip', ''),
-                    "s_href": s.get('href', ''),
-                    "s_process": s.get('process', ''),
-                    "s_user": s.get('user', ''),
-                    "s_labels": s.get('labels', []),
-                    "d_name": d_name,
-                    "d_ip": dst.get('ip', ''),
-                    "d_href": dst.get('href', ''),
-                    "d_process": dst.get('process', ''),
-                    "d_user": dst.get('user', ''),
-                    "d_labels": dst.get('labels', []),
-                    "svc": svc_str,
-                    "pd": pd_int
-                })
-                
-            return jsonify({"ok": True, "data": top10, "total": len(sorted_v)})
-        except Exception as e:
-            logger.error(f"Top 10 Query Error: {e}", exc_info=True)
-            return jsonify({"ok": False, "error": str(e)})
+        except (ValueError, TypeError):
+            mins = 30
+        key = dashboard_cache_key(cm, d, mins)
+        # The page fills its widgets with cached_only; the Run button sends refresh
+        if not d.get("refresh"):
+            cached = dashboard_cache.get(key)
+            if cached is not None:
+                age = time.time() - cached.get("generated_at", time.time())
+                return jsonify(dict(cached, cached=True, cached_age=int(age)))
+            if d.get("cached_only"):
+                return jsonify({"ok": True, "cached": False, "data": None})
+        result = _dashboard_top10(cm, dict(d, mins=mins))
+        if result.get("ok"):
+            dashboard_cache.set(key, result, ttl=warmup_settings(cm)["dashboard_interval"])
+        return jsonify(result)
 
     @app.route('/api/workloads', methods=['GET', 'POST'])
     def api_search_workloads():
@@ -642,15 +624,27 @@ def _create_app(cm: ConfigManager) -> 'Flask':
             d = request.args.to_dict()
         try:
             from src.api_client import ApiClient
+            from src.workload_index import get_index
             api = ApiClient(cm)
-            
+            ip = d.get("ip_address") or d.get("ip")
+            try:
+                max_results = int(d.get("max_results", 500))
+            except (ValueError, TypeError):
+                max_results = 500
+
+            # Serve from the local index when it is loaded; keep it fresh in the background
+            index = get_index(api)
+            index.refresh_async(api)
+            if index.ready:
+                workloads = index.search(name=d.get("name"), hostname=d.get("hostname"), ip=ip, limit=max_results)
+                return jsonify({"ok": True, "data": workloads, "source": "index"})
+
             # API query parameters mapping
             params = {}
             if "name" in d and d["name"]: params["name"] = d["name"]
             if "hostname" in d and d["hostname"]: params["hostname"] = d["hostname"]
-            if "ip_address" in d and d["ip_address"]: params["ip_address"] = d["ip_address"]
-            if "max_results" in d: params["max_results"] = d["max_results"]
-            else: params["max_results"] = 500
+            if ip: params["ip_address"] = ip
+            params["max_results"] = max_results
 
             workloads = api.search_workloads(params)
             return jsonify({"ok": True, "data": workloads})
@@ -674,7 +668,7 @@ def _create_app(cm: ConfigManager) -> 'Flask':
                 return jsonify({"ok": False, "error": f"Failed to retrieve label for {level}"})
 
             # 2. Fetch Workload's current labels
-            wl = api.get_workload(href)
+            wl = api.get_workload(href, revalidate=True)
             if not wl:
                 return jsonify({"ok": False, "error": "Workload not found"})
 
@@ -703,28 +697,11 @@ def _create_app(cm: ConfigManager) -> 'Flask':
             api = ApiClient(cm)
             q_hrefs = api.check_and_create_quarantine_labels()
             target_label_href = q_hrefs.get(level)
+            if not target_label_href:
+                return jsonify({"ok": False, "error": f"Failed to retrieve label for {level}"})
 
-            results = {"success": 0, "failed": []}
-            import concurrent.futures
-
-            def process_wl(href):
-                wl = api.get_workload(href)
-                if not wl: return href, False
-                current_labels = wl.get("labels", [])
-                new_labels = [{"href": l.get("href")} for l in current_labels if l.get("href") not in q_hrefs.values()]
-                new_labels.append({"href": target_label_href})
-                return href, api.update_workload_labels(href, new_labels)
-
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as ex:
-                futures = {ex.submit(process_wl, h): h for h in hrefs}
-                for f in concurrent.futures.as_completed(futures):
-                    h, ok = f.result()
-                    if ok:
-                        results["success"] = int(results["success"]) + 1
-                    else:
-                        failed_list = results["failed"]
-                        if isinstance(failed_list, list):
-                            failed_list.append(h)
+            outcome = api.bulk_relabel_workloads(hrefs, [target_label_href], q_hrefs.values())
+            results = {"success": len(outcome["success"]), "failed": outcome["failed"]}
 
             return jsonify({"ok": True, "results": results})
         except Exception as e:
@@ -741,8 +718,10 @@ def _create_app(cm: ConfigManager) -> 'Flask':
             api = ApiClient(cm)
             rep = Reporter(cm)
             ana = Analyzer(cm, api, rep)
-            ana.run_analysis()
-            rep.send_alerts()
+            with cycle_metrics.cycle("gui"):
+                ana.run_analysis()
+                rep.send_alerts()
+                ana.save_deliveries()
         output = _capture_stdout(work)
         return jsonify({"ok": True, "output": output})
 
@@ -782,11 +761,32 @@ def _create_app(cm: ConfigManager) -> 'Flask':
             api = ApiClient(cm)
             status, body = api.check_health()
             body_text = str(body)
-            clean_body = _strip_ansi(body_text)
+            clean_body = strip_ansi(body_text)
             return jsonify({"ok": status == 200, "status": status, "body": clean_body[:500]})
         except Exception as e:
             return jsonify({"ok": False, "error": str(e)})
 
+    # ─── API: Profiles ────────────────────────────────────────────────────
+    @app.route('/api/profiles')
+    def api_profiles():
+        return jsonify({"ok": True, "armed": profiler.armed, "profiles": profiler.list_profiles()})
+
+    @app.route('/api/profiles/arm', methods=['POST'])
+    def api_profiles_arm():
+        d = request.json or {}
+        try:
+            profiler.arm(max(1, min(int(d.get('count', 1)), 100)))
+        except (TypeError, ValueError):
+            return jsonify({"ok": False, "error": "count must be a number"}), 400
+        return jsonify({"ok": True, "armed": profiler.armed})
+
+    @app.route('/api/profiles/<name>')
+    def api_profile_download(name):
+        path = profiler.profile_path(name)
+        if path is None:
+            return jsonify({"ok": False, "error": "Profile not found"}), 404
+        return send_file(path, as_attachment=True, download_name=name)
+
     @app.route('/api/shutdown', methods=['POST'])
     def api_shutdown():
         func = request.environ.get('werkzeug.server.shutdown')
@@ -814,6 +814,8 @@ def launch_gui(cm: ConfigManager = None, host='0.0.0.0', port=5001):
         cm = ConfigManager()
 
     app = _create_app(cm)
+    warmup = WarmupScheduler(cm, lambda query, mins: _dashboard_top10(cm, dict(query, mins=mins)))
+    warmup.start()
     print(f"\n  Illumio PCE Monitor — Web GUI")
     print(f"  Open in browser: http://127.0.0.1:{port}")
     print(f"  Press Ctrl+C to stop.\n")
@@ -0,0 +1,264 @@
+"""
+Shared outbound HTTP transport for alert channels (webhook and LINE targets).
+
+  - HttpTransport keeps persistent http.client connections per host, so repeated
+    deliveries to the same endpoint skip the TCP and TLS handshakes, and runs
+    fan-out jobs on a shared thread pool so targets are contacted concurrently.
+  - TokenBucket limits the request rate of one target.
+  - CircuitBreaker stops calling a target that keeps failing, for reset_timeout
+    seconds, then lets a single probe request through.
+
+Rate limiters and breakers live in a process-wide registry keyed by target, so
+their state survives the per-cycle Reporter instances.
+"""
+import ssl
+import time
+import socket
+import logging
+import threading
+import http.client
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10  # seconds
+DEFAULT_CONNECT_TIMEOUT = 5  # seconds
+FAN_OUT_WORKERS = 8
+MAX_IDLE_PER_HOST = 4
+IDLE_CONNECTION_TTL = 60  # seconds an idle connection may be reused
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                 BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
+
+HttpResponse = namedtuple("HttpResponse", ["status", "headers", "body"])
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = max(float(rate_per_minute), 0.0) / 60.0
+        self.capacity = max(int(burst), 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Takes one token, sleeping up to timeout seconds for it to become available."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = float(reset_timeout)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN  # let one probe through
+                return True
+            if self.state == self.HALF_OPEN:
+                return False  # a probe is already in flight
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failure(s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class TargetGuard:
+    """Rate limit + circuit breaker for one delivery target."""
+
+    def __init__(self, name: str, rate_per_minute: float = 60, burst: int = 5,
+                 failure_threshold: int = 5, reset_timeout: float = 60, max_wait: float = 30):
+        self.name = name
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_wait = float(max_wait)
+
+    def call(self, fn):
+        """Runs fn() under the target's limits. fn returns True on success."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"circuit open for {self.name}")
+        if not self.bucket.acquire(self.max_wait):
+            # Not the target's fault: do not count against the breaker
+            if self.breaker.state == CircuitBreaker.HALF_OPEN:
+                self.breaker.record_failure()
+            return False
+        try:
+            ok = fn()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return ok
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(key: str, target: dict) -> TargetGuard:
+    """Process-wide guard for a target; rebuilt when its limit settings change."""
+    params = (float(target.get("rate_per_minute", 60)), int(target.get("burst", 5)),
+              int(target.get("failure_threshold", 5)), float(target.get("reset_timeout", 60)),
+              float(target.get("max_wait", 30)))
+    with _guards_lock:
+        entry = _guards.get(key)
+        if entry is None or entry[0] != params:
+            entry = _guards[key] = (params, TargetGuard(key, *params))
+        return entry[1]
+
+
+class HttpTransport:
+    def __init__(self, workers: int = FAN_OUT_WORKERS):
+        self._idle = {}  # (scheme, host, port) -> [(conn, last_used)]
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-fanout")
+        self._ssl = ssl.create_default_context()
+
+    # ─── Connections ──────────────────────────────────────────────────────
+
+    def _new_connection(self, scheme, host, port, timeout):
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and not urllib.request.proxy_bypass(host):
+            p = urllib.parse.urlsplit(proxy)
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(p.hostname, p.port or 8080, timeout=timeout, context=self._ssl)
+                conn.set_tunnel(host, port)
+                return conn, False
+            return http.client.HTTPConnection(p.hostname, p.port or 8080, timeout=timeout), True
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _acquire(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                conn, last_used, absolute = idle.pop()
+                if now - last_used < IDLE_CONNECTION_TTL:
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, absolute, True
+                conn.close()
+        conn, absolute = self._new_connection(*key, timeout)
+        return conn, absolute, False
+
+    def _release(self, key, conn, absolute):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_PER_HOST:
+                idle.append((conn, time.monotonic(), absolute))
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+    # ─── Requests ─────────────────────────────────────────────────────────
+
+    def request(self, method: str, url: str, body: bytes = None, headers: dict = None,
+                timeout: float = DEFAULT_TIMEOUT, connect_timeout: float = None) -> HttpResponse:
+        """
+        Sends one request over a pooled connection. Raises OSError/HTTPException on network errors.
+        connect_timeout bounds the TCP/TLS setup of a new connection, timeout each read afterwards.
+        """
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            conn, absolute, reused = self._acquire(key, timeout)
+            try:
+                if conn.sock is None and connect_timeout is not None:
+                    conn.timeout = connect_timeout
+                    conn.connect()
+                    conn.sock.settimeout(timeout)
+                    conn.timeout = timeout
+                conn.request(method, url if absolute else path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused:
+                    continue  # the server closed an idle keep-alive connection: retry on a new one
+                raise
+            except (OSError, http.client.HTTPException, socket.timeout):
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn, absolute)
+            return HttpResponse(resp.status, {k.lower(): v for k, v in resp.getheaders()}, data)
+
+    def fan_out(self, jobs: list) -> list:
+        """Runs callables concurrently on the shared pool; returns their results (exceptions included) in order."""
+        futures = [self._executor.submit(job) for job in jobs]
+        results = []
+        for f in futures:
+            try:
+                results.append(f.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
@@ -7,18 +7,11 @@ import argparse
 from src import __version__
 from src.utils import setup_logger, Colors, safe_input
 from src.config import ConfigManager
-from src.api_client import ApiClient
-from src.analyzer import Analyzer
-from src.reporter import Reporter
-from src.settings import (
-    settings_menu,
-    add_event_menu,
-    add_traffic_menu,
-    add_bandwidth_volume_menu,
-    manage_rules_menu
-)
 from src.i18n import t
 
+# The analysis pipeline, alert channels, menus and GUI are imported where they are
+# used, so each mode only loads what it runs (see benchmarks/bench_startup.py).
+
 logger = logging.getLogger(__name__)
 
 # ─── Daemon / Monitor Loop ───────────────────────────────────────────────────
@@ -31,26 +24,60 @@ def _signal_handler(signum, frame):
     logger.info(f"Received signal {signum}. Shutting down gracefully...")
     _shutdown_event.set()
 
-def run_daemon_loop(interval_minutes: int):
-    """Headless monitoring loop. Runs analysis at fixed intervals until stopped."""
+def run_daemon_loop(interval_minutes: int, metrics_port: int = None):
+    """
+    Headless monitoring loop. Runs analysis at fixed intervals until stopped.
+    metrics_port: serve Prometheus /metrics on this port (default: settings.metrics_port; 0 disables).
+    """
+    from src.api_client import ApiClient
+    from src.analyzer import Analyzer
+    from src.dispatcher import AlertDispatcher
+    from src.coalescer import AlertCoalescer
+    from src import cycle_metrics, metrics, syslog_sink
+    from src.profiling import get_profiler, profiling_settings
+
     _shutdown_event.clear()
 
     signal.signal(signal.SIGINT, _signal_handler)
     signal.signal(signal.SIGTERM, _signal_handler)
 
     cm = ConfigManager()
+    # Profiling: the first settings.profiling.cycles cycles, plus the next ones after each SIGUSR1
+    profiler = get_profiler(cm)
+    prof_settings = profiling_settings(cm)
+    if int(prof_settings["cycles"]):
+        profiler.arm(prof_settings["cycles"])
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.arm(prof_settings["signal_cycles"]))
     logger.info(f"Starting daemon loop (interval={interval_minutes}m)")
     print(f"Illumio PCE Monitor — daemon mode (interval={interval_minutes}m)")
     print("Press Ctrl+C or send SIGTERM to stop.")
 
+    settings = cm.config.get("settings", {})
+    if metrics_port is None:
+        metrics_port = int(settings.get("metrics_port", 0) or 0)
+    metrics_server = None
+    if metrics_port:
+        try:
+            metrics_server = metrics.start_http_server(metrics_port, settings.get("metrics_host", "0.0.0.0"))
+            print(f"Metrics: http://{settings.get('metrics_host', '0.0.0.0')}:{metrics_port}/metrics")
+        except OSError as e:
+            logger.error(f"Cannot start metrics endpoint on port {metrics_port}: {e}")
+
+    # Alerts are delivered in the background so slow channels never delay the next cycle
+    dispatcher = AlertDispatcher(cm)
+    dispatcher.start()
+    # Repeated alerts are merged into digests across cycles (alerts.digest)
+    coalescer = AlertCoalescer(cm, dispatcher=dispatcher)
+
     while not _shutdown_event.is_set():
         try:
             logger.info("=== Starting monitoring cycle ===")
-            api = ApiClient(cm)
-            rep = Reporter(cm)
-            ana = Analyzer(cm, api, rep)
-            ana.run_analysis()
-            rep.send_alerts()
+            with cycle_metrics.cycle("monitor") as cycle, profiler.capture("cycle", f"monitor-{cycle.cycle}"):
+                api = ApiClient(cm)
+                ana = Analyzer(cm, api, coalescer)
+                ana.run_analysis()
+                coalescer.send_alerts()
             logger.info("=== Monitoring cycle completed ===")
         except Exception as e:
             logger.error(f"Error in monitoring cycle: {e}", exc_info=True)
@@ -59,6 +86,13 @@ def run_daemon_loop(interval_minutes: int):
         sleep_seconds = interval_minutes * 60
         _shutdown_event.wait(timeout=sleep_seconds)
 
+    coalescer.flush()
+    dispatcher.stop()
+    # Keep the outcome of alerts delivered since the last cycle across the restart
+    Analyzer(cm, None, coalescer).save_deliveries()
+    syslog_sink.close_all()
+    if metrics_server is not None:
+        metrics_server.shutdown()
     logger.info("Daemon loop stopped.")
     print("\nDaemon stopped.")
 
@@ -66,6 +100,18 @@ def run_daemon_loop(interval_minutes: int):
 # ─── Interactive CLI Menu ─────────────────────────────────────────────────────
 
 def main_menu():
+    from src.api_client import ApiClient
+    from src.analyzer import Analyzer
+    from src.reporter import Reporter
+    from src import cycle_metrics
+    from src.settings import (
+        settings_menu,
+        add_event_menu,
+        add_traffic_menu,
+        add_bandwidth_volume_menu,
+        manage_rules_menu
+    )
+
     # Setup Logging
     PKG_DIR = os.path.dirname(os.path.abspath(__file__))
     ROOT_DIR = os.path.dirname(PKG_DIR)
@@ -123,8 +169,10 @@ def main_menu():
             api = ApiClient(cm)
             rep = Reporter(cm)
             ana = Analyzer(cm, api, rep)
-            ana.run_analysis()
-            rep.send_alerts()
+            with cycle_metrics.cycle("manual"):
+                ana.run_analysis()
+                rep.send_alerts()
+                ana.save_deliveries()
             print(t('done_msg'))
         elif sel == 9:
             api = ApiClient(cm)
@@ -159,19 +207,52 @@ def main():
             "  python illumio_monitor.py                       # Interactive CLI menu\n"
             "  python illumio_monitor.py --monitor             # Headless daemon mode\n"
             "  python illumio_monitor.py --monitor -i 5        # Daemon with 5-min interval\n"
+            "  python illumio_monitor.py --monitor --metrics-port 9108  # Daemon with /metrics\n"
             "  python illumio_monitor.py --gui                 # Launch Web GUI (port 5001)\n"
             "  python illumio_monitor.py --gui --port 8080     # Web GUI on custom port\n"
+            "  python illumio_monitor.py --run-once            # One cycle; exit 1 if alerts fired\n"
+            "  python illumio_monitor.py --query -m 60 --sort volume --format ndjson  # Flows as NDJSON\n"
         )
     )
     parser.add_argument('--monitor', action='store_true',
                         help='Run in headless daemon mode (no interactive menu)')
     parser.add_argument('-i', '--interval', type=int, default=10,
                         help='Monitoring interval in minutes (default: 10)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve Prometheus metrics on this port in --monitor mode (0 disables; '
+                             'default: settings.metrics_port)')
     parser.add_argument('--gui', action='store_true',
                         help='Launch the Web GUI (requires: pip install flask)')
     parser.add_argument('-p', '--port', type=int, default=5001,
                         help='Web GUI port (default: 5001)')
 
+    batch = parser.add_argument_group('one-shot modes', 'Results are printed to stdout as JSON; exit code 0 = ok, '
+                                                        '1 = alerts fired (--run-once), 2 = error or failed PCE call')
+    batch.add_argument('--run-once', action='store_true',
+                       help='Run a single monitoring cycle and print the alerts that fired')
+    batch.add_argument('--no-send', action='store_true',
+                       help='With --run-once: print alerts without delivering them to the alert channels')
+    batch.add_argument('--query', action='store_true',
+                       help='Run a traffic query and print the matching flows')
+    batch.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                       help='Output format (default: json)')
+    batch.add_argument('-m', '--minutes', type=int, default=30,
+                       help='With --query: look back this many minutes (default: 30)')
+    batch.add_argument('--start', help='With --query: start time, UTC (e.g. 2026-02-23T00:00:00Z)')
+    batch.add_argument('--end', help='With --query: end time, UTC (default: now)')
+    batch.add_argument('--pd', default='blocked,potentially_blocked,allowed',
+                       help='With --query: comma-separated policy decisions (default: all)')
+    batch.add_argument('--sort', choices=['bandwidth', 'volume', 'connections'], default='bandwidth',
+                       help='With --query: rank flows by (default: bandwidth)')
+    batch.add_argument('--search', help='With --query: text filter on names, IPs, port, process and user')
+    batch.add_argument('--src-label', help='With --query: source label filter, key=value')
+    batch.add_argument('--dst-label', help='With --query: destination label filter, key=value')
+    batch.add_argument('--src-ip', help='With --query: source IP or IP list name')
+    batch.add_argument('--dst-ip', help='With --query: destination IP or IP list name')
+    batch.add_argument('--dst-port', type=int, help='With --query: destination port')
+    batch.add_argument('--limit', type=int, default=None,
+                       help='With --query: print at most this many flows (the query keeps the top 500)')
+
     args = parser.parse_args()
 
     # Setup logging early for all modes
@@ -181,8 +262,21 @@ def main():
     LOG_FILE = os.path.join(LOG_DIR, 'illumio_monitor.log')
     setup_logger('illumio_monitor', LOG_FILE)
 
-    if args.monitor:
-        run_daemon_loop(args.interval)
+    if args.run_once:
+        from src.oneshot import run_once
+        sys.exit(run_once(send=not args.no_send, fmt=args.format))
+    elif args.query:
+        from src.oneshot import run_query, query_params
+        params = query_params(
+            args.minutes, args.start, args.end,
+            policy_decisions=[p.strip() for p in args.pd.split(",") if p.strip()],
+            sort_by=args.sort, search=args.search,
+            src_label=args.src_label, dst_label=args.dst_label,
+            src_ip_in=args.src_ip, dst_ip_in=args.dst_ip, port=args.dst_port,
+        )
+        sys.exit(run_query(params, fmt=args.format, limit=args.limit))
+    elif args.monitor:
+        run_daemon_loop(args.interval, args.metrics_port)
     elif args.gui:
         from src.gui import launch_gui, HAS_FLASK
         if not HAS_FLASK:
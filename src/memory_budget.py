@@ -0,0 +1,131 @@
+"""
+Memory budget for the analysis pipeline.
+
+settings.memory_budget_mb (default 256) caps the approximate bytes one analysis
+run (run_analysis, query_flows, run_debug_mode) keeps in memory at once:
+
+  - the traffic download is streamed into a spool that stays in memory while
+    it fits in the budget and spills to a temporary file beyond it; flows are
+    then decoded from the spool one line at a time;
+  - query_flows keeps its ranked results in a bounded heap and drops the
+    lowest-ranked ones while the budget is exceeded (backpressure);
+  - the alert snapshots (top_matches) are bounded per rule and accounted once
+    the scan ends.
+
+Sizes are estimates (approx_size walks a flow's dicts, lists and strings with
+sys.getsizeof) and are only computed for flows that are kept, never for every
+streamed flow; query_flows re-measures one result in SIZE_SAMPLE. At the end of a run, report() records the high-water mark and
+the spilled bytes in the cycle metrics (memory_high_water_bytes,
+memory_spilled_bytes) and in the Prometheus metrics.
+"""
+import sys
+import logging
+import tempfile
+from src import cycle_metrics, metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_MB = 256
+MIN_SPOOL_BYTES = 1024 * 1024  # the download always gets at least this much memory before spilling
+COPY_CHUNK = 64 * 1024
+
+
+def approx_size(obj) -> int:
+    """Approximate deep size of a decoded JSON value in bytes."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += sys.getsizeof(k) + approx_size(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            size += approx_size(v)
+    return size
+
+
+class MemoryBudget:
+    __slots__ = ("limit", "held", "high_water", "spilled", "dropped", "_spool_held", "_warned")
+
+    def __init__(self, limit_bytes: int):
+        self.limit = int(limit_bytes)
+        self.held = 0
+        self.high_water = 0
+        self.spilled = 0
+        self.dropped = 0  # results dropped under backpressure
+        self._spool_held = 0
+        self._warned = False
+
+    @property
+    def over(self) -> bool:
+        return self.held > self.limit
+
+    def available(self) -> int:
+        return max(self.limit - self.held, 0)
+
+    def reserve(self, n: int) -> bool:
+        """Accounts n more bytes; returns False when the budget is now exceeded."""
+        self.held += n
+        if self.held > self.high_water:
+            self.high_water = self.held
+        if self.held > self.limit and not self._warned:
+            self._warned = True
+            logger.warning(f"Memory budget exceeded: ~{self.held // 1024 // 1024} MB held, "
+                           f"budget {self.limit // 1024 // 1024} MB (settings.memory_budget_mb)")
+        return self.held <= self.limit
+
+    def release(self, n: int):
+        self.held = max(self.held - n, 0)
+
+    def spool(self, source, chunk_size: int = COPY_CHUNK):
+        """
+        Copies a file-like source (e.g. an HTTP response) into a temporary file
+        that stays in memory up to the available budget and spills to disk beyond it.
+        Returns the spool rewound to the start; its in-memory part stays reserved
+        until release_spool(). One spool per budget at a time.
+        """
+        max_size = max(self.available(), MIN_SPOOL_BYTES)
+        spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+        total = 0
+        try:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                spool.write(chunk)
+                total += len(chunk)
+        except BaseException:
+            spool.close()  # nothing was reserved yet; drop the partial copy (and its temporary file)
+            raise
+        in_memory = total if total <= max_size else 0
+        if total > max_size:
+            self.spilled += total
+            logger.info(f"Traffic download ({total // 1024} KB) exceeds the memory budget; spooled to disk")
+        spool.seek(0)
+        self._spool_held = in_memory
+        self.reserve(in_memory)
+        return spool
+
+    def release_spool(self, spool):
+        self.release(self._spool_held)
+        self._spool_held = 0
+        spool.close()
+
+    def report(self, pipeline: str):
+        """Records the high-water mark in the current cycle and the Prometheus metrics."""
+        m = cycle_metrics.current()
+        m.counters["memory_high_water_bytes"] = max(m.counters.get("memory_high_water_bytes", 0), self.high_water)
+        if self.spilled:
+            m.count("memory_spilled_bytes", self.spilled)
+            metrics.MEMORY_SPILLED.inc(self.spilled, pipeline=pipeline)
+        if self.dropped:
+            m.count("results_dropped", self.dropped)
+        metrics.MEMORY_HIGH_WATER.set(self.high_water, pipeline=pipeline)
+        logger.info(f"{pipeline}: memory high-water ~{self.high_water // 1024} KB "
+                    f"(budget {self.limit // 1024} KB, spilled {self.spilled // 1024} KB)")
+
+
+def budget_from_config(cm) -> MemoryBudget:
+    """A fresh budget sized from settings.memory_budget_mb."""
+    value = (cm.config.get("settings") or {}).get("memory_budget_mb", DEFAULT_BUDGET_MB)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        value = DEFAULT_BUDGET_MB
+    return MemoryBudget(int(value * 1024 * 1024))
@@ -0,0 +1 @@
+"""Per-language message tables (one module per language code)."""
@@ -0,0 +1,413 @@
+"""English message table, loaded by src.i18n on first use."""
+MESSAGES = {
+    # General & Errors
+    "error_loading_config": "Error loading config: {error}",
+    "config_saved": "Configuration saved.",
+    "error_saving_config": "Error saving config: {error}",
+    "rule_overwritten": "Rule already exists, updated configuration.",
+    "rule_deleted": "Deleted: {name}",
+    "loading_best_practices": "Loading Best Practices (will clear existing rules)...",
+    "press_enter_to_continue": "Press Enter to continue...",
+    "operation_cancelled": "Operation cancelled.",
+    "done": "Done.",
+    "bye": "Bye.",
+    
+    # Menu Titles
+    "main_menu_title": "=== Illumio PCE Monitor ===",
+    "main_menu_api": "API: {url} | Rules: {count}",
+    "main_menu_1": "1. Add Event Rule (inc. PCE Health Check)",
+    "main_menu_2": "2. Add Traffic Rule",
+    "main_menu_3": "3. Add Bandwidth & Volume Rule",
+    "main_menu_4": "4. Manage Rules (List/Delete)",
+    "main_menu_5": "5. System Settings (API / Email / Alerts)",
+    "main_menu_6": "6. Load Official Best Practices",
+    "main_menu_7": "7. Send Test Alert",
+    "main_menu_8": "8. Run Monitor Once",
+    "main_menu_9": "9. Traffic Rule Debug Mode",
+    "main_menu_10": "10. Launch Web GUI",
+    "main_menu_0": "0. Exit",
+    "please_select": "Please select",
+    "starting_web_gui": "Starting Web GUI at",
+    
+    # Add Rules Menus
+    "menu_add_event_title": "=== Add Event Monitor Rule ===",
+    "menu_return": "0. Return",
+    "menu_cancel": "0. Cancel",
+    "set_health_check": "H. Toggle PCE Health Check (Current: {status})",
+    "select_category": "Select category (Number, H for Health Check, 0 to return): ",
+    "select_event": "Select Event",
+    "rule_trigger_type_1": "1. Immediate Alert",
+    "rule_trigger_type_2": "2. Cumulative Count",
+    "cumulative_count": "Cumulative Count",
+    "hint_example_5": "e.g.: 5",
+    "time_window_mins": "Time Window (mins)",
+    "hint_example_10": "e.g.: 10",
+    "cooldown_mins_default": "Cooldown Time (mins) [Default: {win}]",
+    "rule_saved": "Rule saved. Press Enter to continue...",
+    
+    "menu_add_traffic_title": "=== Add Traffic Rule (Blocked/Potential) ===",
+    "rule_name": "Rule Name (e.g.: Blocked SSH)",
+    "policy_decision": "Policy Decision:",
+    "pd_1": "1. \033[91mBlocked\033[0m",
+    "pd_2": "2. \033[93mPotential\033[0m",
+    "pd_3": "3. \033[92mAllowed\033[0m",
+    "pd_4": "4. All",
+    "pd_select_default": "Select [Default: 1]",
+    "advanced_filters": "--- Advanced Filters ---",
+    "port_input": "Port (e.g., 80, 443) [Press Enter to skip]",
+    "proto_select": "Protocol (1. TCP, 2. UDP, 0. Both) [Default: Both]",
+    "src_input": "Source Label/IP/CIDR (e.g., role=Web, 10.0.0.0/8, 192.168.1.1) [Press Enter to skip]",
+    "dst_input": "Dest Label/IP/CIDR (e.g., app=DB, 10.1.1.0/24, 192.168.1.5) [Press Enter to skip]",
+    "trigger_threshold_count": "Trigger Threshold (count) [Default: 10]",
+    "excludes_optional": "--- Excludes (Optional) ---",
+    "ex_port_input": "Exclude Port (e.g., 22) [Press Enter to skip]",
+    "ex_src_input": "Exclude Source Label/IP/CIDR (e.g., env=Kube, 10.9.9.9) [Press Enter to skip]",
+    "ex_dst_input": "Exclude Dest Label/IP/CIDR (e.g., 8.8.8.8) [Press Enter to skip]",
+    "traffic_rule_saved": "Traffic Rule added. Press Enter to continue...",
+    
+    "menu_add_bw_vol_title": "=== Add Bandwidth & Volume Rule ===",
+    "rule_name_bw": "Rule Name (e.g.: Database Spike)",
+    "step_1_metric": "--- 1. Select Metric ---",
+    "metric_1": "1. Bandwidth - Applicable for transmission rate (Mbps)",
+    "metric_2": "2. Total Volume - Applicable for data exfiltration (MB/GB)",
+    "step_2_filters": "--- 2. Filters ---",
+    "step_3_threshold": "--- 3. Threshold ---",
+    "trigger_threshold_unit": "Trigger Threshold ({unit})",
+    "time_window_mins_default_5": "Time Window (mins) [Default: 5]",
+    
+    "menu_manage_rules_title": "=== Manage Monitor Rules ===",
+    "no_rules": "(No rules currently)",
+    "input_delete_indices": "Enter to delete (e.g. 0, 2), modify (e.g. m 1), or -1 to return: ",
+    
+    "menu_settings_title": "=== System Settings v{version} ===",
+    "not_set": "Not Set",
+    "settings_1": "1. Change API Settings (URL, Key, Secret)",
+    "settings_2": "2. Change Alert Channels & Languages",
+    "settings_3": "3. SSL Certificate Verification (Current: {status})",
+    "settings_4": "4. SMTP Settings",
+    "ssl_verify": "Verify",
+    "ssl_ignore": "Ignore",
+    "ssl_status_on": "\033[92mON\033[0m",
+    "ssl_status_off": "\033[91mOFF\033[0m",
+    "change_verify_to": "Change to? (1. Verify, 2. Ignore)",
+    
+    "settings_alert_title": "=== Alert & Language Settings ===",
+    "change_language": "1. Change Language (Current: {lang})",
+    "select_language": "Select Language (1. English, 2. 繁體中文)",
+    "toggle_mail_alert": "2. Toggle Mail Alert (Current: {status})",
+    "toggle_line_alert": "3. Toggle LINE Alert (Current: {status})",
+    "toggle_webhook_alert": "4. Toggle Webhook Alert (Current: {status})",
+    "edit_line_channel_access_token": "5. Edit LINE Channel Access Token",
+    "edit_line_target_id": "6. Edit LINE Target ID",
+    "edit_webhook_url": "7. Edit Webhook URL",
+    "line_token_input": "LINE Channel Token",
+    "line_target_id_input": "LINE Target ID",
+    "webhook_url_input": "Webhook URL",
+    
+    "smtp_title": "=== SMTP Settings ===",
+    "enable_starttls": "Enable STARTTLS (Y/N/Enter)? [{status}]",
+    "enable_auth": "Enable Auth (Y/N/Enter)? [{status}]",
+    
+    "warning_best_practices": "Warning: This action will clear all existing rules and load official recommended settings.",
+    "confirm_continue": "Are you sure you want to continue? (Enter 'YES' to confirm)",
+    
+    # Debug & Analysis
+    "checking_health": "Checking PCE Health...",
+    "checking_events": "Checking Events...",
+    "found_events": "  Found {count} events.",
+    "processed_traffic_records": "  Processed {count} traffic records.",
+    "trigger_alert": ">>> Trigger Alert: {name}",
+    "rule_cooldown": "Rule {name} triggered but in cooldown.",
+    
+    "debug_mode_title": "=== Traffic Rule Simulation & Debug Mode ===",
+    "query_past_mins": "Query data from past how many minutes? [Default: Auto-detect based on max rule window]",
+    "submitting_query": "Submitting traffic query ({start} to {end})...",
+    "simulation_report": "=== Simulation Report ===",
+    "fetched_records": "Fetched {count} traffic records (Window: {mins} mins).",
+    "rule_header": "Rule: {name} ({type})",
+    "time_filter_results": "  -> [Time Filter] Original: {total} -> Rule Window({win}m): Remaining {rem} records",
+    "calc_max_bw": "  -> Calculated Max Bandwidth: {val:.4} Mbps",
+    "calc_sum_vol": "  -> Calculated Total Volume: {val:.4f} MB",
+    "calc_sum_count": "  -> Calculated Total Count: {val:d}",
+    "eval_result": "  -> Evaluation: {status} (Threshold: {threshold})",
+    "samples_top10": "  -> Samples (Top 10):",
+    "would_trigger": "🔴 WOULD TRIGGER",
+    "pass": "🟢 PASS",
+    
+    # Event Descriptions
+    "event_agent_missed_heartbeats": "Missed Heartbeat",
+    "event_agent_offline": "Agent Offline",
+    "event_lost_agent_found": "Lost Agent Found",
+    "event_service_not_available": "Agent Service Unavailable",
+    "event_agent_goodbye": "Agent Goodbye",
+    "event_agent_tampering": "Agent Tampering",
+    "event_agent_suspend": "Agent Suspended",
+    "event_agent_clone_detected": "Agent Clone Detected",
+    "event_agent_activate": "Agent Paired",
+    "event_agent_deactivate": "Agent Unpaired",
+    "event_user_login_failed": "Login Failed",
+    "event_user_sign_in": "User Sign In",
+    "event_csrf_failed": "CSRF Validation Failed",
+    "event_api_auth_failed": "API Auth Failed",
+    "event_api_authz_failed": "API Authz Failed",
+    "event_api_key_create": "Create API Key",
+    "event_api_key_delete": "Delete API Key",
+    "event_ruleset_delete": "Delete Rule Set",
+    "event_ruleset_create": "Create Rule Set",
+    "event_ruleset_update": "Update Rule Set",
+    "event_rule_create": "Create Rule",
+    "event_rule_delete": "Delete Rule",
+    "event_policy_prov": "Policy Provisioning",
+    "event_workload_create": "Create Workload",
+    "event_workload_delete": "Delete Workload",
+    "event_pce_start": "PCE Started",
+    "event_cluster_update": "Cluster Update",
+    
+    "selected": "Selected",
+    "setup_smtp": "=== SMTP Settings ===",
+    
+    # Mail/Reporter HTML UI
+    "no_recipients": "Recipients empty, skipping Mail alert.",
+    "mail_sent": "Email Sent via {host}:{port}.",
+    "mail_failed": "Email Failed: {error}",
+    "mail_subject": "[Illumio] Alert: {count} Issues",
+    "mail_subject_test": "[Illumio] Test Email",
+    "mail_subject_ongoing": "[Illumio] Ongoing: {count} Unchanged Issues",
+    "alert_still_ongoing": "Still ongoing, unchanged since {since}.",
+    "report_header": "Illumio PCE Monitor Report",
+    "generated_at": "Generated at: {time}",
+    "health_alerts_header": "🚨 System Health Alerts",
+    "health_time": "Time",
+    "health_status": "Status",
+    "health_details": "Details",
+    "security_events_header": "⚠️ Security Events",
+    "event_time": "Time",
+    "event_name": "Event",
+    "event_severity": "Severity",
+    "event_source": "Source",
+    "traffic_alerts_header": "🛡️ Traffic Block Alerts",
+    "traffic_rule": "Rule Name",
+    "traffic_count": "Count",
+    "traffic_criteria": "Criteria",
+    "traffic_toptalkers": "Top Talkers",
+    "metric_alerts_header": "📊 Performance & Volume Alerts",
+    "raw_snapshot": "Raw Snapshot:",
+    "table_value": "Value",
+    "table_first_seen": "First Seen",
+    "table_last_seen": "Last Seen",
+    "table_dir": "Dir",
+    "table_source": "Source",
+    "table_destination": "Destination",
+    "table_service": "Service",
+    "table_num_conns": "Num Conns",
+    "table_decision": "Decision",
+    "decision_blocked": "\033[91mBlocked\033[0m",
+    "decision_potential": "\033[93mPotential\033[0m",
+    "decision_allowed": "\033[92mAllowed\033[0m",
+    
+    # Alerters
+    "line_alert_sent": "LINE Alert Sent.",
+    "line_alert_failed": "LINE Alert Failed: {error} / {status}",
+    "line_config_missing": "LINE Channel Token or Target ID not set. Skipping LINE alert.",
+    "webhook_alert_sent": "Webhook Alert Sent.",
+    "webhook_alert_failed": "Webhook Alert Failed: {error} / {status}",
+    "webhook_url_missing": "Webhook URL not set. Skipping Webhook alert.",
+    "syslog_alert_queued": "Syslog: {count} alert(s) queued for {host}.",
+    "syslog_host_missing": "Syslog host not set. Skipping Syslog alert.",
+
+    # Web GUI
+    "gui_title": "Illumio PCE Monitor",
+    "gui_stop": "Stop",
+    "gui_tab_dashboard": "Dashboard",
+    "gui_tab_rules": "Rules",
+    "gui_tab_settings": "Settings",
+    "gui_tab_actions": "Actions",
+    "gui_api_status": "API Status",
+    "gui_active_rules": "Active Rules",
+    "gui_health_check": "Health Check",
+    "gui_language": "Language",
+    "gui_test_conn": "Test Connection",
+    "gui_refresh": "Refresh",
+    "gui_param_guide": "Parameter Guide",
+    "gui_add_event": "+ Event",
+    "gui_add_traffic": "+ Traffic",
+    "gui_add_bw": "+ BW/Vol",
+    "gui_delete": "Delete",
+    "gui_col_type": "Type",
+    "gui_col_name": "Name",
+    "gui_col_status": "Status",
+    "gui_col_condition": "Condition",
+    "gui_col_filters": "Filters",
+    "gui_col_edit": "Edit",
+    "gui_save_all": "Save All Settings",
+    "gui_run_once": "Run Monitor Once",
+    "gui_run_once_desc": "Execute full cycle: Health → Fetch → Analyze → Alert",
+    "gui_run_btn": "Run",
+    "gui_debug_mode": "Debug Mode",
+    "gui_debug_desc": "Sandbox mode — no alerts, no state updates",
+    "gui_window_min": "Window (min)",
+    "gui_policy_dec": "Policy Dec.",
+    "gui_pd_blocked": "Blocked",
+    "gui_pd_allowed": "Allowed",
+    "gui_pd_all": "All",
+    "gui_pd_potential": "Potential",
+    "gui_run_debug": "Run Debug",
+    "gui_test_alert": "Send Test Alert",
+    "gui_test_alert_desc": "Verify Email / LINE / Webhook delivery",
+    "gui_send": "Send",
+    "gui_ta_query": "Traffic Analysis Query",
+    "gui_window": "Window",
+    "gui_filter_details": "Filter Details",
+    "gui_quick_search_placeholder": "Quick Search String...",
+    "gui_sort_by": "Sort By",
+    "gui_filter_settings": "Filter Settings",
+    "gui_query_flow": "Query Flow",
+    "gui_first_last_seen": "First/Last Seen",
+    "gui_metric": "Metric",
+    "gui_source_identity": "Source Identity",
+    "gui_destination_identity": "Destination Identity",
+    "gui_service_port": "Service",
+    "gui_actions": "Actions",
+    "gui_ws_search": "Advanced Workload Search",
+    "gui_win_15m": "Last 15m",
+    "gui_win_1h": "Last 1 hr",
+    "gui_win_24h": "Last 24 hr",
+    "gui_win_1w": "Last 1 Week",
+    "gui_win_1m": "Last 1 Month",
+    "gui_traffic_analyzer": "Traffic Analyzer",
+    "gui_workload_search": "Workload Search",
+    "gui_top10_widgets": "Top 10 Widgets",
+    "gui_workload_name": "Workload Name",
+    "gui_ip_address": "IP Address",
+    "gui_hostname": "Hostname",
+    "gui_find": "Find",
+    "gui_ws_empty": "Search by IP or Name to find workloads in the PCE.",
+    "gui_ws_col_status": "Status / Name",
+    "gui_ws_col_management": "Management",
+    "gui_ws_col_ip": "IP & Interface",
+    "gui_ws_col_labels": "Active Labels",
+    "gui_status_online": "Online",
+    "gui_status_offline": "Offline",
+    "gui_management_managed": "Managed",
+    "gui_management_unmanaged": "Unmanaged",
+    "gui_no_traffic": "No anomalous traffic found matching criteria.",
+    "gui_flows": "flows",
+    "gui_all_services": "All Services",
+    "gui_pd_blocked": "Blocked",
+    "gui_pd_potential": "Potential",
+    "gui_pd_allowed": "Allowed",
+    "gui_pd_all": "All",
+    "gui_total_found_ws": "Total {count} workloads",
+    "gui_ta_guide_sec_search": "Filter Details / Quick Search",
+    "gui_ta_guide_search_desc": "This field performs real-time matching on the returned results (supports top 500 records), matching:",
+    "gui_ta_guide_li_proc": "Process Name (Process): e.g. sshd, nginx, java",
+    "gui_ta_guide_li_user": "User Name (User): e.g. root, www-data, system",
+    "gui_ta_guide_li_svc": "Service Name (Service): e.g. HTTPS, MySQL",
+    "gui_ta_guide_li_wn": "Workload Name: e.g. web-server-01",
+    "gui_ta_guide_li_ip": "IP Address: e.g. 10.0.0.1",
+    "gui_ta_guide_li_port": "Port: e.g. 443",
+    "gui_ta_guide_sec_adv": "Advanced Filter Settings",
+    "gui_ta_guide_adv_desc": "These parameters are sent directly to the Illumio API for server-side filtering:",
+    "gui_ta_guide_li_labels": "Labels: Use Key=Value format, e.g. role=Web",
+    "gui_ta_guide_li_excludes": "Excludes: Exclude specific ports, labels, or IP ranges",
+    "gui_ta_guide_li_pd": "Policy Decision: Filter by decisions (Blocked, Allowed, etc.)",
+    "gui_rank_bw": "Max Bandwidth (Mbps)",
+    "gui_rank_vol": "Total Volume (MB)",
+    "gui_rank_conn": "Connection Count",
+    "gui_top10_loading": "Loading...",
+    "gui_top10_querying": "Querying...",
+    "gui_top10_empty": "No data. Click Run to query.",
+    "gui_page_size": "Page Size",
+    "gui_prev": "Prev",
+    "gui_next": "Next",
+    "gui_total_found": "Total {count} records",
+    "gui_ta_guide_title": "Traffic Analyzer Parameter Guide",
+    "gui_ta_guide_desc": "Use 'Filter Details' to search for process names, users, or workload names.",
+    "gui_best_practices": "Load Best Practices",
+    "gui_best_practices_desc": "Replace ALL existing rules with recommended defaults",
+    "gui_load": "Load",
+    "gui_output": "Output",
+    "gui_profiles": "⏱ Profiling",
+    "gui_profiles_desc": "Capture cProfile + tracemalloc for the next requests (logs/profiles)",
+    "gui_profile_arm": "Arm",
+    "gui_profile_armed": "Armed for next requests",
+    "gui_cancel": "Cancel",
+    "gui_save": "Save",
+    "gui_api_conn": "API Connection",
+    "gui_url": "URL",
+    "gui_org_id": "Org ID",
+    "gui_api_key": "API Key",
+    "gui_api_secret": "API Secret",
+    "gui_verify_ssl": "Verify SSL",
+    "gui_email_smtp": "Email & SMTP",
+    "gui_sender": "Sender",
+    "gui_recipients": "Recipients (comma)",
+    "gui_smtp_host": "SMTP Host",
+    "gui_port": "Port",
+    "gui_user": "User",
+    "gui_password": "Password",
+    "gui_alert_channels": "Alert Channels",
+    "gui_mail": "Mail",
+    "gui_line": "LINE",
+    "gui_webhook": "Webhook",
+    "gui_line_token": "LINE Token",
+    "gui_line_target_id": "LINE Target ID",
+    "gui_webhook_url": "Webhook URL",
+    "gui_lang_settings": "Display & General",
+    "gui_lang_en": "English",
+    "gui_lang_zh": "繁體中文",
+    "gui_theme_dark": "Dark Theme",
+    "gui_theme_light": "Light Theme",
+    "gui_add_event_rule": "Add Event Rule",
+    "gui_edit_event_rule": "Edit Event Rule",
+    "gui_category": "Category",
+    "gui_event_type": "Event Type",
+    "gui_select": "Select...",
+    "gui_select_first": "Select category first",
+    "gui_threshold": "Threshold",
+    "gui_type": "Type",
+    "gui_tt_immediate": "Immediate",
+    "gui_tt_count": "Cumulative",
+    "gui_count": "Count",
+    "gui_cooldown": "Cooldown (min)",
+    "gui_enable_hc": "Enable PCE Health Check",
+    "gui_add_traffic_rule": "Add Traffic Rule",
+    "gui_edit_traffic_rule": "Edit Traffic Rule",
+    "gui_rule_name": "Rule Name",
+    "gui_protocol": "Protocol",
+    "gui_both": "Both",
+    "gui_tcp": "TCP",
+    "gui_udp": "UDP",
+    "gui_source": "Source (Label/IP)",
+    "gui_dest": "Destination (Label/IP)",
+    "gui_excludes": "Excludes (Optional)",
+    "gui_ex_port": "Exclude Port",
+    "gui_ex_src": "Exclude Source",
+    "gui_run_all_queries": "Run All Queries",
+    "gui_add_query_widget": "Add Query Widget",
+    "gui_query_widget_name": "Widget Name",
+    "gui_ex_dest": "Exclude Destination",
+    "gui_add_bw_rule": "Add Bandwidth / Volume Rule",
+    "gui_edit_bw_rule": "Edit Bandwidth / Volume Rule",
+    "gui_metric_type": "Metric Type",
+    "gui_mt_bw": "Bandwidth (Mbps, Max)",
+    "gui_mt_vol": "Volume (MB, Sum)",
+    "gui_value": "Value",
+    "gui_top10_title": "Top 10 Query Report",
+    "gui_rank_by": "Rank By",
+    "gui_rank_count": "Connection Count",
+    "gui_rank_volume": "Total Volume (MB)",
+    "gui_rank_bw": "Max Bandwidth (Mbps)",
+    "gui_top10_flow": "Source -> Destination [Port]",
+    "gui_top10_empty": "No data. Click Run to query.",
+    "gui_top10_querying": "Querying...",
+    "gui_top10_loading": "Loading...",
+    "gui_top10_found": "Found {count} records. (Showing Top 10)",
+    "gui_top10_no_records": "No records found.",
+    "gui_top10_error": "Error querying data.",
+    "gui_top10_cached": "(cached {age}s ago)",
+    "gui_cooldown_title": "Rules in Cooldown",
+    "gui_cooldown_remaining": "{mins}m remaining",
+    "gui_cooldown_active": "Cooldown",
+    "gui_cooldown_ready": "Ready"
+}
@@ -0,0 +1,409 @@
+"""Traditional Chinese (zh_TW) message table, loaded by src.i18n on first use."""
+MESSAGES = {
+    # General & Errors
+    "error_loading_config": "讀取設定失敗: {error}",
+    "config_saved": "設定已儲存。",
+    "error_saving_config": "儲存設定失敗: {error}",
+    "warning_best_practices": "警告: 此操作將清除所有現有的規則，並載入官方推薦的最佳實踐設定。",
+    "confirm_continue": "您確定要繼續操作嗎？",
+    "best_practice_loaded": "\n最佳實踐已成功載入！按 Enter 繼續...",
+    "loading_best_practices": "正在載入最佳實踐 (會清空現有規則)...",
+    "press_enter_to_continue": "按 Enter 繼續...",
+    "operation_cancelled": "\n操作已取消。按 Enter 繼續...",
+    "done": "完成。",
+    "bye": "再見。",
+    
+    # Menu Titles
+    "main_menu_title": "=== Illumio PCE Monitor ===",
+    "main_menu_api": "API: {url} | 規則數: {count}",
+    "main_menu_1": "1. 新增事件規則 (含 PCE Health Check)",
+    "main_menu_2": "2. 新增流量規則 (Traffic Rule)",
+    "main_menu_3": "3. 新增頻寬與傳輸量規則 (Bandwidth & Volume)",
+    "main_menu_4": "4. 管理規則 (列表/刪除)",
+    "main_menu_5": "5. 系統設定 (API / 告警通道 / Email)",
+    "main_menu_6": "6. 載入官方最佳實踐 (Best Practices)",
+    "main_menu_7": "7. 發送測試告警",
+    "main_menu_8": "8. 立即執行監控 (Run Once)",
+    "main_menu_9": "9. 流量規則模擬與除錯 (Debug Mode)",
+    "main_menu_10": "10. 啟動 Web GUI (網頁管理介面)",
+    "main_menu_0": "0. 離開",
+    "please_select": "請選擇",
+    "starting_web_gui": "正在啟動 Web GUI 於",
+    
+    # Add Rules Menus
+    "menu_add_event_title": "=== 新增事件監控規則 ===",
+    "menu_return": "0. 返回上層",
+    "menu_cancel": "0. 取消",
+    "set_health_check": "H. 設定 PCE Health Check (目前: {status})",
+    "select_category": "請選擇類別 (輸入數字，H 設定健檢，0 返回): ",
+    "select_event": "選擇事件",
+    "rule_trigger_type_1": "1. 立即告警",
+    "rule_trigger_type_2": "2. 累積次數",
+    "cumulative_count": "累積次數",
+    "hint_example_5": "例: 5",
+    "time_window_mins": "時間窗口(分)",
+    "hint_example_10": "例: 10",
+    "cooldown_mins_default": "冷卻時間 (分鐘) [預設: {win}]",
+    "rule_saved": "規則已儲存。按 Enter 繼續...",
+    
+    "menu_add_traffic_title": "=== 新增流量規則 (Traffic Rule - Blocked/Potential) ===",
+    "rule_name": "規則名稱 (例如: Blocked SSH)",
+    "policy_decision": "Policy Decision:",
+    "pd_1": "1. \033[91mBlocked (阻擋)\033[0m",
+    "pd_2": "2. \033[93mPotential (潛在阻擋)\033[0m",
+    "pd_3": "3. \033[92mAllowed (允許)\033[0m",
+    "pd_4": "4. All (全部)",
+    "pd_select_default": "選擇 [預設: 1]",
+    "advanced_filters": "--- 進階過濾 (Advanced Filters) ---",
+    "port_input": "Port (例如: 80, 443) [按 Enter 跳過]",
+    "proto_select": "協定 (1. TCP, 2. UDP, 0. Both) [預設: Both]",
+    "src_input": "來源標籤/IP/CIDR (例: role=Web, 10.0.0.0/8, 192.168.1.1) [按 Enter 跳過]",
+    "dst_input": "目的標籤/IP/CIDR (例: app=DB, 10.1.1.0/24, 192.168.1.5) [按 Enter 跳過]",
+    "trigger_threshold_count": "觸發閾值 (次數) [預設: 10]",
+    "excludes_optional": "--- 排除條件 (Excludes) - 選填 ---",
+    "ex_port_input": "排除 Port (例如: 22) [按 Enter 跳過]",
+    "ex_src_input": "排除來源標籤/IP/CIDR (例: env=Kube, 10.9.9.9) [按 Enter 跳過]",
+    "ex_dst_input": "排除目的標籤/IP/CIDR (例: 8.8.8.8) [按 Enter 跳過]",
+    "traffic_rule_saved": "流量規則已新增。按 Enter 繼續...",
+    
+    "menu_add_bw_vol_title": "=== 新增頻寬與傳輸量規則 (Bandwidth & Volume) ===",
+    "rule_name_bw": "規則名稱 (例如: Database Spike)",
+    "step_1_metric": "--- 1. 選擇監控指標 (Metric) ---",
+    "metric_1": "1. 頻寬 (Bandwidth) - 適用: 傳輸速率 (Mbps)",
+    "metric_2": "2. 傳輸量 (Total Volume) - 適用: 資料外洩 (MB/GB)",
+    "step_2_filters": "--- 2. 過濾條件 (Filters) ---",
+    "step_3_threshold": "--- 3. 閾值設定 (Threshold) ---",
+    "trigger_threshold_unit": "觸發閾值 ({unit})",
+    "time_window_mins_default_5": "時間窗口 (分鐘) [預設: 5]",
+    
+    "menu_manage_rules_title": "=== 管理監控規則 ===",
+    "no_rules": "(目前沒有規則)",
+    "input_delete_indices": "輸入編號刪除 (如 0, 2)、修改 (如 m 1) 或 -1 返回: ",
+    
+    "menu_settings_title": "=== 系統設定 (System Settings) v{version} ===",
+    "not_set": "未設定",
+    "settings_1": "1. 修改 API 設定 (URL, Key, Secret)",
+    "settings_2": "2. 告警通道與語言設定 (Alert Channels & Languages)",
+    "settings_3": "3. SSL 憑證驗證 (目前: {status})",
+    "settings_4": "4. SMTP 設定",
+    "ssl_verify": "驗證 (Verify)",
+    "ssl_ignore": "忽略 (Ignore)",
+    "ssl_status_on": "\033[92m開啟\033[0m",
+    "ssl_status_off": "\033[91m關閉\033[0m",
+    "change_verify_to": "變更為? (1. 開啟 Verify, 2. 關閉 Ignore)",
+    
+    "settings_alert_title": "=== 告警通道與語言設定 ===",
+    "change_language": "1. 更改語言 (目前: {lang})",
+    "select_language": "選擇語言 (1. English, 2. 繁體中文)",
+    "toggle_mail_alert": "2. 開關 Mail 告警 (目前: {status})",
+    "toggle_line_alert": "3. 開關 LINE 告警 (目前: {status})",
+    "toggle_webhook_alert": "4. 開關 Webhook 告警 (目前: {status})",
+    "edit_line_channel_access_token": "5. 修改 LINE Channel Access Token",
+    "edit_line_target_id": "6. 修改 LINE Target ID",
+    "edit_webhook_url": "7. 修改 Webhook URL",
+    "line_token_input": "LINE Channel Token",
+    "line_target_id_input": "LINE Target ID",
+    "webhook_url_input": "Webhook URL",
+
+    "smtp_title": "=== SMTP 設定 ===",
+    "enable_starttls": "啟用 STARTTLS (Y/N/Enter)? [{status}]",
+    "enable_auth": "啟用驗證 (Y/N/Enter)? [{status}]",
+    
+    "warning_best_practices": "警告: 此操作將清除所有現有規則並載入官方建議設定。",
+    "confirm_continue": "確定要繼續嗎? (輸入 'YES' 確認)",
+    
+    # Debug & Analysis
+    "checking_health": "檢查 PCE 健康狀態...",
+    "checking_events": "檢查事件 (Events)...",
+    "found_events": "  發現 {count} 個事件。",
+    "processed_traffic_records": "  處理了 {count} 筆流量紀錄。",
+    "trigger_alert": ">>> 觸發告警: {name}",
+    "rule_cooldown": "規則 {name} 已觸發但處於冷卻時間中。",
+    
+    "debug_mode_title": "=== 流量規則模擬與除錯 (Debug Mode) ===",
+    "query_past_mins": "查詢過去幾分鐘的資料? [預設: 自動偵測最大規則時間]",
+    "submitting_query": "正在提交流量查詢 ({start} 至 {end})...",
+    "simulation_report": "=== 模擬結果報告 ===",
+    "fetched_records": "共取得 {count} 筆流量資料 (Window: {mins} mins)。",
+    "rule_header": "規則: {name} ({type})",
+    "time_filter_results": "  -> [時間過濾] 原始資料: {total} -> 規則視窗({win}m): 剩餘 {rem} 筆",
+    "calc_max_bw": "  -> 計算最大頻寬 (Max): {val:.4} Mbps",
+    "calc_sum_vol": "  -> 計算總傳輸量 (Sum): {val:.4f} MB",
+    "calc_sum_count": "  -> 計算總次數 (Sum): {val:d}",
+    "eval_result": "  -> 判定結果: {status} (閾值: {threshold})",
+    "samples_top10": "  -> 樣本 (Top 10):",
+    "would_trigger": "🔴 會觸發 (WOULD TRIGGER)",
+    "pass": "🟢 通過 (PASS)",
+    
+    # Mail/Reporter HTML UI
+    "no_recipients": "未設定收件人，略過發信。",
+    "mail_sent": "Email 已透過 {host}:{port} 發送。",
+    "mail_failed": "Email 發送失敗: {error}",
+    "mail_subject": "[Illumio] 告警: 發現 {count} 個問題",
+    "mail_subject_test": "[Illumio] 測試告警信件",
+    "mail_subject_ongoing": "[Illumio] 持續中: {count} 個未變化的問題",
+    "alert_still_ongoing": "仍在持續，自 {since} 起無變化。",
+    "report_header": "Illumio PCE Monitor 監控報告",
+    "generated_at": "產生時間: {time}",
+    "health_alerts_header": "🚨 系統健康狀態告警",
+    "health_time": "時間",
+    "health_status": "狀態",
+    "health_details": "詳細內容",
+    "security_events_header": "⚠️ 資安事件告警",
+    "event_time": "時間",
+    "event_name": "事件",
+    "event_severity": "嚴重級別",
+    "event_source": "來源",
+    "traffic_alerts_header": "🛡️ 流量阻擋告警",
+    "traffic_rule": "規則名稱",
+    "traffic_count": "次數",
+    "traffic_criteria": "觸發條件",
+    "traffic_toptalkers": "Top Talkers (前十名)",
+    "metric_alerts_header": "📊 效能與傳輸量告警",
+    "raw_snapshot": "原始快照:",
+    "table_value": "測量值",
+    "table_first_seen": "首次發現",
+    "table_last_seen": "最後發現",
+    "table_dir": "方向",
+    "table_source": "來源 (Source)",
+    "table_destination": "目的 (Destination)",
+    "table_service": "服務",
+    "table_num_conns": "連線數",
+    "table_decision": "策略",
+    "decision_blocked": "\033[91m已阻擋\033[0m",
+    "decision_potential": "\033[93m潛在阻擋\033[0m",
+    "decision_allowed": "\033[92m允許\033[0m",
+
+    # Alerters
+    "line_alert_sent": "LINE 告警已送出。",
+    "line_alert_failed": "LINE 告警失敗: {error} / {status}",
+    "line_config_missing": "未設定 LINE Token 或 Target ID，略過 LINE 告警。",
+    "webhook_alert_sent": "Webhook 告警已送出。",
+    "webhook_alert_failed": "Webhook 告警失敗: {error} / {status}",
+    "webhook_url_missing": "未設定 Webhook URL，略過 Webhook 告警。",
+    "syslog_alert_queued": "Syslog: 已將 {count} 筆告警排入 {host} 的佇列。",
+    "syslog_host_missing": "未設定 Syslog 主機，略過 Syslog 告警。",
+
+    # Web GUI
+    "gui_title": "Illumio PCE Monitor",
+    "gui_stop": "停止",
+    "gui_tab_dashboard": "主控台",
+    "gui_tab_rules": "監控規則",
+    "gui_tab_settings": "系統設定",
+    "gui_tab_actions": "執行動作",
+    "gui_api_status": "API 狀態",
+    "gui_active_rules": "啟用規則數",
+    "gui_health_check": "健康檢查",
+    "gui_language": "語言",
+    "gui_test_conn": "測試連線",
+    "gui_refresh": "重新整理",
+    "gui_param_guide": "參數指南",
+    "gui_add_event": "+ 事件",
+    "gui_add_traffic": "+ 流量",
+    "gui_add_bw": "+ 頻寬/傳輸量",
+    "gui_delete": "刪除",
+    "gui_col_type": "類型",
+    "gui_col_name": "名稱",
+    "gui_col_status": "狀態",
+    "gui_col_condition": "觸發條件",
+    "gui_col_filters": "過濾指標",
+    "gui_col_edit": "編輯",
+    "gui_save_all": "儲存所有設定",
+    "gui_run_once": "立即執行監控",
+    "gui_run_once_desc": "執行完整流程: 健康檢查 → 抓取資料 → 分析 → 告警",
+    "gui_run_btn": "執行",
+    "gui_debug_mode": "偵錯模式",
+    "gui_debug_desc": "沙盒模式 — 不會發送告警，不更新內部狀態",
+    "gui_window_min": "視窗 (分鐘)",
+    "gui_policy_dec": "Policy Dec.",
+    "gui_pd_blocked": "已阻擋 (Blocked)",
+    "gui_pd_allowed": "允許 (Allowed)",
+    "gui_pd_all": "全部 (All)",
+    "gui_pd_potential": "潛在 (Potential)",
+    "gui_run_debug": "執行偵錯",
+    "gui_test_alert": "發送測試告警",
+    "gui_test_alert_desc": "測試 Email / LINE / Webhook 告警寄送",
+    "gui_send": "發送",
+    "gui_test_alert_desc": "測試 Email / LINE / Webhook 告警寄送",
+    "gui_send": "發送",
+    "gui_ta_query": "流量分析查詢 (Traffic Analysis Query)",
+    "gui_window": "時間範圍 (Window)",
+    "gui_filter_details": "過濾詳情",
+    "gui_quick_search_placeholder": "快速搜尋字串...",
+    "gui_sort_by": "排序依據",
+    "gui_filter_settings": "過濾設定",
+    "gui_query_flow": "查詢流量",
+    "gui_first_last_seen": "首次/最後發現",
+    "gui_metric": "指標 (Metric)",
+    "gui_source_identity": "來源識別 (Source)",
+    "gui_destination_identity": "目的識別 (Destination)",
+    "gui_service_port": "服務/通訊埠",
+    "gui_actions": "動作",
+    "gui_ws_search": "進階工作負載搜尋",
+    "gui_win_15m": "過去 15 分鐘",
+    "gui_win_1h": "過去 1 小時",
+    "gui_win_24h": "過去 24 小時",
+    "gui_win_1w": "過去 1 週",
+    "gui_win_1m": "過去 1 個月",
+    "gui_traffic_analyzer": "流量分析儀",
+    "gui_workload_search": "工作負載搜尋",
+    "gui_top10_widgets": "Top 10 小工具",
+    "gui_workload_name": "工作負載名稱",
+    "gui_ip_address": "IP 位址",
+    "gui_hostname": "主機名稱",
+    "gui_find": "搜尋",
+    "gui_ws_empty": "請輸入 IP 或名稱以搜尋 PCE 中的工作負載。",
+    "gui_ws_col_status": "狀態 / 名稱",
+    "gui_ws_col_management": "管理狀態",
+    "gui_ws_col_ip": "IP 與介面",
+    "gui_ws_col_labels": "生效標籤",
+    "gui_status_online": "在線",
+    "gui_status_offline": "離線",
+    "gui_management_managed": "受管",
+    "gui_management_unmanaged": "非受管",
+    "gui_total_found_ws": "共 {count} 台工作負載",
+    "gui_ta_guide_sec_search": "過濾詳情 / 即時搜尋",
+    "gui_ta_guide_search_desc": "此欄位會對回傳的結果進行即時比對（支援前 500 筆），包含：",
+    "gui_ta_guide_li_proc": "程序名稱 (Process): 例如 sshd, nginx, java",
+    "gui_ta_guide_li_user": "使用者 (User): 例如 root, www-data, system",
+    "gui_ta_guide_li_svc": "服務名稱 (Service): 例如 HTTPS, MySQL",
+    "gui_ta_guide_li_wn": "工作負載名稱: 例如 web-server-01",
+    "gui_ta_guide_li_ip": "IP 位址: 例如 10.0.0.1",
+    "gui_ta_guide_li_port": "通訊埠 (Port): 直接輸入數字，例如 443",
+    "gui_ta_guide_sec_adv": "進階過濾設定",
+    "gui_ta_guide_adv_desc": "這些參數會直接遞交給 Illumio API 進行伺服器端過濾：",
+    "gui_ta_guide_li_labels": "標籤 (Labels): 請使用 Key=Value 格式，例如 role=Web",
+    "gui_ta_guide_li_excludes": "排除條件 (Excludes): 可排除特定 Port、標籤或 IP 段",
+    "gui_ta_guide_li_pd": "政策判定: 篩選 Blocked, Allowed 等類型",
+    "gui_rank_bw": "最大頻寬 (Mbps)",
+    "gui_rank_vol": "總傳輸量 (MB)",
+    "gui_rank_conn": "連線次數",
+    "gui_top10_loading": "讀取中...",
+    "gui_top10_querying": "查詢中...",
+    "gui_top10_empty": "無資料。請點擊運行開始查詢。",
+    "gui_page_size": "每頁筆數",
+    "gui_prev": "上一頁",
+    "gui_next": "下一頁",
+    "gui_total_found": "共 {count} 筆紀錄",
+    "gui_ta_guide_title": "流量分析參數指南",
+    "gui_ta_guide_desc": "您可以在「過濾詳情」中輸入程序名稱 (process)、使用者 (user) 或工作負載名稱進行搜尋。",
+    "gui_best_practices": "載入最佳實踐",
+    "gui_best_practices_desc": "用官方建議的預設值覆寫 (覆寫所有現有規則)",
+    "gui_load": "載入",
+    "gui_output": "執行輸出",
+    "gui_profiles": "⏱ 效能剖析",
+    "gui_profiles_desc": "對接下來的請求擷取 cProfile 與 tracemalloc 資料 (logs/profiles)",
+    "gui_profile_arm": "啟用",
+    "gui_profile_armed": "待剖析的請求數",
+    "gui_cancel": "取消",
+    "gui_save": "儲存",
+    "gui_api_conn": "API 連線設定",
+    "gui_url": "URL",
+    "gui_org_id": "Org ID",
+    "gui_api_key": "API Key",
+    "gui_api_secret": "API Secret",
+    "gui_verify_ssl": "驗證憑證 (Verify SSL)",
+    "gui_email_smtp": "Email 與 SMTP",
+    "gui_sender": "寄件人 (Sender)",
+    "gui_recipients": "收件人 (多個用逗號分隔)",
+    "gui_smtp_host": "SMTP 主機",
+    "gui_port": "Port",
+    "gui_user": "使用者帳號",
+    "gui_password": "密碼",
+    "gui_alert_channels": "啟用的告警通道",
+    "gui_mail": "Mail",
+    "gui_line": "LINE",
+    "gui_webhook": "Webhook",
+    "gui_line_token": "LINE Token",
+    "gui_line_target_id": "LINE Target ID",
+    "gui_webhook_url": "Webhook URL",
+    "gui_lang_settings": "顯示與一般設定 (Display & General)",
+    "gui_lang_en": "English",
+    "gui_lang_zh": "繁體中文",
+    "gui_theme_dark": "暗黑主題 (Dark)",
+    "gui_theme_light": "明亮主題 (Light)",
+    "gui_add_event_rule": "新增事件規則",
+    "gui_edit_event_rule": "編輯事件規則",
+    "gui_category": "事件類別",
+    "gui_event_type": "事件類型",
+    "gui_select": "請選擇...",
+    "gui_select_first": "請先選擇類別",
+    "gui_threshold": "觸發閾值",
+    "gui_type": "計算方式",
+    "gui_tt_immediate": "立即觸發",
+    "gui_tt_count": "累積次數",
+    "gui_count": "次數",
+    "gui_cooldown": "冷卻時間 (分)",
+    "gui_enable_hc": "啟用 PCE 健康檢查監控",
+    "gui_add_traffic_rule": "新增流量規則",
+    "gui_edit_traffic_rule": "編輯流量規則",
+    "gui_rule_name": "規則名稱",
+    "gui_protocol": "通訊協定",
+    "gui_both": "兩者 (Both)",
+    "gui_tcp": "TCP",
+    "gui_udp": "UDP",
+    "gui_source": "來源 (標籤/IP)",
+    "gui_dest": "目的 (標籤/IP)",
+    "gui_excludes": "排除條件 (選填)",
+    "gui_ex_port": "排除 Port",
+    "gui_ex_src": "排除來源",
+    "gui_run_all_queries": "執行全部查詢",
+    "gui_add_query_widget": "新增查詢報表",
+    "gui_query_widget_name": "報表名稱",
+    "gui_ex_dest": "排除目的",
+    "gui_add_bw_rule": "新增頻寬與傳輸量規則",
+    "gui_edit_bw_rule": "編輯頻寬與傳輸量規則",
+    "gui_metric_type": "監控指標類型",
+    "gui_mt_bw": "頻寬 (Mbps, Max)",
+    "gui_mt_vol": "傳輸量 (MB, Sum)",
+    "gui_value": "數值",
+    "gui_top10_title": "Top 10 查詢報表",
+    "gui_rank_by": "排序依據",
+    "gui_rank_count": "連線數 (Connection Count)",
+    "gui_rank_volume": "總傳輸量 (Total Volume MB)",
+    "gui_rank_bw": "最大頻寬 (Max Bandwidth Mbps)",
+    "gui_top10_flow": "來源 -> 目的 [Port]",
+    "gui_top10_empty": "無資料。點擊執行開始查詢。",
+    "gui_top10_querying": "查詢中...",
+    "gui_top10_loading": "載入中...",
+    "gui_top10_found": "找到 {count} 筆紀錄。(顯示 Top 10)",
+    "gui_top10_no_records": "未找到任何紀錄。",
+    "gui_top10_error": "查詢資料時發生錯誤。",
+    "gui_top10_cached": "（{age} 秒前的快取）",
+    "gui_cooldown_title": "冷卻中的規則",
+    "gui_cooldown_remaining": "剩餘 {mins} 分鐘",
+    "gui_cooldown_active": "冷卻中",
+    "gui_cooldown_ready": "就緒",
+
+    # Event Descriptions
+    "event_agent_missed_heartbeats": "遺失心跳",
+    "event_agent_offline": "Agent 離線",
+    "event_lost_agent_found": "重新發現遺失 Agent",
+    "event_service_not_available": "Agent 服務不可用",
+    "event_agent_goodbye": "Agent Goodbye",
+    "event_agent_tampering": "Agent 遭到竄改",
+    "event_agent_suspend": "Agent 被暫停",
+    "event_agent_clone_detected": "偵測到複製 Agent",
+    "event_agent_activate": "Agent 已配對",
+    "event_agent_deactivate": "Agent 取消配對",
+    "event_user_login_failed": "登入失敗",
+    "event_user_sign_in": "使用者登入",
+    "event_csrf_failed": "CSRF 驗證失敗",
+    "event_api_auth_failed": "API 認證失敗",
+    "event_api_authz_failed": "API 授權失敗",
+    "event_api_key_create": "建立 API Key",
+    "event_api_key_delete": "刪除 API Key",
+    "event_ruleset_delete": "刪除規則集",
+    "event_ruleset_create": "建立規則集",
+    "event_ruleset_update": "更新規則集",
+    "event_rule_create": "建立規則",
+    "event_rule_delete": "刪除規則",
+    "event_policy_prov": "政策派送 (Provisioning)",
+    "event_workload_create": "建立工作負載",
+    "event_workload_delete": "刪除工作負載",
+    "event_pce_start": "PCE 啟動",
+    "event_cluster_update": "叢集更新",
+    
+    "selected": "已選擇",
+    "setup_smtp": "=== SMTP 設定 ===",
+}
@@ -0,0 +1,280 @@
+"""
+Process metrics in the Prometheus text exposition format (version 0.0.4).
+
+Counters, gauges and histograms are module-level objects that the hot paths
+update directly; render() produces the /metrics page. The Web GUI serves it as a
+Flask route, and the --monitor daemon starts a small HTTP listener with
+start_http_server() (settings.metrics_port, or --metrics-port).
+
+Updates are a dict lookup plus an add under a per-metric lock that is only ever
+held for those few instructions, so writers practically never wait; labelled
+children are created once and reused. Values that are cheaper to read at scrape
+time (queue depths, cache statistics, RSS) come from collectors registered with
+register_collector(), which return (name, type, help, [(labels, value)]) tuples.
+"""
+import os
+import sys
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CYCLE_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra="") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self.labelnames, key, "", v) for key, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value  # a single store: no lock needed
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self.labelnames, key, "", v) for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            child = self._values.get(key)
+            if child is None:
+                child = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            child[0][idx] += 1
+            child[1] += value
+            child[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(c[0]), c[1], c[2])) for key, c in self._values.items()]
+        out = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                out.append((f"{self.name}_bucket", self.labelnames, key, f'le="{_num(float(bound))}"', cumulative))
+            out.append((f"{self.name}_sum", self.labelnames, key, "", total))
+            out.append((f"{self.name}_count", self.labelnames, key, "", count))
+        return out
+
+
+_registry = []
+_collectors = []
+_collectors_lock = threading.Lock()
+
+
+def register_collector(fn):
+    """fn() -> [(name, type, help, [(labels_dict, value)])], called on every scrape."""
+    with _collectors_lock:
+        _collectors.append(fn)
+    return fn
+
+
+def unregister_collector(fn):
+    with _collectors_lock:
+        if fn in _collectors:
+            _collectors.remove(fn)
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        samples = metric.samples()
+        if not samples:
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labelnames, key, extra, value in samples:
+            lines.append(f"{name}{_label_str(labelnames, key, extra)} {_num(value)}")
+    with _collectors_lock:
+        collectors = list(_collectors)
+    families = {}
+    for fn in collectors:
+        try:
+            for name, kind, help_text, samples in fn():
+                families.setdefault(name, [kind, help_text, []])[2].extend(samples)
+        except Exception as e:
+            logger.debug(f"Metrics collector {fn!r} failed: {e}")
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_label_str(list(labels), list(labels.values()))} {_num(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────
+
+CYCLE_SECONDS = Histogram("illumio_monitor_cycle_duration_seconds",
+                          "Duration of monitoring cycles.", ("kind",), CYCLE_BUCKETS)
+CYCLE_STAGE_SECONDS = Gauge("illumio_monitor_cycle_stage_seconds",
+                            "Time spent per stage in the last monitoring cycle.", ("stage",))
+CYCLE_FLOWS = Gauge("illumio_monitor_cycle_flows",
+                    "Traffic flows processed in the last monitoring cycle.")
+CYCLES = Counter("illumio_monitor_cycles_total", "Monitoring cycles run, by outcome.", ("kind", "status"))
+FLOWS = Counter("illumio_monitor_flows_processed_total", "Traffic flows processed.")
+PCE_REQUEST_SECONDS = Histogram("illumio_monitor_pce_request_duration_seconds",
+                                "PCE API request latency, per attempt.", ("endpoint", "method", "status"))
+PCE_RETRIES = Counter("illumio_monitor_pce_retries_total",
+                      "PCE API requests retried, by reason.", ("endpoint", "reason"))
+ALERTS = Counter("illumio_monitor_alerts_total",
+                 "Alert deliveries by channel and outcome.", ("channel", "outcome"))
+SMTP_PHASE_SECONDS = Histogram("illumio_monitor_smtp_phase_duration_seconds",
+                               "SMTP session phase latency (connect, starttls, auth, noop, send, quit).",
+                               ("phase",))
+MEMORY_HIGH_WATER = Gauge("illumio_monitor_memory_high_water_bytes",
+                          "Approximate peak bytes held by the last analysis run.", ("pipeline",))
+MEMORY_SPILLED = Counter("illumio_monitor_memory_spilled_bytes_total",
+                         "Traffic download bytes spooled to disk because they exceeded the memory budget.",
+                         ("pipeline",))
+
+
+def observe_cycle(record: dict):
+    """Feeds a finished cycle_metrics record into the cycle metrics."""
+    CYCLE_SECONDS.observe(record["duration_ms"] / 1000, kind=record["kind"])
+    CYCLES.inc(kind=record["kind"], status=record["status"])
+    for stage, ms in record["stages"].items():
+        CYCLE_STAGE_SECONDS.set(ms / 1000, stage=stage)
+    flows = record["counters"].get("flows", 0)
+    CYCLE_FLOWS.set(flows)
+    if flows:
+        FLOWS.inc(flows)
+
+
+# ─── Scrape-time collectors ───────────────────────────────────────────────
+
+_caches = {}
+
+
+def register_cache(name: str, cache):
+    """Exposes a TTLCache's hit/miss counters and size under cache=name."""
+    _caches[name] = cache
+
+
+@register_collector
+def _cache_collector():
+    stats = {name: cache.stats() for name, cache in list(_caches.items())}
+    return [
+        ("illumio_monitor_cache_hits_total", "counter", "Cache lookups served from a fresh entry.",
+         [({"cache": n}, s["hits"]) for n, s in stats.items()]),
+        ("illumio_monitor_cache_misses_total", "counter", "Cache lookups that missed or found a stale entry.",
+         [({"cache": n}, s["misses"]) for n, s in stats.items()]),
+        ("illumio_monitor_cache_hit_ratio", "gauge", "Share of cache lookups that were hits.",
+         [({"cache": n}, round(s["hit_rate"], 4)) for n, s in stats.items()]),
+        ("illumio_monitor_cache_entries", "gauge", "Entries held in the cache.",
+         [({"cache": n}, s["entries"]) for n, s in stats.items()]),
+    ]
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+@register_collector
+def _process_collector():
+    return [("process_resident_memory_bytes", "gauge", "Resident memory size in bytes.", [({}, rss_bytes())])]
+
+
+# ─── HTTP listener (daemon mode) ──────────────────────────────────────────
+
+def start_http_server(port: int, host: str = "0.0.0.0"):
+    """Serves /metrics from a daemon thread. Returns the server; call shutdown() to stop it."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            logger.debug("metrics: " + fmt % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,133 @@
+"""
+One-shot batch modes for cron jobs and external schedulers.
+
+  --run-once  runs one monitoring cycle (health check, events, traffic rules),
+              delivers the alerts through the configured channels unless
+              --no-send is given, and prints the alerts that fired.
+  --query     runs a traffic query (Analyzer.query_flows) and prints the
+              matching flows.
+
+Results go to stdout as one JSON document (--format json) or as one JSON object
+per line (--format ndjson); progress messages are sent to stderr so stdout stays
+machine-readable. Only the API client, analyzer and reporter are loaded: no
+Flask, no menus.
+
+Exit codes:
+  0  the cycle ran and no alert fired / the query ran
+  1  the cycle ran and at least one alert fired
+  2  error (configuration, analysis), or a PCE API call failed: connection
+     error, 5xx after retries, or 401/403. The analysis carries on past
+     failed calls, so the alerts that did fire are still printed.
+"""
+import sys
+import json
+import logging
+import datetime
+from contextlib import redirect_stdout
+from src.config import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_ALERTS = 1
+EXIT_ERROR = 2
+FORMATS = ("json", "ndjson")
+ALERT_KINDS = ("health", "event", "traffic", "metric")
+QUERY_SORTS = ("bandwidth", "volume", "connections")
+
+
+def _write(out, fmt: str, document: dict, records: list):
+    """json: the document with the records under its "records" key; ndjson: each record, then the document."""
+    dump = lambda obj, **kw: json.dumps(obj, ensure_ascii=False, default=str, **kw)
+    if fmt == "ndjson":
+        for rec in records:
+            out.write(dump(rec, separators=(",", ":")) + "\n")
+        out.write(dump(document, separators=(",", ":")) + "\n")
+    else:
+        out.write(dump(dict(document, records=records), indent=2) + "\n")
+    out.flush()
+
+
+def run_once(send: bool = True, fmt: str = "json", cm=None, out=None) -> int:
+    """Runs a single monitoring cycle and prints its alerts; returns the exit code."""
+    from src.api_client import ApiClient
+    from src.analyzer import Analyzer
+    from src.reporter import Reporter
+    from src import cycle_metrics, syslog_sink
+
+    out = out or sys.stdout
+    cycle = None
+    try:
+        with redirect_stdout(sys.stderr):
+            cm = cm or ConfigManager()
+            rep = Reporter(cm)
+            with cycle_metrics.cycle("oneshot") as cycle:
+                ana = Analyzer(cm, ApiClient(cm), rep)
+                ana.run_analysis()
+                if send:
+                    rep.send_alerts()
+                    ana.save_deliveries()
+    except Exception as e:
+        logger.error(f"One-shot cycle failed: {e}", exc_info=True)
+        _write(out, fmt, {"type": "summary", "mode": "run_once", "status": "error", "error": str(e),
+                          "cycle": cycle.to_dict() if cycle else None}, [])
+        return EXIT_ERROR
+    finally:
+        # The process exits next: deliver queued syslog alerts and streamed flows first
+        syslog_sink.close_all()
+
+    records = [dict(alert, type="alert", kind=kind)
+               for kind in ALERT_KINDS for alert in getattr(rep, f"{kind}_alerts")]
+    pce_errors = cycle.counters.get("pce_errors", 0)
+    _write(out, fmt, {
+        "type": "summary",
+        "mode": "run_once",
+        "status": "pce_error" if pce_errors else ("alerts" if records else "ok"),
+        "alerts": len(records),
+        "sent": bool(send and records),
+        "pce_errors": pce_errors,
+        "cycle": cycle.to_dict(),
+    }, records)
+    if pce_errors:
+        return EXIT_ERROR
+    return EXIT_ALERTS if records else EXIT_OK
+
+
+def query_params(minutes: int = 30, start: str = None, end: str = None, **filters) -> dict:
+    """Analyzer.query_flows params for the last `minutes` minutes, or for start..end (UTC, ISO 8601)."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    params = {
+        "start_time": start or (now - datetime.timedelta(minutes=minutes)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "end_time": end or now.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }
+    params.update({k: v for k, v in filters.items() if v not in (None, "", [])})
+    return params
+
+
+def run_query(params: dict, fmt: str = "json", limit: int = None, cm=None, out=None) -> int:
+    """Runs a traffic query and prints the matching flows; returns the exit code."""
+    from src.api_client import ApiClient
+    from src.analyzer import Analyzer
+    from src.reporter import Reporter
+    from src import cycle_metrics
+
+    out = out or sys.stdout
+    try:
+        with redirect_stdout(sys.stderr):
+            cm = cm or ConfigManager()
+            with cycle_metrics.cycle("query") as cycle:
+                flows = Analyzer(cm, ApiClient(cm), Reporter(cm)).query_flows(params)
+    except Exception as e:
+        logger.error(f"One-shot query failed: {e}", exc_info=True)
+        _write(out, fmt, {"type": "summary", "mode": "query", "status": "error", "error": str(e),
+                          "params": params}, [])
+        return EXIT_ERROR
+
+    total = len(flows)
+    if limit:
+        flows = flows[:limit]
+    pce_errors = cycle.counters.get("pce_errors", 0)
+    _write(out, fmt, {"type": "summary", "mode": "query", "status": "pce_error" if pce_errors else "ok",
+                      "params": params, "matched": total, "returned": len(flows), "pce_errors": pce_errors},
+           [dict(flow, type="flow") for flow in flows])
+    return EXIT_ERROR if pce_errors else EXIT_OK
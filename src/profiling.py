@@ -0,0 +1,201 @@
+"""
+Opt-in profiling of monitoring cycles and Web GUI requests.
+
+Profiling is off until it is armed for the next N captures:
+
+  - daemon: settings.profiling.cycles profiles the first N cycles after start,
+    and SIGUSR1 arms the next signal_cycles cycles (kill -USR1 <pid>);
+  - GUI:    a request carrying the X-Profile header is profiled, and the
+    Actions tab (POST /api/profiles/arm) arms the next N requests.
+
+Each capture runs the cycle or request under cProfile and tracemalloc and
+writes two files to logs/profiles/: <stamp>_<kind>_<name>.prof (pstats dump,
+for snakeviz / pstats) and a matching .txt with the top functions by cumulative
+time and the top allocation sites. Only the newest `keep` captures are kept.
+Only one capture runs at a time; work that starts while another capture is
+running is not profiled and does not use up an armed slot.
+
+    "settings": {"profiling": {"cycles": 0, "signal_cycles": 1, "keep": 20, "top_allocations": 25}}
+"""
+import io
+import os
+import re
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(PKG_DIR)
+PROFILE_DIR = os.path.join(ROOT_DIR, "logs", "profiles")
+PROFILE_HEADER = "X-Profile"
+PROFILING_DEFAULTS = {
+    "cycles": 0,            # profile this many cycles after the daemon starts
+    "signal_cycles": 1,     # cycles armed by each SIGUSR1
+    "keep": 20,             # captures kept in logs/profiles
+    "top_allocations": 25,  # tracemalloc lines in the .txt report
+}
+TOP_FUNCTIONS = 40
+PROFILE_FILE_RE = re.compile(r"^[\w.-]+\.(prof|txt)$")
+
+
+def profiling_settings(cm) -> dict:
+    settings = dict(PROFILING_DEFAULTS)
+    settings.update(cm.config.get("settings", {}).get("profiling") or {})
+    return settings
+
+
+class _Capture:
+    def __init__(self, profiler, kind, name):
+        self.profiler = profiler
+        self.kind = kind
+        self.name = re.sub(r"[^\w.-]+", "_", name).strip("_")[:60] or "run"
+        self.started = time.time()
+        # The profiling modules are only loaded when a capture actually runs
+        import cProfile
+        import tracemalloc
+        self._tracemalloc = tracemalloc
+        self._prof = cProfile.Profile()
+        self._own_tracemalloc = not tracemalloc.is_tracing()
+
+    def start(self):
+        if self._own_tracemalloc:
+            self._tracemalloc.start()
+        self._prof.enable()
+
+    def stop(self) -> str:
+        """Stops profiling, writes the .prof and .txt files and returns the .prof file name."""
+        self._prof.disable()
+        try:
+            snapshot = self._tracemalloc.take_snapshot()
+            if self._own_tracemalloc:
+                self._tracemalloc.stop()
+            return self.profiler._write(self, snapshot)
+        finally:
+            self.profiler._release()
+
+
+class Profiler:
+    def __init__(self, directory: str = PROFILE_DIR, keep: int = 20, top_allocations: int = 25):
+        self.directory = directory
+        self.keep = int(keep)
+        self.top_allocations = int(top_allocations)
+        self._lock = threading.Lock()
+        self._armed = 0
+        self._arm_requests = deque()  # filled without locking, so arm() is safe in a signal handler
+        self._active = False
+
+    @property
+    def armed(self) -> int:
+        return self._armed + sum(self._arm_requests)
+
+    def arm(self, count: int = 1):
+        """Profiles the next `count` cycles or requests."""
+        self._arm_requests.append(max(int(count), 0))
+
+    def start(self, kind: str, name: str, force: bool = False):
+        """Starts a capture if one is armed (or force=True) and none is running; returns it, or None."""
+        with self._lock:
+            while self._arm_requests:
+                self._armed += self._arm_requests.popleft()
+            if self._active or not (force or self._armed > 0):
+                return None
+            if not force:
+                self._armed -= 1
+            self._active = True
+        logger.info(f"Profiling {kind} {name}")
+        capture = _Capture(self, kind, name)
+        try:
+            capture.start()
+        except ValueError as e:  # another profiler (e.g. a debugger) owns the profiling hook
+            logger.warning(f"Cannot profile {kind} {name}: {e}")
+            self._release()
+            return None
+        return capture
+
+    @contextmanager
+    def capture(self, kind: str, name: str, force: bool = False):
+        """Profiles the block if a capture is armed; yields the capture or None."""
+        cap = self.start(kind, name, force)
+        try:
+            yield cap
+        finally:
+            if cap is not None:
+                cap.stop()
+
+    def _release(self):
+        with self._lock:
+            self._active = False
+
+    # ─── Output ───────────────────────────────────────────────────────────
+
+    def _write(self, cap, snapshot) -> str:
+        import pstats
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(cap.started)) + f"{cap.started % 1:.3f}"[1:]
+        base = os.path.join(self.directory, f"{stamp}_{cap.kind}_{cap.name}")
+        cap._prof.dump_stats(base + ".prof")
+
+        elapsed = time.time() - cap.started
+        out = io.StringIO()
+        out.write(f"{cap.kind} {cap.name}: {elapsed:.3f}s wall time, started "
+                  f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(cap.started))}\n\n")
+        pstats.Stats(cap._prof, stream=out).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        out.write(f"\nTop {self.top_allocations} allocation sites (tracemalloc):\n")
+        for stat in snapshot.statistics("lineno")[:self.top_allocations]:
+            out.write(f"  {stat}\n")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+
+        self._rotate()
+        logger.info(f"Profile written: {base}.prof ({elapsed:.2f}s)")
+        return os.path.basename(base + ".prof")
+
+    def _rotate(self):
+        captures = sorted(f[:-5] for f in os.listdir(self.directory) if f.endswith(".prof"))
+        for base in captures[:-self.keep] if self.keep > 0 else []:
+            for ext in (".prof", ".txt"):
+                try:
+                    os.remove(os.path.join(self.directory, base + ext))
+                except OSError:
+                    pass
+
+    def list_profiles(self) -> list:
+        """Captured files, newest first: [{"name", "size", "modified"}]."""
+        try:
+            names = [n for n in os.listdir(self.directory) if PROFILE_FILE_RE.match(n)]
+        except OSError:
+            return []
+        out = []
+        for name in names:
+            st = os.stat(os.path.join(self.directory, name))
+            out.append({"name": name, "size": st.st_size,
+                        "modified": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(st.st_mtime))})
+        return sorted(out, key=lambda p: p["name"], reverse=True)
+
+    def profile_path(self, name: str):
+        """Absolute path of a captured file, or None for unknown or unsafe names."""
+        if not PROFILE_FILE_RE.match(name or ""):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler(cm=None) -> Profiler:
+    """Process-wide Profiler; its rotation settings follow settings.profiling."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler()
+        if cm is not None:
+            settings = profiling_settings(cm)
+            _profiler.keep = int(settings["keep"])
+            _profiler.top_allocations = int(settings["top_allocations"])
+        return _profiler
@@ -0,0 +1,156 @@
+"""
+Report rendering for the Reporter: the HTML flow snapshot table and the plain-text report.
+
+Row and badge markup are module-level templates filled with str.format, output is
+collected in lists and joined once, and the badge fragment for a label is
+memoized, since the same few labels repeat on almost every row of a snapshot.
+"""
+import datetime
+from functools import lru_cache
+from src.utils import strip_ansi
+from src.i18n import t, get_language
+
+_CELL_TH = "<th style='padding:8px; border:1px solid #ddd;'>{}</th>"
+
+_SNAPSHOT_ROW = (
+    "<tr>"
+    "<td style='padding:8px; border:1px solid #ddd; font-weight:bold; color:#6f42c1;'>{val}</td>"
+    "<td style='padding:8px; border:1px solid #ddd; white-space:nowrap; font-size:10px;'>{first}<br>{last}</td>"
+    "<td style='padding:8px; border:1px solid #ddd; text-align:center;'>{direction}</td>"
+    "<td style='padding:8px; border:1px solid #ddd;'><strong>{s_name}</strong><br><small>{s_ip}</small><br>{s_badges}</td>"
+    "<td style='padding:8px; border:1px solid #ddd;'><strong>{d_name}</strong><br><small>{d_ip}</small><br>{d_badges}</td>"
+    "<td style='padding:8px; border:1px solid #ddd;'>{port} / {proto}</td>"
+    "<td style='padding:8px; border:1px solid #ddd; text-align:center;'><strong>{count}</strong></td>"
+    "<td style='padding:8px; border:1px solid #ddd;'>{decision}</td>"
+    "</tr>"
+)
+
+_BADGE = ("<span style='background:#e1ecf4; color:#2c5e77; padding:2px 5px; border-radius:4px; "
+          "font-size:10px; margin-right:3px;'>{}:{}</span>")
+
+_DECISION_BADGES = {
+    "blocked": ("<span style='color:white; background:#dc3545; padding:2px 6px; border-radius:3px;'>{}</span>", "decision_blocked"),
+    "potentially_blocked": ("<span style='color:black; background:#ffc107; padding:2px 6px; border-radius:3px;'>{}</span>", "decision_potential"),
+    "allowed": ("<span style='color:white; background:#28a745; padding:2px 6px; border-radius:3px;'>{}</span>", "decision_allowed"),
+}
+
+_DIRECTIONS = {"inbound": "IN", "outbound": "OUT"}
+_PROTOCOLS = {6: "TCP", 17: "UDP"}
+
+
+@lru_cache(maxsize=4096)
+def label_badge(key, value) -> str:
+    return _BADGE.format(strip_ansi(key), strip_ansi(value))
+
+
+def _badges(labels) -> str:
+    return "".join([label_badge(l.get('key'), l.get('value')) for l in labels])
+
+
+@lru_cache(maxsize=16)
+def _snapshot_header(lang: str) -> str:
+    cols = [t('table_value'), f"{t('table_first_seen')} /<br>{t('table_last_seen')}", t('table_dir'),
+            t('table_source'), t('table_destination'), t('table_service'), t('table_num_conns'), t('table_decision')]
+    return ("<table style='width:100%; border-collapse:collapse; font-family:Arial,sans-serif; font-size:12px; border:1px solid #ddd;'>"
+            "<tr style='background-color:#f2f2f2; text-align:left;'>"
+            + "".join(_CELL_TH.format(c) for c in cols) + "</tr>")
+
+
+@lru_cache(maxsize=16)
+def _decision_badges(lang: str) -> dict:
+    return {k: tpl.format(strip_ansi(t(key))) for k, (tpl, key) in _DECISION_BADGES.items()}
+
+
+def snapshot_html(data_list) -> str:
+    """HTML table of flow records (the raw_data of a traffic or metric alert)."""
+    if not data_list:
+        return "No Data"
+    lang = get_language()
+    decisions = _decision_badges(lang)
+    out = [_snapshot_header(lang)]
+    append = out.append
+    row = _SNAPSHOT_ROW.format
+    for d in data_list:
+        ts_r = d.get('timestamp_range', {})
+        src = d.get('src', {})
+        dst = d.get('dst', {})
+        s_ip = src.get('ip', '-')
+        d_ip = dst.get('ip', '-')
+        s_wl = src.get('workload', {})
+        d_wl = dst.get('workload', {})
+        svc = d.get('service', {})
+        proto = d.get('proto') or svc.get('proto') or '-'
+        flow_dir = d.get('flow_direction', '-')
+        decision = str(d.get('policy_decision')).lower()
+        append(row(
+            val=strip_ansi(d.get('_metric_fmt', '-')),
+            first=ts_r.get('first_detected', d.get('timestamp', '-')).replace('T', ' ').split('.')[0],
+            last=ts_r.get('last_detected', '-').replace('T', ' ').split('.')[0],
+            direction=_DIRECTIONS.get(flow_dir, flow_dir),
+            s_name=strip_ansi(s_wl.get('name') or s_wl.get('hostname') or s_ip), s_ip=s_ip,
+            s_badges=_badges(s_wl.get('labels', [])),
+            d_name=strip_ansi(d_wl.get('name') or d_wl.get('hostname') or d_ip), d_ip=d_ip,
+            d_badges=_badges(d_wl.get('labels', [])),
+            port=d.get('dst_port') or svc.get('port') or '-',
+            proto=_PROTOCOLS.get(proto, str(proto)),
+            count=d.get('num_connections') or d.get('count') or 1,
+            decision=decisions.get(decision) or strip_ansi(decision),
+        ))
+    append("</table>")
+    return "".join(out)
+
+
+def compact_flow(d) -> dict:
+    """Flat summary of a flow record, for channels that ask for compact raw_data samples."""
+    src = d.get('src', {})
+    dst = d.get('dst', {})
+    s_wl = src.get('workload') or {}
+    d_wl = dst.get('workload') or {}
+    svc = d.get('service', {})
+    proto = d.get('proto') or svc.get('proto')
+    return {
+        "src": s_wl.get('name') or s_wl.get('hostname') or src.get('ip'),
+        "src_ip": src.get('ip'),
+        "dst": d_wl.get('name') or d_wl.get('hostname') or dst.get('ip'),
+        "dst_ip": dst.get('ip'),
+        "port": d.get('dst_port') or svc.get('port'),
+        "proto": _PROTOCOLS.get(proto, proto),
+        "decision": d.get('policy_decision'),
+        "connections": d.get('num_connections') or d.get('count') or 1,
+        "value": strip_ansi(d['_metric_fmt']) if '_metric_fmt' in d else None,
+    }
+
+
+def plain_text_report(health_alerts, event_alerts, traffic_alerts, metric_alerts, rule_label) -> str:
+    """Plain-text report used for LINE messages. rule_label(alert) formats the rule column."""
+    out = [f"{t('report_header')}\n",
+           f"{t('generated_at', time=datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC'))}\n",
+           "-" * 20 + "\n\n"]
+    append = out.append
+
+    if health_alerts:
+        append(f"{t('health_alerts_header')}\n")
+        for a in health_alerts:
+            append(strip_ansi(f"[{a['time']}] {a['status']} - {a['details']}\n"))
+        append("\n")
+
+    if event_alerts:
+        append(f"{t('security_events_header')}\n")
+        for a in event_alerts:
+            append(strip_ansi(f"[{a['time']}] {rule_label(a)} ({a.get('severity','').upper()} x{a['count']})\n"))
+            append(strip_ansi(f"Desc: {a['desc']}\n"))
+            if a.get('ongoing'):
+                append(f"  {t('alert_still_ongoing', since=a.get('ongoing_since', ''))}\n")
+        append("\n")
+
+    for header, alerts in (('traffic_alerts_header', traffic_alerts), ('metric_alerts_header', metric_alerts)):
+        if alerts:
+            append(f"{t(header)}\n")
+            for a in alerts:
+                append(strip_ansi(f"- {rule_label(a)} : {a['count']} ({a.get('criteria','')})\n"))
+                if a.get('ongoing'):
+                    append(f"  {t('alert_still_ongoing', since=a.get('ongoing_since', ''))}\n")
+                else:
+                    append(strip_ansi(f"  {t('traffic_toptalkers')}: {a['details'].replace('<br>', ', ')}\n"))
+            append("\n")
+    return "".join(out)
@@ -1,17 +1,91 @@
 import datetime
 import json
-import smtplib
-import urllib.request
-import urllib.parse
-import urllib.error
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import time
+import uuid
+import logging
+import http.client
+from functools import partial
 from src.utils import Colors
 from src.i18n import t
+from src import render, cycle_metrics, metrics
+from src.coalescer import record_delivery
+from src.http_transport import get_transport, get_guard, CircuitOpenError
+from src.syslog_sink import get_sender as get_syslog_sender
+
+logger = logging.getLogger(__name__)
+
+LINE_PUSH_URL = "https://api.line.me/v2/bot/message/push"
+LINE_PUSH_TIMEOUT = 10  # seconds per read
+LINE_CONNECT_TIMEOUT = 5  # seconds
+LINE_TEXT_LIMIT = 5000  # characters per text message
+LINE_MESSAGES_PER_PUSH = 5  # message objects per push request
+LINE_MAX_RETRY_AFTER = 60  # longer 429 back-offs are left to the dispatcher's retry
+LINE_RATE_LIMIT_RETRIES = 3
+WEBHOOK_TIMEOUT = 10  # seconds
+DEFAULT_TARGET = "default"
+
+
+def split_text(text: str, limit: int = LINE_TEXT_LIMIT) -> list:
+    """Splits text into chunks of at most limit characters, at line breaks where possible."""
+    chunks, current, size = [], [], 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            if current:
+                chunks.append("".join(current))
+                current, size = [], 0
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if size + len(line) > limit:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+    if current:
+        chunks.append("".join(current))
+    return [c for c in (c.strip("\n") for c in chunks) if c] or [""]
+
+
+def _retry_after(headers: dict) -> float:
+    try:
+        return max(float(headers.get("retry-after", 1)), 0.0)
+    except ValueError:
+        return 1.0  # HTTP-date form: LINE sends seconds, so just wait briefly
+
+
+def alert_targets(cm, channel: str, name: str = None) -> list:
+    """
+    Configured delivery targets of the webhook or LINE channel, optionally only the named one.
+    alerts.webhook_targets: [{"name", "url", ...limits}]; alerts.line_targets: [{"name", "target_id", "token"?, ...limits}].
+    The legacy webhook_url / line_target_id settings act as a target named "default".
+    Limits: rate_per_minute, burst, failure_threshold, reset_timeout, max_wait (see http_transport).
+    """
+    alerts = cm.config.get("alerts", {})
+    targets = []
+    if channel == "webhook":
+        if alerts.get("webhook_url"):
+            targets.append({"name": DEFAULT_TARGET, "url": alerts["webhook_url"]})
+        targets.extend(dict(tg) for tg in alerts.get("webhook_targets") or [] if tg.get("url"))
+    elif channel == "line":
+        token = alerts.get("line_channel_access_token", "")
+        if alerts.get("line_target_id") and token:
+            targets.append({"name": DEFAULT_TARGET, "target_id": alerts["line_target_id"], "token": token})
+        for tg in alerts.get("line_targets") or []:
+            tg = dict(tg)
+            tg.setdefault("token", token)
+            if tg.get("target_id") and tg.get("token"):
+                targets.append(tg)
+    for i, tg in enumerate(targets):
+        tg.setdefault("name", f"{channel}-{i}")
+    if name is not None:
+        targets = [tg for tg in targets if tg["name"] == name]
+    return targets
+
 
 class Reporter:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, dispatcher=None):
+        """dispatcher: optional AlertDispatcher; when set, send_alerts() queues instead of sending inline."""
         self.cm = config_manager
+        self.dispatcher = dispatcher
         self.health_alerts = []
         self.event_alerts = []
         self.traffic_alerts = []
@@ -29,267 +103,273 @@ class Reporter:
     def add_metric_alert(self, alert):
         self.metric_alerts.append(alert)
 
-    def generate_pretty_snapshot_html(self, data_list):
-        import re
-        def clean_ansi(text):
-            return re.sub(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])', '', str(text))
-
-        if not data_list: return "No Data"
-        html = "<table style='width:100%; border-collapse:collapse; font-family:Arial,sans-serif; font-size:12px; border:1px solid #ddd;'>"
-        html += "<tr style='background-color:#f2f2f2; text-align:left;'>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_value')}</th>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_first_seen')} /<br>{t('table_last_seen')}</th>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_dir')}</th>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_source')}</th>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_destination')}</th>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_service')}</th>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_num_conns')}</th>"
-        html += f"<th style='padding:8px; border:1px solid #ddd;'>{t('table_decision')}</th>"
-        html += "</tr>"
-        for d in data_list:
-            val_str = clean_ansi(d.get('_metric_fmt', '-'))
-            ts_r = d.get('timestamp_range', {})
-            t_first = ts_r.get('first_detected', d.get('timestamp','-')).replace('T',' ').split('.')[0]
-            t_last = ts_r.get('last_detected', '-').replace('T',' ').split('.')[0]
-            
-            direction = "IN" if d.get('flow_direction') == 'inbound' else "OUT" if d.get('flow_direction') == 'outbound' else d.get('flow_direction', '-')
-            src = d.get('src', {})
-            s_ip = src.get('ip', '-')
-            s_wl = src.get('workload', {})
-            s_name = clean_ansi(s_wl.get('name') or s_wl.get('hostname') or s_ip)
-            s_labels = s_wl.get('labels', [])
-            s_badges = "".join([f"<span style='background:#e1ecf4; color:#2c5e77; padding:2px 5px; border-radius:4px; font-size:10px; margin-right:3px;'>{clean_ansi(l.get('key'))}:{clean_ansi(l.get('value'))}</span>" for l in s_labels])
-            dst = d.get('dst', {})
-            d_ip = dst.get('ip', '-')
-            d_wl = dst.get('workload', {})
-            d_name = clean_ansi(d_wl.get('name') or d_wl.get('hostname') or d_ip)
-            d_labels = d_wl.get('labels', [])
-            d_badges = "".join([f"<span style='background:#e1ecf4; color:#2c5e77; padding:2px 5px; border-radius:4px; font-size:10px; margin-right:3px;'>{clean_ansi(l.get('key'))}:{clean_ansi(l.get('value'))}</span>" for l in d_labels])
-            svc = d.get('service', {})
-            port = d.get('dst_port') or svc.get('port') or '-'
-            proto = d.get('proto') or svc.get('proto') or '-'
-            proto_str = "TCP" if proto == 6 else "UDP" if proto == 17 else str(proto)
-            count = d.get('num_connections') or d.get('count') or 1
-            pd_map = {
-                "blocked": f"<span style='color:white; background:#dc3545; padding:2px 6px; border-radius:3px;'>{clean_ansi(t('decision_blocked'))}</span>",
-                "potentially_blocked": f"<span style='color:black; background:#ffc107; padding:2px 6px; border-radius:3px;'>{clean_ansi(t('decision_potential'))}</span>",
-                "allowed": f"<span style='color:white; background:#28a745; padding:2px 6px; border-radius:3px;'>{clean_ansi(t('decision_allowed'))}</span>"
-            }
-            decision = str(d.get('policy_decision')).lower()
-            decision_html = pd_map.get(decision, clean_ansi(decision))
-            html += "<tr>"
-            html += f"<td style='padding:8px; border:1px solid #ddd; font-weight:bold; color:#6f42c1;'>{val_str}</td>"
-            html += f"<td style='padding:8px; border:1px solid #ddd; white-space:nowrap; font-size:10px;'>{t_first}<br>{t_last}</td>"
-            html += f"<td style='padding:8px; border:1px solid #ddd; text-align:center;'>{direction}</td>"
-            html += f"<td style='padding:8px; border:1px solid #ddd;'><strong>{s_name}</strong><br><small>{s_ip}</small><br>{s_badges}</td>"
-            html += f"<td style='padding:8px; border:1px solid #ddd;'><strong>{d_name}</strong><br><small>{d_ip}</small><br>{d_badges}</td>"
-            html += f"<td style='padding:8px; border:1px solid #ddd;'>{port} / {proto_str}</td>"
-            html += f"<td style='padding:8px; border:1px solid #ddd; text-align:center;'><strong>{count}</strong></td>"
-            html += f"<td style='padding:8px; border:1px solid #ddd;'>{decision_html}</td>"
-            html += "</tr>"
-        html += "</table>"
-        return html
-        
-    def _build_plain_text_report(self):
-        import re
-        def clean_ansi(text):
-            return re.sub(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])', '', str(text))
-
-        body = f"{t('report_header')}\n"
-        body += f"{t('generated_at', time=datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC'))}\n"
-        body += "-" * 20 + "\n\n"
-
-        if self.health_alerts:
-            body += f"{t('health_alerts_header')}\n"
-            for a in self.health_alerts:
-                body += clean_ansi(f"[{a['time']}] {a['status']} - {a['details']}\n")
-            body += "\n"
-
-        if self.event_alerts:
-            body += f"{t('security_events_header')}\n"
-            for a in self.event_alerts:
-                body += clean_ansi(f"[{a['time']}] {a['rule']} ({a.get('severity','').upper()} x{a['count']})\n")
-                body += clean_ansi(f"Desc: {a['desc']}\n")
-            body += "\n"
+    @staticmethod
+    def _rule_label(a):
+        """Rule name, with the repeat count when the alert is a coalesced digest entry."""
+        n = a.get('occurrences', 1)
+        return f"{a['rule']} (x{n}, {a.get('first_seen', '')} ~ {a.get('last_seen', '')})" if n > 1 else a['rule']
 
-        if self.traffic_alerts:
-            body += f"{t('traffic_alerts_header')}\n"
-            for a in self.traffic_alerts:
-                body += clean_ansi(f"- {a['rule']} : {a['count']} ({a.get('criteria','')})\n")
-                body += clean_ansi(f"  {t('traffic_toptalkers')}: {a['details'].replace('<br>', ', ')}\n")
-            body += "\n"
+    def generate_pretty_snapshot_html(self, data_list):
+        return render.snapshot_html(data_list)
 
-        if self.metric_alerts:
-            body += f"{t('metric_alerts_header')}\n"
-            for a in self.metric_alerts:
-                body += clean_ansi(f"- {a['rule']} : {a['count']} ({a.get('criteria','')})\n")
-                body += clean_ansi(f"  {t('traffic_toptalkers')}: {a['details'].replace('<br>', ', ')}\n")
-            body += "\n"
-        return body
+    def _build_plain_text_report(self):
+        return render.plain_text_report(self.health_alerts, self.event_alerts, self.traffic_alerts,
+                                        self.metric_alerts, self._rule_label)
 
     def send_alerts(self, force_test=False):
         if not any([self.health_alerts, self.event_alerts, self.traffic_alerts, self.metric_alerts]) and not force_test: return
-        
+        with cycle_metrics.current().stage("alert_delivery"):
+            self._deliver_alerts(force_test)
+
+    def _deliver_alerts(self, force_test):
         alerts_config = self.cm.config.get("alerts", {})
         active_channels = alerts_config.get("active", ["mail"])
         
-        total_issues = len(self.health_alerts) + len(self.event_alerts) + len(self.traffic_alerts) + len(self.metric_alerts)
-        subj = t('mail_subject_test') if force_test else t('mail_subject', count=total_issues)
-        
-        if "mail" in active_channels:
-            self._send_mail(subj)
-            
-        if "line" in active_channels:
-            self._send_line(subj)
-            
-        if "webhook" in active_channels:
-            self._send_webhook(subj)
-
-    def _send_line(self, subj):
-        token = self.cm.config.get("alerts", {}).get("line_channel_access_token", "")
-        target_id = self.cm.config.get("alerts", {}).get("line_target_id", "")
-        if not token or not target_id:
-            print(f"{Colors.WARNING}{t('line_config_missing')}{Colors.ENDC}")
+        all_alerts = self.health_alerts + self.event_alerts + self.traffic_alerts + self.metric_alerts
+        total_issues = len(all_alerts)
+        if force_test:
+            subj = t('mail_subject_test')
+        elif all(a.get('ongoing') for a in all_alerts):
+            subj = t('mail_subject_ongoing', count=total_issues)
+        else:
+            subj = t('mail_subject', count=total_issues)
+
+        if self.dispatcher is not None:
+            alerts = {
+                "health_alerts": list(self.health_alerts),
+                "event_alerts": list(self.event_alerts),
+                "traffic_alerts": list(self.traffic_alerts),
+                "metric_alerts": list(self.metric_alerts),
+            }
+            self.dispatcher.submit(subj, alerts, active_channels)
             return
-            
+
+        for channel, send in (("mail", self._send_mail), ("line", self._send_line),
+                              ("webhook", self._send_webhook), ("syslog", self._send_syslog)):
+            if channel in active_channels:
+                ok = send(subj)
+                outcome = "sent" if ok else ("unconfigured" if ok is None else "failed")
+                metrics.ALERTS.inc(channel=channel, outcome=outcome)
+                if ok is not None:
+                    record_delivery({"alerts": all_alerts}, ok)
+
+    def _send_line(self, subj, target=None):
+        """Pushes the plain-text report to every LINE target (or only the named one) concurrently."""
+        targets = alert_targets(self.cm, "line", target)
+        if not targets:
+            print(f"{Colors.WARNING}{t('line_config_missing')}{Colors.ENDC}")
+            return None
+
         message_text = f"{subj}\n\n{self._build_plain_text_report()}"
-        url = "https://api.line.me/v2/bot/message/push"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "to": target_id,
-            "messages": [
-                {
-                    "type": "text",
-                    "text": message_text
-                }
-            ]
-        }
-        data = json.dumps(payload).encode("utf-8")
-        
-        try:
-            req = urllib.request.Request(url, data=data, headers=headers, method="POST")
-            with urllib.request.urlopen(req) as response:
-                if response.status == 200:
-                    print(f"{Colors.GREEN}{t('line_alert_sent')}{Colors.ENDC}")
-                else:
-                    print(f"{Colors.FAIL}{t('line_alert_failed', error='', status=response.status)}{Colors.ENDC}")
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode('utf-8')
-            print(f"{Colors.FAIL}{t('line_alert_failed', error=f'{e} - {error_body}', status=e.code)}{Colors.ENDC}")
-        except Exception as e:
-            print(f"{Colors.FAIL}{t('line_alert_failed', error=e, status='')}{Colors.ENDC}")
+        transport = get_transport()
+        results = transport.fan_out([partial(self._guarded, "line", tgt, partial(self._push_line, tgt, message_text))
+                                     for tgt in targets])
+        return all(r is True for r in results)
+
+    def _push_line(self, tgt, message_text):
+        """
+        Sends the text as LINE push requests of up to 5 messages of 5000 characters each, in
+        order over the pooled connection. A 429 is retried after its Retry-After delay with the
+        same X-Line-Retry-Key, so LINE drops duplicates of a push it already accepted.
+        """
+        label = f" ({tgt['name']})" if tgt['name'] != DEFAULT_TARGET else ""
+        chunks = split_text(message_text)
+        if len(chunks) > 1:
+            logger.info(f"LINE message split into {len(chunks)} parts")
+        transport = get_transport()
+
+        for i in range(0, len(chunks), LINE_MESSAGES_PER_PUSH):
+            payload = {
+                "to": tgt["target_id"],
+                "messages": [{"type": "text", "text": c} for c in chunks[i:i + LINE_MESSAGES_PER_PUSH]]
+            }
+            data = json.dumps(payload).encode("utf-8")
+            headers = {
+                "Authorization": f"Bearer {tgt['token']}",
+                "Content-Type": "application/json",
+                "X-Line-Retry-Key": str(uuid.uuid4()),
+            }
+            try:
+                for attempt in range(LINE_RATE_LIMIT_RETRIES + 1):
+                    resp = transport.request("POST", LINE_PUSH_URL, body=data, headers=headers,
+                                             timeout=LINE_PUSH_TIMEOUT, connect_timeout=LINE_CONNECT_TIMEOUT)
+                    if resp.status != 429:
+                        break
+                    delay = _retry_after(resp.headers)
+                    if attempt == LINE_RATE_LIMIT_RETRIES or delay > LINE_MAX_RETRY_AFTER:
+                        break
+                    logger.warning(f"LINE rate limited{label}; retrying in {delay:.0f}s")
+                    time.sleep(delay)
+                # 409: LINE already accepted a push with this retry key
+                if resp.status not in (200, 409):
+                    error_body = resp.body.decode('utf-8', errors='replace')
+                    print(f"{Colors.FAIL}{t('line_alert_failed', error=error_body, status=resp.status)}{label}{Colors.ENDC}")
+                    return False
+            except Exception as e:
+                print(f"{Colors.FAIL}{t('line_alert_failed', error=e, status='')}{label}{Colors.ENDC}")
+                return False
+        print(f"{Colors.GREEN}{t('line_alert_sent')}{label}{Colors.ENDC}")
+        return True
 
-    def _send_webhook(self, subj):
-        webhook_url = self.cm.config.get("alerts", {}).get("webhook_url", "")
-        if not webhook_url:
+    def _send_webhook(self, subj, target=None):
+        """Posts the alert payload to every webhook target (or only the named one) concurrently."""
+        targets = alert_targets(self.cm, "webhook", target)
+        if not targets:
             print(f"{Colors.WARNING}{t('webhook_url_missing')}{Colors.ENDC}")
-            return
-            
-        payload = {
-            "subject": subj,
+            return None
+
+        from src.webhook_encoder import WebhookEncoder
+        encoder = WebhookEncoder.from_config(self.cm)
+        alerts = {
             "health_alerts": self.health_alerts,
             "event_alerts": self.event_alerts,
             "traffic_alerts": self.traffic_alerts,
             "metric_alerts": self.metric_alerts,
-            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
         }
-        
-        headers = {"Content-Type": "application/json"}
-        data = json.dumps(payload).encode("utf-8")
-        
+        bodies = encoder.encode(subj, alerts, datetime.datetime.now(datetime.timezone.utc).isoformat())
+        if len(bodies) > 1:
+            logger.info(f"Webhook payload split into {len(bodies)} requests")
+
+        def deliver(tgt):
+            for data in bodies:
+                if not self._post_webhook(tgt, data, encoder.headers):
+                    return False
+            label = f" ({tgt['name']})" if tgt['name'] != DEFAULT_TARGET else ""
+            print(f"{Colors.GREEN}{t('webhook_alert_sent')}{label}{Colors.ENDC}")
+            return True
+
+        results = get_transport().fan_out([partial(self._guarded, "webhook", tgt, partial(deliver, tgt))
+                                           for tgt in targets])
+        return all(r is True for r in results)
+
+    def _post_webhook(self, tgt, data, headers):
+        label = f" ({tgt['name']})" if tgt['name'] != DEFAULT_TARGET else ""
         try:
-            req = urllib.request.Request(webhook_url, data=data, headers=headers, method="POST")
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.status in [200, 201, 202, 204]:
-                    print(f"{Colors.GREEN}{t('webhook_alert_sent')}{Colors.ENDC}")
-                else:
-                    print(f"{Colors.FAIL}{t('webhook_alert_failed', error='', status=response.status)}{Colors.ENDC}")
-        except urllib.error.HTTPError as e:
-            try:
-                error_body = e.read().decode('utf-8')
-            except Exception:
-                error_body = "Could not read error body"
-            print(f"{Colors.FAIL}{t('webhook_alert_failed', error=f'{e} - {error_body}', status=e.code)}{Colors.ENDC}")
-        except (urllib.error.URLError, TimeoutError) as e:
-            print(f"{Colors.FAIL}{t('webhook_alert_failed', error=f'Connection Error/Timeout: {e}', status='')}{Colors.ENDC}")
+            resp = get_transport().request("POST", tgt["url"], body=data, headers=headers, timeout=WEBHOOK_TIMEOUT)
+            if resp.status in [200, 201, 202, 204]:
+                return True
+            error_body = resp.body.decode('utf-8', errors='replace')
+            print(f"{Colors.FAIL}{t('webhook_alert_failed', error=error_body, status=resp.status)}{label}{Colors.ENDC}")
+        except (OSError, http.client.HTTPException) as e:
+            print(f"{Colors.FAIL}{t('webhook_alert_failed', error=f'Connection Error/Timeout: {e}', status='')}{label}{Colors.ENDC}")
         except Exception as e:
-            print(f"{Colors.FAIL}{t('webhook_alert_failed', error=e, status='')}{Colors.ENDC}")
+            print(f"{Colors.FAIL}{t('webhook_alert_failed', error=e, status='')}{label}{Colors.ENDC}")
+        return False
 
-    def _send_mail(self, subj):
-        cfg = self.cm.config["email"]
-        if not cfg["recipients"]: 
-            print(f"{Colors.WARNING}{t('no_recipients')}{Colors.ENDC}")
-            return
-        
+    def _send_syslog(self, subj):
+        """Queues one syslog message per alert; the sender thread delivers them."""
+        sender = get_syslog_sender(self.cm)
+        if sender is None:
+            print(f"{Colors.WARNING}{t('syslog_host_missing')}{Colors.ENDC}")
+            return None
+        queued = 0
+        for kind, alerts in (("health", self.health_alerts), ("event", self.event_alerts),
+                             ("traffic", self.traffic_alerts), ("metric", self.metric_alerts)):
+            for a in alerts:
+                queued += sender.emit_alert(kind, a)
+        print(f"{Colors.GREEN}{t('syslog_alert_queued', count=queued, host=sender.host)}{Colors.ENDC}")
+        return True
+
+    @staticmethod
+    def _guarded(channel, tgt, send):
+        """Runs send() under the target's rate limit and circuit breaker."""
+        guard = get_guard(f"{channel}:{tgt['name']}", tgt)
+        try:
+            return guard.call(send)
+        except CircuitOpenError:
+            logger.warning(f"Skipping {channel} target {tgt['name']}: circuit open after repeated failures")
+            return False
+
+    @staticmethod
+    def _ongoing_row(a):
+        """Replaces the snapshot of an alert that is unchanged since it was last reported."""
+        return (f"<tr><td colspan='4' style='padding: 8px 10px; background-color: #f8f9fa; font-size: 12px; color: #666;'>"
+                f"{t('alert_still_ongoing', since=a.get('ongoing_since', ''))}</td></tr>")
+
+    def _build_mail_html(self):
         style_header = "background-color: #f8f9fa; border-left: 5px solid #007bff; padding: 10px; margin-top: 20px;"
         style_table = "width: 100%; border-collapse: collapse; margin-top: 5px;"
         style_th = "text-align: left; padding: 10px; background-color: #e9ecef; border-bottom: 2px solid #dee2e6;"
         style_td = "padding: 10px; border-bottom: 1px solid #dee2e6;"
 
-        body = f"<html><body style='font-family: Arial, sans-serif; line-height: 1.6; color: #333;'>"
-        body += f"<div style='max-width: 950px; margin: 0 auto; border: 1px solid #ddd; padding: 20px; border-radius: 5px;'>"
-        body += f"<h2 style='color: #2c3e50; text-align: center; border-bottom: 2px solid #f60; padding-bottom: 10px;'>{t('report_header')}</h2>"
-        body += f"<p style='text-align: center; color: #777; font-size: 12px;'>{t('generated_at', time=datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC'))}</p>"
+        body = [f"<html><body style='font-family: Arial, sans-serif; line-height: 1.6; color: #333;'>"]
+        body.append(f"<div style='max-width: 950px; margin: 0 auto; border: 1px solid #ddd; padding: 20px; border-radius: 5px;'>")
+        body.append(f"<h2 style='color: #2c3e50; text-align: center; border-bottom: 2px solid #f60; padding-bottom: 10px;'>{t('report_header')}</h2>")
+        body.append(f"<p style='text-align: center; color: #777; font-size: 12px;'>{t('generated_at', time=datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M UTC'))}</p>")
 
         if self.health_alerts:
-            body += f"<div style='{style_header} border-color: #dc3545;'><h3 style='margin:0; color: #dc3545;'>{t('health_alerts_header')}</h3></div>"
-            body += f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('health_time')}</th><th style='{style_th}'>{t('health_status')}</th><th style='{style_th}'>{t('health_details')}</th></tr></thead><tbody>"
+            body.append(f"<div style='{style_header} border-color: #dc3545;'><h3 style='margin:0; color: #dc3545;'>{t('health_alerts_header')}</h3></div>")
+            body.append(f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('health_time')}</th><th style='{style_th}'>{t('health_status')}</th><th style='{style_th}'>{t('health_details')}</th></tr></thead><tbody>")
             for a in self.health_alerts:
-                body += f"<tr><td style='{style_td}'>{a['time']}</td><td style='{style_td} color: red; font-weight: bold;'>{a['status']}</td><td style='{style_td}'>{a['details']}</td></tr>"
-            body += "</tbody></table>"
+                body.append(f"<tr><td style='{style_td}'>{a['time']}</td><td style='{style_td} color: red; font-weight: bold;'>{a['status']}</td><td style='{style_td}'>{a['details']}</td></tr>")
+            body.append("</tbody></table>")
 
         if self.event_alerts:
-            body += f"<div style='{style_header} border-color: #ffc107;'><h3 style='margin:0; color: #d39e00;'>{t('security_events_header')}</h3></div>"
-            body += f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('event_time')}</th><th style='{style_th}'>{t('event_name')}</th><th style='{style_th}'>{t('event_severity')}</th><th style='{style_th}'>{t('event_source')}</th></tr></thead><tbody>"
+            body.append(f"<div style='{style_header} border-color: #ffc107;'><h3 style='margin:0; color: #d39e00;'>{t('security_events_header')}</h3></div>")
+            body.append(f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('event_time')}</th><th style='{style_th}'>{t('event_name')}</th><th style='{style_th}'>{t('event_severity')}</th><th style='{style_th}'>{t('event_source')}</th></tr></thead><tbody>")
             for a in self.event_alerts:
                 sev_color = "red" if a.get('severity')=='error' else "orange"
-                body += f"<tr><td style='{style_td}'>{a['time']}</td><td style='{style_td}'><strong>{a['rule']}</strong><br><small>{a['desc']}</small></td><td style='{style_td} color:{sev_color}'>{a.get('severity','').upper()} ({a['count']})</td><td style='{style_td}'>{a['source']}</td></tr>"
-                if a.get('raw_data'):
-                    body += f"<tr><td colspan='4' style='padding: 10px; background-color: #f8f9fa;'><div style='font-size: 11px; color: #666; margin-bottom: 5px;'>{t('raw_snapshot')}</div><pre style='background: #eee; padding: 5px; border-radius: 3px; font-size: 10px; overflow-x: auto;'>{json.dumps(a['raw_data'], indent=2)}</pre></td></tr>"
-            body += "</tbody></table>"
+                body.append(f"<tr><td style='{style_td}'>{a['time']}</td><td style='{style_td}'><strong>{self._rule_label(a)}</strong><br><small>{a['desc']}</small></td><td style='{style_td} color:{sev_color}'>{a.get('severity','').upper()} ({a['count']})</td><td style='{style_td}'>{a['source']}</td></tr>")
+                if a.get('ongoing'):
+                    body.append(self._ongoing_row(a))
+                elif a.get('raw_data'):
+                    body.append(f"<tr><td colspan='4' style='padding: 10px; background-color: #f8f9fa;'><div style='font-size: 11px; color: #666; margin-bottom: 5px;'>{t('raw_snapshot')}</div><pre style='background: #eee; padding: 5px; border-radius: 3px; font-size: 10px; overflow-x: auto;'>{json.dumps(a['raw_data'], indent=2)}</pre></td></tr>")
+            body.append("</tbody></table>")
 
         if self.traffic_alerts:
-            body += f"<div style='{style_header} border-color: #17a2b8;'><h3 style='margin:0; color: #117a8b;'>{t('traffic_alerts_header')}</h3></div>"
-            body += f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('traffic_rule')}</th><th style='{style_th}'>{t('traffic_count')}</th><th style='{style_th}'>{t('traffic_criteria')}</th><th style='{style_th}'>{t('traffic_toptalkers')}</th></tr></thead><tbody>"
+            body.append(f"<div style='{style_header} border-color: #17a2b8;'><h3 style='margin:0; color: #117a8b;'>{t('traffic_alerts_header')}</h3></div>")
+            body.append(f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('traffic_rule')}</th><th style='{style_th}'>{t('traffic_count')}</th><th style='{style_th}'>{t('traffic_criteria')}</th><th style='{style_th}'>{t('traffic_toptalkers')}</th></tr></thead><tbody>")
             for a in self.traffic_alerts:
-                body += f"<tr><td style='{style_td}'><strong>{a['rule']}</strong></td><td style='{style_td} font-size: 16px; font-weight: bold; color: #d9534f;'>{a['count']}</td><td style='{style_td} font-size:11px; color:#555;'>{a.get('criteria','')}</td><td style='{style_td} font-size: 12px;'>{a['details']}</td></tr>"
-                body += f"<tr><td colspan='4' style='padding: 15px; background-color: #fff;'>{self.generate_pretty_snapshot_html(a.get('raw_data', []))}</td></tr>"
-            body += "</tbody></table>"
+                body.append(f"<tr><td style='{style_td}'><strong>{self._rule_label(a)}</strong></td><td style='{style_td} font-size: 16px; font-weight: bold; color: #d9534f;'>{a['count']}</td><td style='{style_td} font-size:11px; color:#555;'>{a.get('criteria','')}</td><td style='{style_td} font-size: 12px;'>{a['details']}</td></tr>")
+                if a.get('ongoing'):
+                    body.append(self._ongoing_row(a))
+                else:
+                    body.append(f"<tr><td colspan='4' style='padding: 15px; background-color: #fff;'>{self.generate_pretty_snapshot_html(a.get('raw_data', []))}</td></tr>")
+            body.append("</tbody></table>")
 
         if self.metric_alerts:
-            body += f"<div style='{style_header} border-color: #6f42c1;'><h3 style='margin:0; color: #5a32a3;'>{t('metric_alerts_header')}</h3></div>"
-            body += f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('traffic_rule')}</th><th style='{style_th}'>{t('table_value')}</th><th style='{style_th}'>{t('traffic_criteria')}</th><th style='{style_th}'>{t('traffic_toptalkers')}</th></tr></thead><tbody>"
+            body.append(f"<div style='{style_header} border-color: #6f42c1;'><h3 style='margin:0; color: #5a32a3;'>{t('metric_alerts_header')}</h3></div>")
+            body.append(f"<table style='{style_table}'><thead><tr><th style='{style_th}'>{t('traffic_rule')}</th><th style='{style_th}'>{t('table_value')}</th><th style='{style_th}'>{t('traffic_criteria')}</th><th style='{style_th}'>{t('traffic_toptalkers')}</th></tr></thead><tbody>")
             for a in self.metric_alerts:
-                body += f"<tr><td style='{style_td}'><strong>{a['rule']}</strong></td><td style='{style_td} font-size: 16px; font-weight: bold; color: #6f42c1;'>{a['count']}</td><td style='{style_td} font-size:11px; color:#555;'>{a.get('criteria','')}</td><td style='{style_td} font-size: 12px;'>{a['details']}</td></tr>"
-                body += f"<tr><td colspan='4' style='padding: 15px; background-color: #fff;'>{self.generate_pretty_snapshot_html(a.get('raw_data', []))}</td></tr>"
-            body += "</tbody></table>"
+                body.append(f"<tr><td style='{style_td}'><strong>{self._rule_label(a)}</strong></td><td style='{style_td} font-size: 16px; font-weight: bold; color: #6f42c1;'>{a['count']}</td><td style='{style_td} font-size:11px; color:#555;'>{a.get('criteria','')}</td><td style='{style_td} font-size: 12px;'>{a['details']}</td></tr>")
+                if a.get('ongoing'):
+                    body.append(self._ongoing_row(a))
+                else:
+                    body.append(f"<tr><td colspan='4' style='padding: 15px; background-color: #fff;'>{self.generate_pretty_snapshot_html(a.get('raw_data', []))}</td></tr>")
+            body.append("</tbody></table>")
+
+        body.append("</div></body></html>")
+        return "".join(body)
 
-        body += "</div></body></html>"
+    def build_mail(self, subj):
+        """(sender, recipients, message) of the alert mail, or None when no recipients are configured."""
+        cfg = self.cm.config["email"]
+        if not cfg["recipients"]:
+            return None
+
+        # The MIME modules are only loaded when mail is actually sent
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
 
         msg = MIMEMultipart()
         msg['Subject'] = subj
         msg['From'] = cfg['sender']
         msg['To'] = ",".join(cfg['recipients'])
-        msg.attach(MIMEText(body, 'html'))
+        msg.attach(MIMEText(self._build_mail_html(), 'html'))
+        return cfg['sender'], cfg['recipients'], msg.as_string()
+
+    def _send_mail(self, subj):
+        mail = self.build_mail(subj)
+        if mail is None:
+            print(f"{Colors.WARNING}{t('no_recipients')}{Colors.ENDC}")
+            return None
+
+        from src.smtp_pool import get_pool
         try:
-            smtp_conf = self.cm.config.get('smtp', {})
-            host = smtp_conf.get('host', 'localhost')
-            port = int(smtp_conf.get('port', 25))
-            
-            s = smtplib.SMTP(host, port)
-            s.ehlo()
-            if smtp_conf.get('enable_tls'):
-                s.starttls()
-                s.ehlo()
-            
-            if smtp_conf.get('enable_auth'):
-                s.login(smtp_conf.get('user'), smtp_conf.get('password'))
-            
-            s.sendmail(cfg['sender'], cfg['recipients'], msg.as_string())
-            s.quit()
-            print(f"{Colors.GREEN}{t('mail_sent', host=host, port=port)}{Colors.ENDC}")
-        except Exception as e: print(f"{Colors.FAIL}{t('mail_failed', error=e)}{Colors.ENDC}")
+            pool = get_pool(self.cm.config.get('smtp', {}))
+            pool.send(*mail)
+            print(f"{Colors.GREEN}{t('mail_sent', host=pool.host, port=pool.port)}{Colors.ENDC}")
+            return True
+        except Exception as e:
+            print(f"{Colors.FAIL}{t('mail_failed', error=e)}{Colors.ENDC}")
+            return False
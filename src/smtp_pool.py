@@ -0,0 +1,243 @@
+"""
+Reusable SMTP sessions for alert mail.
+
+Opening a session costs a TCP connect, EHLO, optionally STARTTLS + EHLO and AUTH,
+which dominates delivery time when several alert mails go out in a row. The pool
+keeps authenticated sessions open between sends:
+
+  - a session idle for longer than probe_after is checked with NOOP before reuse;
+  - a session idle for longer than idle_timeout is closed instead of reused;
+  - a session is recycled after max_messages_per_session messages, since many
+    relays limit the number of transactions per connection;
+  - a send that hits a dropped connection is retried once on a fresh session.
+
+smtplib does not implement ESMTP PIPELINING, so batching means sending several
+messages (each to all recipients in a single transaction) over one session;
+see SmtpPool.send_many(), which the alert dispatcher uses when several mail
+deliveries are due at once.
+
+Time spent in each phase (connect, starttls, auth, noop, send, quit) is exported
+as the illumio_monitor_smtp_phase_duration_seconds histogram and summarised by
+SmtpPool.metrics(). Tuned through smtp.pool in config.json:
+
+    "pool": {"idle_timeout": 300, "probe_after": 30, "max_messages_per_session": 100, "max_idle_sessions": 2}
+"""
+import time
+import smtplib
+import logging
+import threading
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+SMTP_TIMEOUT = 30  # seconds
+POOL_DEFAULTS = {
+    "idle_timeout": 300,            # close sessions unused for this long (seconds)
+    "probe_after": 30,              # NOOP-check sessions unused for this long before reuse
+    "max_messages_per_session": 100,
+    "max_idle_sessions": 2,
+}
+PHASES = ("connect", "starttls", "auth", "noop", "send", "quit")
+
+
+class SmtpBatchError(Exception):
+    """send_many() failed part-way: the first `sent` messages were delivered, `error` stopped the rest."""
+
+    def __init__(self, sent: int, error: Exception):
+        super().__init__(str(error))
+        self.sent = sent
+        self.error = error
+
+
+class _Session:
+    __slots__ = ("smtp", "last_used", "messages")
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.messages = 0
+
+
+class SmtpPool:
+    def __init__(self, smtp_conf: dict, smtp_factory=smtplib.SMTP):
+        self.host = smtp_conf.get("host", "localhost")
+        self.port = int(smtp_conf.get("port", 25))
+        self.enable_tls = bool(smtp_conf.get("enable_tls"))
+        self.enable_auth = bool(smtp_conf.get("enable_auth"))
+        self.user = smtp_conf.get("user")
+        self.password = smtp_conf.get("password")
+        self.settings = dict(POOL_DEFAULTS)
+        self.settings.update(smtp_conf.get("pool") or {})
+        self._factory = smtp_factory
+        self._idle = []
+        self._lock = threading.Lock()
+        self._metrics = {p: {"count": 0, "total_ms": 0.0, "max_ms": 0.0} for p in PHASES}
+        self.sessions_opened = 0
+        self.sessions_reused = 0
+
+    # ─── Metrics ──────────────────────────────────────────────────────────
+
+    def _timed(self, phase, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            metrics.SMTP_PHASE_SECONDS.observe(elapsed / 1000, phase=phase)
+            with self._lock:
+                m = self._metrics[phase]
+                m["count"] += 1
+                m["total_ms"] += elapsed
+                m["max_ms"] = max(m["max_ms"], elapsed)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            phases = {p: dict(m, total_ms=round(m["total_ms"], 2), max_ms=round(m["max_ms"], 2))
+                      for p, m in self._metrics.items()}
+            return {"phases": phases, "sessions_opened": self.sessions_opened,
+                    "sessions_reused": self.sessions_reused, "idle_sessions": len(self._idle)}
+
+    # ─── Sessions ─────────────────────────────────────────────────────────
+
+    def _open(self) -> _Session:
+        def connect():
+            s = self._factory(self.host, self.port, timeout=SMTP_TIMEOUT)
+            s.ehlo()
+            return s
+        smtp = self._timed("connect", connect)
+        try:
+            if self.enable_tls:
+                def starttls():
+                    smtp.starttls()
+                    smtp.ehlo()
+                self._timed("starttls", starttls)
+            if self.enable_auth:
+                self._timed("auth", smtp.login, self.user, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        with self._lock:
+            self.sessions_opened += 1
+        return _Session(smtp)
+
+    def _close(self, smtp):
+        try:
+            self._timed("quit", smtp.quit)
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _alive(self, session: _Session) -> bool:
+        try:
+            code = self._timed("noop", lambda: session.smtp.noop()[0])
+            return code == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> _Session:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self._open()
+            idle = now - session.last_used
+            if idle >= float(self.settings["idle_timeout"]):
+                self._close(session.smtp)
+                continue
+            if idle >= float(self.settings["probe_after"]) and not self._alive(session):
+                self._close(session.smtp)
+                continue
+            with self._lock:
+                self.sessions_reused += 1
+            return session
+
+    def _release(self, session: _Session):
+        session.last_used = time.monotonic()
+        if session.messages >= int(self.settings["max_messages_per_session"]):
+            self._close(session.smtp)
+            return
+        with self._lock:
+            if len(self._idle) < int(self.settings["max_idle_sessions"]):
+                self._idle.append(session)
+                return
+        self._close(session.smtp)
+
+    def close_idle(self, force: bool = False):
+        """Closes idle sessions that expired (or all of them with force=True)."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [s for s in self._idle if force or now - s.last_used >= float(self.settings["idle_timeout"])]
+            self._idle = [s for s in self._idle if s not in expired]
+        for s in expired:
+            self._close(s.smtp)
+
+    # ─── Sending ──────────────────────────────────────────────────────────
+
+    def send(self, sender: str, recipients: list, message: str):
+        """Sends one message to all recipients in a single transaction. Raises on failure."""
+        try:
+            self.send_many([(sender, recipients, message)])
+        except SmtpBatchError as e:
+            raise e.error
+
+    def send_many(self, messages: list):
+        """
+        Sends [(sender, recipients, message), ...] over one session, in order. Raises
+        SmtpBatchError on the first failure, telling how many messages went out before it.
+        """
+        sent = 0
+        try:
+            session = self._acquire()
+        except Exception as e:
+            raise SmtpBatchError(0, e) from e
+        try:
+            for sender, recipients, message in messages:
+                try:
+                    self._timed("send", session.smtp.sendmail, sender, recipients, message)
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # The relay dropped an idle session under us: retry once on a fresh one
+                    self._close(session.smtp)
+                    session = self._open()
+                    self._timed("send", session.smtp.sendmail, sender, recipients, message)
+                session.messages += 1
+                sent += 1
+        except Exception as e:
+            self._close(session.smtp)
+            raise SmtpBatchError(sent, e) from e
+        self._release(session)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(smtp_conf: dict) -> SmtpPool:
+    """Process-wide pool for the given SMTP settings; a settings change gets a new pool."""
+    key = (smtp_conf.get("host", "localhost"), int(smtp_conf.get("port", 25)), bool(smtp_conf.get("enable_tls")),
+           bool(smtp_conf.get("enable_auth")), smtp_conf.get("user"), smtp_conf.get("password"))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            for old in _pools.values():
+                old.close_idle(force=True)
+            _pools.clear()
+            pool = _pools[key] = SmtpPool(smtp_conf)
+        return pool
+
+
+def close_idle():
+    """Closes expired idle sessions of every pool; called periodically by the alert dispatcher."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
+
+
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle(force=True)
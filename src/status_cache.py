@@ -0,0 +1,157 @@
+"""
+In-process snapshot of rule cooldown state for the Web GUI.
+
+The dashboard polls /api/status and /api/rules continuously. Instead of
+re-parsing config.json and state.json and running strptime for every rule on
+every poll, StatusCache keeps the cooldown deadlines as epoch seconds and only
+rebuilds them when the config or state file changes on disk, or when an
+Analyzer in this process publishes a freshly saved state.
+"""
+import os
+import json
+import time
+import datetime
+import logging
+import threading
+import weakref
+from src.config import ROOT_DIR
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = os.path.join(ROOT_DIR, "state.json")
+
+_subscribers = weakref.WeakSet()
+_subscribers_lock = threading.Lock()
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _parse_utc_epoch(ts_str):
+    return datetime.datetime.strptime(ts_str, '%Y-%m-%dT%H:%M:%SZ').replace(
+        tzinfo=datetime.timezone.utc).timestamp()
+
+
+def publish_state(state_file: str, state: dict):
+    """Called by Analyzer after state.json was written, so caches skip re-reading it."""
+    stamp = _file_stamp(state_file)
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for cache in subscribers:
+        cache.on_state_published(state_file, state, stamp)
+
+
+class StatusCache:
+    def __init__(self, config_manager, state_file: str = STATE_FILE):
+        self.cm = config_manager
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._state_stamp = None
+        self._alert_epochs = {}
+        self._config_stamp = object()
+        self._rules = []            # [(id, name, cooldown_end_epoch)]
+        self._dirty = True
+        self._cooldowns = []
+        self._valid_until = 0.0
+        with _subscribers_lock:
+            _subscribers.add(self)
+
+    def invalidate(self):
+        with self._lock:
+            self._dirty = True
+            self._valid_until = 0.0
+
+    def on_state_published(self, state_file, state, stamp):
+        if os.path.abspath(state_file) != os.path.abspath(self.state_file):
+            return
+        epochs = self._epochs_from_history(state.get("alert_history", {}))
+        with self._lock:
+            self._alert_epochs = epochs
+            self._state_stamp = stamp
+            self._dirty = True
+            self._valid_until = 0.0
+
+    def _epochs_from_history(self, alert_history):
+        epochs = {}
+        for rid, ts_str in alert_history.items():
+            try:
+                epochs[rid] = _parse_utc_epoch(ts_str)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Error parsing cooldown for rule {rid}: {e}")
+        return epochs
+
+    def _refresh_state(self):
+        """Re-reads state.json only when its mtime/size changed. Caller holds the lock."""
+        stamp = _file_stamp(self.state_file)
+        if stamp == self._state_stamp:
+            return False
+        alert_history = {}
+        if stamp is not None:
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    alert_history = json.load(f).get("alert_history", {})
+            except (json.JSONDecodeError, IOError, OSError) as e:
+                logger.error(f"Error reading state file for cooldowns: {e}")
+        self._alert_epochs = self._epochs_from_history(alert_history)
+        self._state_stamp = stamp
+        return True
+
+    def _rebuild(self):
+        rules = []
+        for rule in self.cm.config.get('rules', []):
+            end_epoch = 0.0
+            last = self._alert_epochs.get(str(rule.get('id')))
+            if last is not None:
+                try:
+                    cd_mins = int(rule.get('cooldown_minutes', 0))
+                except (ValueError, TypeError):
+                    cd_mins = 0
+                if cd_mins > 0:
+                    end_epoch = last + cd_mins * 60
+            rules.append((rule.get('id'), rule.get('name', 'Unknown Rule'), end_epoch))
+        self._rules = rules
+        self._dirty = False
+        self._valid_until = 0.0
+
+    def _sync(self):
+        """Brings the snapshot up to date with disk. Caller holds the lock."""
+        self.cm.reload_if_changed()
+        if self.cm.mtime_stamp != self._config_stamp:
+            self._config_stamp = self.cm.mtime_stamp
+            self._dirty = True
+        if self._refresh_state():
+            self._dirty = True
+        if self._dirty:
+            self._rebuild()
+
+    def cooldowns(self, now: float = None) -> list:
+        """Returns [{"id", "name", "remaining_mins"}] for every rule, in config order."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._sync()
+            if now < self._valid_until:
+                return self._cooldowns
+
+            out = []
+            valid_until = float('inf')
+            for rid, name, end_epoch in self._rules:
+                rem_mins = 0
+                if end_epoch > now:
+                    left = end_epoch - now
+                    rem_mins = int(left // 60) + 1
+                    # The displayed minute count next changes when `left` crosses a multiple of 60
+                    valid_until = min(valid_until, now + (left % 60))
+                out.append({"id": rid, "name": name, "remaining_mins": rem_mins})
+            self._cooldowns = out
+            self._valid_until = valid_until
+            return out
+
+    def remaining_by_rule(self, now: float = None) -> dict:
+        """Maps str(rule id) -> remaining cooldown minutes."""
+        return {str(c["id"]): c["remaining_mins"] for c in self.cooldowns(now)}
@@ -0,0 +1,328 @@
+"""
+Syslog output for alerts and (optionally) every matched traffic flow.
+
+Messages are RFC 5424 syslog lines whose MSG part is CEF, LEEF or JSON, sent
+over UDP, TCP or TLS (TCP and TLS use RFC 6587 octet-counting framing). The
+SyslogSender never blocks its caller: emit() appends to a bounded queue, and a
+background thread formats queued items and writes them in batches; when the
+queue is full new items are dropped and counted. Flows are queued as
+(rule name, flow) references and formatted on the sender thread, so streaming
+all matches costs run_analysis only one queue append per matching flow.
+
+Configured under alerts.syslog; add "syslog" to alerts.active to send alerts:
+
+    "syslog": {"host": "siem.example.com", "port": 514, "protocol": "udp", "format": "cef",
+               "facility": 16, "app_name": "illumio-monitor", "stream_flows": false,
+               "verify_ssl": true, "ca_file": "", "queue_size": 100000, "batch_size": 500}
+"""
+import ssl
+import json
+import time
+import socket
+import logging
+import datetime
+import threading
+from collections import deque
+from src import __version__, metrics
+from src.flow_record import as_record
+
+logger = logging.getLogger(__name__)
+
+SYSLOG_DEFAULTS = {
+    "host": "",
+    "port": 514,
+    "protocol": "udp",         # udp | tcp | tls
+    "format": "cef",           # cef | leef | json
+    "facility": 16,            # local0
+    "app_name": "illumio-monitor",
+    "stream_flows": False,
+    "verify_ssl": True,
+    "ca_file": "",
+    "queue_size": 100000,
+    "batch_size": 500,
+}
+CONNECT_TIMEOUT = 5  # seconds
+RECONNECT_DELAY = 5  # seconds between reconnect attempts
+FLUSH_INTERVAL = 0.2  # seconds the sender thread waits for more work
+UDP_MAX_BYTES = 8192
+
+# syslog severities (RFC 5424) and CEF severities (0-10) per alert kind
+_SEVERITY = {
+    "health": (2, 10),
+    "event:error": (3, 8),
+    "event:warning": (4, 5),
+    "event": (5, 3),
+    "traffic": (4, 6),
+    "metric": (4, 6),
+    "flow:blocked": (5, 5),
+    "flow": (6, 3),
+}
+_PROTOCOLS = {6: "TCP", 17: "UDP", 1: "ICMP"}
+
+
+def _cef_header(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("|", "\\|")
+
+
+def _cef_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("=", "\\=").replace("\r", "").replace("\n", "\\n")
+
+
+def _leef_value(value) -> str:
+    return str(value).replace("\t", " ").replace("\r", "").replace("\n", " ")
+
+
+def alert_fields(kind: str, alert: dict) -> tuple:
+    """Returns (signature id, name, severity key, {field: value}) for an alert."""
+    fields = {"cs1Label": "rule", "cs1": alert.get("rule", ""), "cat": kind}
+    if kind == "health":
+        fields["msg"] = f"PCE health {alert.get('status')}: {alert.get('details', '')}"
+        return "pce_health", "PCE health check failed", "health", fields
+    fields["cnt"] = alert.get("count", "")
+    if kind == "event":
+        fields["msg"] = alert.get("desc") or ""
+        fields["shost"] = alert.get("source", "")
+        sev = str(alert.get("severity", "")).lower()
+        return "event_rule", alert.get("rule", ""), f"event:{sev}" if f"event:{sev}" in _SEVERITY else "event", fields
+    fields["msg"] = str(alert.get("details", "")).replace("<br>", ", ")
+    fields["cs2Label"] = "criteria"
+    fields["cs2"] = alert.get("criteria", "")
+    return f"{kind}_rule", alert.get("rule", ""), kind, fields
+
+
+def flow_fields(rule_name: str, flow) -> tuple:
+    """flow: a FlowRecord (or a PCE-shaped dict)."""
+    flow = as_record(flow)
+    src, dst = flow.src, flow.dst
+    decision = flow.policy_decision or ""
+    proto = flow.proto or flow.svc_proto or ""
+    fields = {
+        "cs1Label": "rule", "cs1": rule_name, "cat": "flow", "act": decision,
+        "src": src.ip or "", "dst": dst.ip or "",
+        "shost": src.hostname or src.name or "",
+        "dhost": dst.hostname or dst.name or "",
+        "dpt": flow.dst_port or flow.svc_port or "",
+        "proto": _PROTOCOLS.get(proto, proto),
+        "cnt": flow.connections or 1,
+    }
+    return "flow_match", "Traffic flow matched rule", "flow:blocked" if decision == "blocked" else "flow", fields
+
+
+# LEEF uses its own names for the common CEF keys
+_LEEF_KEYS = {"act": "action", "dpt": "dstPort", "shost": "srcHostName", "dhost": "dstHostName",
+              "cnt": "count", "msg": "msg", "cs1": "rule", "cs2": "criteria"}
+
+
+class SyslogFormatter:
+    def __init__(self, fmt: str = "cef", facility: int = 16, app_name: str = "illumio-monitor", hostname: str = None):
+        self.fmt = fmt.lower()
+        self.facility = int(facility)
+        self.app_name = app_name
+        self.hostname = hostname or socket.gethostname()
+
+    def message(self, sig_id: str, name: str, sev_key: str, fields: dict) -> str:
+        syslog_sev, cef_sev = _SEVERITY.get(sev_key, (6, 3))
+        if self.fmt == "leef":
+            attrs = "\t".join(f"{_LEEF_KEYS.get(k, k)}={_leef_value(v)}" for k, v in fields.items()
+                              if not k.endswith("Label") and v != "")
+            body = f"LEEF:1.0|Illumio|PCE Monitor|{__version__}|{sig_id}|sev={cef_sev}\t{attrs}"
+        elif self.fmt == "json":
+            body = json.dumps(dict(fields, signature=sig_id, name=name, severity=cef_sev), default=str)
+        else:
+            ext = " ".join(f"{k}={_cef_value(v)}" for k, v in fields.items() if v != "")
+            body = (f"CEF:0|Illumio|PCE Monitor|{__version__}|{_cef_header(sig_id)}|"
+                    f"{_cef_header(name)}|{cef_sev}|{ext}")
+        ts = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        pri = self.facility * 8 + syslog_sev
+        return f"<{pri}>1 {ts} {self.hostname} {self.app_name} - {sig_id} - {body}"
+
+
+class SyslogSender:
+    def __init__(self, settings: dict, formatter: SyslogFormatter = None):
+        self.settings = dict(SYSLOG_DEFAULTS)
+        self.settings.update(settings or {})
+        self.host = self.settings["host"]
+        self.port = int(self.settings["port"])
+        self.protocol = str(self.settings["protocol"]).lower()
+        self.formatter = formatter or SyslogFormatter(self.settings["format"], self.settings["facility"],
+                                                      self.settings["app_name"])
+        self.max_queue = int(self.settings["queue_size"])
+        self.batch_size = int(self.settings["batch_size"])
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._sock = None
+        self._next_connect = 0.0
+        self.stats = {"queued": 0, "sent": 0, "dropped": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._loop, name="syslog-sender", daemon=True)
+        self._thread.start()
+
+    # ─── Producer side (never blocks) ─────────────────────────────────────
+
+    def _put(self, item) -> bool:
+        if len(self._queue) >= self.max_queue:
+            self.stats["dropped"] += 1
+            return False
+        self._queue.append(item)
+        self.stats["queued"] += 1
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def emit_alert(self, kind: str, alert: dict) -> bool:
+        return self._put(("alert", kind, alert))
+
+    def emit_flow(self, rule_name: str, flow: dict) -> bool:
+        return self._put(("flow", rule_name, flow))
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits until the queue is drained (or timeout). Returns True when empty."""
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        while self._queue and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(2)
+        self._disconnect()
+
+    # ─── Sender thread ────────────────────────────────────────────────────
+
+    def _connect(self):
+        if self.protocol == "udp":
+            return socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        if self.protocol == "tls":
+            ctx = ssl.create_default_context(cafile=self.settings.get("ca_file") or None)
+            if not self.settings.get("verify_ssl", True):
+                ctx.check_hostname = False
+                ctx.verify_mode = ssl.CERT_NONE
+            sock = ctx.wrap_socket(sock, server_hostname=self.host)
+        return sock
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _format(self, item) -> bytes:
+        if item[0] == "flow":
+            fields = flow_fields(item[1], item[2])
+        else:
+            fields = alert_fields(item[1], item[2])
+        return self.formatter.message(*fields).encode("utf-8", errors="replace")
+
+    def _write(self, messages: list):
+        if self.protocol == "udp":
+            for m in messages:
+                self._sock.sendto(m[:UDP_MAX_BYTES], (self.host, self.port))
+        else:
+            self._sock.sendall(b"".join(str(len(m)).encode() + b" " + m for m in messages))
+
+    def _loop(self):
+        while not (self._stop.is_set() and not self._queue):
+            if not self._queue:
+                self._wake.wait(FLUSH_INTERVAL)
+                self._wake.clear()
+                continue
+            if self._sock is None:
+                if time.monotonic() < self._next_connect:
+                    self._wake.wait(FLUSH_INTERVAL)
+                    if self._stop.is_set():
+                        return
+                    continue
+                try:
+                    self._sock = self._connect()
+                except OSError as e:
+                    self.stats["errors"] += 1
+                    self._next_connect = time.monotonic() + RECONNECT_DELAY
+                    logger.warning(f"Syslog connect to {self.host}:{self.port} failed: {e}")
+                    continue
+            batch, messages = [], []
+            while self._queue and len(batch) < self.batch_size:
+                item = self._queue.popleft()
+                try:
+                    messages.append(self._format(item))
+                except Exception as e:
+                    # Only the item that cannot be formatted is lost, not the rest of the batch
+                    self.stats["errors"] += 1
+                    logger.error(f"Syslog formatting failed: {e}", exc_info=True)
+                    continue
+                batch.append(item)
+            if not messages:
+                continue
+            try:
+                self._write(messages)
+                self.stats["sent"] += len(messages)
+            except OSError as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Syslog send to {self.host}:{self.port} failed: {e}; reconnecting")
+                self._disconnect()
+                self._next_connect = time.monotonic() + RECONNECT_DELAY
+                # Keep the batch: put it back at the head of the queue, oldest first
+                self._queue.extendleft(reversed(batch))
+
+
+_senders = {}
+_senders_lock = threading.Lock()
+
+
+def close_all(timeout: float = 5.0):
+    """Delivers what is still queued (up to timeout per sender) and stops the senders; call before exiting."""
+    with _senders_lock:
+        senders = list(_senders.values())
+        _senders.clear()
+    for sender in senders:
+        if not sender.flush(timeout):
+            logger.warning(f"Syslog: {sender.pending()} message(s) to {sender.host} not sent before shutdown")
+        sender.close()
+
+
+def syslog_settings(cm) -> dict:
+    settings = dict(SYSLOG_DEFAULTS)
+    settings.update(cm.config.get("alerts", {}).get("syslog") or {})
+    return settings
+
+
+def get_sender(cm):
+    """Process-wide sender for the configured syslog destination, or None when no host is set."""
+    settings = syslog_settings(cm)
+    if not settings.get("host"):
+        return None
+    key = json.dumps(settings, sort_keys=True, default=str)
+    with _senders_lock:
+        sender = _senders.get(key)
+        if sender is None:
+            for old in _senders.values():
+                old.close()
+            _senders.clear()
+            sender = _senders[key] = SyslogSender(settings)
+        return sender
+
+
+def get_flow_sink(cm):
+    """The sender to stream matched flows to, when alerts.syslog.stream_flows is enabled."""
+    if not syslog_settings(cm).get("stream_flows"):
+        return None
+    return get_sender(cm)
+
+
+@metrics.register_collector
+def _collect_metrics():
+    with _senders_lock:
+        senders = list(_senders.values())
+    return [
+        ("illumio_monitor_syslog_queue_depth", "gauge", "Syslog messages waiting to be sent.",
+         [({"host": s.host}, len(s._queue)) for s in senders]),
+        ("illumio_monitor_syslog_messages_total", "counter", "Syslog messages by outcome.",
+         [({"host": s.host, "outcome": k}, v) for s in senders for k, v in s.stats.items()]),
+    ]
@@ -1,4 +1,5 @@
 import os
+import re
 import sys
 import logging
 import unicodedata
@@ -6,6 +7,14 @@ from logging.handlers import RotatingFileHandler
 from src.i18n import t
 
 
+ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+
+def strip_ansi(text) -> str:
+    """Removes ANSI color/control sequences (e.g. Colors.*) from text."""
+    return ANSI_RE.sub('', str(text))
+
+
 class Colors:
     """ANSI color codes. Auto-disabled when stdout is not a TTY (daemon/service mode)."""
     _enabled = hasattr(sys.stdout, 'isatty') and sys.stdout.isatty()
@@ -40,8 +49,15 @@ def safe_input(prompt: str, value_type=str, valid_range=None, allow_cancel=True,
             print(f"{Colors.FAIL}{t('error_format', default='格式錯誤。')}{Colors.ENDC}")
 
 
+PACKAGE_LOGGER = "src"  # parent of the module loggers (logging.getLogger(__name__)) in this package
+
+
 def setup_logger(name: str, log_file: str, level=logging.INFO,
                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5) -> logging.Logger:
+    """
+    Writes the `name` logger and every src.* module logger (cycle_metrics,
+    analyzer, dispatcher, ...) to one rotating log file.
+    """
     log_dir = os.path.dirname(log_file)
     if log_dir and not os.path.exists(log_dir):
         os.makedirs(log_dir)
@@ -49,10 +65,11 @@ def setup_logger(name: str, log_file: str, level=logging.INFO,
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
     handler.setFormatter(formatter)
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-    if not logger.handlers:
-        logger.addHandler(handler)
+    for logger_name in (PACKAGE_LOGGER, name):
+        logger = logging.getLogger(logger_name)
+        logger.setLevel(level)
+        if not logger.handlers:
+            logger.addHandler(handler)
     return logger
 
 
@@ -0,0 +1,173 @@
+"""
+Cache warm-up scheduler for the Web GUI.
+
+Started by launch_gui(). A single background thread refreshes the cached
+Quarantine label hrefs, keeps the local workload index synced and pre-runs the saved
+dashboard queries into dashboard_cache, so the first page load after startup is
+served from warm caches. Every refresh is rescheduled with random jitter and the
+dashboard queries are run one after another, which spreads PCE load over time
+instead of spiking when many browsers open the dashboard at once.
+
+Tuned through settings.warmup in config.json (an interval of 0 disables a task):
+
+    "warmup": {"enabled": true, "jitter": 0.2, "quarantine_labels_interval": 900,
+               "workload_index_interval": 60, "dashboard_interval": 300,
+               "dashboard_windows": [30], "dashboard_stagger": 2}
+"""
+import heapq
+import json
+import logging
+import random
+import threading
+import time
+from src.cache import TTLCache
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DEFAULTS = {
+    "enabled": True,
+    "jitter": 0.2,                       # +/- fraction applied to every interval
+    "startup_spread": 5,                 # first runs are spread over this many seconds
+    "quarantine_labels_interval": 900,   # seconds
+    "workload_index_interval": 60,
+    "dashboard_interval": 300,
+    "dashboard_windows": [30],           # minutes; the dashboard's default window is 30
+    "dashboard_stagger": 2,              # pause between two pre-run dashboard queries
+}
+DASHBOARD_CACHE_SIZE = 256
+
+# Top 10 results keyed by dashboard_cache_key(); shared by the route and the scheduler
+dashboard_cache = TTLCache(max_entries=DASHBOARD_CACHE_SIZE, ttl=WARMUP_DEFAULTS["dashboard_interval"])
+metrics.register_cache("dashboard", dashboard_cache)
+
+_QUERY_IGNORED_KEYS = ("name", "idx", "mins", "refresh", "cached_only")
+
+
+def dashboard_cache_key(cm, query: dict, mins: int) -> str:
+    """Identifies a Top 10 result by PCE, query filters and time window (the display name is ignored)."""
+    filters = {k: v for k, v in query.items() if k not in _QUERY_IGNORED_KEYS}
+    api_url = cm.config.get("api", {}).get("url", "")
+    return json.dumps([api_url, int(mins), filters], sort_keys=True, default=str)
+
+
+def warmup_settings(cm) -> dict:
+    settings = dict(WARMUP_DEFAULTS)
+    settings.update(cm.config.get("settings", {}).get("warmup") or {})
+    return settings
+
+
+class WarmupScheduler:
+    TASKS = ("quarantine_labels", "workload_index", "dashboard")
+
+    def __init__(self, cm, top10_fn, api_factory=None):
+        """
+        top10_fn(query, mins) computes a Top 10 dashboard result (the same dict the route returns).
+        api_factory() returns a fresh ApiClient; defaults to ApiClient(cm).
+        """
+        self.cm = cm
+        self.top10_fn = top10_fn
+        self.api_factory = api_factory or self._default_api
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = {}  # task -> {"at": epoch, "duration": seconds, "ok": bool}
+
+    def _default_api(self):
+        from src.api_client import ApiClient
+        return ApiClient(self.cm)
+
+    # ─── Scheduling ───────────────────────────────────────────────────────
+
+    def next_delay(self, task: str, settings: dict = None):
+        """Jittered delay before the next run of task, or None when the task is disabled."""
+        settings = settings or warmup_settings(self.cm)
+        interval = float(settings.get(f"{task}_interval") or 0)
+        if interval <= 0:
+            return None
+        jitter = min(max(float(settings.get("jitter", 0)), 0.0), 0.9)
+        return interval * random.uniform(1 - jitter, 1 + jitter)
+
+    def start(self):
+        settings = warmup_settings(self.cm)
+        if not settings.get("enabled", True):
+            logger.info("Cache warm-up disabled by settings.warmup.enabled")
+            return False
+        if self._thread and self._thread.is_alive():
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cache-warmup", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        spread = float(warmup_settings(self.cm).get("startup_spread", 0))
+        now = time.monotonic()
+        # Labels and the index first: the dashboard queries are the expensive part
+        queue = [(now + i + random.uniform(0, spread), task) for i, task in enumerate(self.TASKS)]
+        heapq.heapify(queue)
+        while queue and not self._stop.is_set():
+            due, task = heapq.heappop(queue)
+            if self._stop.wait(max(0.0, due - time.monotonic())):
+                break
+            settings = warmup_settings(self.cm)
+            if not settings.get("enabled", True):
+                break
+            self.run_task(task, settings)
+            delay = self.next_delay(task, settings)
+            if delay is not None:
+                heapq.heappush(queue, (time.monotonic() + delay, task))
+
+    # ─── Tasks ────────────────────────────────────────────────────────────
+
+    def run_task(self, task: str, settings: dict = None) -> bool:
+        settings = settings or warmup_settings(self.cm)
+        if self.next_delay(task, settings) is None:
+            return False
+        started = time.monotonic()
+        ok = False
+        try:
+            ok = bool(getattr(self, f"_warm_{task}")(settings))
+        except Exception as e:
+            logger.error(f"Cache warm-up task {task} failed: {e}", exc_info=True)
+        duration = time.monotonic() - started
+        self.last_run[task] = {"at": time.time(), "duration": round(duration, 3), "ok": ok}
+        logger.debug(f"Cache warm-up {task}: ok={ok} in {duration:.2f}s")
+        return ok
+
+    def _warm_quarantine_labels(self, settings) -> bool:
+        # Read-only: missing labels are created by the quarantine actions, not by opening the GUI.
+        # Re-reads the labels so hrefs of deleted or re-created labels do not stay cached.
+        hrefs = self.api_factory().find_quarantine_labels(refresh=True)
+        return bool(hrefs)
+
+    def _warm_workload_index(self, settings) -> bool:
+        from src.workload_index import get_index
+        api = self.api_factory()
+        return get_index(api).sync(api)
+
+    def _warm_dashboard(self, settings) -> bool:
+        queries = self.cm.config.get("settings", {}).get("dashboard_queries") or []
+        windows = settings.get("dashboard_windows") or WARMUP_DEFAULTS["dashboard_windows"]
+        stagger = max(float(settings.get("dashboard_stagger", 0)), 0.0)
+        # Keep entries alive until the next refresh has had time to replace them
+        ttl = float(settings["dashboard_interval"]) * (1 + float(settings.get("jitter", 0))) \
+            + stagger * len(queries) * len(windows) + 60
+        ok = True
+        first = True
+        for query in queries:
+            for mins in windows:
+                if self._stop.is_set():
+                    return False
+                if not first and self._stop.wait(stagger):
+                    return False
+                first = False
+                result = self.top10_fn(query, int(mins))
+                if result.get("ok"):
+                    dashboard_cache.set(dashboard_cache_key(self.cm, query, mins), result, ttl=ttl)
+                else:
+                    ok = False
+                    logger.warning(f"Dashboard warm-up query '{query.get('name', '')}' failed: {result.get('error')}")
+        return ok
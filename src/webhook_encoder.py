@@ -0,0 +1,181 @@
+"""
+Size-bounded JSON encoding of webhook alert payloads.
+
+The webhook body keeps its original shape (subject, timestamp and the four alert
+lists) and adds batch_id / sequence / sequence_total so receivers can reassemble
+or de-duplicate split deliveries:
+
+  - each alert is serialised on its own; one larger than max_alert_bytes loses
+    raw_data flows from the end (then long text fields) and gets a "_truncated"
+    marker saying what was cut;
+  - encoded alerts are packed into bodies of at most max_body_bytes, so one
+    oversized batch becomes several requests;
+  - at most max_requests bodies are produced; alerts that do not fit are counted
+    in a "dropped_alerts" marker on the last body;
+  - with raw_data set to "compact", flow samples are sent as flat summaries
+    (see render.compact_flow) instead of full PCE flow records;
+  - with gzip enabled, bodies are compressed incrementally as fragments are
+    produced (Content-Encoding: gzip).
+
+Budgets apply to the uncompressed JSON. Tuned through alerts.webhook_payload:
+
+    "webhook_payload": {"gzip": false, "max_alert_bytes": 65536, "max_body_bytes": 1048576, "max_requests": 10,
+                        "raw_data": "full"}
+"""
+import json
+import uuid
+import zlib
+from src.render import compact_flow
+
+PAYLOAD_DEFAULTS = {
+    "gzip": False,
+    "max_alert_bytes": 64 * 1024,
+    "max_body_bytes": 1024 * 1024,
+    "max_requests": 10,
+    "raw_data": "full",     # full | compact
+}
+ALERT_LISTS = ("health_alerts", "event_alerts", "traffic_alerts", "metric_alerts")
+FLOW_LISTS = ("traffic_alerts", "metric_alerts")
+TEXT_FIELD_LIMIT = 2048  # characters kept from a text field of an alert that is still too large
+_ENVELOPE_RESERVE = 512  # room for subject, timestamp, sequence fields and list brackets
+
+_encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+def _dumps(obj) -> bytes:
+    return _encoder.encode(obj).encode("utf-8")
+
+
+def _gzip_stream():
+    return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+
+class WebhookEncoder:
+    def __init__(self, gzip: bool = False, max_alert_bytes: int = PAYLOAD_DEFAULTS["max_alert_bytes"],
+                 max_body_bytes: int = PAYLOAD_DEFAULTS["max_body_bytes"],
+                 max_requests: int = PAYLOAD_DEFAULTS["max_requests"], raw_data: str = "full"):
+        self.gzip = gzip
+        self.compact = raw_data == "compact"
+        self.max_body_bytes = max(int(max_body_bytes), 2 * _ENVELOPE_RESERVE)
+        self.max_alert_bytes = min(int(max_alert_bytes), self.max_body_bytes - _ENVELOPE_RESERVE)
+        self.max_requests = max(int(max_requests), 1)
+
+    @classmethod
+    def from_config(cls, cm) -> 'WebhookEncoder':
+        settings = dict(PAYLOAD_DEFAULTS)
+        settings.update(cm.config.get("alerts", {}).get("webhook_payload") or {})
+        return cls(bool(settings["gzip"]), settings["max_alert_bytes"], settings["max_body_bytes"], settings["max_requests"],
+                   settings["raw_data"])
+
+    @property
+    def headers(self) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.gzip:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+
+    # ─── Per-alert budget ─────────────────────────────────────────────────
+
+    def encode_alert(self, alert: dict, flows: bool = False) -> bytes:
+        """Serialises one alert, trimming it to max_alert_bytes with a _truncated marker.
+
+        flows: the alert's raw_data holds traffic flows (compacted when raw_data is "compact").
+        """
+        if flows and self.compact and isinstance(alert.get("raw_data"), list) and alert["raw_data"]:
+            alert = dict(alert, raw_data=[compact_flow(f) if isinstance(f, dict) else f for f in alert["raw_data"]])
+        data = _dumps(alert)
+        if len(data) <= self.max_alert_bytes:
+            return data
+
+        raw = alert.get("raw_data")
+        trimmed = dict(alert)
+        marker = {"reason": "alert_size_budget", "original_bytes": len(data)}
+        if isinstance(raw, list) and raw:
+            # Binary search for the largest raw_data prefix that fits
+            lo, hi = 0, len(raw)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                trimmed["raw_data"] = raw[:mid]
+                trimmed["_truncated"] = dict(marker, raw_data_total=len(raw), raw_data_kept=mid)
+                if len(_dumps(trimmed)) <= self.max_alert_bytes:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            trimmed["raw_data"] = raw[:lo]
+            trimmed["_truncated"] = dict(marker, raw_data_total=len(raw), raw_data_kept=lo)
+            data = _dumps(trimmed)
+            if len(data) <= self.max_alert_bytes:
+                return data
+        else:
+            trimmed["_truncated"] = dict(marker)
+
+        cut = []
+        for key, value in list(trimmed.items()):
+            if isinstance(value, str) and len(value) > TEXT_FIELD_LIMIT:
+                trimmed[key] = value[:TEXT_FIELD_LIMIT] + "..."
+                cut.append(key)
+            elif key == "raw_data" and not isinstance(value, list):
+                trimmed[key] = None
+                cut.append(key)
+        trimmed["_truncated"] = dict(trimmed["_truncated"], fields_cut=cut)
+        data = _dumps(trimmed)
+        if len(data) <= self.max_alert_bytes:
+            return data
+        # Last resort: identity fields only
+        minimal = {k: trimmed[k] for k in ("rule", "time", "status", "severity", "count") if k in trimmed}
+        minimal["_truncated"] = dict(marker, fields_cut=["*"])
+        return _dumps(minimal)
+
+    # ─── Batching ─────────────────────────────────────────────────────────
+
+    def _pack(self, fragments: list) -> tuple:
+        """Greedily packs (list_name, bytes) fragments into bodies. Returns (bodies, dropped)."""
+        budget = self.max_body_bytes - _ENVELOPE_RESERVE
+        bodies, current, size = [], [], 0
+        for i, (name, frag) in enumerate(fragments):
+            if current and size + len(frag) + 1 > budget:
+                bodies.append(current)
+                current, size = [], 0
+                if len(bodies) == self.max_requests:
+                    return bodies, len(fragments) - i
+            current.append((name, frag))
+            size += len(frag) + 1
+        if current or not bodies:
+            bodies.append(current)
+        return bodies, 0
+
+    def _render(self, envelope: bytes, body: list, extra: bytes):
+        """Yields the chunks of one JSON body: envelope fields, then each alert list."""
+        yield envelope
+        for name in ALERT_LISTS:
+            yield b',"' + name.encode() + b'":['
+            first = True
+            for list_name, frag in body:
+                if list_name == name:
+                    if not first:
+                        yield b","
+                    yield frag
+                    first = False
+            yield b"]"
+        yield extra + b"}"
+
+    def encode(self, subject: str, alerts: dict, timestamp: str) -> list:
+        """Returns the request bodies (bytes, gzip-compressed if enabled) for one webhook delivery."""
+        fragments = [(name, self.encode_alert(a, name in FLOW_LISTS)) for name in ALERT_LISTS for a in alerts.get(name) or []]
+        bodies, dropped = self._pack(fragments)
+        batch_id = uuid.uuid4().hex
+        total = len(bodies)
+        out = []
+        for seq, body in enumerate(bodies, 1):
+            envelope = b'{"subject":' + _dumps(subject) + b',"timestamp":' + _dumps(timestamp) + \
+                b',"batch_id":' + _dumps(batch_id) + b',"sequence":' + str(seq).encode() + \
+                b',"sequence_total":' + str(total).encode()
+            extra = b',"dropped_alerts":' + str(dropped).encode() if dropped and seq == total else b""
+            if self.gzip:
+                z = _gzip_stream()
+                parts = [z.compress(chunk) for chunk in self._render(envelope, body, extra)]
+                parts.append(z.flush())
+                out.append(b"".join(parts))
+            else:
+                out.append(b"".join(self._render(envelope, body, extra)))
+        return out
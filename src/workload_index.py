@@ -0,0 +1,328 @@
+"""
+Local in-memory workload index for the Web GUI workload search.
+
+The full workload collection is exported periodically through an asynchronous
+GET job; between exports the index follows workload.* audit events and only
+re-fetches the workloads that changed. Searches never touch the PCE:
+
+  - substring queries (3+ characters) intersect a trigram index, then verify;
+  - shorter queries are answered as prefix matches from per-field sorted lists
+    (the IP list doubles as the prefix index for "10.1." style lookups).
+"""
+import bisect
+import heapq
+import datetime
+import logging
+import threading
+import time
+from collections import defaultdict
+from src.api_client import event_resource_hrefs
+
+logger = logging.getLogger(__name__)
+
+FULL_SYNC_INTERVAL = 3600  # seconds between full collection exports
+INCREMENTAL_INTERVAL = 60  # seconds between workload event polls
+MAX_EVENTS = 1000  # events per poll; a full page may have cut some off, so a full export follows
+WORKLOAD_EVENT_TYPES = ["workload.create", "workload.delete", "workload.update"]
+SEARCH_FIELDS = ("name", "hostname", "ip", "label")
+GRAM = 3
+
+# Only what the GUI renders is kept, to keep the index small
+_KEEP_KEYS = ("href", "name", "hostname", "online", "managed", "labels", "interfaces", "public_ip")
+
+
+def _trigrams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _slim(wl: dict) -> dict:
+    out = {k: wl[k] for k in _KEEP_KEYS if k in wl}
+    if "interfaces" in out:
+        out["interfaces"] = [{"name": i.get("name"), "address": i.get("address")}
+                             for i in out["interfaces"] or [] if isinstance(i, dict)]
+    if "labels" in out:
+        out["labels"] = [{"href": l.get("href"), "key": l.get("key"), "value": l.get("value")}
+                         for l in out["labels"] or [] if isinstance(l, dict)]
+    return out
+
+
+def _field_values(wl: dict) -> dict:
+    ips = [i.get("address") for i in wl.get("interfaces") or [] if i.get("address")]
+    if wl.get("public_ip"):
+        ips.append(wl["public_ip"])
+    labels = []
+    for l in wl.get("labels") or []:
+        if l.get("key") or l.get("value"):
+            labels.append(f"{l.get('key', '')}={l.get('value', '')}".lower())
+    return {
+        "name": [wl["name"].lower()] if wl.get("name") else [],
+        "hostname": [wl["hostname"].lower()] if wl.get("hostname") else [],
+        "ip": [ip.lower() for ip in ips],
+        "label": labels,
+    }
+
+
+class WorkloadIndex:
+    def __init__(self, full_sync_interval: float = FULL_SYNC_INTERVAL,
+                 incremental_interval: float = INCREMENTAL_INTERVAL):
+        self.full_sync_interval = full_sync_interval
+        self.incremental_interval = incremental_interval
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._reset()
+        self.ready = False
+        self.last_full_sync = 0.0
+        self.last_refresh = 0.0
+        self.event_watermark = None
+        self._pending = {}          # href -> deleted?, queued by queue_events()
+        self._pending_lock = threading.Lock()
+        self._applying = False
+
+    def _reset(self):
+        self._next_id = 0
+        self._docs = {}                          # id -> slim workload
+        self._values = {}                        # id -> {field: [lowered strings]}
+        self._ids = {}                           # href -> id
+        self._grams = defaultdict(set)           # trigram -> {id}
+        self._sorted = {f: [] for f in SEARCH_FIELDS}  # field -> sorted [(value, id)]
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ─── Mutation ─────────────────────────────────────────────────────────
+
+    def _add(self, wl: dict, bulk: bool = False):
+        href = wl.get("href")
+        if not href:
+            return
+        if href in self._ids:
+            self._remove(href)
+        doc_id = self._next_id
+        self._next_id += 1
+        values = _field_values(wl)
+        self._docs[doc_id] = _slim(wl)
+        self._values[doc_id] = values
+        self._ids[href] = doc_id
+        for field, vals in values.items():
+            for v in vals:
+                for g in _trigrams(v):
+                    self._grams[g].add(doc_id)
+                if bulk:
+                    self._sorted[field].append((v, doc_id))
+                else:
+                    bisect.insort(self._sorted[field], (v, doc_id))
+
+    def _remove(self, href: str):
+        doc_id = self._ids.pop(href, None)
+        if doc_id is None:
+            return
+        self._docs.pop(doc_id, None)
+        for field, vals in self._values.pop(doc_id, {}).items():
+            for v in vals:
+                for g in _trigrams(v):
+                    posting = self._grams.get(g)
+                    if posting is not None:
+                        posting.discard(doc_id)
+                        if not posting:
+                            del self._grams[g]
+                entries = self._sorted[field]
+                pos = bisect.bisect_left(entries, (v, doc_id))
+                if pos < len(entries) and entries[pos] == (v, doc_id):
+                    del entries[pos]
+
+    def load(self, workloads: list):
+        """Replace the whole index with a freshly exported workload collection."""
+        with self._lock:
+            self._reset()
+            for wl in workloads:
+                if isinstance(wl, dict):
+                    self._add(wl, bulk=True)
+            for entries in self._sorted.values():
+                entries.sort()
+            self.ready = True
+
+    def upsert(self, wl: dict):
+        with self._lock:
+            self._add(wl)
+
+    def remove(self, href: str):
+        with self._lock:
+            self._remove(href)
+
+    # ─── Search ───────────────────────────────────────────────────────────
+
+    def _match(self, field: str, q: str) -> set:
+        if len(q) < GRAM:
+            entries = self._sorted[field]
+            ids = set()
+            for i in range(bisect.bisect_left(entries, (q,)), len(entries)):
+                value, doc_id = entries[i]
+                if not value.startswith(q):
+                    break
+                ids.add(doc_id)
+            return ids
+
+        postings = []
+        for g in _trigrams(q):
+            posting = self._grams.get(g)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        return {i for i in candidates if any(q in v for v in self._values[i][field])}
+
+    def search(self, name=None, hostname=None, ip=None, label=None, limit: int = 500) -> list:
+        """Case-insensitive search; every given criterion must match. Returns slim workload dicts."""
+        criteria = [(f, str(q).strip().lower()) for f, q in
+                    (("name", name), ("hostname", hostname), ("ip", ip), ("label", label)) if q]
+        criteria = [(f, q) for f, q in criteria if q]
+        with self._lock:
+            if not criteria:
+                ids = list(self._docs)
+            else:
+                result = None
+                for field, q in criteria:
+                    matched = self._match(field, q)
+                    result = matched if result is None else result & matched
+                    if not result:
+                        return []
+                ids = result
+            docs = [self._docs[i] for i in ids]
+        return heapq.nsmallest(limit, docs, key=lambda w: (w.get("name") or w.get("hostname") or "").lower())
+
+    # ─── Synchronisation ──────────────────────────────────────────────────
+
+    @staticmethod
+    def _changes(events: list):
+        """(href, deleted) for each workload touched by workload.* audit events, in order."""
+        for evt in events or []:
+            etype = str(evt.get("event_type", ""))
+            if not etype.startswith("workload.") or evt.get("status") == "failure":
+                continue
+            for href in event_resource_hrefs(evt, "workload"):
+                yield href, etype == "workload.delete"
+
+    def _apply_change(self, api, href: str, deleted: bool):
+        wl = None if deleted else api.get_workload(href, revalidate=True)
+        if wl:
+            self.upsert(wl)
+        else:
+            self.remove(href)
+
+    def apply_events(self, api, events: list):
+        """Apply workload.create / workload.update / workload.delete audit events."""
+        for href, deleted in self._changes(events):
+            self._apply_change(api, href, deleted)
+
+    def queue_events(self, api, events: list):
+        """
+        Like apply_events(), but returns at once: the touched hrefs are queued (a burst of
+        events for one workload re-reads it once) and applied on a background thread.
+        """
+        with self._pending_lock:
+            for href, deleted in self._changes(events):
+                self._pending[href] = deleted
+            if not self._pending or self._applying:
+                return
+            self._applying = True
+        threading.Thread(target=self._apply_pending, args=(api,), name="workload-index-events",
+                         daemon=True).start()
+
+    def _apply_pending(self, api):
+        while True:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+                if not pending:
+                    self._applying = False
+                    return
+            try:
+                for href, deleted in pending.items():
+                    self._apply_change(api, href, deleted)
+            except Exception as e:
+                logger.error(f"Applying workload events to the index failed: {e}", exc_info=True)
+
+    def _full_sync(self, api) -> bool:
+        watermark = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        started = time.monotonic()
+        workloads = api.fetch_collection_async("workloads")
+        if workloads is None:
+            return False
+        self.load(workloads)
+        # Events raised while the export ran are replayed by the next incremental refresh
+        self.event_watermark = watermark
+        self.last_full_sync = self.last_refresh = time.time()
+        logger.info(f"Workload index synced: {len(self)} workloads in {time.monotonic() - started:.1f}s")
+        return True
+
+    def _incremental_sync(self, api) -> bool:
+        events = api.fetch_events(self.event_watermark, max_results=MAX_EVENTS,
+                                  event_types=WORKLOAD_EVENT_TYPES, strict=True)
+        if events is None:
+            # Keep the watermark: the same window is polled again next time
+            return False
+        if len(events) >= MAX_EVENTS:
+            logger.info(f"{len(events)} workload events since {self.event_watermark}; running a full export")
+            return self._full_sync(api)
+        self.apply_events(api, events)
+        # Resume from the newest applied event; timestamp[gte] re-reads it, which is harmless
+        stamps = [e["timestamp"] for e in events if isinstance(e.get("timestamp"), str)]
+        if stamps:
+            self.event_watermark = max(stamps)
+        self.last_refresh = time.time()
+        return True
+
+    def sync(self, api, full: bool = False) -> bool:
+        """Full export when forced, never synced, or the full interval elapsed; otherwise follow events."""
+        with self._sync_lock:
+            if full or not self.ready or time.time() - self.last_full_sync >= self.full_sync_interval:
+                return self._full_sync(api)
+            return self._incremental_sync(api)
+
+    def is_stale(self) -> bool:
+        return not self.ready or time.time() - self.last_refresh >= self.incremental_interval
+
+    def refresh_async(self, api):
+        """Start a background sync if the index is stale and no sync is running."""
+        if not self.is_stale() or self._sync_lock.locked():
+            return
+
+        def work():
+            try:
+                self.sync(api)
+            except Exception as e:
+                logger.error(f"Workload index sync failed: {e}", exc_info=True)
+        threading.Thread(target=work, name="workload-index-sync", daemon=True).start()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(api) -> WorkloadIndex:
+    """Process-wide index for the PCE org the given ApiClient talks to."""
+    with _indexes_lock:
+        idx = _indexes.get(api.base_url)
+        if idx is None:
+            idx = _indexes[api.base_url] = WorkloadIndex()
+        return idx
+
+
+def known_size(api):
+    """Workloads in the org's synced index, or None when this process has none."""
+    idx = _indexes.get(api.base_url)
+    return len(idx) if idx is not None and idx.ready else None
+
+
+def notify_events(api, events: list):
+    """
+    Feed audit events seen elsewhere (e.g. by the Analyzer) into an existing index. The
+    PCE round-trips run on the index's background thread, not on the caller's.
+    """
+    idx = _indexes.get(api.base_url)
+    if idx is not None and idx.ready:
+        idx.queue_events(api, events)
@@ -1,7 +1,10 @@
+import os
+import tempfile
 import unittest
 from datetime import datetime, timezone, timedelta
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from src.analyzer import Analyzer
+from src.coalescer import record_delivery
 from src.config import ConfigManager
 
 class TestAnalyzer(unittest.TestCase):
@@ -69,5 +72,64 @@ class TestAnalyzer(unittest.TestCase):
         self.analyzer.state['alert_history']['rule1'] = past.strftime('%Y-%m-%dT%H:%M:%SZ')
         self.assertTrue(self.analyzer._check_cooldown(rule))
 
+    def test_unchanged_alert_becomes_ongoing_update(self):
+        self.mock_cm.config = {"alerts": {}}
+        self.analyzer.state["alert_fingerprints"] = {}
+        rule = {"id": 7, "name": "SSH"}
+
+        def alert(count, details="web -> db [22]: 3"):
+            return {"rule": "SSH", "count": str(count), "details": details, "raw_data": [{"pd": 2}]}
+
+        first = alert(100)
+        self.analyzer._mark_ongoing(rule, "traffic", first)
+        self.assertNotIn("ongoing", first)
+
+        undelivered = alert(105)  # same value bucket and talkers, but the first alert was not delivered yet
+        self.analyzer._mark_ongoing(rule, "traffic", undelivered)
+        self.assertNotIn("ongoing", undelivered)
+        self.assertEqual(undelivered["raw_data"], [{"pd": 2}])
+        record_delivery({"traffic_alerts": [undelivered]}, False)
+        record_delivery({"traffic_alerts": [first]}, True)  # a channel that gave up wins
+
+        again = alert(105)
+        self.analyzer._mark_ongoing(rule, "traffic", again)
+        self.assertNotIn("ongoing", again)
+        record_delivery({"traffic_alerts": [again]}, True)
+
+        same = alert(105)
+        self.analyzer._mark_ongoing(rule, "traffic", same)
+        self.assertTrue(same["ongoing"])
+        self.assertEqual(same["raw_data"], [])
+
+        for changed in (alert(200), alert(200, "app -> db [22]: 3")):
+            self.analyzer._mark_ongoing(rule, "traffic", changed)
+            self.assertNotIn("ongoing", changed)
+
+        self.analyzer._clear_fingerprint(rule)
+        again = alert(200, "app -> db [22]: 3")
+        self.analyzer._mark_ongoing(rule, "traffic", again)
+        self.assertNotIn("ongoing", again)
+
+    def test_delivery_outcome_survives_a_new_process(self):
+        rule = {"id": 7, "name": "SSH"}
+        alert = lambda: {"rule": "SSH", "count": "100", "details": "web -> db [22]: 3", "raw_data": [{"pd": 2}]}
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch("src.analyzer.STATE_FILE", os.path.join(tmp, "state.json")):
+            first_run = Analyzer(self.mock_cm, self.mock_api, self.mock_rep)
+            first_run.cm.config = {"alerts": {}}
+            first = alert()
+            first_run._mark_ongoing(rule, "traffic", first)
+            first_run.save_state()
+            record_delivery({"traffic_alerts": [first]}, True)
+            first_run.save_deliveries()
+
+            # A later --run-once: a new Analyzer that only sees state.json
+            with patch("src.analyzer.take_delivery", return_value=None):
+                second_run = Analyzer(self.mock_cm, self.mock_api, self.mock_rep)
+                again = alert()
+                second_run._mark_ongoing(rule, "traffic", again)
+        self.assertTrue(again["ongoing"])
+        self.assertEqual(again["raw_data"], [])
+
 if __name__ == '__main__':
     unittest.main()
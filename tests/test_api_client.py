@@ -0,0 +1,202 @@
+import io
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+from src import api_client
+from src.api_client import ApiClient
+from src.memory_budget import MemoryBudget
+
+
+def _make_client():
+    cm = MagicMock()
+    cm.config = {"api": {"url": "https://pce.test:8443", "org_id": "1", "key": "k", "secret": "s", "verify_ssl": True}}
+    return ApiClient(cm)
+
+
+class TestBulkRelabel(unittest.TestCase):
+    def setUp(self):
+        api_client._metadata_cache.clear()
+        api_client._quarantine_hrefs.clear()
+        self.api = _make_client()
+        self.workloads = {
+            "/orgs/1/workloads/a": {"href": "/orgs/1/workloads/a", "labels": [{"href": "/orgs/1/labels/env"}, {"href": "/orgs/1/labels/q-mild"}]},
+            "/orgs/1/workloads/b": {"href": "/orgs/1/workloads/b", "labels": [{"href": "/orgs/1/labels/app"}]},
+        }
+        self.calls = []
+
+    def _fake_request(self, bulk_body, single_status=204):
+        def fake(url, method="GET", data=None, headers=None, timeout=15, stream=False, response_headers=None):
+            self.calls.append((method, url, data))
+            if method == "GET":
+                href = url.split("/api/v2", 1)[1]
+                if href in self.workloads:
+                    return 200, json.dumps(self.workloads[href]).encode()
+                return 404, b""
+            if url.endswith("/workloads/bulk_update"):
+                return 200, json.dumps(bulk_body).encode()
+            return single_status, b""
+        return fake
+
+    def test_bulk_update_computes_label_sets_locally(self):
+        self.api._request = self._fake_request([])
+        res = self.api.bulk_relabel_workloads(
+            list(self.workloads) + ["/orgs/1/workloads/missing"],
+            ["/orgs/1/labels/q-severe"], ["/orgs/1/labels/q-mild", "/orgs/1/labels/q-moderate"])
+
+        self.assertEqual(sorted(res["success"]), sorted(self.workloads))
+        self.assertEqual(res["failed"], ["/orgs/1/workloads/missing"])
+        bulk = [c for c in self.calls if c[1].endswith("bulk_update")]
+        self.assertEqual(len(bulk), 1)
+        sent = {u["href"]: u["labels"] for u in bulk[0][2]}
+        self.assertEqual(sent["/orgs/1/workloads/a"], [{"href": "/orgs/1/labels/env"}, {"href": "/orgs/1/labels/q-severe"}])
+        self.assertEqual(sent["/orgs/1/workloads/b"], [{"href": "/orgs/1/labels/app"}, {"href": "/orgs/1/labels/q-severe"}])
+        self.assertFalse([c for c in self.calls if c[0] == "PUT" and not c[1].endswith("bulk_update")])
+
+    def test_failed_items_fall_back_to_individual_put(self):
+        bulk_body = [{"href": "/orgs/1/workloads/b", "errors": [{"token": "not_found_error", "message": "Not found"}]}]
+        self.api._request = self._fake_request(bulk_body)
+        res = self.api.bulk_relabel_workloads(list(self.workloads), ["/orgs/1/labels/q-mild"])
+
+        singles = [c for c in self.calls if c[0] == "PUT" and not c[1].endswith("bulk_update")]
+        self.assertEqual([c[1] for c in singles], ["https://pce.test:8443/api/v2/orgs/1/workloads/b"])
+        self.assertEqual(sorted(res["success"]), sorted(self.workloads))
+        self.assertEqual(res["failed"], [])
+
+    def test_chunk_failure_marks_items_failed_after_fallback(self):
+        self.api._request = self._fake_request([{"href": "/orgs/1/workloads/a", "errors": [{"token": "x"}]}], single_status=500)
+        res = self.api.bulk_relabel_workloads(["/orgs/1/workloads/a"], ["/orgs/1/labels/q-mild"])
+        self.assertEqual(res, {"success": [], "failed": ["/orgs/1/workloads/a"]})
+
+
+    def test_large_batches_read_one_collection_export(self):
+        # b was created after the export ran: it is fetched on its own rather than reported failed
+        exported = [self.workloads["/orgs/1/workloads/a"], {"href": "/orgs/1/workloads/other", "labels": []}]
+        single = self._fake_request([])
+
+        def fake(url, method="GET", data=None, headers=None, timeout=15, stream=False, response_headers=None):
+            if url.endswith("/orgs/1/workloads"):
+                self.calls.append((method, url, data))
+                return 200, json.dumps(exported).encode()
+            return single(url, method, data, headers, timeout, stream, response_headers)
+        self.api._request = fake
+        found = self.api.get_workloads_batch(list(self.workloads) + ["/orgs/1/workloads/missing"], export_min=2)
+        self.assertEqual(found, self.workloads)
+        self.assertEqual(self.calls[0][1], "https://pce.test:8443/api/v2/orgs/1/workloads")
+        self.assertEqual(sorted(c[1].rsplit("/", 1)[1] for c in self.calls[1:]), ["b", "missing"])
+
+    def test_export_threshold_scales_with_known_collection_size(self):
+        self.assertEqual(self.api._bulk_export_threshold(), api_client.BULK_EXPORT_MIN)
+        self.assertEqual(self.api._bulk_export_threshold(0), float("inf"))
+        self.api.cm.config["settings"] = {"bulk_export_min": 100}
+        self.assertEqual(self.api._bulk_export_threshold(), 100)
+        with patch("src.workload_index.known_size", return_value=50000):
+            self.assertEqual(self.api._bulk_export_threshold(), 5000)
+
+    def test_failed_item_without_href_uses_its_position(self):
+        failed, _ = ApiClient._parse_bulk_failures(
+            json.dumps([{"status": "ok"}, {"errors": [{"token": "invalid_uri"}]}]).encode(),
+            ["/orgs/1/workloads/a", "/orgs/1/workloads/b"])
+        self.assertEqual(failed, ["/orgs/1/workloads/b"])
+
+
+class TestDownload(unittest.TestCase):
+    def test_interrupted_download_is_retried(self):
+        class Dropped(io.BytesIO):
+            def read(self, n=-1):
+                raise ConnectionResetError("reset by peer")
+        responses = [Dropped(), io.BytesIO(b"x" * 100)]
+        api = _make_client()
+        api._request = MagicMock(side_effect=lambda *a, **kw: (200, responses.pop(0)))
+        budget = MemoryBudget(1024 * 1024)
+        with patch("src.api_client.time.sleep"), self.assertLogs("src.api_client", level="WARNING"):
+            status, spool = api._download_spool("https://pce.test:8443/api/v2/x/download", budget)
+        self.assertEqual((status, spool.read()), (200, b"x" * 100))
+        self.assertEqual((api._request.call_count, budget.held), (2, 100))
+        budget.release_spool(spool)
+
+    def test_non_200_response_is_closed(self):
+        resp = io.BytesIO(b"")
+        api = _make_client()
+        api._request = MagicMock(return_value=(202, resp))
+        self.assertEqual(api._download_spool("https://pce.test:8443/api/v2/x/download", MemoryBudget(1024)), (202, None))
+        self.assertTrue(resp.closed)
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        api_client._metadata_cache.clear()
+        api_client._quarantine_hrefs.clear()
+        self.api = _make_client()
+        self.calls = []
+
+    def test_etag_revalidation(self):
+        wl = {"href": "/orgs/1/workloads/a", "labels": []}
+
+        def fake(url, method="GET", data=None, headers=None, timeout=15, stream=False, response_headers=None):
+            self.calls.append(dict(headers or {}))
+            if (headers or {}).get("If-None-Match") == '"v1"':
+                return 304, b""
+            response_headers["etag"] = '"v1"'
+            return 200, json.dumps(wl).encode()
+        self.api._request = fake
+
+        self.assertEqual(self.api.get_workload("/orgs/1/workloads/a"), wl)
+        self.assertEqual(self.api.get_workload("/orgs/1/workloads/a"), wl)
+        self.assertEqual(len(self.calls), 1)  # second call served from cache
+
+        self.assertEqual(self.api.get_workload("/orgs/1/workloads/a", revalidate=True), wl)
+        self.assertEqual(self.calls[-1].get("If-None-Match"), '"v1"')
+
+    def test_quarantine_labels_resolved_once_until_label_event(self):
+        labels = [{"href": f"/orgs/1/labels/{v}", "key": "Quarantine", "value": v} for v in ("Mild", "Moderate", "Severe")]
+
+        def fake(url, method="GET", data=None, headers=None, timeout=15, stream=False, response_headers=None):
+            self.calls.append(url)
+            return 200, json.dumps(labels).encode()
+        self.api._request = fake
+
+        first = self.api.check_and_create_quarantine_labels()
+        self.assertEqual(first["Severe"], "/orgs/1/labels/Severe")
+        _make_client().check_and_create_quarantine_labels()
+        self.assertEqual(len(self.calls), 1)
+
+        self.api.note_events([{"event_type": "label.update"}])
+        self.api.check_and_create_quarantine_labels()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_find_quarantine_labels_never_creates(self):
+        labels = [{"href": "/orgs/1/labels/Mild", "key": "Quarantine", "value": "Mild"}]
+
+        def fake(url, method="GET", data=None, headers=None, timeout=15, stream=False, response_headers=None):
+            self.calls.append((method, url))
+            return 200, json.dumps(labels).encode()
+        self.api._request = fake
+
+        self.assertEqual(self.api.find_quarantine_labels(), {"Mild": "/orgs/1/labels/Mild"})
+        self.assertEqual([m for m, _ in self.calls], ["GET"])
+        self.assertNotIn(self.api.base_url, api_client._quarantine_hrefs)  # incomplete sets are not cached
+
+    def test_find_quarantine_labels_refresh_replaces_cached_set(self):
+        labels = [{"href": f"/orgs/1/labels/{v}", "key": "Quarantine", "value": v} for v in ("Mild", "Moderate", "Severe")]
+
+        def fake(url, method="GET", data=None, headers=None, timeout=15, stream=False, response_headers=None):
+            self.calls.append(url)
+            return 200, json.dumps(labels).encode()
+        self.api._request = fake
+
+        self.assertEqual(self.api.find_quarantine_labels()["Severe"], "/orgs/1/labels/Severe")
+        self.api.find_quarantine_labels()
+        self.assertEqual(len(self.calls), 1)
+
+        labels[2] = {"href": "/orgs/1/labels/Severe2", "key": "Quarantine", "value": "Severe"}
+        self.assertEqual(self.api.find_quarantine_labels(refresh=True)["Severe"], "/orgs/1/labels/Severe2")
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.api.find_quarantine_labels()["Severe"], "/orgs/1/labels/Severe2")
+
+        del labels[2]  # a label was deleted: the cached set goes with it
+        self.assertNotIn("Severe", self.api.find_quarantine_labels(refresh=True))
+        self.assertNotIn(self.api.base_url, api_client._quarantine_hrefs)
+
+
+if __name__ == '__main__':
+    unittest.main()
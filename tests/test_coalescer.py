@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from src.coalescer import AlertCoalescer, alert_fingerprint
+
+
+def _cm(**digest):
+    cm = MagicMock()
+    cm.config = {"alerts": {"digest": digest}}
+    return cm
+
+
+def _traffic(count, details, vals):
+    return {"rule": "Blocked SSH", "count": str(count), "criteria": "port 22", "details": details,
+            "raw_data": [{"_metric_val": v} for v in vals]}
+
+
+class TestAlertCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.reporters = []
+
+        def factory(cm, dispatcher):
+            rep = MagicMock()
+            self.reporters.append(rep)
+            return rep
+        self.factory = factory
+
+    def test_fingerprint_ignores_values(self):
+        a = _traffic(5, "web -> db [22]: 3<br>app -> db [22]: 2", [1])
+        b = _traffic(9, "app -> db [22]: 7<br>web -> db [22]: 1", [4])
+        c = _traffic(5, "web -> mail [22]: 5", [1])
+        self.assertEqual(alert_fingerprint("traffic", a), alert_fingerprint("traffic", b))
+        self.assertNotEqual(alert_fingerprint("traffic", a), alert_fingerprint("traffic", c))
+
+    def test_repeated_alerts_merge_within_window(self):
+        co = AlertCoalescer(_cm(window_seconds=600, max_raw_per_alert=3), reporter_factory=self.factory)
+        co.add_traffic_alert(_traffic(5, "web -> db [22]: 3<br>app -> db [22]: 2", [1, 5]))
+        co.send_alerts()
+        self.assertEqual(self.reporters, [])  # window still open
+
+        co.add_traffic_alert(_traffic(9, "app -> db [22]: 7<br>web -> db [22]: 1", [4, 2]))
+        co.flush()
+        rep = self.reporters[0]
+        merged = rep.add_traffic_alert.call_args[0][0]
+        self.assertEqual(merged["occurrences"], 2)
+        self.assertEqual(merged["count"], "9")
+        self.assertEqual(merged["peak"], "9")
+        self.assertEqual(merged["details"], "app -> db [22]: 9<br>web -> db [22]: 4")
+        self.assertEqual([r["_metric_val"] for r in merged["raw_data"]], [5, 4, 2])
+        rep.send_alerts.assert_called_once_with(force_test=False)
+
+    def test_full_alert_followed_by_ongoing_update_stays_full(self):
+        co = AlertCoalescer(_cm(window_seconds=600), reporter_factory=self.factory)
+        co.add_traffic_alert(_traffic(5, "web -> db [22]: 3", [1, 5]))
+        update = dict(_traffic(6, "web -> db [22]: 3", []), ongoing=True, ongoing_since="2026-01-01T00:00:00Z")
+        co.add_traffic_alert(update)
+        co.flush()
+        merged = self.reporters[0].add_traffic_alert.call_args[0][0]
+        self.assertNotIn("ongoing", merged)
+        self.assertNotIn("ongoing_since", merged)
+        self.assertEqual([r["_metric_val"] for r in merged["raw_data"]], [1, 5])
+
+        co.add_traffic_alert(dict(update))
+        co.add_traffic_alert(dict(update, count="7"))
+        co.flush()
+        merged = self.reporters[1].add_traffic_alert.call_args[0][0]
+        self.assertTrue(merged["ongoing"])
+        self.assertEqual(merged["ongoing_since"], "2026-01-01T00:00:00Z")
+
+    def test_flush_on_window_size_and_health(self):
+        co = AlertCoalescer(_cm(window_seconds=600, max_groups=2), reporter_factory=self.factory)
+        co.add_event_alert({"rule": "Tamper", "severity": "error", "source": "h1", "count": 1})
+        self.assertFalse(co.due())
+        co.add_event_alert({"rule": "Tamper", "severity": "error", "source": "h2", "count": 1})
+        self.assertTrue(co.due())  # two distinct groups reach max_groups
+        co.send_alerts()
+        self.assertEqual(co.pending(), 0)
+
+        co.add_health_alert({"time": "t", "status": "503", "details": "down"})
+        self.assertTrue(co.due())
+
+        co = AlertCoalescer(_cm(window_seconds=60), reporter_factory=self.factory)
+        co.add_event_alert({"rule": "Tamper", "count": 1})
+        with patch("src.coalescer.time.monotonic", return_value=co._window_start + 61):
+            self.assertTrue(co.due())
+
+
+if __name__ == '__main__':
+    unittest.main()
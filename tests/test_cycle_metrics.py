@@ -0,0 +1,88 @@
+import os
+import json
+import logging
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from benchmarks.pce_simulator import PceSimulator
+from src import api_client, cycle_metrics
+from src.api_client import ApiClient
+from src.analyzer import Analyzer
+from src.utils import setup_logger, PACKAGE_LOGGER
+
+
+class TestCycleMetrics(unittest.TestCase):
+    def test_cycle_logs_json_line_and_keeps_history(self):
+        with self.assertLogs("src.cycle_metrics", level="INFO") as logs:
+            with cycle_metrics.cycle("test") as m:
+                self.assertIs(cycle_metrics.current(), m)
+                with m.stage("download"):
+                    pass
+                m.count("flows", 3)
+                m.rule({"id": 7, "name": "SSH"})[1] += 2
+        self.assertIsNot(cycle_metrics.current(), m)
+        record = json.loads(logs.output[0].split("cycle_metrics ", 1)[1])
+        self.assertEqual(record["kind"], "test")
+        self.assertEqual(record["counters"], {"flows": 3})
+        self.assertEqual(record["rules"]["7"]["matches"], 2)
+        self.assertIn("download", record["stages"])
+        self.assertEqual(cycle_metrics.history(1)[0]["cycle"], record["cycle"])
+
+    def test_cycle_line_reaches_log_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "monitor.log")
+            loggers = [logging.getLogger(PACKAGE_LOGGER), setup_logger("illumio_monitor_test", path)]
+            try:
+                with cycle_metrics.cycle("test"):
+                    pass
+            finally:
+                for lg in loggers:
+                    for h in list(lg.handlers):
+                        lg.removeHandler(h)
+                        h.close()
+                    lg.setLevel(logging.NOTSET)
+            with open(path, encoding="utf-8") as f:
+                lines = [l for l in f if " - src.cycle_metrics - INFO - cycle_metrics {" in l]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0].split(" - cycle_metrics ", 1)[1])["kind"], "test")
+
+    def test_records_outside_a_cycle_are_not_kept(self):
+        cycle_metrics.current().count("pce_errors")
+        self.assertIsNot(cycle_metrics.current(), cycle_metrics.current())
+        self.assertEqual(cycle_metrics.current().counters, {})
+
+    def test_failed_cycle_is_recorded(self):
+        with self.assertLogs("src.cycle_metrics", level="INFO"), self.assertRaises(RuntimeError):
+            with cycle_metrics.cycle("test"):
+                raise RuntimeError("boom")
+        self.assertEqual(cycle_metrics.history(1)[0]["status"], "error")
+
+    def test_analysis_cycle_against_simulator(self):
+        api_client._metadata_cache.clear()
+        cm = MagicMock()
+        rules = [{"id": 1, "name": "All traffic", "type": "traffic", "pd": 3, "threshold_count": 10 ** 9,
+                  "threshold_window": 10 ** 6},
+                 {"id": 2, "name": "SSH", "type": "traffic", "pd": 3, "port": 22, "threshold_count": 10 ** 9,
+                  "threshold_window": 10 ** 6}]
+        with PceSimulator({"workloads": 20, "flows_per_query": 200, "events_per_minute": 0}) as sim, \
+                tempfile.TemporaryDirectory() as tmp:
+            cm.config = {"api": sim.api_config(), "settings": {"enable_health_check": True},
+                         "rules": rules, "alerts": {}}
+            with patch("src.analyzer.STATE_FILE", os.path.join(tmp, "state.json")), \
+                    patch("src.api_client.time.sleep"), patch("builtins.print"), \
+                    self.assertLogs("src.cycle_metrics", level="INFO"):
+                with cycle_metrics.cycle("monitor"):
+                    Analyzer(cm, ApiClient(cm), MagicMock()).run_analysis()
+
+        record = cycle_metrics.history(1)[0]
+        for stage in ("health_check", "events", "pce_submit", "pce_poll", "download", "decompress",
+                      "parse", "flow_scan", "triggers", "state_save"):
+            self.assertIn(stage, record["stages"])
+        self.assertEqual(record["counters"]["flows"], 200)
+        self.assertGreater(record["counters"]["bytes_downloaded"], 0)
+        self.assertEqual(record["rules"]["1"]["matches"], 200)
+        self.assertLess(record["rules"]["2"]["matches"], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from src.dispatcher import AlertDispatcher, AlertSpool
+from src.reporter import Reporter
+from src.smtp_pool import SmtpPool
+
+
+def _cm(**dispatch):
+    cm = MagicMock()
+    cm.config = {"alerts": {"active": ["mail", "webhook"], "dispatch": dispatch}}
+    return cm
+
+
+class TestAlertDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.spool = AlertSpool(os.path.join(self.tmp, "spool.db"))
+
+    def tearDown(self):
+        self.spool.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _wait(self, predicate, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_reporter_hands_off_without_sending(self):
+        release = threading.Event()
+        sent = []
+
+        def slow_deliver(channel, subject, alerts):
+            release.wait(5)
+            sent.append((channel, alerts["event_alerts"][0]["rule"]))
+            return True
+
+        disp = AlertDispatcher(_cm(), spool=self.spool, deliver_fn=slow_deliver)
+        disp.start()
+        rep = Reporter(disp.cm, dispatcher=disp)
+        rep.add_event_alert({"rule": "Agent Tampering", "count": 1})
+        started = time.monotonic()
+        rep.send_alerts()
+        self.assertLess(time.monotonic() - started, 0.05)
+
+        release.set()
+        self.assertTrue(self._wait(lambda: len(sent) == 2))
+        self.assertEqual(sorted(c for c, _ in sent), ["mail", "webhook"])
+        self.assertTrue(self._wait(lambda: self.spool.counts() == {}))
+        disp.stop()
+
+    def test_failures_back_off_then_dead_letter(self):
+        attempts = []
+
+        def failing(channel, subject, alerts):
+            attempts.append(time.monotonic())
+            return False
+
+        disp = AlertDispatcher(_cm(max_attempts=2, backoff_base=0.05), spool=self.spool, deliver_fn=failing)
+        disp.start()
+        disp.submit("subj", {"health_alerts": []}, ["mail"])
+        self.assertTrue(self._wait(lambda: self.spool.dead_letters()))
+        disp.stop()
+
+        self.assertEqual(len(attempts), 2)
+        dead = self.spool.dead_letters()[0]
+        self.assertEqual((dead["channel"], dead["attempts"]), ("mail", 2))
+        self.assertEqual(self.spool.requeue_dead(), 1)
+        self.assertEqual(self.spool.counts(), {"pending": 1})
+
+    def test_unconfigured_channel_is_dead_lettered_immediately(self):
+        disp = AlertDispatcher(_cm(), spool=self.spool, deliver_fn=lambda c, s, a: None)
+        disp.start()
+        disp.submit("subj", {}, ["line"])
+        self.assertTrue(self._wait(lambda: self.spool.dead_letters()))
+        disp.stop()
+        self.assertEqual(self.spool.dead_letters()[0]["attempts"], 1)
+
+    def test_due_mails_share_one_smtp_session(self):
+        sessions = []
+
+        class Relay:
+            def __init__(self, host, port, timeout=None):
+                self.sent = []
+                sessions.append(self)
+
+            def ehlo(self):
+                pass
+
+            def sendmail(self, sender, recipients, message):
+                if "Subject: third" in message:
+                    raise OSError("552 message too large")
+                self.sent.append(message)
+
+            def quit(self):
+                pass
+
+        cm = _cm(max_attempts=1)
+        cm.config["alerts"]["active"] = ["mail"]
+        cm.config["email"] = {"sender": "monitor@x", "recipients": ["soc@x"]}
+        pool = SmtpPool({"host": "relay"}, smtp_factory=Relay)
+        disp = AlertDispatcher(cm, spool=self.spool)
+        for subject in ("first", "second", "third"):
+            disp.submit(subject, {"event_alerts": [{"time": "t", "rule": subject, "desc": "", "count": 1, "source": "pce"}]}, ["mail"])
+        with patch("src.dispatcher.smtp_pool.get_pool", return_value=pool):
+            disp.start()  # the three queued deliveries go out as one batch
+            self.assertTrue(self._wait(lambda: self.spool.counts() == {"dead": 1}))
+            disp.stop()
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(len(sessions[0].sent), 2)
+        self.assertEqual(self.spool.dead_letters()[0]["subject"], "third")
+        self.assertEqual((disp.stats["sent"], disp.stats["dead"]), (2, 1))
+
+    def test_pending_rows_survive_restart(self):
+        disp = AlertDispatcher(_cm(), spool=self.spool, deliver_fn=lambda c, s, a: True)
+        disp.submit("subj", {"event_alerts": []}, ["webhook"])  # never started: stop() spools the queue
+        disp.stop()
+        self.assertEqual(self.spool.counts(), {"pending": 1})
+
+        delivered = []
+        disp = AlertDispatcher(_cm(), spool=self.spool, deliver_fn=lambda c, s, a: delivered.append(c) or True)
+        disp.start()
+        self.assertTrue(self._wait(lambda: delivered == ["webhook"]))
+        disp.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import unittest
+from datetime import datetime, timezone
+from src.flow_record import FlowRecord, SymbolTable, as_record, label_filter
+
+FLOW = {
+    "src": {"ip": "10.0.0.1", "workload": {"href": "/orgs/1/workloads/a", "name": "web-01", "hostname": "web-01.lab",
+                                           "labels": [{"key": "role", "value": "web"}, {"key": "env", "value": "prod"}],
+                                           "os_type": "linux"}},
+    "dst": {"ip": "203.0.113.9", "ip_lists": [{"name": "Any (0.0.0.0/0 and ::/0)"}]},
+    "service": {"port": 443, "proto": 6, "process_name": "nginx"},
+    "num_connections": 12, "policy_decision": "potentially_blocked", "flow_direction": "outbound",
+    "timestamp_range": {"first_detected": "2026-01-01T10:00:00Z", "last_detected": "2026-01-01T10:05:00.250Z"},
+    "dst_dbo": 1000, "dst_dbi": 500, "ddms": 2000, "state": "snapshot",
+}
+
+
+class TestFlowRecord(unittest.TestCase):
+    def test_decoded_fields(self):
+        f = FlowRecord(FLOW)
+        self.assertEqual(f.src.labels, frozenset({"role=web", "env=prod"}))
+        self.assertEqual((f.pd, f.port_num, f.proto_num, f.connections, f.delta_bytes), (1, 443, 6, 12, 1500.0))
+        self.assertEqual(f.dst.ip_lists, ("Any (0.0.0.0/0 and ::/0)",))
+        self.assertEqual(f.seen, datetime(2026, 1, 1, 10, 5, 0, 250000, tzinfo=timezone.utc))
+        self.assertIs(as_record(f), f)
+        with self.assertRaises(AttributeError):
+            f.unknown = 1
+
+    def test_symbol_table_shares_strings_and_label_sets(self):
+        symbols = SymbolTable()
+        a, b = (FlowRecord(json.loads(json.dumps(FLOW)), symbols) for _ in range(2))
+        self.assertIs(a.src.name, b.src.name)
+        self.assertIs(a.src.label_ids, b.src.label_ids)
+        self.assertIs(a.dst.ip_lists, b.dst.ip_lists)
+        self.assertEqual(sorted(symbols.labels[i] for i in a.src.label_ids), ["env=prod", "role=web"])
+        self.assertEqual(symbols.label_id("env", "prod"), symbols.find_label("env=prod"))
+        self.assertTrue(a.src.has_label("role=web"))
+        self.assertFalse(a.src.has_label("role=db"))
+        self.assertFalse(a.dst.has_label("role=web"))
+        self.assertIsNone(symbols.find_label("role=db"))
+
+    def test_to_dict_round_trip(self):
+        self.assertEqual(FlowRecord(FLOW).to_dict(), FLOW)
+        pce = {
+            "src": {"ip": "10.0.0.2", "workload": {"href": "/orgs/1/workloads/b", "hostname": "db-01", "labels": [
+                {"href": "/orgs/1/labels/9", "key": "role", "value": "db"},
+                {"href": "/orgs/1/labels/3", "key": "env", "value": "prod"},
+                {"href": "/orgs/1/labels/3", "key": "env", "value": "prod"}]}},
+            "dst": {"ip": "10.0.0.3", "workload": {"href": "/orgs/1/workloads/c", "labels": []},
+                    "ip_lists": [{"href": "/orgs/1/sec_policy/active/ip_lists/1", "name": "Any"}]},
+            "service": {"port": 5432, "proto": 6},
+            "policy_decision": "allowed", "state": "closed", "dst_tbo": 10, "dst_tbi": 20,
+        }
+        symbols = SymbolTable()
+        a, b = (FlowRecord(json.loads(json.dumps(pce)), symbols) for _ in range(2))
+        self.assertEqual(a.to_dict(), pce)
+        self.assertEqual(a.connections, 1)
+        self.assertTrue(a.src.has_label(" env = prod "))
+        self.assertIs(a.src.label_list, b.src.label_list)
+        a.to_dict()["src"]["workload"]["labels"][0]["value"] = "changed"  # callers get copies
+        self.assertEqual(b.to_dict(), pce)
+
+    def test_label_filter(self):
+        self.assertEqual(label_filter(" role = web "), "role=web")
+        self.assertIsNone(label_filter("role"))
+        self.assertIsNone(label_filter("a=b=c"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from src import http_transport
+from src.http_transport import HttpTransport, TokenBucket, CircuitBreaker, TargetGuard, CircuitOpenError
+from src.reporter import Reporter, alert_targets, split_text
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []
+    throttle = 0  # number of upcoming /line requests answered with 429
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        _Handler.received.append((self.path, self.client_address[1], body))
+        status = 500 if self.path.startswith("/dead") else 200
+        if self.path.startswith("/line") and _Handler.throttle:
+            _Handler.throttle -= 1
+            status = 429
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Handler.received = []
+        http_transport._guards.clear()
+
+    def test_keep_alive_connection_reused(self):
+        tr = HttpTransport()
+        for _ in range(3):
+            self.assertEqual(tr.request("POST", f"{self.base}/hook", body=b"{}").status, 200)
+        self.assertEqual(len({port for _, port, _ in _Handler.received}), 1)
+        tr.close()
+
+    def test_fan_out_to_targets_isolates_failures(self):
+        cm = MagicMock()
+        cm.config = {"alerts": {"webhook_url": f"{self.base}/legacy", "webhook_targets": [
+            {"name": "soar", "url": f"{self.base}/soar"},
+            {"name": "siem", "url": f"{self.base}/dead", "failure_threshold": 1, "reset_timeout": 60},
+        ]}}
+        self.assertEqual([tg["name"] for tg in alert_targets(cm, "webhook")], ["default", "soar", "siem"])
+
+        rep = Reporter(cm)
+        rep.add_event_alert({"rule": "Tamper", "count": 1})
+        with patch("builtins.print"):
+            self.assertFalse(rep._send_webhook("subj"))
+            self.assertTrue(rep._send_webhook("subj", target="soar"))
+            self.assertFalse(rep._send_webhook("subj", target="siem"))  # circuit now open: not even sent
+        paths = [p for p, _, _ in _Handler.received]
+        self.assertEqual(sorted(paths), ["/dead", "/legacy", "/soar", "/soar"])
+        self.assertEqual(json.loads(_Handler.received[0][2])["event_alerts"][0]["rule"], "Tamper")
+
+    def test_line_split_and_rate_limit_retry(self):
+        cm = MagicMock()
+        cm.config = {"alerts": {"line_channel_access_token": "tok", "line_target_id": "U1"}}
+        _Handler.throttle = 1
+        text = "\n".join(f"line {i} " + "x" * 90 for i in range(300))  # ~30k characters
+        with patch("src.reporter.LINE_PUSH_URL", f"{self.base}/line"), patch("builtins.print"):
+            self.assertTrue(Reporter(cm)._push_line(alert_targets(cm, "line")[0], text))
+        pushes = [json.loads(b) for _, _, b in _Handler.received]
+        self.assertEqual(len(pushes), 3)  # 7 messages: one retried push of 5, then 2
+        self.assertEqual(pushes[0], pushes[1])
+        messages = [m["text"] for p in pushes[1:] for m in p["messages"]]
+        self.assertTrue(all(len(m) <= 5000 for m in messages))
+        self.assertEqual("\n".join(messages), text)
+
+    def test_split_text_hard_splits_long_lines(self):
+        self.assertEqual(split_text("a" * 12, limit=5), ["aaaaa", "aaaaa", "aa"])
+        self.assertEqual(split_text("ab\ncd\nef", limit=6), ["ab\ncd", "ef"])
+
+
+class TestLimits(unittest.TestCase):
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate_per_minute=60, burst=2)
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire())
+        with patch("src.http_transport.time.monotonic", return_value=bucket.updated + 1.0):
+            self.assertTrue(bucket.acquire())
+
+    def test_circuit_breaker_opens_and_probes(self):
+        guard = TargetGuard("t", rate_per_minute=6000, burst=10, failure_threshold=2, reset_timeout=30)
+        self.assertFalse(guard.call(lambda: False))
+        self.assertFalse(guard.call(lambda: False))
+        self.assertEqual(guard.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            guard.call(lambda: True)
+        with patch("src.http_transport.time.monotonic", return_value=guard.breaker.opened_at + 31):
+            self.assertTrue(guard.call(lambda: True))
+        self.assertEqual(guard.breaker.state, CircuitBreaker.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+from src import cycle_metrics
+from src.analyzer import Analyzer
+from src.memory_budget import MemoryBudget, budget_from_config, approx_size
+
+
+def make_flows(n):
+    return [{"src": {"ip": f"10.0.0.{i % 250}", "workload": {"name": f"wl-{i}", "labels": [{"key": "env", "value": "prod"}]}},
+             "dst": {"ip": "10.1.0.1"}, "service": {"port": 443, "proto": 6}, "policy_decision": "allowed",
+             "num_connections": i % 37 + 1, "timestamp_range": {"last_detected": "2099-01-01T00:00:00Z"}}
+            for i in range(n)]
+
+
+class _Api:
+    def __init__(self, flows):
+        self.flows = flows
+        self.budgets = []
+
+    def execute_traffic_query_stream(self, start, end, pds, budget=None):
+        self.budgets.append(budget)
+        return iter(self.flows)
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_reserve_release_and_high_water(self):
+        budget = MemoryBudget(100)
+        self.assertTrue(budget.reserve(60))
+        with self.assertLogs("src.memory_budget", level="WARNING"):
+            self.assertFalse(budget.reserve(60))
+        budget.release(100)
+        self.assertEqual((budget.held, budget.high_water, budget.over), (20, 120, False))
+        self.assertGreater(approx_size(make_flows(1)[0]), 500)
+
+    def test_spool_spills_beyond_budget(self):
+        data = b"x" * (3 * 1024 * 1024)
+        budget = MemoryBudget(2 * 1024 * 1024)
+        spool = budget.spool(io.BytesIO(data))
+        self.assertEqual(spool.read(), data)
+        self.assertEqual((budget.spilled, budget.held), (len(data), 0))
+        budget.release_spool(spool)
+
+        budget = MemoryBudget(8 * 1024 * 1024)
+        spool = budget.spool(io.BytesIO(data))
+        self.assertEqual((budget.spilled, budget.held), (0, len(data)))
+        budget.release_spool(spool)
+        self.assertEqual((budget.held, budget.high_water), (0, len(data)))
+
+    def test_budget_setting(self):
+        cm = MagicMock()
+        cm.config = {"settings": {"memory_budget_mb": 64}}
+        self.assertEqual(budget_from_config(cm).limit, 64 * 1024 * 1024)
+        cm.config = {"settings": {"memory_budget_mb": "lots"}}
+        self.assertEqual(budget_from_config(cm).limit, 256 * 1024 * 1024)
+
+
+class TestAnalyzerBudget(unittest.TestCase):
+    def _analyzer(self, flows, budget_mb=256):
+        cm = MagicMock()
+        cm.config = {"settings": {"memory_budget_mb": budget_mb}, "alerts": {},
+                     "rules": [{"id": 1, "name": "All", "type": "traffic", "pd": 3, "threshold_count": 1},
+                               {"id": 2, "name": "BW", "type": "bandwidth", "pd": 3, "threshold_count": 0}]}
+        with patch.object(Analyzer, "load_state"):
+            return Analyzer(cm, _Api(flows), MagicMock())
+
+    def test_query_flows_keeps_top_results_in_order(self):
+        flows = make_flows(800)
+        results = self._analyzer(flows).query_flows({"sort_by": "connections"})
+        self.assertEqual(len(results), 500)
+        expected = sorted(range(800), key=lambda i: i % 37 + 1, reverse=True)[:500]
+        self.assertEqual([r["source"]["name"] for r in results], [f"wl-{i}" for i in expected])
+
+    def test_query_flows_backpressure_drops_lowest_ranked(self):
+        flows = make_flows(800)
+        ana = self._analyzer(flows, budget_mb=0.05)
+        with self.assertLogs("src.analyzer", level="WARNING"), self.assertLogs("src.memory_budget", level="WARNING"):
+            results = ana.query_flows({"sort_by": "connections"})
+        self.assertTrue(0 < len(results) < 500)
+        self.assertEqual(results[0]["total_connections"], 37)
+        values = [r["total_connections"] for r in results]
+        self.assertEqual(values, sorted(values, reverse=True))
+
+    def test_debug_mode_runs_over_a_single_pass_stream(self):
+        ana = self._analyzer(make_flows(300))
+        with patch("builtins.print") as out, self.assertLogs("src.cycle_metrics", level="INFO"):
+            with cycle_metrics.cycle("test"):
+                ana.run_debug_mode(mins=10, pd_sel=3)
+        printed = "\n".join(str(c.args[0]) for c in out.call_args_list if c.args)
+        self.assertIn("Raw: 300 -> Window(10m): 300 left", printed)
+        self.assertIn(f"Total Count (Sum): {sum(i % 37 + 1 for i in range(300))}", printed)
+        self.assertEqual(printed.count("     ["), 20)  # 10 samples per rule
+        self.assertIsNotNone(ana.api.budgets[0])
+        self.assertGreater(cycle_metrics.history(1)[0]["counters"]["memory_high_water_bytes"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import urllib.request
+from src import metrics
+from src.api_client import endpoint_label
+from src.cache import TTLCache
+
+
+class TestMetrics(unittest.TestCase):
+    def test_render_counters_and_histograms(self):
+        metrics.ALERTS.clear()
+        metrics.PCE_REQUEST_SECONDS.clear()
+        metrics.ALERTS.inc(channel="mail", outcome="sent")
+        metrics.ALERTS.inc(2, channel="mail", outcome="sent")
+        metrics.PCE_REQUEST_SECONDS.observe(0.02, endpoint="health", method="GET", status=200)
+        metrics.PCE_REQUEST_SECONDS.observe(100, endpoint="health", method="GET", status=200)
+
+        text = metrics.render()
+        self.assertIn("# TYPE illumio_monitor_alerts_total counter", text)
+        self.assertIn('illumio_monitor_alerts_total{channel="mail",outcome="sent"} 3', text)
+        labels = 'endpoint="health",method="GET",status="200"'
+        self.assertIn(f'illumio_monitor_pce_request_duration_seconds_bucket{{{labels},le="0.025"}} 1', text)
+        self.assertIn(f'illumio_monitor_pce_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'illumio_monitor_pce_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn("process_resident_memory_bytes ", text)
+
+    def test_cache_collector(self):
+        cache = TTLCache()
+        metrics.register_cache("test", cache)
+        cache.set("k", 1)
+        cache.get("k")
+        cache.get("missing")
+        text = metrics.render()
+        self.assertIn('illumio_monitor_cache_hits_total{cache="test"} 1', text)
+        self.assertIn('illumio_monitor_cache_hit_ratio{cache="test"} 0.5', text)
+
+    def test_endpoint_label(self):
+        base = "https://pce:8443/api/v2"
+        self.assertEqual(endpoint_label(f"{base}/health"), "health")
+        self.assertEqual(endpoint_label(f"{base}/orgs/1/workloads?name=x"), "workloads")
+        self.assertEqual(endpoint_label(f"{base}/orgs/1/workloads/4f2c-9a"), "workloads/:id")
+        self.assertEqual(endpoint_label(f"{base}/orgs/1/traffic_flows/async_queries/77/download"),
+                         "traffic_flows/async_queries/:id/download")
+
+    def test_http_server(self):
+        server = metrics.start_http_server(0, "127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                self.assertEqual(resp.headers["Content-Type"], metrics.CONTENT_TYPE)
+                self.assertIn(b"process_resident_memory_bytes", resp.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
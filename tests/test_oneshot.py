@@ -0,0 +1,81 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from benchmarks.pce_simulator import PceSimulator
+from src import api_client, oneshot
+
+
+class TestOneShot(unittest.TestCase):
+    def setUp(self):
+        api_client._metadata_cache.clear()
+        self.sim = PceSimulator({"workloads": 20, "flows_per_query": 200, "events_per_minute": 0}).__enter__()
+        self.addCleanup(self.sim.__exit__, None, None, None)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for p in (patch("src.analyzer.STATE_FILE", os.path.join(tmp.name, "state.json")),
+                  patch("src.api_client.time.sleep")):
+            p.start()
+            self.addCleanup(p.stop)
+        self.cm = MagicMock()
+        self.cm.config = {"api": self.sim.api_config(), "settings": {"enable_health_check": True},
+                          "rules": [], "alerts": {"active": []}}
+
+    def _rule(self, threshold):
+        return {"id": 1, "name": "All traffic", "type": "traffic", "pd": 3, "threshold_count": threshold,
+                "threshold_window": 10 ** 6, "cooldown_minutes": 0}
+
+    def test_run_once_exit_code_reflects_alerts(self):
+        self.cm.config["rules"] = [self._rule(10 ** 9)]
+        out = io.StringIO()
+        self.assertEqual(oneshot.run_once(fmt="json", cm=self.cm, out=out), oneshot.EXIT_OK)
+        doc = json.loads(out.getvalue())
+        self.assertEqual((doc["status"], doc["alerts"], doc["records"]), ("ok", 0, []))
+        self.assertEqual(doc["cycle"]["counters"]["flows"], 200)
+
+        self.cm.config["rules"] = [self._rule(1)]
+        out = io.StringIO()
+        self.assertEqual(oneshot.run_once(send=False, fmt="ndjson", cm=self.cm, out=out), oneshot.EXIT_ALERTS)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(r["type"], r["kind"], r["rule"]) for r in lines[:-1]], [("alert", "traffic", "All traffic")])
+        self.assertEqual((lines[-1]["type"], lines[-1]["alerts"], lines[-1]["sent"]), ("summary", 1, False))
+
+    def test_run_once_error_exit_code(self):
+        out = io.StringIO()
+        with patch("src.analyzer.Analyzer.run_analysis", side_effect=RuntimeError("boom")), \
+                self.assertLogs("src.oneshot", level="ERROR"):
+            self.assertEqual(oneshot.run_once(cm=self.cm, out=out), oneshot.EXIT_ERROR)
+        self.assertEqual(json.loads(out.getvalue())["error"], "boom")
+
+    def test_unreachable_pce_exit_code(self):
+        self.cm.config["api"] = dict(self.sim.api_config(), url="http://127.0.0.1:1")
+        self.cm.config["rules"] = [self._rule(1)]
+        out = io.StringIO()
+        with self.assertLogs("src.api_client", level="ERROR"):
+            self.assertEqual(oneshot.run_once(send=False, cm=self.cm, out=out), oneshot.EXIT_ERROR)
+        doc = json.loads(out.getvalue())
+        self.assertEqual(doc["status"], "pce_error")
+        self.assertGreater(doc["pce_errors"], 0)
+
+        out = io.StringIO()
+        with self.assertLogs("src.api_client", level="ERROR"):
+            self.assertEqual(oneshot.run_query(oneshot.query_params(60), cm=self.cm, out=out), oneshot.EXIT_ERROR)
+        self.assertEqual(json.loads(out.getvalue())["status"], "pce_error")
+
+    def test_query_ndjson_and_stdout_kept_clean(self):
+        out = io.StringIO()
+        params = oneshot.query_params(10 ** 6, sort_by="connections", search=None)
+        self.assertNotIn("search", params)
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.assertEqual(oneshot.run_query(params, fmt="ndjson", limit=5, cm=self.cm, out=out), oneshot.EXIT_OK)
+        self.assertEqual(stdout.getvalue(), "")  # progress output went to stderr
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(all(r["type"] == "flow" for r in lines[:-1]))
+        self.assertEqual((lines[-1]["matched"], lines[-1]["returned"]), (200, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from benchmarks.pce_simulator import PceSimulator
+from src import api_client
+from src.api_client import ApiClient
+
+
+class TestPceSimulator(unittest.TestCase):
+    def setUp(self):
+        api_client._metadata_cache.clear()
+        self.sim = PceSimulator({"workloads": 50, "flows_per_query": 300, "events_per_minute": 60}).start()
+        self.cm = MagicMock()
+        self.cm.config = {"api": self.sim.api_config()}
+        self.api = ApiClient(self.cm)
+
+    def tearDown(self):
+        self.sim.stop()
+
+    def test_traffic_query_and_events(self):
+        self.assertEqual(self.api.check_health()[0], 200)
+        with patch("src.api_client.time.sleep"), patch("builtins.print"):
+            flows = list(self.api.execute_traffic_query_stream(
+                "2024-01-01T00:00:00Z", "2024-01-01T00:10:00Z", ["blocked", "potentially_blocked", "allowed"]))
+            events = self.api.fetch_events("2024-01-01T00:00:00Z", max_results=25)
+        self.assertEqual(len(flows), 300)
+        self.assertTrue(all(f.last_detected and f.has_service and f.svc_port for f in flows))
+        self.assertIn("timestamp_range", flows[0].to_dict())
+        self.assertEqual(len(events), 25)
+
+    def test_workloads_labels_and_injected_errors(self):
+        wl = self.api.search_workloads({"name": "wl-0001", "max_results": 5})[0]
+        label = self.api.get_labels("env")[0]
+        self.assertTrue(self.api.update_workload_labels(wl["href"], [{"href": label["href"]}]))
+        self.assertEqual(self.api.get_workload(wl["href"], revalidate=True)["labels"][0]["value"], label["value"])
+        with patch("src.api_client.time.sleep"):
+            self.assertEqual(len(self.api.fetch_collection_async("workloads")), 50)
+
+        self.sim.settings["error_503"] = 1.0
+        with patch("src.api_client.time.sleep"):
+            self.assertEqual(self.api.check_health()[0], 503)
+        self.assertEqual(self.sim.stats["injected_503"], api_client.MAX_RETRIES)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from src.profiling import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiler = Profiler(self.tmp.name, keep=2, top_allocations=5)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_not_profiled_unless_armed(self):
+        with self.profiler.capture("cycle", "monitor-1") as cap:
+            self.assertIsNone(cap)
+        self.assertEqual(self.profiler.list_profiles(), [])
+
+    def test_armed_capture_writes_prof_and_report(self):
+        self.profiler.arm(1)
+        with self.profiler.capture("cycle", "monitor-1") as cap:
+            self.assertIsNotNone(cap)
+            self.assertIsNone(self.profiler.start("gui", "GET /"))  # one capture at a time
+            sorted(str(i) for i in range(10000))
+        self.assertEqual(self.profiler.armed, 0)
+        names = [p["name"] for p in self.profiler.list_profiles()]
+        self.assertEqual(len(names), 2)
+        report = next(n for n in names if n.endswith(".txt"))
+        with open(self.profiler.profile_path(report), encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn("cumulative", text)
+        self.assertIn("allocation sites", text)
+
+    def test_rotation_and_safe_names(self):
+        for i in range(4):
+            self.profiler.start("gui", f"GET /api/x{i}", force=True).stop()
+        self.assertEqual(len([n for n in os.listdir(self.tmp.name) if n.endswith(".prof")]), 2)
+        self.assertIsNone(self.profiler.profile_path("../config.json"))
+        self.assertIsNone(self.profiler.profile_path("missing.prof"))
+
+
+if __name__ == '__main__':
+    unittest.main()
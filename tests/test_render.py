@@ -0,0 +1,32 @@
+import unittest
+from src import render
+
+
+class TestRender(unittest.TestCase):
+    def test_snapshot_row(self):
+        flow = {
+            "_metric_fmt": "\x1b[92m5.00 Mbps\x1b[0m", "flow_direction": "inbound",
+            "timestamp_range": {"first_detected": "2024-01-01T10:00:00.123Z", "last_detected": "2024-01-01T10:05:00Z"},
+            "src": {"ip": "10.0.0.1", "workload": {"name": "web-01", "labels": [{"key": "app", "value": "shop"}]}},
+            "dst": {"ip": "10.0.0.2"}, "service": {"port": 443, "proto": 6},
+            "num_connections": 7, "policy_decision": "blocked",
+        }
+        html = render.snapshot_html([flow, flow])
+        self.assertNotIn("\x1b", html)
+        self.assertIn("5.00 Mbps", html)
+        self.assertIn("2024-01-01 10:00:00<br>2024-01-01 10:05:00", html)
+        self.assertIn("443 / TCP", html)
+        self.assertIn(">app:shop</span>", html)
+        self.assertIn("background:#dc3545", html)
+        self.assertEqual(html.count("<tr>"), 2)
+        self.assertEqual(render.snapshot_html([]), "No Data")
+
+    def test_badges_memoized(self):
+        render.label_badge.cache_clear()
+        render.snapshot_html([{"src": {"workload": {"labels": [{"key": "env", "value": "prod"}]}}}] * 50)
+        info = render.label_badge.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 49))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import smtplib
+import unittest
+from unittest.mock import patch
+from src import metrics
+from src.smtp_pool import SmtpPool, SmtpBatchError
+
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.calls = []
+        self.alive = True
+        FakeSMTP.instances.append(self)
+
+    def ehlo(self):
+        self.calls.append("ehlo")
+
+    def starttls(self):
+        self.calls.append("starttls")
+
+    def login(self, user, password):
+        self.calls.append("login")
+
+    def noop(self):
+        self.calls.append("noop")
+        return (250, b"OK") if self.alive else (421, b"closing")
+
+    def sendmail(self, sender, recipients, message):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.calls.append(("sendmail", tuple(recipients)))
+
+    def quit(self):
+        self.calls.append("quit")
+
+    def close(self):
+        pass
+
+
+class TestSmtpPool(unittest.TestCase):
+    def setUp(self):
+        FakeSMTP.instances = []
+        self.conf = {"host": "relay", "port": 587, "enable_tls": True, "enable_auth": True,
+                     "user": "u", "password": "p", "pool": {"probe_after": 30, "idle_timeout": 300}}
+
+    def test_session_reused_across_sends(self):
+        pool = SmtpPool(self.conf, smtp_factory=FakeSMTP)
+        pool.send("a@x", ["b@x", "c@x"], "m1")
+        pool.send_many([("a@x", ["b@x"], "m2"), ("a@x", ["c@x"], "m3")])
+
+        self.assertEqual(len(FakeSMTP.instances), 1)
+        calls = FakeSMTP.instances[0].calls
+        self.assertEqual(calls.count("login"), 1)
+        self.assertEqual(calls.count("starttls"), 1)
+        self.assertEqual(len([c for c in calls if c[0] == "sendmail"]), 3)
+        m = pool.metrics()
+        self.assertEqual((m["sessions_opened"], m["sessions_reused"]), (1, 1))
+        self.assertEqual(m["phases"]["send"]["count"], 3)
+        self.assertEqual(m["phases"]["auth"]["count"], 1)
+
+    def test_idle_session_probed_and_replaced(self):
+        pool = SmtpPool(self.conf, smtp_factory=FakeSMTP)
+        pool.send("a@x", ["b@x"], "m1")
+        first = FakeSMTP.instances[0]
+        first.alive = False
+        with patch("src.smtp_pool.time.monotonic", return_value=pool._idle[0].last_used + 60):
+            pool.send("a@x", ["b@x"], "m2")
+        self.assertIn("noop", first.calls)
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertIn(("sendmail", ("b@x",)), FakeSMTP.instances[1].calls)
+
+    def test_partial_batch_failure_and_phase_histogram(self):
+        class Refusing(FakeSMTP):
+            def sendmail(self, sender, recipients, message):
+                if message == "bad":
+                    raise smtplib.SMTPDataError(552, b"too large")
+                super().sendmail(sender, recipients, message)
+
+        pool = SmtpPool(self.conf, smtp_factory=Refusing)
+        with self.assertRaises(SmtpBatchError) as ctx:
+            pool.send_many([("a@x", ["b@x"], "m1"), ("a@x", ["b@x"], "bad"), ("a@x", ["b@x"], "m3")])
+        self.assertEqual(ctx.exception.sent, 1)
+        self.assertIsInstance(ctx.exception.error, smtplib.SMTPDataError)
+        with self.assertRaises(smtplib.SMTPDataError):
+            pool.send("a@x", ["b@x"], "bad")
+        self.assertIn('illumio_monitor_smtp_phase_duration_seconds_count{phase="auth"}', metrics.render())
+
+    def test_expired_session_closed_without_probe(self):
+        pool = SmtpPool(self.conf, smtp_factory=FakeSMTP)
+        pool.send("a@x", ["b@x"], "m1")
+        with patch("src.smtp_pool.time.monotonic", return_value=pool._idle[0].last_used + 301):
+            pool.close_idle()
+        self.assertNotIn("noop", FakeSMTP.instances[0].calls)
+        self.assertEqual(FakeSMTP.instances[0].calls[-1], "quit")
+        self.assertEqual(pool.metrics()["idle_sessions"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
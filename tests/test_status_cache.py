@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from src.config import ConfigManager
+from src.status_cache import StatusCache, publish_state
+
+
+class TestStatusCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.tmp.name, "config.json")
+        self.state_file = os.path.join(self.tmp.name, "state.json")
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            json.dump({"rules": [{"id": 1, "name": "Rule 1", "cooldown_minutes": 10},
+                                 {"id": 2, "name": "Rule 2", "cooldown_minutes": 0}]}, f)
+        self.cm = ConfigManager(self.config_file)
+        self.cache = StatusCache(self.cm, state_file=self.state_file)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_state(self, alert_history):
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump({"alert_history": alert_history}, f)
+
+    def test_no_state_file(self):
+        cds = self.cache.cooldowns()
+        self.assertEqual([c["remaining_mins"] for c in cds], [0, 0])
+
+    def test_remaining_from_state_file(self):
+        last = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        self._write_state({"1": last.strftime('%Y-%m-%dT%H:%M:%SZ'), "2": last.strftime('%Y-%m-%dT%H:%M:%SZ')})
+        now = last.timestamp() + 150  # 7.5 minutes left
+        self.assertEqual(self.cache.remaining_by_rule(now), {"1": 8, "2": 0})
+        self.assertEqual(self.cache.remaining_by_rule(now + 31), {"1": 7, "2": 0})
+        self.assertEqual(self.cache.remaining_by_rule(last.timestamp() + 601), {"1": 0, "2": 0})
+
+    def test_published_state_is_used_without_reading_file(self):
+        last = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        self._write_state({})
+        self.cache.cooldowns()
+        state = {"alert_history": {"1": last.strftime('%Y-%m-%dT%H:%M:%SZ')}}
+        publish_state(self.state_file, state)
+        self.assertEqual(self.cache.remaining_by_rule(last.timestamp() + 90)["1"], 9)
+
+    def test_config_change_invalidates(self):
+        self.assertEqual(len(self.cache.cooldowns()), 2)
+        self.cm.config["rules"].append({"id": 3, "name": "Rule 3", "cooldown_minutes": 5})
+        self.cm.save()
+        self.assertEqual([c["id"] for c in self.cache.cooldowns()], [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
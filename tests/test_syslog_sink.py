@@ -0,0 +1,101 @@
+import socket
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src import syslog_sink
+from src.syslog_sink import SyslogFormatter, SyslogSender, alert_fields, flow_fields
+
+
+def _flow(decision="blocked"):
+    return {"src": {"ip": "10.0.0.1", "workload": {"hostname": "web01"}},
+            "dst": {"ip": "10.0.0.2"}, "service": {"port": 445, "proto": 6},
+            "policy_decision": decision, "num_connections": 3}
+
+
+class TestSyslogFormatter(unittest.TestCase):
+    def test_cef_escaping_and_priority(self):
+        fmt = SyslogFormatter("cef", facility=16, app_name="app", hostname="host")
+        msg = fmt.message(*alert_fields("event", {"rule": "a|b", "severity": "error", "count": 2,
+                                                  "desc": "x=y\nz", "source": "pce"}))
+        self.assertTrue(msg.startswith("<131>1 "))  # local0 (16) * 8 + err (3)
+        self.assertIn(" host app - event_rule - CEF:0|Illumio|PCE Monitor|", msg)
+        self.assertIn("|a\\|b|8|", msg)
+        self.assertIn("msg=x\\=y\\nz", msg)
+
+    def test_leef_flow(self):
+        fmt = SyslogFormatter("leef", hostname="host")
+        msg = fmt.message(*flow_fields("SMB", _flow()))
+        self.assertIn("LEEF:1.0|Illumio|PCE Monitor|", msg)
+        self.assertIn("\taction=blocked\t", msg)
+        self.assertIn("\tdstPort=445\t", msg)
+        self.assertIn("\tsrcHostName=web01\t", msg)
+        self.assertNotIn("cs1Label", msg)
+
+
+class TestSyslogSender(unittest.TestCase):
+    def test_tcp_octet_counted_batch(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        received = []
+
+        def accept():
+            conn, _ = server.accept()
+            with conn:
+                while True:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    received.append(chunk)
+
+        t = threading.Thread(target=accept, daemon=True)
+        t.start()
+        sender = SyslogSender({"host": "127.0.0.1", "port": server.getsockname()[1], "protocol": "tcp"})
+        for _ in range(3):
+            sender.emit_flow("SMB", _flow())
+        sender.emit_alert("health", {"status": "503", "details": "down"})
+        self.assertTrue(sender.flush())
+        sender.close()
+        t.join(2)
+        server.close()
+
+        data = b"".join(received)
+        frames = []
+        while data:
+            length, _, rest = data.partition(b" ")
+            frames.append(rest[:int(length)])
+            data = rest[int(length):]
+        self.assertEqual(len(frames), 4)
+        self.assertIn(b"pce_health", frames[-1])
+        self.assertEqual(sender.stats["sent"], 4)
+
+    def test_bad_item_skipped_and_close_all_delivers_queue(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(2)
+        cm = MagicMock()
+        cm.config = {"alerts": {"syslog": {"host": "127.0.0.1", "port": server.getsockname()[1], "protocol": "udp"}}}
+        sender = syslog_sink.get_sender(cm)
+        sender.emit_flow("SMB", _flow())
+        sender.emit_flow("SMB", None)  # cannot be formatted
+        sender.emit_alert("health", {"status": "503", "details": "down"})
+        syslog_sink.close_all()
+        messages = [server.recv(65536), server.recv(65536)]
+        server.close()
+        self.assertIn(b"pce_health", messages[-1])
+        self.assertEqual((sender.stats["sent"], sender.stats["errors"], sender.pending()), (2, 1, 0))
+        self.assertIsNot(syslog_sink.get_sender(cm), sender)
+        syslog_sink.close_all()
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        sender = SyslogSender({"host": "127.0.0.1", "port": 9, "protocol": "tcp", "queue_size": 2, "batch_size": 10})
+        sender._stop.set()  # keep the sender thread from draining
+        sender._wake.set()
+        sender._thread.join(2)
+        results = [sender.emit_flow("r", _flow()) for _ in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertEqual(sender.stats["dropped"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
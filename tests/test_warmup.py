@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import MagicMock
+from src.warmup import WarmupScheduler, dashboard_cache, dashboard_cache_key
+
+
+def _cm(queries, **warmup_settings):
+    cm = MagicMock()
+    cm.config = {
+        "api": {"url": "https://pce.test:8443"},
+        "settings": {"dashboard_queries": queries, "warmup": dict(dashboard_stagger=0, **warmup_settings)},
+    }
+    return cm
+
+
+class TestWarmupScheduler(unittest.TestCase):
+    def setUp(self):
+        dashboard_cache.clear()
+
+    def test_dashboard_queries_prerun_into_cache(self):
+        queries = [{"name": "Blocked", "pd": 2, "rank_by": "count"}, {"name": "Volume", "pd": 3, "rank_by": "volume"}]
+        cm = _cm(queries, dashboard_windows=[30, 60])
+        calls = []
+
+        def top10(query, mins):
+            calls.append((query["name"], mins))
+            return {"ok": True, "data": [], "total": 0}
+
+        self.assertTrue(WarmupScheduler(cm, top10, api_factory=MagicMock()).run_task("dashboard"))
+        self.assertEqual(len(calls), 4)
+        # The route builds its key from the browser payload, which carries the display name and window
+        payload = dict(queries[0], mins=60)
+        self.assertIsNotNone(dashboard_cache.get(dashboard_cache_key(cm, payload, 60)))
+        self.assertIsNone(dashboard_cache.get(dashboard_cache_key(cm, payload, 15)))
+
+    def test_prefetch_tasks_use_api(self):
+        api = MagicMock()
+        api.base_url = "https://pce.test:8443/api/v2"
+        api.find_quarantine_labels.return_value = {"Mild": "/orgs/1/labels/1"}
+        sched = WarmupScheduler(_cm([]), MagicMock(), api_factory=lambda: api)
+        self.assertTrue(sched.run_task("quarantine_labels"))
+        api.find_quarantine_labels.assert_called_once_with(refresh=True)
+        api.check_and_create_quarantine_labels.assert_not_called()
+        self.assertTrue(sched.last_run["quarantine_labels"]["ok"])
+
+    def test_jittered_intervals_and_disabled_tasks(self):
+        sched = WarmupScheduler(_cm([], dashboard_interval=100, jitter=0.25, workload_index_interval=0), MagicMock())
+        delays = [sched.next_delay("dashboard") for _ in range(50)]
+        self.assertTrue(all(75 <= d <= 125 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertIsNone(sched.next_delay("workload_index"))
+        self.assertFalse(sched.run_task("workload_index"))
+
+
+if __name__ == '__main__':
+    unittest.main()
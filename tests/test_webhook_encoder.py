@@ -0,0 +1,63 @@
+import gzip
+import json
+import unittest
+from src.webhook_encoder import WebhookEncoder
+
+
+def _traffic(i, flows=5, pad=100):
+    return {"rule": f"Rule {i}", "count": "10", "details": "a -> b [22]: 3",
+            "raw_data": [{"src": {"ip": f"10.0.0.{n}"}, "pad": "x" * pad} for n in range(flows)]}
+
+
+class TestWebhookEncoder(unittest.TestCase):
+    def test_single_body_keeps_shape(self):
+        enc = WebhookEncoder()
+        bodies = enc.encode("subj", {"event_alerts": [{"rule": "Tamper", "count": 1}]}, "2024-01-01T00:00:00Z")
+        self.assertEqual(len(bodies), 1)
+        doc = json.loads(bodies[0])
+        self.assertEqual(doc["subject"], "subj")
+        self.assertEqual(doc["event_alerts"], [{"rule": "Tamper", "count": 1}])
+        self.assertEqual(doc["health_alerts"], [])
+        self.assertEqual((doc["sequence"], doc["sequence_total"]), (1, 1))
+
+    def test_oversized_alert_truncated_with_marker(self):
+        enc = WebhookEncoder(max_alert_bytes=2000)
+        alert = _traffic(1, flows=100)
+        data = enc.encode_alert(alert)
+        self.assertLessEqual(len(data), 2000)
+        doc = json.loads(data)
+        self.assertEqual(doc["_truncated"]["raw_data_total"], 100)
+        self.assertEqual(doc["_truncated"]["raw_data_kept"], len(doc["raw_data"]))
+        self.assertGreater(len(doc["raw_data"]), 0)
+        self.assertEqual(len(alert["raw_data"]), 100)  # caller's alert is untouched
+
+    def test_split_into_sequenced_gzip_bodies(self):
+        enc = WebhookEncoder(gzip=True, max_alert_bytes=1500, max_body_bytes=4000, max_requests=3)
+        alerts = {"traffic_alerts": [_traffic(i, flows=8) for i in range(20)]}
+        bodies = enc.encode("subj", alerts, "ts")
+        self.assertEqual(enc.headers["Content-Encoding"], "gzip")
+        docs = [json.loads(gzip.decompress(b)) for b in bodies]
+        self.assertEqual(len(docs), 3)
+        self.assertEqual([d["sequence"] for d in docs], [1, 2, 3])
+        self.assertEqual(len({d["batch_id"] for d in docs}), 1)
+        self.assertTrue(all(len(gzip.decompress(b)) <= 4000 for b in bodies))
+        sent = sum(len(d["traffic_alerts"]) for d in docs)
+        self.assertEqual(sent + docs[-1]["dropped_alerts"], 20)
+        self.assertNotIn("dropped_alerts", docs[0])
+
+    def test_compact_flow_samples(self):
+        enc = WebhookEncoder(raw_data="compact")
+        flow = {"src": {"ip": "10.0.0.1", "workload": {"name": "web", "labels": [{"key": "app", "value": "x"}]}},
+                "dst": {"ip": "10.0.0.2"}, "service": {"port": 22, "proto": 6}, "policy_decision": "blocked",
+                "num_connections": 4, "_metric_val": 4, "_metric_fmt": "4"}
+        doc = json.loads(enc.encode("s", {"traffic_alerts": [{"rule": "SSH", "raw_data": [flow]}],
+                                          "event_alerts": [{"rule": "Tamper", "raw_data": [{"event_type": "x"}]}]},
+                                    "ts")[0])
+        self.assertEqual(doc["traffic_alerts"][0]["raw_data"], [{
+            "src": "web", "src_ip": "10.0.0.1", "dst": "10.0.0.2", "dst_ip": "10.0.0.2", "port": 22,
+            "proto": "TCP", "decision": "blocked", "connections": 4, "value": "4"}])
+        self.assertEqual(doc["event_alerts"][0]["raw_data"], [{"event_type": "x"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
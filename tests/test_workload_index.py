@@ -0,0 +1,113 @@
+import time
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src.workload_index import WorkloadIndex
+
+
+def _wl(n, name, ip, labels=()):
+    return {
+        "href": f"/orgs/1/workloads/{n}", "name": name, "hostname": f"{name}.corp.local",
+        "interfaces": [{"name": "eth0", "address": ip}],
+        "labels": [{"href": f"/orgs/1/labels/{k}-{v}", "key": k, "value": v} for k, v in labels],
+        "online": True, "managed": True, "os_detail": "dropped by the index",
+    }
+
+
+class TestWorkloadIndex(unittest.TestCase):
+    def setUp(self):
+        self.idx = WorkloadIndex()
+        self.idx.load([
+            _wl(1, "web-01", "10.1.1.10", [("app", "shop"), ("env", "prod")]),
+            _wl(2, "web-02", "10.1.1.11", [("app", "shop"), ("env", "dev")]),
+            _wl(3, "db-01", "10.2.0.5", [("app", "erp")]),
+        ])
+
+    def _names(self, results):
+        return [w["name"] for w in results]
+
+    def test_substring_and_prefix(self):
+        self.assertEqual(self._names(self.idx.search(name="eb-0")), ["web-01", "web-02"])
+        self.assertEqual(self._names(self.idx.search(name="DB")), ["db-01"])
+        self.assertEqual(self._names(self.idx.search(hostname="corp")), ["db-01", "web-01", "web-02"])
+        self.assertEqual(self._names(self.idx.search(name="b")), [])  # short queries are prefix-only
+
+    def test_ip_and_label_search(self):
+        self.assertEqual(self._names(self.idx.search(ip="10.1.")), ["web-01", "web-02"])
+        self.assertEqual(self._names(self.idx.search(ip="1.1.11")), ["web-02"])
+        self.assertEqual(self._names(self.idx.search(label="env=prod")), ["web-01"])
+        self.assertEqual(self._names(self.idx.search(name="web", label="dev")), ["web-02"])
+
+    def test_slim_documents(self):
+        doc = self.idx.search(name="db-01")[0]
+        self.assertNotIn("os_detail", doc)
+        self.assertEqual(doc["interfaces"], [{"name": "eth0", "address": "10.2.0.5"}])
+
+    def test_events_update_index(self):
+        api = MagicMock()
+        api.get_workload.return_value = _wl(4, "app-07", "10.3.0.7")
+        self.idx.apply_events(api, [
+            {"event_type": "workload.create", "resource_changes": [{"resource": {"workload": {"href": "/orgs/1/workloads/4"}}}]},
+            {"event_type": "workload.delete", "resource_changes": [{"resource": {"workload": {"href": "/orgs/1/workloads/3"}}}]},
+        ])
+        self.assertEqual(self._names(self.idx.search(ip="10.")), ["app-07", "web-01", "web-02"])
+        self.assertEqual(self.idx.search(name="db-01"), [])
+
+    def test_queued_events_apply_off_the_caller_thread(self):
+        release = threading.Event()
+        callers = []
+
+        def get_workload(href, revalidate=False):
+            callers.append(threading.current_thread())
+            release.wait(5)
+            return _wl(4, "app-07", "10.3.0.7")
+        api = MagicMock()
+        api.get_workload.side_effect = get_workload
+        create = {"event_type": "workload.create", "resource_changes": [{"resource": {"workload": {"href": "/orgs/1/workloads/4"}}}]}
+        self.idx.queue_events(api, [create, dict(create, event_type="workload.update")])
+        self.idx.queue_events(api, [create])  # the same workload again while the first burst is applied
+        release.set()
+        deadline = time.monotonic() + 5
+        while (self.idx._applying or not self.idx.search(name="app-07")) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._names(self.idx.search(name="app-07")), ["app-07"])
+        self.assertNotIn(threading.current_thread(), callers)
+        self.assertLessEqual(api.get_workload.call_count, 2)  # one re-read per burst, not per event
+
+    def test_incremental_sync_watermark(self):
+        api = MagicMock()
+        api.fetch_collection_async.return_value = [_wl(9, "solo", "192.168.0.9")]
+        idx = WorkloadIndex()
+        idx.sync(api)
+        start = idx.event_watermark
+
+        api.fetch_events.return_value = None  # PCE error: the window is polled again
+        self.assertFalse(idx.sync(api))
+        self.assertEqual(idx.event_watermark, start)
+
+        api.fetch_events.return_value = [
+            {"event_type": "workload.delete", "timestamp": "2099-01-01T00:00:05.120Z",
+             "resource_changes": [{"resource": {"workload": {"href": "/orgs/1/workloads/9"}}}]},
+            {"event_type": "workload.update", "timestamp": "2099-01-01T00:00:01.000Z", "status": "failure"},
+        ]
+        self.assertTrue(idx.sync(api))
+        self.assertEqual(idx.event_watermark, "2099-01-01T00:00:05.120Z")
+        self.assertEqual(len(idx), 0)
+
+        api.fetch_events.return_value = [{"event_type": "workload.update"}] * 1000  # capped page
+        self.assertTrue(idx.sync(api))
+        self.assertEqual(api.fetch_collection_async.call_count, 2)
+        self.assertEqual(len(idx), 1)
+
+    def test_full_sync_uses_async_export(self):
+        api = MagicMock()
+        api.fetch_collection_async.return_value = [_wl(9, "solo", "192.168.0.9")]
+        idx = WorkloadIndex()
+        self.assertTrue(idx.sync(api))
+        api.fetch_collection_async.assert_called_once_with("workloads")
+        self.assertEqual(self._names(idx.search(ip="192.168")), ["solo"])
+        self.assertFalse(idx.is_stale())
+
+
+if __name__ == '__main__':
+    unittest.main()